@@ -20,10 +20,10 @@ from pathlib import Path
 import tiktoken
 
 from dotenv import load_dotenv
-from openai import OpenAI
 
 from text_to_sql.app_logger import get_logger, setup_logging
 from text_to_sql.db import execute_query, get_schema_ddl
+from text_to_sql.llm_gateway import get_gateway
 from text_to_sql.naive.query import ask
 from text_to_sql.prompts.prompts import get_prompt
 from text_to_sql.usage_tracker import generate_run_id
@@ -31,6 +31,9 @@ from text_to_sql.usage_tracker import generate_run_id
 
 DIVIDER = "=" * 70
 SCENARIOS_PATH = Path(__file__).parent / "scenarios.json"
+# Rows fetched per scenario (the first 10 are shown); a
+# SELECT * over a large table stops here.
+MAX_FETCH_ROWS = 100
 
 logger = get_logger(__name__)
 
@@ -41,9 +44,9 @@ def demo_generate_only(label: str, question: str):
     """
     logger.info(f"\n--- {label} ---")
     schema = get_schema_ddl()
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-    response = client.chat.completions.create(
+    response = get_gateway().chat_completion(
+        lane="demo",
         model=model,
         messages=[
             {"role": "system",
@@ -67,7 +70,9 @@ def demo_query(label: str, question: str):
     """
     logger.info(label)
     try:
-        results = ask(question=question, verbose=True)
+        results = ask(
+            question=question, verbose=True, max_rows=MAX_FETCH_ROWS
+        )
         return results
     except Exception as e:
         logger.error(f"  ERROR: {type(e).__name__}: {e}")
@@ -14,16 +14,15 @@ as the example — the simplest possible query makes the waste most visible.
 """
 
 import argparse
-import os
 import re
 
 import tiktoken
 
 from dotenv import load_dotenv
-from openai import OpenAI
 
 from text_to_sql.app_logger import get_logger, setup_logging
 from text_to_sql.db import get_schema_ddl
+from text_to_sql.llm_gateway import get_gateway
 from text_to_sql.prompts.prompts import get_prompt
 from text_to_sql.usage_tracker import (
     generate_run_id,
@@ -79,15 +78,13 @@ def analyze_token_waste_live():
     logger.info("Mode: live API calls")
     logger.info("")
 
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
     full_schema = get_schema_ddl(llm_context=False)
     filtered_schema = get_schema_ddl(llm_context=True)
     products_table = _extract_products_table(full_schema)
 
-    full_usage = _call_llm(client=client, schema_text=full_schema)
-    filtered_usage = _call_llm(client=client, schema_text=filtered_schema)
-    ideal_usage = _call_llm(client=client, schema_text=products_table)
+    full_usage = _call_llm(schema_text=full_schema)
+    filtered_usage = _call_llm(schema_text=filtered_schema)
+    ideal_usage = _call_llm(schema_text=products_table)
 
     _print_results(
         question_tokens=None,
@@ -98,7 +95,7 @@ def analyze_token_waste_live():
     )
 
 
-def _call_llm(client: OpenAI, schema_text: str) -> dict:
+def _call_llm(schema_text: str) -> dict:
     """
     Send a query to the LLM and return the usage dict.
     """
@@ -109,7 +106,8 @@ def _call_llm(client: OpenAI, schema_text: str) -> dict:
         user_prompt=user_content,
         question=QUESTION,
     )
-    response = client.chat.completions.create(
+    response = get_gateway().chat_completion(
+        lane="demo",
         model=MODEL,
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
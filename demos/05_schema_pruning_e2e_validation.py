@@ -15,10 +15,12 @@ Note: this validates that pruning does not degrade SQL generation
 relative to the full-schema baseline. It does not validate
 correctness against ground-truth query results.
 
-Requires: OPENAI_API_KEY and DATABASE_URL in .env
+Requires: OPENAI_API_KEY and DATABASE_URL in .env (or
+SQL_BACKEND=sqlite to execute on the embedded backend)
 """
 
 import argparse
+import hashlib
 import json
 import logging
 import os
@@ -36,10 +38,10 @@ from typing import (
 )
 
 from dotenv import load_dotenv
-from openai import OpenAI
 
 from text_to_sql.app_logger import get_logger, setup_logging
-from text_to_sql.db import execute_query, get_schema_ddl
+from text_to_sql.db import get_schema_ddl, stream_query
+from text_to_sql.llm_gateway import get_gateway
 from text_to_sql.prompts.prompts import get_prompt
 from text_to_sql.schema_pruner import SchemaPruner
 from text_to_sql.usage_tracker import (
@@ -79,7 +81,6 @@ def load_schema_ddl() -> str:
 def generate_sql(
     question: str,
     schema: str,
-    client: OpenAI,
     model: str,
 ) -> Tuple[str, Dict]:
     """
@@ -101,7 +102,8 @@ def generate_sql(
         question=question,
     )
 
-    response = client.chat.completions.create(
+    response = get_gateway().chat_completion(
+        lane="demo",
         model=model,
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
@@ -135,20 +137,30 @@ def execute_sql_safe(sql: str) -> Dict:
     Helper function used to execute SQL and return result
     or error.
 
-    Returns dict with 'success', 'rows', 'row_count', 'error'.
+    Rows are streamed and reduced to one digest each, so
+    a large result is never held in memory.
+
+    Returns dict with 'success', 'digests' (sorted row
+    digests), 'row_count', 'error'.
     """
     try:
-        rows = execute_query(sql)
+        digests = sorted(
+            hashlib.blake2b(
+                json.dumps(row, sort_keys=True, default=str).encode(),
+                digest_size=16,
+            ).digest()
+            for row in stream_query(sql)
+        )
         return {
             "success": True,
-            "rows": rows,
-            "row_count": len(rows),
+            "digests": digests,
+            "row_count": len(digests),
             "error": None,
         }
     except Exception as e:
         return {
             "success": False,
-            "rows": [],
+            "digests": [],
             "row_count": 0,
             "error": str(e),
         }
@@ -183,15 +195,7 @@ def compare_results(
     if full_result["row_count"] != pruned_result["row_count"]:
         return "DIFF_STRATEGY"
 
-    full_str = sorted(
-        json.dumps(r, sort_keys=True, default=str)
-        for r in full_result["rows"]
-    )
-    pruned_str = sorted(
-        json.dumps(r, sort_keys=True, default=str)
-        for r in pruned_result["rows"]
-    )
-    if full_str == pruned_str:
+    if full_result["digests"] == pruned_result["digests"]:
         return "BOTH_EXACT"
     return "SAME_ROW_COUNT"
 
@@ -224,7 +228,6 @@ def run_e2e_validation(
 
     run_id = generate_run_id()
     model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
     # Load schema and build pruner
     raw_ddl = load_schema_ddl()
@@ -298,7 +301,6 @@ def run_e2e_validation(
             full_sql, full_usage = generate_sql(
                 question=query,
                 schema=full_schema,
-                client=client,
                 model=model,
             )
             full_latency = time.monotonic() - t0
@@ -307,7 +309,6 @@ def run_e2e_validation(
             pruned_sql, pruned_usage = generate_sql(
                 question=query,
                 schema=prune_result.pruned_schema,
-                client=client,
                 model=model,
             )
             pruned_latency = time.monotonic() - t0
@@ -316,7 +317,6 @@ def run_e2e_validation(
             pruned_sql, pruned_usage = generate_sql(
                 question=query,
                 schema=prune_result.pruned_schema,
-                client=client,
                 model=model,
             )
             pruned_latency = time.monotonic() - t0
@@ -325,7 +325,6 @@ def run_e2e_validation(
             full_sql, full_usage = generate_sql(
                 question=query,
                 schema=full_schema,
-                client=client,
                 model=model,
             )
             full_latency = time.monotonic() - t0
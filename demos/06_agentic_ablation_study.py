@@ -23,6 +23,9 @@ Usage:
     uv run python -m demos.06_agentic_ablation_study
     uv run python -m demos.06_agentic_ablation_study --verbose
     uv run python -m demos.06_agentic_ablation_study --query GQ-002
+
+SQL runs on DATABASE_URL, or offline on the embedded
+backend with SQL_BACKEND=sqlite.
 """
 
 import argparse
@@ -69,13 +72,16 @@ from text_to_sql.app_logger import (
     get_logger,
     setup_logging,
 )
-from text_to_sql.db import execute_query
+from text_to_sql.cost_guard import get_cost_guard
+from text_to_sql.db import execute_query_async
 
 
 logger = get_logger(__name__)
 
 EVALS_DIR = Path(__file__).parent.parent / "evals"
 REF_DATE = datetime(2026, 2, 22)
+# statement_timeout for executing generated SQL.
+EXECUTION_TIMEOUT_MS = 10_000
 CONFIGS = [
     "full", "no_security", "no_refine", "no_critique",
 ]
@@ -98,6 +104,8 @@ class NoCritiqueSQLGenAgent(SQLGenerationAgent):
         sql: str,
         schema: str,
         query: str,
+        deadline=None,
+        model=None,
     ) -> SQLCritique:
         return SQLCritique(
             is_valid=True,
@@ -231,11 +239,16 @@ def build_orchestrator(
 # ---- SQL execution ----
 
 
-def try_execute_sql(
+async def try_execute_sql(
     sql: Optional[str],
+    role: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
-    Execute SQL against the database.
+    Execute SQL against the database (off the event
+    loop, under EXECUTION_TIMEOUT_MS; through the result
+    cache for the role when SQL_RESULT_CACHE is set, and
+    within the role's row / cost budget when
+    SQL_COST_GUARD is set).
 
     Returns execution_success, row_count, error,
     and sample_rows (first 3 rows).
@@ -248,7 +261,13 @@ def try_execute_sql(
             "sample_rows": [],
         }
     try:
-        rows = execute_query(sql)
+        guard = get_cost_guard()
+        if guard is not None:
+            rows = await guard.execute_async(sql, role or "user")
+        else:
+            rows = await execute_query_async(
+                sql, timeout_ms=EXECUTION_TIMEOUT_MS, role=role,
+            )
         return {
             "execution_success": True,
             "row_count": len(rows),
@@ -267,7 +286,7 @@ def try_execute_sql(
         }
 
 
-def execute_sql_if_allowed(
+async def execute_sql_if_allowed(
     gq: Dict[str, Any],
     response: AgenticResponse,
 ) -> Dict[str, Any]:
@@ -280,7 +299,9 @@ def execute_sql_if_allowed(
         and response.generated_sql
     )
     if should_execute:
-        return try_execute_sql(response.generated_sql)
+        return await try_execute_sql(
+            response.generated_sql, gq.get("role", "analyst")
+        )
     return {
         "execution_success": None,
         "row_count": 0,
@@ -674,7 +695,7 @@ async def run_query(
         chain=response.execution_chain,
         response=response,
     )
-    exec_result = execute_sql_if_allowed(gq, response)
+    exec_result = await execute_sql_if_allowed(gq, response)
     ground_truth = check_outcome(
         gq, response, agents
     )
@@ -0,0 +1,186 @@
+"""
+Demo: Bulk load (COPY) benchmark.
+
+Usage:
+    python demos/06_agentic_bulk_load_benchmark.py
+    python demos/06_agentic_bulk_load_benchmark.py --order-items 1000000
+    python demos/06_agentic_bulk_load_benchmark.py --live
+    python demos/06_agentic_bulk_load_benchmark.py --live --load
+
+Builds a synthetic dataset for the 35-table schema
+sized by its order_items count and times generating it
+as COPY-ready CSV, per table and in total (the largest
+tables are shown).
+
+With --live, order_items rows are written into
+temporary copies of the table (nothing in the schema
+changes) three ways: multi-row INSERT batches, COPY into
+the indexed table, and COPY into the bare table followed
+by building the indexes. With --load, the whole dataset
+is then loaded into the schema with bulk_load (this
+REPLACES the data of every table). Requires
+DATABASE_URL for --live.
+"""
+
+import argparse
+import io
+import time
+
+from typing import Callable
+
+import psycopg2.extras
+
+from dotenv import load_dotenv
+
+from text_to_sql.app_logger import get_logger, setup_logging
+from text_to_sql.bulk_load import connect, copy_rows, load_dataset
+from text_to_sql.synthetic_data import SyntheticDataset
+
+
+logger = get_logger(__name__)
+
+DEFAULT_ORDER_ITEMS = 200_000
+SHOWN_TABLES = 8
+INSERT_PAGE_SIZE = 1_000
+
+
+def generate(dataset: SyntheticDataset) -> None:
+    """
+    Time CSV generation per table.
+    """
+    results = []
+    for table in dataset.order:
+        start = time.perf_counter()
+        buffer = io.StringIO()
+        copy_rows(_Sink(buffer), table, dataset.columns(table),
+                  dataset.rows(table))
+        results.append((
+            table, dataset.counts[table], buffer.tell(),
+            time.perf_counter() - start,
+        ))
+    results.sort(key=lambda r: -r[1])
+    logger.info("")
+    logger.info("  Table                          Rows      MB   rows/s")
+    logger.info("  " + "-" * 58)
+    for table, rows, size, seconds in results[:SHOWN_TABLES]:
+        logger.info(
+            f"  {table:<26} {rows:>10,} {size / 1e6:>7.1f} "
+            f"{rows / seconds:>8,.0f}"
+        )
+    rows = sum(r[1] for r in results)
+    size = sum(r[2] for r in results)
+    seconds = sum(r[3] for r in results)
+    logger.info("  " + "-" * 58)
+    logger.info(
+        f"  {'all ' + str(len(results)) + ' tables':<26} {rows:>10,} "
+        f"{size / 1e6:>7.1f} {rows / seconds:>8,.0f}"
+    )
+
+
+class _Sink:
+    """
+    Cursor stand-in draining the COPY stream into a
+    buffer.
+    """
+
+    def __init__(self, buffer: io.StringIO):
+        self._buffer = buffer
+
+    def copy_expert(self, sql: str, file) -> None:
+        while chunk := file.read(1 << 16):
+            self._buffer.write(chunk)
+
+
+def compare_live(dataset: SyntheticDataset) -> None:
+    """
+    INSERT vs COPY vs COPY + index build on temp tables.
+    """
+    columns = dataset.columns("order_items")
+    rows = list(dataset.rows("order_items"))
+    conn = connect()
+    try:
+        with conn.cursor() as cur:
+            def insert(table: str) -> None:
+                psycopg2.extras.execute_values(
+                    cur,
+                    f"INSERT INTO {table} ({', '.join(columns)}) "
+                    f"VALUES %s",
+                    rows, page_size=INSERT_PAGE_SIZE,
+                )
+
+            def copy(table: str) -> None:
+                copy_rows(cur, table, columns, rows)
+
+            def copy_then_index(table: str) -> None:
+                copy_rows(cur, table, columns, rows)
+                cur.execute(f"ALTER TABLE {table} ADD PRIMARY KEY "
+                            f"(order_item_id)")
+                cur.execute(
+                    f"CREATE INDEX ON {table} (order_id, product_id)"
+                )
+                cur.execute(
+                    f"CREATE INDEX ON {table} (product_id, variant_id)"
+                )
+
+            methods: list[tuple[str, str, Callable[[str], None]]] = [
+                ("INSERT (indexed)", "INCLUDING ALL", insert),
+                ("COPY (indexed)", "INCLUDING ALL", copy),
+                ("COPY + build indexes", "INCLUDING DEFAULTS "
+                 "INCLUDING GENERATED INCLUDING CONSTRAINTS",
+                 copy_then_index),
+            ]
+            logger.info("")
+            logger.info(f"  order_items, {len(rows):,} rows     s    rows/s")
+            logger.info("  " + "-" * 48)
+            for i, (label, like, method) in enumerate(methods):
+                table = f"bulk_demo_{i}"
+                cur.execute(
+                    f"CREATE TEMP TABLE {table} (LIKE order_items {like})"
+                )
+                start = time.perf_counter()
+                method(table)
+                seconds = time.perf_counter() - start
+                logger.info(
+                    f"  {label:<24} {seconds:>7.2f} "
+                    f"{len(rows) / seconds:>9,.0f}"
+                )
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Bulk load (COPY) benchmark"
+    )
+    parser.add_argument(
+        "--order-items", type=int, default=DEFAULT_ORDER_ITEMS,
+        help="Dataset size in order_items rows"
+    )
+    parser.add_argument(
+        "--live", action="store_true",
+        help="Compare INSERT and COPY against DATABASE_URL"
+    )
+    parser.add_argument(
+        "--load", action="store_true",
+        help="With --live, replace the schema's data with the dataset"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    dataset = SyntheticDataset.for_order_items(args.order_items)
+    logger.info(
+        f"Synthetic dataset: {dataset.total_rows():,} rows in "
+        f"{len(dataset.order)} tables "
+        f"({args.order_items:,} order_items)"
+    )
+    generate(dataset)
+    if args.live:
+        compare_live(dataset)
+        if args.load:
+            conn = connect()
+            try:
+                load_dataset(conn, dataset)
+            finally:
+                conn.close()
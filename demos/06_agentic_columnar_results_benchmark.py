@@ -0,0 +1,221 @@
+"""
+Demo: Columnar query results benchmark.
+
+Usage:
+    python demos/06_agentic_columnar_results_benchmark.py
+    python demos/06_agentic_columnar_results_benchmark.py --rows 200000
+    python demos/06_agentic_columnar_results_benchmark.py --live
+
+Compares a list of dicts (what execute_query returns)
+with a ColumnarResult for the same rows: memory held,
+JSON / CSV export time and size, and comparing two
+results as unordered row sets (json.dumps per row and
+sort, as the e2e validation used to, versus
+ColumnarResult.same_rows).
+
+Offline (default), the rows are a synthetic wide
+aggregation (ids, counts, float metrics, a category
+label, a date). With --live, the rows come from
+LIVE_SQL against DATABASE_URL. Requires DATABASE_URL
+for --live.
+"""
+
+import argparse
+import csv
+import io
+import json
+import random
+import time
+import tracemalloc
+
+from datetime import date, timedelta
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Tuple,
+)
+
+from dotenv import load_dotenv
+
+from text_to_sql.app_logger import get_logger, setup_logging
+from text_to_sql.db import execute_query, execute_query_columnar
+from text_to_sql.results import ColumnarResult
+
+
+logger = get_logger(__name__)
+
+DEFAULT_ROWS = 100_000
+METRICS = 8
+LIVE_SQL = """
+SELECT oi.order_id, oi.product_id, oi.quantity,
+       oi.unit_price, o.order_date, o.customer_id
+FROM order_items oi
+JOIN orders o ON o.order_id = oi.order_id
+"""
+
+
+def synthetic_rows(n: int) -> List[Dict[str, Any]]:
+    """
+    Wide aggregation-like rows.
+    """
+    rng = random.Random(7)
+    categories = ["Electronics", "Furniture", "Home & Garden", "Tools"]
+    start = date(2025, 1, 1)
+    rows = []
+    for i in range(n):
+        row = {
+            "product_id": i,
+            "category": categories[i % len(categories)],
+            "day": start + timedelta(days=i % 365),
+            "orders": rng.randint(0, 500),
+            "units": rng.randint(0, 5000),
+        }
+        for m in range(METRICS):
+            row[f"metric_{m}"] = rng.random() * 1000
+        rows.append(row)
+    return rows
+
+
+def measure(build: Callable[[], Any]) -> Tuple[Any, float]:
+    """
+    Build an object and return it with the memory it
+    holds (MB, traced allocations).
+    """
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current / 1e6
+
+
+def timed(fn: Callable[[], Any]) -> Tuple[Any, float]:
+    """
+    Run fn and return its result and duration (ms).
+    """
+    start = time.perf_counter()
+    value = fn()
+    return value, (time.perf_counter() - start) * 1000
+
+
+def _dicts_same_rows(a: List[Dict], b: List[Dict]) -> bool:
+    """
+    Unordered comparison by serializing every row.
+    """
+    def key(rows):
+        return sorted(
+            json.dumps(r, sort_keys=True, default=str) for r in rows
+        )
+    return key(a) == key(b)
+
+
+def _dicts_csv(rows: List[Dict]) -> str:
+    """
+    CSV of a list of dicts via the csv module.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(
+        buffer, fieldnames=list(rows[0]), lineterminator="\n"
+    )
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def compare(
+    rows_fn: Callable[[], List[Dict]],
+    columnar_fn: Callable[[], ColumnarResult],
+) -> None:
+    """
+    Log memory, export and comparison cost of both
+    layouts.
+    """
+    rows, rows_mb = measure(rows_fn)
+    columnar, columnar_mb = measure(columnar_fn)
+    shuffled = list(rows)
+    random.Random(1).shuffle(shuffled)
+    other = ColumnarResult.from_rows(shuffled, columnar.columns)
+
+    json_rows, json_rows_ms = timed(
+        lambda: json.dumps(rows, default=str)
+    )
+    json_cols, json_cols_ms = timed(columnar.to_json)
+    csv_rows, csv_rows_ms = timed(lambda: _dicts_csv(rows))
+    csv_cols, csv_cols_ms = timed(columnar.to_csv)
+    same_rows, same_rows_ms = timed(
+        lambda: _dicts_same_rows(rows, shuffled)
+    )
+    same_cols, same_cols_ms = timed(lambda: columnar.same_rows(other))
+    assert same_rows and same_cols
+
+    logger.info(
+        f"  {len(rows)} rows x {len(columnar.columns)} columns"
+    )
+    logger.info("")
+    logger.info("                     List of dicts    Columnar")
+    logger.info("  " + "-" * 46)
+    logger.info(
+        f"  Memory (MB)         {rows_mb:13.1f}  {columnar_mb:10.1f}"
+    )
+    logger.info(
+        f"  JSON (ms)           {json_rows_ms:13.0f}  "
+        f"{json_cols_ms:10.0f}"
+    )
+    logger.info(
+        f"  JSON (MB)           {len(json_rows) / 1e6:13.1f}  "
+        f"{len(json_cols) / 1e6:10.1f}"
+    )
+    logger.info(
+        f"  CSV (ms)            {csv_rows_ms:13.0f}  "
+        f"{csv_cols_ms:10.0f}"
+    )
+    logger.info(
+        f"  Same rows (ms)      {same_rows_ms:13.0f}  "
+        f"{same_cols_ms:10.0f}"
+    )
+
+
+def run_offline(n: int) -> None:
+    """
+    Compare layouts on synthetic rows.
+    """
+    logger.info("Columnar results (offline, synthetic aggregation)")
+    source = synthetic_rows(n)
+    compare(
+        lambda: [dict(r) for r in source],
+        lambda: ColumnarResult.from_rows(source),
+    )
+
+
+def run_live() -> None:
+    """
+    Compare layouts on rows from the database.
+    """
+    logger.info("Columnar results (live)")
+    compare(
+        lambda: execute_query(LIVE_SQL),
+        lambda: execute_query_columnar(LIVE_SQL),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Columnar query results benchmark"
+    )
+    parser.add_argument(
+        "--rows", type=int, default=DEFAULT_ROWS,
+        help="Synthetic rows (offline)"
+    )
+    parser.add_argument(
+        "--live", action="store_true",
+        help="Read rows from DATABASE_URL"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    if args.live:
+        run_live()
+    else:
+        run_offline(args.rows)
@@ -0,0 +1,151 @@
+"""
+Demo: Execution cost guard benchmark.
+
+Usage:
+    python demos/06_agentic_cost_guard_benchmark.py
+    python demos/06_agentic_cost_guard_benchmark.py --live
+
+Runs a mix of generated-looking queries (a point
+lookup, a capped listing, full-table dumps, a wide join
+fan-out and an unplannable query) through the cost
+guard for each role and shows what happens to each:
+the row cap added, the planner's estimate, and whether
+it runs, waits for a heavy-query slot or is rejected.
+
+Offline (default), EXPLAIN is modeled from a table of
+estimates (cost scales down with the row cap unless the
+plan has to sort first). With --live, queries are
+planned with EXPLAIN against DATABASE_URL (nothing is
+executed). Requires DATABASE_URL for --live.
+"""
+
+import argparse
+import logging
+import re
+
+from typing import (
+    Any,
+    Dict,
+    List,
+    Tuple,
+)
+
+from dotenv import load_dotenv
+
+from text_to_sql.app_logger import get_logger, setup_logging
+from text_to_sql.cost_guard import DEFAULT_BUDGETS, CostGuard
+from text_to_sql.db import PlannerError
+
+
+logger = get_logger(__name__)
+
+ROLES = ["admin", "analyst", "viewer"]
+# (label, sql, modeled total cost, modeled rows, sorts)
+QUERIES: List[Tuple[str, str, float, int, bool]] = [
+    ("point lookup",
+     "SELECT * FROM orders WHERE order_id = 42",
+     8.3, 1, False),
+    ("top customers",
+     "SELECT customer_id, SUM(total_amount) AS spend FROM orders "
+     "GROUP BY customer_id ORDER BY spend DESC LIMIT 20",
+     4_200.0, 20, True),
+    ("dump order items",
+     "SELECT * FROM order_items",
+     180_000.0, 9_000_000, False),
+    ("sorted dump",
+     "SELECT * FROM order_items ORDER BY unit_price DESC",
+     1_400_000.0, 9_000_000, True),
+    ("join fan-out",
+     "SELECT * FROM orders o JOIN order_items oi "
+     "ON oi.order_id = o.order_id JOIN products p "
+     "ON p.product_id = oi.product_id ORDER BY o.order_date",
+     6_500_000.0, 9_000_000, True),
+    ("unknown table",
+     "SELECT * FROM ordres",
+     0.0, 0, False),
+]
+_LIMIT = re.compile(r"\s+LIMIT\s+(\d+)$", re.IGNORECASE)
+
+
+def modeled_explain(sql: str) -> Dict[str, Any]:
+    """
+    EXPLAIN stand-in from the QUERIES estimates.
+    """
+    match = _LIMIT.search(sql)
+    base = _LIMIT.sub("", sql) if match else sql
+    for label, query, cost, rows, sorts in QUERIES:
+        if base in (query, _LIMIT.sub("", query)):
+            break
+    else:
+        raise ValueError(f"No estimate for {sql}")
+    if label == "unknown table":
+        raise PlannerError('relation "ordres" does not exist')
+    limit = int(match.group(1)) if match else rows
+    if limit < rows and not sorts:
+        cost *= limit / rows
+    return {"total_cost": cost, "plan_rows": min(limit, rows)}
+
+
+def report(guard: CostGuard) -> None:
+    """
+    Log the guard's decision per role and query.
+    """
+    logger.info("")
+    logger.info("  Budgets (max rows / queue cost / max cost / timeout)")
+    for role in ROLES:
+        b = guard.budget(role)
+        logger.info(
+            f"    {role:<8} {b.max_rows:>8,} {b.queue_cost:>12,.0f} "
+            f"{b.max_cost:>12,.0f} {b.statement_timeout_ms:>8,}ms"
+        )
+    logger.info("")
+    logger.info(
+        "  Role     Query              Capped      Cost   Verdict"
+    )
+    logger.info("  " + "-" * 66)
+    for role in ROLES:
+        for label, sql, *_ in QUERIES:
+            decision = guard.check(sql, role)
+            capped = "yes" if decision.sql != sql else "-"
+            cost = (
+                f"{decision.total_cost:,.0f}"
+                if decision.total_cost is not None else "-"
+            )
+            if not decision.admitted:
+                verdict = (
+                    "reject (does not plan)"
+                    if decision.total_cost is None
+                    else "reject (over budget)"
+                )
+            elif decision.heavy:
+                verdict = "queue (heavy slot)"
+            else:
+                verdict = "run"
+            logger.info(
+                f"  {role:<8} {label:<18} {capped:<6} {cost:>11}   "
+                f"{verdict}"
+            )
+    logger.info("")
+    logger.info(f"  {guard.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Execution cost guard benchmark"
+    )
+    parser.add_argument(
+        "--live", action="store_true",
+        help="Plan queries with EXPLAIN against DATABASE_URL"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    # Rejections are reported in the table
+    logging.getLogger("text_to_sql.cost_guard").setLevel(logging.ERROR)
+    if args.live:
+        logger.info("Cost guard (live EXPLAIN)")
+        report(CostGuard(DEFAULT_BUDGETS))
+    else:
+        logger.info("Cost guard (offline, modeled EXPLAIN)")
+        report(CostGuard(DEFAULT_BUDGETS, explain=modeled_explain))
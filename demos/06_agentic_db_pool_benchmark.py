@@ -0,0 +1,224 @@
+"""
+Demo: Connection pool benchmark.
+
+Usage:
+    python demos/06_agentic_db_pool_benchmark.py
+    python demos/06_agentic_db_pool_benchmark.py --workers 8
+    python demos/06_agentic_db_pool_benchmark.py --live
+
+Runs a burst of small lookups from a few worker
+threads, once opening a connection per query (the old
+get_connection behaviour) and once through the
+connection pool, and reports per-query latency, the
+connections opened and the pool's checkout metrics
+(wait time, timeouts).
+
+Offline (default), connections are simulated with a
+fixed handshake and query time (CONNECT_MS, QUERY_MS;
+roughly a TLS connection to a remote Neon endpoint and
+a small indexed lookup). With --live, the queries run
+against DATABASE_URL. Requires DATABASE_URL for --live.
+"""
+
+import argparse
+import os
+import statistics
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Callable,
+    Dict,
+    List,
+)
+
+import psycopg2
+import psycopg2.extensions
+
+from dotenv import load_dotenv
+
+from text_to_sql.app_logger import get_logger, setup_logging
+from text_to_sql.db import (
+    SEARCH_PATH,
+    close_pool,
+    execute_query,
+    pool_stats,
+)
+from text_to_sql.db_pool import ConnectionPool
+
+
+logger = get_logger(__name__)
+
+CONNECT_MS = 60
+QUERY_MS = 3
+QUERIES = 200
+LIVE_SQL = "SELECT product_id FROM products ORDER BY product_id LIMIT 5"
+
+
+class _SimulatedConnection:
+    """
+    Connection whose handshake and queries sleep.
+    """
+
+    closed = 0
+
+    def __init__(self):
+        time.sleep(CONNECT_MS / 1000)
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        time.sleep(QUERY_MS / 1000)
+
+    def rollback(self):
+        pass
+
+    def get_transaction_status(self):
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+def run(query: Callable[[], None], workers: int) -> List[float]:
+    """
+    Run QUERIES queries from worker threads.
+
+    Returns:
+        Per-query latencies (ms)
+    """
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def timed(_):
+        start = time.perf_counter()
+        query()
+        with lock:
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(timed, range(QUERIES)))
+    return latencies
+
+
+def report(rows: Dict[str, List[float]], opened: Dict[str, int]) -> None:
+    """
+    Log latency and connections per mode.
+    """
+    logger.info("")
+    logger.info("  Mode          p50 ms   p95 ms  Connections")
+    logger.info("  " + "-" * 44)
+    for mode, latencies in rows.items():
+        logger.info(
+            f"  {mode:12s}  {statistics.median(latencies):6.1f}  "
+            f"{statistics.quantiles(latencies, n=20)[-1]:7.1f}  "
+            f"{opened[mode]:11d}"
+        )
+
+
+def log_pool_stats(stats: Dict) -> None:
+    """
+    Log the pool's checkout metrics.
+    """
+    logger.info("")
+    logger.info(
+        f"  Pool: {stats['checkouts']} checkouts, wait p50 "
+        f"{stats['wait_ms_p50']}ms / p95 {stats['wait_ms_p95']}ms, "
+        f"{stats['timeouts']} timeouts, {stats['created']} opened"
+    )
+
+
+def run_offline(workers: int) -> None:
+    """
+    Compare per-query connections and the pool on
+    simulated connections.
+    """
+    logger.info(
+        f"Connection pool (offline): {QUERIES} queries, "
+        f"{workers} workers, connect {CONNECT_MS}ms, "
+        f"query {QUERY_MS}ms"
+    )
+    opened = {"per query": QUERIES}
+
+    def per_query():
+        conn = _SimulatedConnection()
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.close()
+
+    pool = ConnectionPool(_SimulatedConnection, max_size=workers)
+
+    def pooled():
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+
+    rows = {"per query": run(per_query, workers)}
+    rows["pooled"] = run(pooled, workers)
+    stats = pool.stats()
+    opened["pooled"] = stats["created"]
+    report(rows, opened)
+    log_pool_stats(stats)
+
+
+def run_live(workers: int) -> None:
+    """
+    Compare per-query connections and the pool against
+    DATABASE_URL.
+    """
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL not set in .env")
+    logger.info(
+        f"Connection pool (live): {QUERIES} queries, "
+        f"{workers} workers"
+    )
+
+    def per_query():
+        conn = psycopg2.connect(database_url)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"SET search_path TO {SEARCH_PATH}")
+                cur.execute(LIVE_SQL)
+                cur.fetchall()
+        finally:
+            conn.close()
+
+    os.environ["DB_POOL_MAX_SIZE"] = str(workers)
+    close_pool()
+    rows = {"per query": run(per_query, workers)}
+    rows["pooled"] = run(lambda: execute_query(LIVE_SQL), workers)
+    stats = pool_stats()["db"]
+    report(rows, {"per query": QUERIES, "pooled": stats["created"]})
+    log_pool_stats(stats)
+    close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Connection pool benchmark"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4,
+        help="Concurrent worker threads (and pool size)"
+    )
+    parser.add_argument(
+        "--live", action="store_true",
+        help="Run against DATABASE_URL"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    if args.live:
+        run_live(args.workers)
+    else:
+        run_offline(args.workers)
@@ -0,0 +1,253 @@
+"""
+Demo: Few-shot example retrieval benchmark.
+
+Usage:
+    python demos/06_agentic_few_shot_benchmark.py
+    python demos/06_agentic_few_shot_benchmark.py --verbose
+    python demos/06_agentic_few_shot_benchmark.py --live
+
+Leave-one-out over the golden queries with a
+reference_sql: each query is answered with a
+FewShotStore seeded from the other golden queries,
+retrieving examples restricted to the tables the
+deterministic pruner selects.
+
+Offline (default), reports what retrieval would inject:
+examples and tokens per prompt, whether the top example
+shares a table with the expected ones, and retrieval
+latency. With --live, SQL Generation runs zero-shot and
+few-shot per query and reports first-attempt
+acceptance, LLM calls per query and expected-SQL-pattern
+matches. Requires OPENAI_API_KEY for --live.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import statistics
+import time
+
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    List,
+)
+
+import tiktoken
+
+from dotenv import load_dotenv
+
+from text_to_sql.agents.few_shot import (
+    SOURCE_GOLDEN,
+    FewShotExample,
+    FewShotStore,
+    format_example,
+)
+from text_to_sql.agents.sql_generation import (
+    SQLGenerationAgent,
+)
+from text_to_sql.app_logger import get_logger, setup_logging
+from text_to_sql.llm_gateway import get_gateway
+from text_to_sql.schema_pruner import SchemaPruner
+
+
+logger = get_logger(__name__)
+
+EVALS_DIR = Path(__file__).parent.parent / "evals"
+SCHEMA_DIR = Path(__file__).parent.parent / "schema"
+MODES = ["zero-shot", "few-shot"]
+
+
+def load_golden_queries() -> List[Dict]:
+    """
+    Load allowed golden queries with a reference SQL.
+    """
+    path = EVALS_DIR / "golden_queries.json"
+    return [
+        gq for gq in json.loads(path.read_text(encoding="utf-8"))
+        if gq["expected_outcome"] == "allowed"
+        and gq.get("reference_sql")
+    ]
+
+
+def leave_one_out(
+    golden_queries: List[Dict],
+    held_out: Dict,
+) -> FewShotStore:
+    """
+    Store seeded from every golden query but one.
+    """
+    return FewShotStore(
+        FewShotExample(
+            question=gq["nl_query"],
+            sql=gq["reference_sql"],
+            tables=gq["expected_tables"],
+            source=SOURCE_GOLDEN,
+        )
+        for gq in golden_queries
+        if gq["id"] != held_out["id"]
+    )
+
+
+def run_offline(verbose: bool = False) -> None:
+    """
+    Report examples retrieved per held-out query.
+    """
+    logging.getLogger("text_to_sql.schema_pruner").setLevel(
+        logging.WARNING
+    )
+    ddl = (SCHEMA_DIR / "schema_setup.sql").read_text(encoding="utf-8")
+    pruner = SchemaPruner(ddl)
+    encoder = tiktoken.get_encoding("o200k_base")
+    golden_queries = load_golden_queries()
+
+    logger.info(
+        f"Few-shot retrieval (offline, leave-one-out): "
+        f"{len(golden_queries)} queries"
+    )
+    logger.info("")
+    logger.info("  ID      Examples  Tokens  Top shares table  Search us")
+    logger.info("  " + "-" * 60)
+
+    counts, tokens, relevant, latencies = [], [], 0, []
+    for gq in golden_queries:
+        store = leave_one_out(golden_queries, gq)
+        tables = pruner.prune(gq["nl_query"]).selected_tables
+        start = time.perf_counter()
+        examples = store.search(gq["nl_query"], tables)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        shares = bool(examples) and bool(
+            set(examples[0].tables) & set(gq["expected_tables"])
+        )
+        relevant += shares
+        counts.append(len(examples))
+        tokens.append(sum(
+            len(encoder.encode(format_example(e)))
+            for e in examples
+        ))
+        line = (
+            f"  {gq['id']}  {counts[-1]:8d}  {tokens[-1]:6d}  "
+            f"{'yes' if shares else 'no':>16s}  "
+            f"{latencies[-1]:9.0f}"
+        )
+        if verbose:
+            line += f"\n         Q: {gq['nl_query']}"
+            for e in examples:
+                line += f"\n         -> {e.question}"
+        logger.info(line)
+
+    n = len(golden_queries)
+    logger.info("")
+    logger.info(
+        f"  Queries with examples: "
+        f"{sum(c > 0 for c in counts)}/{n}, "
+        f"mean {statistics.mean(counts):.1f} examples / "
+        f"{statistics.mean(tokens):.0f} tokens per prompt"
+    )
+    logger.info(
+        f"  Top example shares an expected table: {relevant}/{n}"
+    )
+    logger.info(
+        f"  Search latency: p50 "
+        f"{statistics.median(latencies):.0f}us"
+    )
+
+
+async def run_live(verbose: bool = False) -> None:
+    """
+    Run SQL Generation zero-shot and few-shot per
+    held-out query and report acceptance and calls.
+    """
+    logging.getLogger("text_to_sql.schema_pruner").setLevel(
+        logging.WARNING
+    )
+    ddl = (SCHEMA_DIR / "schema_setup.sql").read_text(encoding="utf-8")
+    pruner = SchemaPruner(ddl)
+    gateway = get_gateway()
+    golden_queries = load_golden_queries()
+    results: Dict[str, List[Dict[str, Any]]] = {
+        mode: [] for mode in MODES
+    }
+
+    for gq in golden_queries:
+        pruned = pruner.prune(gq["nl_query"])
+        for mode in MODES:
+            agent = SQLGenerationAgent(
+                few_shot=(
+                    leave_one_out(golden_queries, gq)
+                    if mode == "few-shot" else None
+                ),
+            )
+            before = sum(
+                u["requests"]
+                for u in gateway.usage_by_model().values()
+            )
+            result = await agent._run_critique_loop(
+                gq["nl_query"], pruned.pruned_schema,
+                pruned.selected_tables,
+                fk_edges=pruned.fk_paths,
+            )
+            calls = sum(
+                u["requests"]
+                for u in gateway.usage_by_model().values()
+            ) - before
+            history = result["critique_history"]
+            sql = result["final_sql"] or ""
+            pattern = gq.get("expected_sql_pattern")
+            results[mode].append({
+                "first_attempt": bool(history) and (
+                    history[0]["action"].startswith("accepted")
+                ),
+                "calls": calls,
+                "pattern": bool(sql) and (
+                    not pattern or bool(re.search(
+                        pattern, sql, re.IGNORECASE | re.DOTALL,
+                    ))
+                ),
+            })
+            if verbose:
+                row = results[mode][-1]
+                logger.info(
+                    f"  {gq['id']}  {mode:9s}  "
+                    f"{row['calls']} calls  "
+                    f"{'first' if row['first_attempt'] else 'retry'}  "
+                    f"{'ok' if row['pattern'] else 'BAD'}"
+                )
+
+    logger.info("")
+    logger.info(
+        "  Mode       First-attempt  Calls/query  Pattern"
+    )
+    logger.info("  " + "-" * 48)
+    for mode, rows in results.items():
+        logger.info(
+            f"  {mode:9s}  "
+            f"{sum(r['first_attempt'] for r in rows) / len(rows):13.0%}  "
+            f"{statistics.mean(r['calls'] for r in rows):11.2f}  "
+            f"{sum(r['pattern'] for r in rows) / len(rows):7.0%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Few-shot example retrieval benchmark"
+    )
+    parser.add_argument(
+        "--verbose", action="store_true",
+        help="Show per-query details"
+    )
+    parser.add_argument(
+        "--live", action="store_true",
+        help="Run zero-shot and few-shot generation (LLM calls)"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    if args.live:
+        asyncio.run(run_live(verbose=args.verbose))
+    else:
+        run_offline(verbose=args.verbose)
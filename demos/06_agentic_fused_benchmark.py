@@ -0,0 +1,272 @@
+"""
+Demo: Fused vs two-call pipeline benchmark.
+
+Usage:
+    python demos/06_agentic_fused_benchmark.py
+    python demos/06_agentic_fused_benchmark.py --verbose
+    python demos/06_agentic_fused_benchmark.py --live
+
+Compares, per allowed golden query, the standard path
+(LLM entity extraction, then SQL generation over the
+pruned schema) with the fused path (deterministic
+candidate tables, then one call returning tables_used
+and the SQL), running Schema Intelligence and SQL
+Generation only.
+
+Offline (default), LLM calls and prompt tokens are
+projected from the prompts each path would send (the
+standard path's schema is approximated with the
+deterministic seeds). With --live, both paths run and
+report measured LLM calls, tokens, latency, table
+recall and expected-SQL-pattern matches.
+Requires OPENAI_API_KEY for --live.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import statistics
+import time
+
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    List,
+)
+
+import tiktoken
+
+from dotenv import load_dotenv
+
+from text_to_sql.agents import QueryRequest
+from text_to_sql.agents.schema_intelligence import (
+    SchemaIntelligenceAgent,
+)
+from text_to_sql.agents.sql_generation import (
+    SQLGenerationAgent,
+)
+from text_to_sql.agents.types import (
+    PIPELINE_FUSED,
+    PIPELINE_STANDARD,
+)
+from text_to_sql.app_logger import get_logger, setup_logging
+from text_to_sql.llm_gateway import get_gateway
+from text_to_sql.prompts.prompts import get_prompt
+from text_to_sql.schema_pruner import SchemaPruner
+from text_to_sql.sql_validator import catalog_for_ddl, validate_sql
+
+
+logger = get_logger(__name__)
+
+EVALS_DIR = Path(__file__).parent.parent / "evals"
+SCHEMA_DIR = Path(__file__).parent.parent / "schema"
+MODES = [PIPELINE_STANDARD, PIPELINE_FUSED]
+# Question and instructions around the schema / table
+# list (projection only).
+PROMPT_OVERHEAD_TOKENS = 60
+
+
+def load_golden_queries() -> List[Dict]:
+    """
+    Load allowed golden queries with expected tables.
+    """
+    path = EVALS_DIR / "golden_queries.json"
+    return [
+        gq for gq in json.loads(path.read_text(encoding="utf-8"))
+        if gq["expected_outcome"] == "allowed"
+        and gq["expected_tables"]
+    ]
+
+
+def recall(selected: List[str], expected: List[str]) -> float:
+    """
+    Share of expected tables that were used.
+    """
+    if not expected:
+        return 1.0
+    return len(set(selected) & set(expected)) / len(expected)
+
+
+def run_offline(verbose: bool = False) -> None:
+    """
+    Report projected LLM calls and prompt tokens per
+    path.
+    """
+    logging.getLogger("text_to_sql.schema_pruner").setLevel(
+        logging.WARNING
+    )
+    ddl = (SCHEMA_DIR / "schema_setup.sql").read_text(encoding="utf-8")
+    pruner = SchemaPruner(ddl)
+    encoder = tiktoken.get_encoding("o200k_base")
+    entity_prompt = len(encoder.encode(
+        get_prompt("schema_intelligence")
+    )) + len(encoder.encode(
+        ", ".join(sorted(catalog_for_ddl(ddl).tables))
+    ))
+    generation_prompt = len(encoder.encode(
+        get_prompt("sql_generation")
+    ))
+    golden_queries = load_golden_queries()
+
+    logger.info(
+        f"Fused pipeline benchmark (offline): "
+        f"{len(golden_queries)} queries"
+    )
+    logger.info("")
+    logger.info("  ID      Tables  Two-call tok  Fused tok  Saved")
+    logger.info("  " + "-" * 60)
+
+    totals = {mode: 0 for mode in MODES}
+    for gq in golden_queries:
+        pruned = pruner.prune(gq["nl_query"])
+        generation = (
+            generation_prompt + pruned.pruned_schema_tokens
+            + PROMPT_OVERHEAD_TOKENS
+        )
+        tokens = {
+            PIPELINE_STANDARD: (
+                entity_prompt + PROMPT_OVERHEAD_TOKENS
+                + generation
+            ),
+            PIPELINE_FUSED: generation,
+        }
+        for mode, count in tokens.items():
+            totals[mode] += count
+        saved = tokens[PIPELINE_STANDARD] - tokens[PIPELINE_FUSED]
+        line = (
+            f"  {gq['id']}  {len(pruned.selected_tables):6d}  "
+            f"{tokens[PIPELINE_STANDARD]:12d}  "
+            f"{tokens[PIPELINE_FUSED]:9d}  "
+            f"{saved / tokens[PIPELINE_STANDARD]:5.0%}"
+        )
+        if verbose:
+            line += f"\n         Q: {gq['nl_query']}"
+            line += f"\n         Candidates: {pruned.selected_tables}"
+        logger.info(line)
+
+    n = len(golden_queries)
+    logger.info("")
+    logger.info("  Path       LLM calls  Prompt tokens")
+    logger.info(
+        f"  two-call   {2 * n:9d}  {totals[PIPELINE_STANDARD]:13d}"
+    )
+    logger.info(
+        f"  fused      {n:9d}  {totals[PIPELINE_FUSED]:13d}"
+    )
+    logger.info("")
+    logger.info(
+        "  (offline: projected, critique calls excluded "
+        "(same rules on both paths); run with --live "
+        "for measured tokens, latency and accuracy)"
+    )
+
+
+async def run_live(verbose: bool = False) -> None:
+    """
+    Run both paths per query and report measured
+    calls, tokens, latency and accuracy.
+    """
+    golden_queries = load_golden_queries()
+    gateway = get_gateway()
+    catalog = catalog_for_ddl(
+        (SCHEMA_DIR / "schema_setup.sql").read_text(encoding="utf-8")
+    )
+    schema_agent = SchemaIntelligenceAgent()
+    sql_agent = SQLGenerationAgent()
+    results: Dict[str, List[Dict[str, Any]]] = {
+        mode: [] for mode in MODES
+    }
+
+    for gq in golden_queries:
+        for mode in MODES:
+            request = QueryRequest(
+                natural_language=gq["nl_query"],
+                user_context={"role": gq.get("role", "analyst")},
+                pipeline_mode=mode,
+            )
+            before = gateway.usage_by_model()
+            start = time.perf_counter()
+            previous: Dict[str, Any] = {}
+            previous["schema"] = await schema_agent.execute(
+                request, previous, {}
+            )
+            sql_result = await sql_agent.execute(
+                request, previous, {}
+            )
+            latency_ms = (time.perf_counter() - start) * 1000
+            after = gateway.usage_by_model()
+            usage = {
+                key: sum(
+                    u[key] - before.get(m, {}).get(key, 0)
+                    for m, u in after.items()
+                )
+                for key in ("requests", "input_tokens", "output_tokens")
+            }
+            sql = sql_result.get("final_sql")
+            tables = validate_sql(sql, catalog).tables if sql else []
+            pattern = gq.get("expected_sql_pattern")
+            results[mode].append({
+                "latency_ms": latency_ms,
+                "calls": usage["requests"],
+                "input_tokens": usage["input_tokens"],
+                "output_tokens": usage["output_tokens"],
+                "recall": recall(tables, gq["expected_tables"]),
+                "pattern": bool(sql) and (
+                    not pattern or bool(re.search(
+                        pattern, sql, re.IGNORECASE | re.DOTALL,
+                    ))
+                ),
+            })
+            if verbose:
+                row = results[mode][-1]
+                logger.info(
+                    f"  {gq['id']}  {mode:8s}  "
+                    f"{row['calls']} calls  "
+                    f"{row['input_tokens']:6d} in  "
+                    f"{latency_ms:7.0f}ms  "
+                    f"recall={row['recall']:.2f}  "
+                    f"{'ok' if row['pattern'] else 'BAD'}"
+                )
+
+    logger.info("")
+    logger.info(
+        "  Path      Calls  In tok  Out tok  "
+        "p50 ms  Mean ms  Recall  Pattern"
+    )
+    logger.info("  " + "-" * 68)
+    for mode, rows in results.items():
+        latencies = [r["latency_ms"] for r in rows]
+        logger.info(
+            f"  {mode:8s}  {sum(r['calls'] for r in rows):5d}  "
+            f"{sum(r['input_tokens'] for r in rows):6d}  "
+            f"{sum(r['output_tokens'] for r in rows):7d}  "
+            f"{statistics.median(latencies):6.0f}  "
+            f"{statistics.mean(latencies):7.0f}  "
+            f"{statistics.mean(r['recall'] for r in rows):6.2f}  "
+            f"{sum(r['pattern'] for r in rows) / len(rows):7.0%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fused vs two-call pipeline benchmark"
+    )
+    parser.add_argument(
+        "--verbose", action="store_true",
+        help="Show per-query details"
+    )
+    parser.add_argument(
+        "--live", action="store_true",
+        help="Run both paths (LLM calls)"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    if args.live:
+        asyncio.run(run_live(verbose=args.verbose))
+    else:
+        run_offline(verbose=args.verbose)
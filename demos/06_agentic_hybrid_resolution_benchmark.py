@@ -0,0 +1,201 @@
+"""
+Demo: Hybrid (deterministic-first) entity resolution benchmark.
+
+Usage:
+    python demos/06_agentic_hybrid_resolution_benchmark.py
+    python demos/06_agentic_hybrid_resolution_benchmark.py --verbose
+    python demos/06_agentic_hybrid_resolution_benchmark.py --live
+
+Scores every prunable golden query with the deterministic resolver's
+confidence and reports, per threshold, how many LLM entity-extraction
+calls the hybrid mode saves and the table recall it achieves.
+
+Offline (default), queries below the threshold are counted as LLM calls
+and their recall is taken from the deterministic resolver (a lower
+bound). With --live, they are sent to the SchemaIntelligenceAgent's LLM
+extractor, and LLM-only recall is reported alongside for comparison.
+Requires OPENAI_API_KEY for --live.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+
+from pathlib import Path
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Set,
+)
+
+from text_to_sql.agents.schema_intelligence import (
+    DEFAULT_HYBRID_THRESHOLD,
+    SchemaIntelligenceAgent,
+)
+from text_to_sql.app_logger import get_logger, setup_logging
+from text_to_sql.schema_pruner import SchemaPruner
+
+
+logger = get_logger(__name__)
+
+EVALS_DIR = Path(__file__).parent.parent / "evals"
+SCHEMA_DIR = Path(__file__).parent.parent / "schema"
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+
+
+def load_golden_queries() -> List[Dict]:
+    """
+    Load prunable golden queries (allowed, with expected tables).
+    """
+    path = EVALS_DIR / "golden_queries.json"
+    return [
+        gq for gq in json.loads(path.read_text(encoding="utf-8"))
+        if gq["expected_outcome"] == "allowed"
+        and gq["expected_tables"]
+    ]
+
+
+def recall(selected: Set[str], expected: Set[str]) -> float:
+    """
+    Share of expected tables that were selected.
+    """
+    if not expected:
+        return 1.0
+    return len(selected & expected) / len(expected)
+
+
+async def llm_seeds(
+    agent: SchemaIntelligenceAgent,
+    query: str,
+) -> Set[str]:
+    """
+    Resolve seed tables via the agent's LLM entity extractor.
+    """
+    entities = await agent._extract_entities(
+        query, list(agent._all_tables)
+    )
+    return agent._resolve_seeds(entities)
+
+
+async def run_benchmark(
+    verbose: bool = False,
+    live: bool = False,
+) -> None:
+    """
+    Run the hybrid resolution benchmark.
+    """
+    logging.getLogger("text_to_sql.schema_pruner").setLevel(
+        logging.WARNING
+    )
+
+    ddl = (SCHEMA_DIR / "schema_setup.sql").read_text(encoding="utf-8")
+    pruner = SchemaPruner(ddl)
+    golden_queries = load_golden_queries()
+
+    agent: Optional[SchemaIntelligenceAgent] = None
+    if live:
+        agent = SchemaIntelligenceAgent()
+        agent._build_fk_graph(ddl)
+
+    logger.info(
+        f"Hybrid entity resolution benchmark: "
+        f"{len(golden_queries)} queries"
+    )
+    logger.info("")
+    logger.info("  ID      Conf  Det.R  LLM.R  Unresolved")
+    logger.info("  " + "-" * 60)
+
+    rows = []
+    for gq in golden_queries:
+        expected = set(gq["expected_tables"])
+        resolution = pruner.resolve_with_confidence(gq["nl_query"])
+        det_recall = recall(set(resolution.seed_tables), expected)
+        llm_recall = None
+        if agent is not None:
+            llm_recall = recall(
+                await llm_seeds(agent, gq["nl_query"]), expected
+            )
+        rows.append({
+            "id": gq["id"],
+            "confidence": resolution.confidence,
+            "det_recall": det_recall,
+            "llm_recall": llm_recall,
+        })
+        llm_col = f"{llm_recall:5.2f}" if llm_recall is not None else "    -"
+        line = (
+            f"  {gq['id']}  {resolution.confidence:4.2f}  "
+            f"{det_recall:5.2f}  {llm_col}  "
+            f"{', '.join(resolution.unresolved_terms) or '-'}"
+        )
+        if verbose:
+            line += f"\n         Q: {gq['nl_query']}"
+            line += f"\n         Expected: {sorted(expected)}"
+            line += f"\n         Seeds:    {resolution.seed_tables}"
+        logger.info(line)
+
+    if not rows:
+        return
+
+    logger.info("")
+    logger.info("  Threshold sweep")
+    logger.info("  " + "-" * 60)
+    logger.info("  Thresh  LLM calls  Saved   Hybrid recall")
+    for threshold in THRESHOLDS:
+        llm_calls = 0
+        recalls = []
+        for row in rows:
+            if row["confidence"] >= threshold:
+                recalls.append(row["det_recall"])
+                continue
+            llm_calls += 1
+            recalls.append(
+                row["llm_recall"]
+                if row["llm_recall"] is not None
+                else row["det_recall"]
+            )
+        saved = len(rows) - llm_calls
+        marker = " *" if threshold == DEFAULT_HYBRID_THRESHOLD else ""
+        logger.info(
+            f"  {threshold:6.2f}  {llm_calls:9d}  "
+            f"{saved:2d} ({saved / len(rows):4.0%})  "
+            f"{statistics.mean(recalls):.2f}{marker}"
+        )
+
+    logger.info("")
+    logger.info(
+        f"  Deterministic-only recall: "
+        f"{statistics.mean(r['det_recall'] for r in rows):.2f}"
+    )
+    if live:
+        logger.info(
+            f"  LLM-only recall:           "
+            f"{statistics.mean(r['llm_recall'] for r in rows):.2f} "
+            f"({len(rows)} LLM calls)"
+        )
+    else:
+        logger.info(
+            "  (offline: below-threshold recall uses the "
+            "deterministic result; run with --live for LLM recall)"
+        )
+    logger.info(f"  * default threshold ({DEFAULT_HYBRID_THRESHOLD})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Hybrid entity resolution benchmark"
+    )
+    parser.add_argument(
+        "--verbose", action="store_true",
+        help="Show per-query details (seeds vs expected)"
+    )
+    parser.add_argument(
+        "--live", action="store_true",
+        help="Call the LLM for below-threshold queries"
+    )
+    args = parser.parse_args()
+
+    setup_logging()
+    asyncio.run(run_benchmark(verbose=args.verbose, live=args.live))
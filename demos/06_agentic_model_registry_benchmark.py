@@ -0,0 +1,170 @@
+"""
+Demo: Model registry context budgets and token counters.
+
+Usage:
+    python demos/06_agentic_model_registry_benchmark.py
+    python demos/06_agentic_model_registry_benchmark.py --verbose
+    python demos/06_agentic_model_registry_benchmark.py --models models.json
+
+Offline (no LLM calls). For each registered model,
+reports the context budget Schema Intelligence gets
+for the production schema and whether the unpruned
+schema fits it (the old fixed-table lookup held every
+non-OpenAI model to 8k tokens).
+
+Then compares the token counters on the pruned schemas
+of the golden queries: the approximate counter used
+for models without a local tokenizer against tiktoken
+(count error, share of underestimates) and the cost of
+one count.
+
+--models loads a registry config file (as
+MODEL_REGISTRY_FILE would) before reporting.
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import time
+
+from pathlib import Path
+from typing import (
+    Dict,
+    List,
+)
+
+from dotenv import load_dotenv
+
+from text_to_sql.app_logger import get_logger, setup_logging
+from text_to_sql.model_registry import (
+    ApproxTokenCounter,
+    ModelRegistry,
+    TiktokenCounter,
+    get_registry,
+    set_registry,
+)
+from text_to_sql.schema_pruner import SchemaPruner
+
+
+logger = get_logger(__name__)
+
+EVALS_DIR = Path(__file__).parent.parent / "evals"
+SCHEMA_DIR = Path(__file__).parent.parent / "schema"
+
+# Committed tokens besides the schema (system prompt
+# and question), as in Schema Intelligence.
+PROMPT_OVERHEAD = 1500
+
+
+def load_pruned_schemas() -> List[str]:
+    """
+    Pruned schema DDL of each golden query.
+    """
+    logging.getLogger("text_to_sql.schema_pruner").setLevel(
+        logging.WARNING
+    )
+    ddl = (SCHEMA_DIR / "schema_setup.sql").read_text(encoding="utf-8")
+    pruner = SchemaPruner(ddl)
+    path = EVALS_DIR / "golden_queries.json"
+    return [
+        pruner.prune(gq["nl_query"]).pruned_schema
+        for gq in json.loads(path.read_text(encoding="utf-8"))
+    ]
+
+
+def report_budgets(verbose: bool = False) -> None:
+    """
+    Context budget and full-schema fit per model.
+    """
+    registry = get_registry()
+    ddl = (SCHEMA_DIR / "schema_setup.sql").read_text(encoding="utf-8")
+
+    logger.info("Context budgets (production schema, unpruned)")
+    logger.info("")
+    logger.info(
+        "  Model                               Window   Budget  "
+        "Schema  Fits"
+    )
+    logger.info("  " + "-" * 70)
+    for name in registry.names():
+        spec = registry.get(name)
+        schema_tokens = registry.count_tokens(ddl, name)
+        budget = (
+            spec.context_window - PROMPT_OVERHEAD - spec.output_reserve
+        )
+        logger.info(
+            f"  {name:34s}  {spec.context_window:7d}  {budget:7d}  "
+            f"{schema_tokens:6d}  "
+            f"{'yes' if schema_tokens <= budget else 'no':>4s}"
+        )
+        if verbose:
+            logger.info(
+                f"    tokenizer: {spec.tokenizer or 'approximate'}, "
+                f"${spec.input_price_per_1m:.2f} / "
+                f"${spec.output_price_per_1m:.2f} per 1M"
+            )
+
+
+def report_counters(verbose: bool = False) -> None:
+    """
+    Approximate vs tiktoken counts and count cost.
+    """
+    schemas = load_pruned_schemas()
+    exact = TiktokenCounter("o200k_base")
+    approx = ApproxTokenCounter()
+
+    exact.count("warm up")
+    latencies: Dict[str, List[float]] = {"tiktoken": [], "approx": []}
+    errors, under = [], 0
+    for ddl in schemas:
+        start = time.perf_counter()
+        n_exact = exact.count(ddl)
+        latencies["tiktoken"].append(
+            (time.perf_counter() - start) * 1e6
+        )
+        start = time.perf_counter()
+        n_approx = approx.count(ddl)
+        latencies["approx"].append((time.perf_counter() - start) * 1e6)
+        errors.append(n_approx / n_exact - 1)
+        under += n_approx < n_exact
+        if verbose:
+            logger.info(f"    {n_exact:5d} exact  {n_approx:5d} approx")
+
+    logger.info("")
+    logger.info(
+        f"Token counters ({len(schemas)} pruned schemas, "
+        f"o200k_base)"
+    )
+    logger.info("")
+    logger.info(
+        f"  Approximate vs tiktoken: mean error "
+        f"{statistics.mean(errors):+.0%}, max "
+        f"{max(errors):+.0%}, underestimates {under}/{len(schemas)}"
+    )
+    for name, values in latencies.items():
+        logger.info(
+            f"  {name:9s} p50 {statistics.median(values):7.1f}us per count"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Model registry budgets and counters"
+    )
+    parser.add_argument(
+        "--verbose", action="store_true",
+        help="Show tokenizers, prices and per-schema counts"
+    )
+    parser.add_argument(
+        "--models", type=Path,
+        help="Registry config file to load"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    if args.models:
+        set_registry(ModelRegistry.from_file(args.models))
+    report_budgets(verbose=args.verbose)
+    report_counters(verbose=args.verbose)
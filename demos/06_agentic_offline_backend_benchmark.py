@@ -0,0 +1,135 @@
+"""
+Demo: Embedded (offline) execution backend benchmark.
+
+Usage:
+    python demos/06_agentic_offline_backend_benchmark.py
+    python demos/06_agentic_offline_backend_benchmark.py --scale 1.0
+    python demos/06_agentic_offline_backend_benchmark.py --live
+
+Loads the project schema into the embedded SQLite
+backend (sample_data.sql, or a synthetic dataset with
+--scale) and runs every golden reference query through
+it: dialect translation time (uncached), mean execution
+time, EXPLAIN time and rows returned, plus the queries
+that do not run.
+
+With --live, the same queries also run on PostgreSQL
+(DATABASE_URL) through execute_query, to compare the
+round trips the embedded backend saves.
+"""
+
+import argparse
+import json
+import time
+
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from dotenv import load_dotenv
+
+from text_to_sql.app_logger import get_logger, setup_logging
+from text_to_sql.db import PostgresBackend, set_backend
+from text_to_sql.sqlite_backend import SQLiteBackend, translate_sql
+
+
+logger = get_logger(__name__)
+
+GOLDEN = Path(__file__).parent.parent / "evals" / "golden_queries.json"
+DEFAULT_REPEAT = 20
+
+
+def mean_ms(fn: Callable[[], object], repeat: int) -> float:
+    """
+    Mean milliseconds per call.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(
+    queries: List[Dict],
+    backend: SQLiteBackend,
+    repeat: int,
+    live: bool,
+) -> None:
+    """
+    Time each golden query on the embedded backend (and
+    PostgreSQL with live).
+    """
+    postgres = PostgresBackend() if live else None
+    logger.info("")
+    logger.info(
+        "  Query    translate us  sqlite ms  explain ms    rows"
+        + ("   postgres ms" if live else "")
+    )
+    logger.info("  " + "-" * (56 + (14 if live else 0)))
+    failed = []
+    totals = [0.0, 0.0]
+    for query in queries:
+        sql = query["reference_sql"]
+        try:
+            rows = backend.execute(sql)
+        except Exception as e:
+            failed.append((query["id"], str(e)))
+            continue
+        translate = mean_ms(
+            lambda: translate_sql.__wrapped__(sql), repeat
+        ) * 1000
+        execute = mean_ms(lambda: backend.execute(sql), repeat)
+        explain = mean_ms(lambda: backend.explain(sql, 250), repeat)
+        line = (
+            f"  {query['id']:<8} {translate:>12.1f} {execute:>10.2f} "
+            f"{explain:>11.2f} {len(rows):>7}"
+        )
+        totals[0] += execute
+        if postgres is not None:
+            remote = mean_ms(lambda: postgres.execute(sql), repeat)
+            totals[1] += remote
+            line += f" {remote:>13.2f}"
+        logger.info(line)
+    logger.info("  " + "-" * (56 + (14 if live else 0)))
+    line = f"  {'total':<8} {'':>12} {totals[0]:>10.2f}"
+    if live:
+        line += f" {'':>11} {'':>7} {totals[1]:>13.2f}"
+    logger.info(line)
+    for query_id, error in failed:
+        logger.info(f"  {query_id}: not run ({error})")
+    if postgres is not None:
+        postgres.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Embedded execution backend benchmark"
+    )
+    parser.add_argument(
+        "--scale", type=float, default=None,
+        help="Load a synthetic dataset of this scale "
+             "(default: sample_data.sql)"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT,
+        help="Runs per query and measurement"
+    )
+    parser.add_argument(
+        "--live", action="store_true",
+        help="Also run the queries on DATABASE_URL"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    golden = json.loads(GOLDEN.read_text(encoding="utf-8"))
+    queries = [q for q in golden if q.get("reference_sql")]
+    start = time.perf_counter()
+    backend = SQLiteBackend(scale=args.scale)
+    logger.info(
+        f"Embedded backend: {len(backend.tables())} tables loaded in "
+        f"{(time.perf_counter() - start) * 1000:.0f}ms "
+        f"({'scale ' + str(args.scale) if args.scale else 'sample data'}"
+        f", {len(queries)} golden queries, {args.repeat} runs each)"
+    )
+    set_backend(backend)
+    run(queries, backend, args.repeat, args.live)
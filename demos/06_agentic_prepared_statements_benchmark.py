@@ -0,0 +1,183 @@
+"""
+Demo: Prepared-statement reuse benchmark.
+
+Usage:
+    python demos/06_agentic_prepared_statements_benchmark.py
+    python demos/06_agentic_prepared_statements_benchmark.py --variants 50
+    python demos/06_agentic_prepared_statements_benchmark.py --live
+
+Parameterizes every golden reference query (time,
+parameters, literals kept in the skeleton) and replays
+a dashboard-like workload through the prepared-statement
+cache: each query repeated with --variants different
+literal values, round-robin, on one connection. Reports
+the cache hit rate (EXECUTE without PREPARE) for the
+configured cache size.
+
+With --live, the same workload runs on PostgreSQL
+(DATABASE_URL) through execute_query twice, as plain SQL
+and as prepared statements, and compares the mean time
+per query.
+"""
+
+import argparse
+import json
+import re
+import time
+
+from pathlib import Path
+from typing import List
+
+from dotenv import load_dotenv
+
+from text_to_sql.app_logger import get_logger, setup_logging
+from text_to_sql.db import close_pool, execute_query
+from text_to_sql.prepared_statements import (
+    DEFAULT_PREPARED_CACHE_SIZE,
+    PreparedStatementCache,
+    set_prepared_cache,
+)
+from text_to_sql.sql_validator import ParameterizedSQL, parameterize_sql
+
+
+logger = get_logger(__name__)
+
+GOLDEN = Path(__file__).parent.parent / "evals" / "golden_queries.json"
+DEFAULT_VARIANTS = 20
+PARAM = re.compile(r"\$(\d+)")
+
+
+class _Connection:
+    """
+    Connection stand-in (the cache only keys on it).
+    """
+
+
+def variant(query: ParameterizedSQL, i: int) -> str:
+    """
+    The query with its i-th set of literal values
+    (numbers shifted by i, strings suffixed with i; the
+    first variant is the original).
+    """
+    values = []
+    for value, kind in zip(query.values, query.types):
+        if i == 0:
+            values.append(value)
+        elif kind == "unknown":
+            values.append(f"{value[:-1]}{i}'")
+        elif kind == "numeric":
+            values.append(f"{float(value) + i}")
+        else:
+            values.append(str(int(value) + i))
+    return PARAM.sub(lambda m: values[int(m.group(1)) - 1], query.sql)
+
+
+def parameterize(golden: List[dict]) -> List[ParameterizedSQL]:
+    """
+    Parameterize the golden queries, one line each.
+    """
+    logger.info("")
+    logger.info("  Query    parameterize us  params  kept literals")
+    logger.info("  " + "-" * 52)
+    queries = []
+    for item in golden:
+        sql = item["reference_sql"]
+        start = time.perf_counter()
+        query = parameterize_sql(sql)
+        elapsed = (time.perf_counter() - start) * 1e6
+        if query is None:
+            logger.info(f"  {item['id']:<8} not parameterizable")
+            continue
+        kept = query.skeleton.count("'") // 2
+        logger.info(
+            f"  {item['id']:<8} {elapsed:>15.1f} {len(query.values):>7} "
+            f"{kept:>14}"
+        )
+        queries.append(query)
+    return queries
+
+
+def replay(
+    queries: List[ParameterizedSQL],
+    variants: int,
+    cache_size: int,
+) -> List[str]:
+    """
+    Run the workload through a cache on one connection.
+    """
+    workload = [
+        variant(query, i) for i in range(variants) for query in queries
+    ]
+    cache = PreparedStatementCache(cache_size)
+    conn = _Connection()
+    start = time.perf_counter()
+    for sql in workload:
+        cache.call(conn, sql)
+    elapsed = (time.perf_counter() - start) * 1e6 / len(workload)
+    stats = cache.stats()
+    logger.info("")
+    logger.info(
+        f"  Workload: {len(workload)} queries ({len(queries)} x "
+        f"{variants} literal variants), cache size {cache_size}"
+    )
+    logger.info(
+        f"  prepares {stats['prepares']}, hits {stats['hits']}, "
+        f"hit rate {stats['hit_rate']:.1%}, evictions "
+        f"{stats['evictions']}, {elapsed:.1f}us per lookup"
+    )
+    return workload
+
+
+def compare_live(workload: List[str], cache_size: int) -> None:
+    """
+    Plain SQL vs prepared statements on DATABASE_URL.
+    """
+    logger.info("")
+    logger.info("  Mode          mean ms   total s")
+    logger.info("  " + "-" * 33)
+    for label, cache in (
+        ("plain SQL", None),
+        ("prepared", PreparedStatementCache(cache_size)),
+    ):
+        set_prepared_cache(cache)
+        start = time.perf_counter()
+        for sql in workload:
+            execute_query(sql)
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"  {label:<12} {elapsed / len(workload) * 1000:>8.2f} "
+            f"{elapsed:>9.2f}"
+        )
+    set_prepared_cache(None)
+    close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Prepared-statement reuse benchmark"
+    )
+    parser.add_argument(
+        "--variants", type=int, default=DEFAULT_VARIANTS,
+        help="Literal variants per golden query"
+    )
+    parser.add_argument(
+        "--cache-size", type=int, default=DEFAULT_PREPARED_CACHE_SIZE,
+        help="Prepared statements kept per connection"
+    )
+    parser.add_argument(
+        "--live", action="store_true",
+        help="Compare plain and prepared execution on DATABASE_URL"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    golden = [
+        q for q in json.loads(GOLDEN.read_text(encoding="utf-8"))
+        if q.get("reference_sql")
+    ]
+    logger.info(f"Prepared statements: {len(golden)} golden queries")
+    queries = parameterize(golden)
+    workload = replay(queries, args.variants, args.cache_size)
+    if args.live:
+        compare_live(workload, args.cache_size)
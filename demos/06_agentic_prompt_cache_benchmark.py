@@ -0,0 +1,342 @@
+"""
+Demo: Prompt-prefix cache benchmark.
+
+Usage:
+    python demos/06_agentic_prompt_cache_benchmark.py
+    python demos/06_agentic_prompt_cache_benchmark.py --verbose
+    python demos/06_agentic_prompt_cache_benchmark.py --live
+
+Measures how often SQL Generation prompts hit the
+provider's prompt-prefix cache over the allowed golden
+queries. Each query makes a generation call, a critique
+call, and one retry of each (with critique feedback),
+over the schema the deterministic pruner selects.
+
+Offline (default), the provider cache is simulated:
+a call is a hit when it shares at least 1024 leading
+tokens with an earlier prompt, and the shared prefix is
+cached in 128-token increments (OpenAI's rules). The
+PromptBuilder layout is compared with the previous
+one (critique checklist after the SQL); both already
+open with the schema, so they hit equally and the
+misses are first calls over a table set not seen
+before. With --live,
+every generation prompt is sent twice and the cached
+input tokens the provider reports are read from the
+gateway. Requires OPENAI_API_KEY for --live.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Tuple,
+)
+
+import tiktoken
+
+from dotenv import load_dotenv
+
+from text_to_sql.agents.sql_generation import (
+    SQLGenerationAgent,
+)
+from text_to_sql.app_logger import get_logger, setup_logging
+from text_to_sql.llm_gateway import get_gateway
+from text_to_sql.prompts.prompts import get_prompt
+from text_to_sql.schema_pruner import SchemaPruner
+
+
+logger = get_logger(__name__)
+
+EVALS_DIR = Path(__file__).parent.parent / "evals"
+SCHEMA_DIR = Path(__file__).parent.parent / "schema"
+# OpenAI prompt caching: minimum cacheable prompt and
+# cache granularity (tokens).
+MIN_CACHED_PREFIX = 1024
+CACHE_INCREMENT = 128
+PLACEHOLDER_SQL = "SELECT 1"
+PLACEHOLDER_RETRY_SQL = "SELECT 2"
+PLACEHOLDER_FEEDBACK = {"critique": "Column names need checking"}
+KINDS = ["generation", "critique", "retry", "retry critique"]
+
+
+def load_golden_queries() -> List[Dict]:
+    """
+    Load allowed golden queries (ones that produce SQL).
+    """
+    path = EVALS_DIR / "golden_queries.json"
+    return [
+        gq for gq in json.loads(path.read_text(encoding="utf-8"))
+        if gq["expected_outcome"] == "allowed"
+    ]
+
+
+class SimulatedPrefixCache:
+    """
+    Provider-side prompt-prefix cache over token ids.
+    """
+
+    def __init__(self) -> None:
+        self._seen: List[List[int]] = []
+
+    def lookup(self, tokens: List[int]) -> int:
+        """
+        Cache the prompt and return its cached tokens.
+        """
+        shared = 0
+        for seen in self._seen:
+            n = 0
+            for a, b in zip(seen, tokens):
+                if a != b:
+                    break
+                n += 1
+            shared = max(shared, n)
+        self._seen.append(tokens)
+        if shared < MIN_CACHED_PREFIX:
+            return 0
+        return shared // CACHE_INCREMENT * CACHE_INCREMENT
+
+
+def legacy_generation(
+    query: str,
+    schema: str,
+    tables: List[str],
+    feedback: Dict | None,
+) -> str:
+    """
+    Generation prompt as laid out before PromptBuilder.
+    """
+    parts = [
+        f"Schema:\n{schema}\n",
+        f"Available tables: {', '.join(tables)}\n",
+        f"Question: {query}\n",
+        "Generate a PostgreSQL SELECT query.",
+    ]
+    if feedback:
+        parts.append(
+            f"\nPrevious attempt had issues: "
+            f"{feedback['critique']}\nPlease fix these issues."
+        )
+    return "\n".join(parts)
+
+
+def legacy_critique(sql: str, schema: str, query: str) -> str:
+    """
+    Critique prompt as laid out before PromptBuilder.
+    """
+    return (
+        f"Review this SQL query for correctness "
+        f"against the schema.\n\n"
+        f"Schema:\n{schema}\n\n"
+        f"Original question: {query}\n\n"
+        f"Generated SQL:\n{sql}\n\n"
+        f"Check:\n"
+        f"1. Are all table names valid?\n"
+        f"2. Are all column names correct?\n"
+        f"3. Are JOIN conditions correct?\n"
+        f"4. Does it answer the question?\n"
+        f"5. Any missing WHERE clauses?"
+    )
+
+
+def builder_prompts(
+    query: str,
+    schema: str,
+    tables: List[str],
+) -> Dict[str, str]:
+    """
+    Prompts SQL Generation builds for one query.
+    """
+    return {
+        "generation": SQLGenerationAgent._build_generation_prompt(
+            query, schema, tables, None
+        ),
+        "critique": SQLGenerationAgent._build_critique_prompt(
+            PLACEHOLDER_SQL, schema, query
+        ),
+        "retry": SQLGenerationAgent._build_generation_prompt(
+            query, schema, tables, PLACEHOLDER_FEEDBACK
+        ),
+        "retry critique": SQLGenerationAgent._build_critique_prompt(
+            PLACEHOLDER_RETRY_SQL, schema, query
+        ),
+    }
+
+
+def simulate(
+    calls: List[Tuple[str, str, str]],
+    encode: Callable[[str], List[int]],
+) -> Dict[str, Dict[str, int]]:
+    """
+    Replay (kind, system prompt, user prompt) calls
+    through one simulated cache.
+    """
+    cache = SimulatedPrefixCache()
+    stats = {
+        kind: {"calls": 0, "hits": 0, "tokens": 0, "cached": 0}
+        for kind in KINDS
+    }
+    for kind, system, user in calls:
+        tokens = encode(system) + encode(user)
+        cached = cache.lookup(tokens)
+        s = stats[kind]
+        s["calls"] += 1
+        s["hits"] += cached > 0
+        s["tokens"] += len(tokens)
+        s["cached"] += cached
+    return stats
+
+
+def report(name: str, stats: Dict[str, Dict[str, int]]) -> None:
+    """
+    Log hit rate and cached-token share per call kind.
+    """
+    for kind, s in list(stats.items()) + [("all", {
+        key: sum(st[key] for st in stats.values())
+        for key in ("calls", "hits", "tokens", "cached")
+    })]:
+        logger.info(
+            f"  {name:8s}  {kind:14s}  {s['calls']:5d}  "
+            f"{s['hits'] / s['calls']:8.0%}  "
+            f"{s['tokens']:8d}  "
+            f"{s['cached'] / s['tokens']:12.0%}"
+        )
+
+
+def run_offline(verbose: bool = False) -> None:
+    """
+    Simulate the provider cache for both layouts.
+    """
+    logging.getLogger("text_to_sql.schema_pruner").setLevel(
+        logging.WARNING
+    )
+    ddl = (SCHEMA_DIR / "schema_setup.sql").read_text(encoding="utf-8")
+    pruner = SchemaPruner(ddl)
+    encoder = tiktoken.get_encoding("o200k_base")
+    systems = {
+        "generation": get_prompt("sql_generation"),
+        "critique": get_prompt("sql_critique"),
+    }
+    golden_queries = load_golden_queries()
+
+    calls: Dict[str, List[Tuple[str, str, str]]] = {
+        "legacy": [],
+        "builder": [],
+    }
+    for gq in golden_queries:
+        pruned = pruner.prune(gq["nl_query"])
+        schema, tables = pruned.pruned_schema, pruned.selected_tables
+        query = gq["nl_query"]
+        legacy = {
+            "generation": legacy_generation(query, schema, tables, None),
+            "critique": legacy_critique(PLACEHOLDER_SQL, schema, query),
+            "retry": legacy_generation(
+                query, schema, tables, PLACEHOLDER_FEEDBACK
+            ),
+            "retry critique": legacy_critique(
+                PLACEHOLDER_RETRY_SQL, schema, query
+            ),
+        }
+        built = builder_prompts(query, schema, tables)
+        for name, prompts in (("legacy", legacy), ("builder", built)):
+            calls[name] += [
+                ("generation", systems["generation"],
+                 prompts["generation"]),
+                ("critique", systems["critique"], prompts["critique"]),
+                ("retry", systems["generation"], prompts["retry"]),
+                ("retry critique", systems["critique"],
+                 prompts["retry critique"]),
+            ]
+        if verbose:
+            logger.info(
+                f"  {gq['id']}  {pruned.pruned_schema_tokens:5d} "
+                f"schema tokens  {tables}"
+            )
+
+    logger.info(
+        f"Prompt-prefix cache benchmark (offline, simulated): "
+        f"{len(golden_queries)} queries"
+    )
+    logger.info("")
+    logger.info(
+        "  Layout    Call            Calls  Hit rate  "
+        "  Tokens  Cached share"
+    )
+    logger.info("  " + "-" * 66)
+    for name, layout_calls in calls.items():
+        report(name, simulate(layout_calls, encoder.encode))
+    logger.info("")
+    logger.info(
+        f"  (a hit needs {MIN_CACHED_PREFIX}+ shared leading "
+        f"tokens; prompts over smaller schemas never hit)"
+    )
+
+
+async def run_live(verbose: bool = False) -> None:
+    """
+    Send every generation prompt twice and report the
+    cached input tokens per pass.
+    """
+    logging.getLogger("text_to_sql.schema_pruner").setLevel(
+        logging.WARNING
+    )
+    ddl = (SCHEMA_DIR / "schema_setup.sql").read_text(encoding="utf-8")
+    pruner = SchemaPruner(ddl)
+    gateway = get_gateway()
+    agent = SQLGenerationAgent()
+    golden_queries = load_golden_queries()
+
+    logger.info("")
+    logger.info(
+        "  Pass  Calls  Input tokens  Cached tokens  Cached share"
+    )
+    logger.info("  " + "-" * 56)
+    for n in (1, 2):
+        before = gateway.usage_by_model().get(agent.model, {})
+        for gq in golden_queries:
+            pruned = pruner.prune(gq["nl_query"])
+            await agent._generate_sql(
+                gq["nl_query"], pruned.pruned_schema,
+                pruned.selected_tables, None,
+            )
+        after = gateway.usage_by_model().get(agent.model, {})
+        delta = {
+            key: after.get(key, 0) - before.get(key, 0)
+            for key in (
+                "requests", "input_tokens", "cached_input_tokens",
+            )
+        }
+        logger.info(
+            f"  {n:4d}  {delta['requests']:5d}  "
+            f"{delta['input_tokens']:12d}  "
+            f"{delta['cached_input_tokens']:13d}  "
+            f"{delta['cached_input_tokens'] / max(delta['input_tokens'], 1):12.0%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Prompt-prefix cache benchmark"
+    )
+    parser.add_argument(
+        "--verbose", action="store_true",
+        help="Show per-query details"
+    )
+    parser.add_argument(
+        "--live", action="store_true",
+        help="Send generation prompts twice (LLM calls)"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    if args.live:
+        asyncio.run(run_live(verbose=args.verbose))
+    else:
+        run_offline(verbose=args.verbose)
@@ -0,0 +1,183 @@
+"""
+Demo: Query result cache benchmark.
+
+Usage:
+    python demos/06_agentic_result_cache_benchmark.py
+    python demos/06_agentic_result_cache_benchmark.py --write-every 20
+    python demos/06_agentic_result_cache_benchmark.py --live
+
+Replays a dashboard-like workload (a few popular
+queries asked over and over by two roles, with the
+occasional write to one of the tables) through a
+ResultCache and reports hit rate, invalidations, bytes
+held with and without compression, and the database
+time the hits would have cost.
+
+Offline (default), queries "run" against synthetic
+rows with a modeled cost per row. With --live, each
+query runs twice against DATABASE_URL through
+execute_query (cold, then cached). Requires
+DATABASE_URL for --live.
+"""
+
+import argparse
+import random
+import time
+
+from typing import (
+    Any,
+    Dict,
+    List,
+    Tuple,
+)
+
+from dotenv import load_dotenv
+
+from text_to_sql.app_logger import get_logger, setup_logging
+from text_to_sql.db import execute_query
+from text_to_sql.result_cache import ResultCache, set_result_cache
+
+
+logger = get_logger(__name__)
+
+DEFAULT_REQUESTS = 2000
+DEFAULT_WRITE_EVERY = 50
+# Modeled database cost of a query (ms): fixed + per row.
+QUERY_BASE_MS = 15.0
+QUERY_ROW_MS = 0.01
+ROLES = ["analyst", "admin"]
+# (sql, rows returned), most popular first
+QUERIES: List[Tuple[str, int]] = [
+    ("SELECT category, SUM(quantity * unit_price) AS revenue "
+     "FROM order_items oi JOIN products p "
+     "ON p.product_id = oi.product_id GROUP BY category", 12),
+    ("SELECT order_date::date AS day, COUNT(*) AS orders "
+     "FROM orders GROUP BY 1 ORDER BY 1", 365),
+    ("SELECT customer_id, COUNT(*) AS orders FROM orders "
+     "GROUP BY customer_id ORDER BY orders DESC LIMIT 100", 100),
+    ("SELECT * FROM products WHERE stock_quantity < 10", 2000),
+    ("SELECT c.region, COUNT(DISTINCT o.customer_id) AS buyers "
+     "FROM customers c JOIN orders o "
+     "ON o.customer_id = c.customer_id GROUP BY c.region", 8),
+    ("SELECT * FROM order_items WHERE order_id IN "
+     "(SELECT order_id FROM orders WHERE status = 'pending')", 5000),
+]
+WRITES = [
+    "INSERT INTO orders (customer_id, status) VALUES (1, 'pending')",
+    "UPDATE products SET stock_quantity = stock_quantity - 1 "
+    "WHERE product_id = 7",
+]
+
+
+def synthetic_rows(n: int) -> List[Dict[str, Any]]:
+    """
+    Rows shaped like a report (id, label, amount).
+    """
+    return [
+        {"id": i, "label": f"item-{i % 50}", "amount": i * 1.5}
+        for i in range(n)
+    ]
+
+
+def replay(
+    cache: ResultCache,
+    requests: int,
+    write_every: int,
+) -> float:
+    """
+    Run the workload through the cache; return the
+    modeled database ms saved by hits.
+    """
+    rng = random.Random(7)
+    weights = [1 / (rank + 1) for rank in range(len(QUERIES))]
+    saved_ms = 0.0
+    for n in range(1, requests + 1):
+        if write_every and n % write_every == 0:
+            cache.invalidate_sql(rng.choice(WRITES))
+        sql, row_count = rng.choices(QUERIES, weights)[0]
+        cost_ms = QUERY_BASE_MS + QUERY_ROW_MS * row_count
+        lookup = cache.lookup(sql, rng.choice(ROLES))
+        if lookup.rows is not None:
+            saved_ms += cost_ms
+        else:
+            cache.store(lookup, synthetic_rows(row_count))
+    return saved_ms
+
+
+def run_offline(requests: int, write_every: int) -> None:
+    """
+    Replay the workload with and without compression.
+    """
+    logger.info(
+        f"Result cache (offline, {requests} requests, a write "
+        f"every {write_every})"
+    )
+    logger.info("")
+    logger.info(
+        "  Storage      Hit rate  Stale  Entries    KB   "
+        "Saved (s)  Replay (ms)"
+    )
+    logger.info("  " + "-" * 72)
+    for label, compress in (("plain", None), ("zlib >=4KB", 4096)):
+        cache = ResultCache(compress_min_bytes=compress)
+        start = time.perf_counter()
+        saved_ms = replay(cache, requests, write_every)
+        replay_ms = (time.perf_counter() - start) * 1000
+        stats = cache.stats()
+        logger.info(
+            f"  {label:<11} {stats['hit_rate']:9.1%}  "
+            f"{stats['stale']:5d}  {stats['entries']:7d}  "
+            f"{stats['bytes'] / 1024:5.0f}  {saved_ms / 1000:9.1f}  "
+            f"{replay_ms:11.0f}"
+        )
+
+
+def run_live() -> None:
+    """
+    Run each query cold and then from the cache.
+    """
+    logger.info("Result cache (live)")
+    cache = ResultCache()
+    set_result_cache(cache)
+    logger.info("")
+    logger.info("  Query  Rows   Cold (ms)  Cached (ms)")
+    logger.info("  " + "-" * 38)
+    for n, (sql, _) in enumerate(QUERIES, 1):
+        timings = []
+        for _ in range(2):
+            start = time.perf_counter()
+            rows = execute_query(sql, role="analyst")
+            timings.append((time.perf_counter() - start) * 1000)
+        logger.info(
+            f"  {n:5d}  {len(rows):5d}  {timings[0]:9.1f}  "
+            f"{timings[1]:11.2f}"
+        )
+    logger.info("")
+    logger.info(f"  {cache.stats()}")
+    set_result_cache(None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Query result cache benchmark"
+    )
+    parser.add_argument(
+        "--requests", type=int, default=DEFAULT_REQUESTS,
+        help="Queries replayed (offline)"
+    )
+    parser.add_argument(
+        "--write-every", type=int, default=DEFAULT_WRITE_EVERY,
+        help="Requests between writes (offline, 0 = none)"
+    )
+    parser.add_argument(
+        "--live", action="store_true",
+        help="Run queries against DATABASE_URL"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    if args.live:
+        run_live()
+    else:
+        run_offline(args.requests, args.write_every)
@@ -0,0 +1,381 @@
+"""
+Demo: Complexity-based model routing evaluation.
+
+Usage:
+    python demos/06_agentic_routing_evaluation.py
+    python demos/06_agentic_routing_evaluation.py --verbose
+    python demos/06_agentic_routing_evaluation.py --live
+
+Assigns every allowed golden query a complexity tier
+(orchestrator analysis + seed tables resolved by the
+schema pruner) and compares the uniform baseline (one model,
+critique on every query) with the default RoutingPolicy
+(simple queries skip the critique, complex queries are
+generated by the larger model).
+
+Offline (default), LLM calls and cost are projected
+from the pruned schema size; both are upper bounds, as
+the static validator can accept SQL without a critique
+under either policy. With --live, every query runs
+through the full pipeline once per policy, reporting
+accuracy (outcome + expected SQL pattern), latency and
+cost from the gateway's per-model token usage.
+Requires OPENAI_API_KEY for --live.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import statistics
+import time
+
+from datetime import datetime
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    List,
+)
+
+import tiktoken
+
+from dotenv import load_dotenv
+
+from text_to_sql.agents import (
+    OrchestratorAgent,
+    QueryRequest,
+    RoutingPolicy,
+)
+from text_to_sql.agents.orchestrator import analyze_query
+from text_to_sql.agents.query_refinement import (
+    QueryRefinementAgent,
+)
+from text_to_sql.agents.routing import (
+    CRITIQUE_LANE,
+    GENERATION_LANE,
+    TIER_COMPLEX,
+    TIER_SIMPLE,
+    TIER_STANDARD,
+    estimate_cost,
+)
+from text_to_sql.agents.schema_intelligence import (
+    SchemaIntelligenceAgent,
+)
+from text_to_sql.agents.security_governance import (
+    SecurityGovernanceAgent,
+)
+from text_to_sql.agents.sql_generation import (
+    SQLGenerationAgent,
+)
+from text_to_sql.app_logger import get_logger, setup_logging
+from text_to_sql.llm_gateway import get_gateway
+from text_to_sql.model_registry import get_registry
+from text_to_sql.prompts.prompts import get_prompt
+from text_to_sql.schema_pruner import SchemaPruner
+
+
+logger = get_logger(__name__)
+
+EVALS_DIR = Path(__file__).parent.parent / "evals"
+SCHEMA_DIR = Path(__file__).parent.parent / "schema"
+REF_DATE = datetime(2026, 2, 22)
+TIERS = [TIER_SIMPLE, TIER_STANDARD, TIER_COMPLEX]
+# Projection assumptions (tokens): question and
+# instructions around the schema, and completion size.
+PROMPT_OVERHEAD_TOKENS = 60
+OUTPUT_TOKENS = 150
+
+
+def load_golden_queries() -> List[Dict]:
+    """
+    Load allowed golden queries (ones that produce SQL).
+    """
+    path = EVALS_DIR / "golden_queries.json"
+    return [
+        gq for gq in json.loads(path.read_text(encoding="utf-8"))
+        if gq["expected_outcome"] == "allowed"
+    ]
+
+
+def policies() -> Dict[str, RoutingPolicy]:
+    """
+    Policies under comparison.
+    """
+    return {
+        "baseline": RoutingPolicy.uniform(),
+        "routed": RoutingPolicy(),
+    }
+
+
+def call_cost(model: str, input_tokens: int) -> float:
+    """
+    Projected USD cost of one call.
+    """
+    spec = get_registry().get(model)
+    return (
+        input_tokens * spec.input_price_per_1m
+        + OUTPUT_TOKENS * spec.output_price_per_1m
+    ) / 1_000_000
+
+
+def project(
+    policy: RoutingPolicy,
+    analysis: Dict[str, Any],
+    tables: List[str],
+    schema_tokens: int,
+    prompt_tokens: Dict[str, int],
+) -> Dict[str, float]:
+    """
+    Projected LLM calls and cost of one query under a
+    policy (generation plus, unless skipped, one
+    critique).
+    """
+    route = policy.route(analysis, tables)
+    calls, cost = 0, 0.0
+    for lane in (GENERATION_LANE, CRITIQUE_LANE):
+        if route.skips(lane):
+            continue
+        input_tokens = (
+            prompt_tokens[lane] + schema_tokens
+            + PROMPT_OVERHEAD_TOKENS
+        )
+        if lane == CRITIQUE_LANE:
+            input_tokens += OUTPUT_TOKENS
+        calls += 1
+        cost += call_cost(route.model(lane), input_tokens)
+    return {"calls": calls, "cost": cost}
+
+
+def run_offline(verbose: bool = False) -> None:
+    """
+    Report tiers and projected calls / cost per policy.
+    """
+    logging.getLogger("text_to_sql.schema_pruner").setLevel(
+        logging.WARNING
+    )
+    ddl = (SCHEMA_DIR / "schema_setup.sql").read_text(encoding="utf-8")
+    pruner = SchemaPruner(ddl)
+    encoder = tiktoken.get_encoding("o200k_base")
+    prompt_tokens = {
+        GENERATION_LANE: len(encoder.encode(
+            get_prompt("sql_generation")
+        )),
+        CRITIQUE_LANE: len(encoder.encode(
+            get_prompt("sql_critique")
+        )),
+    }
+    golden_queries = load_golden_queries()
+    candidates = policies()
+
+    logger.info(
+        f"Routing evaluation (offline): "
+        f"{len(golden_queries)} queries"
+    )
+    logger.info("")
+    logger.info("  ID      Difficulty  Tables  Tier      Calls B/R")
+    logger.info("  " + "-" * 60)
+
+    totals = {
+        name: {"calls": 0, "cost": 0.0} for name in candidates
+    }
+    tiers: Dict[str, int] = {tier: 0 for tier in TIERS}
+    for gq in golden_queries:
+        request = QueryRequest(
+            natural_language=gq["nl_query"],
+            user_context={"role": gq.get("role", "analyst")},
+        )
+        analysis = analyze_query(request)
+        pruned = pruner.prune(gq["nl_query"])
+        tables = pruned.seed_tables
+        tier = RoutingPolicy.tier(analysis, tables)
+        tiers[tier] += 1
+        projected = {
+            name: project(
+                policy, analysis, tables,
+                pruned.pruned_schema_tokens, prompt_tokens,
+            )
+            for name, policy in candidates.items()
+        }
+        for name, p in projected.items():
+            totals[name]["calls"] += p["calls"]
+            totals[name]["cost"] += p["cost"]
+        line = (
+            f"  {gq['id']}  {gq.get('difficulty') or '-':10s}  "
+            f"{len(tables):6d}  {tier:8s}  "
+            f"{projected['baseline']['calls']}/"
+            f"{projected['routed']['calls']}"
+        )
+        if verbose:
+            line += f"\n         Q: {gq['nl_query']}"
+            line += f"\n         Tables: {tables}"
+        logger.info(line)
+
+    logger.info("")
+    logger.info(
+        "  Tiers: " + ", ".join(
+            f"{tier}={count}" for tier, count in tiers.items()
+        )
+    )
+    logger.info("")
+    logger.info("  Policy     LLM calls  Cost (USD, projected)")
+    for name, total in totals.items():
+        logger.info(
+            f"  {name:9s}  {total['calls']:9d}  "
+            f"${total['cost']:.5f}"
+        )
+    logger.info("")
+    logger.info(
+        "  (offline: upper bounds, the static validator "
+        "may accept SQL without a critique; run with "
+        "--live for measured accuracy, latency and cost)"
+    )
+
+
+def build_orchestrator(policy: RoutingPolicy) -> OrchestratorAgent:
+    """
+    Build a full pipeline whose SQL generation uses
+    the given routing policy.
+    """
+    orchestrator = OrchestratorAgent()
+    orchestrator.set_conversation_state(
+        {"reference_date": REF_DATE}
+    )
+    orchestrator.inject_agent(
+        "refinement", QueryRefinementAgent()
+    )
+    orchestrator.inject_agent(
+        "security", SecurityGovernanceAgent()
+    )
+    orchestrator.inject_agent(
+        "schema", SchemaIntelligenceAgent()
+    )
+    orchestrator.inject_agent(
+        "sql_generation", SQLGenerationAgent(routing=policy)
+    )
+    return orchestrator
+
+
+def usage_delta(
+    before: Dict[str, Dict[str, int]],
+    after: Dict[str, Dict[str, int]],
+) -> Dict[str, Dict[str, int]]:
+    """
+    Per-model usage accrued between two snapshots.
+    """
+    return {
+        model: {
+            key: value - before.get(model, {}).get(key, 0)
+            for key, value in usage.items()
+        }
+        for model, usage in after.items()
+    }
+
+
+def routing_step(response: Any) -> Dict[str, Any]:
+    """
+    Routing decision recorded by SQL Generation.
+    """
+    for step in response.execution_chain or []:
+        if step.agent_name == "SQL Generation":
+            return step.output_data.get("routing") or {}
+    return {}
+
+
+async def run_live(verbose: bool = False) -> None:
+    """
+    Run every query through the pipeline per policy and
+    report accuracy against latency and cost.
+    """
+    golden_queries = load_golden_queries()
+    gateway = get_gateway()
+    results: Dict[str, List[Dict[str, Any]]] = {}
+
+    for name, policy in policies().items():
+        orchestrator = build_orchestrator(policy)
+        rows = results.setdefault(name, [])
+        for gq in golden_queries:
+            request = QueryRequest(
+                natural_language=gq["nl_query"],
+                user_context={"role": gq.get("role", "analyst")},
+            )
+            before = gateway.usage_by_model()
+            start = time.perf_counter()
+            response = await orchestrator.process_query(request)
+            latency_ms = (time.perf_counter() - start) * 1000
+            usage = usage_delta(before, gateway.usage_by_model())
+            pattern = gq.get("expected_sql_pattern")
+            correct = bool(response.success and response.generated_sql) and (
+                not pattern or bool(re.search(
+                    pattern, response.generated_sql,
+                    re.IGNORECASE | re.DOTALL,
+                ))
+            )
+            route = routing_step(response)
+            rows.append({
+                "id": gq["id"],
+                "tier": route.get("tier", "-"),
+                "correct": correct,
+                "latency_ms": latency_ms,
+                "calls": sum(u["requests"] for u in usage.values()),
+                "cost": estimate_cost(usage),
+            })
+            if verbose:
+                logger.info(
+                    f"  [{name}] {gq['id']}  "
+                    f"{rows[-1]['tier']:8s}  "
+                    f"{'ok ' if correct else 'BAD'}  "
+                    f"{latency_ms:7.0f}ms  "
+                    f"{rows[-1]['calls']} calls  "
+                    f"${rows[-1]['cost']:.5f}"
+                )
+
+    logger.info("")
+    logger.info(
+        "  Policy     Tier      N   Accuracy  "
+        "p50 ms   p95 ms   Calls  Cost (USD)"
+    )
+    logger.info("  " + "-" * 72)
+    for name, rows in results.items():
+        for tier in TIERS + ["all"]:
+            subset = [
+                r for r in rows
+                if tier == "all" or r["tier"] == tier
+            ]
+            if not subset:
+                continue
+            latencies = sorted(r["latency_ms"] for r in subset)
+            p95 = latencies[
+                max(int(round(0.95 * len(latencies))) - 1, 0)
+            ]
+            logger.info(
+                f"  {name:9s}  {tier:8s}  {len(subset):2d}  "
+                f"{sum(r['correct'] for r in subset) / len(subset):8.0%}  "
+                f"{statistics.median(latencies):7.0f}  "
+                f"{p95:7.0f}  "
+                f"{sum(r['calls'] for r in subset):5d}  "
+                f"${sum(r['cost'] for r in subset):.5f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Complexity-based model routing evaluation"
+    )
+    parser.add_argument(
+        "--verbose", action="store_true",
+        help="Show per-query details"
+    )
+    parser.add_argument(
+        "--live", action="store_true",
+        help="Run the pipeline per policy (LLM calls)"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    if args.live:
+        asyncio.run(run_live(verbose=args.verbose))
+    else:
+        run_offline(verbose=args.verbose)
@@ -0,0 +1,124 @@
+"""
+Demo: Schema DDL cache benchmark.
+
+Usage:
+    python demos/06_agentic_schema_ddl_cache_benchmark.py
+    python demos/06_agentic_schema_ddl_cache_benchmark.py --requests 5000
+
+Times the schema stage's DDL loading per request: the
+previous behavior (read schema_setup.sql and run the
+CREATE TABLE regex, once for the full file and once
+for the LLM context) against load_schema_ddl (one
+stat() while the file is unchanged). Then touches and
+edits a copy of the file to show when it is re-read
+and when change listeners run.
+
+No database or API key needed.
+"""
+
+import argparse
+import os
+import re
+import shutil
+import tempfile
+import time
+
+from pathlib import Path
+from typing import Callable
+
+from dotenv import load_dotenv
+
+from text_to_sql.app_logger import get_logger, setup_logging
+from text_to_sql.db import (
+    SCHEMA_DIR,
+    load_schema_ddl,
+    on_schema_change,
+)
+
+
+logger = get_logger(__name__)
+
+DEFAULT_REQUESTS = 2000
+
+
+def uncached_request(path: Path) -> None:
+    """
+    What each schema-stage request used to do.
+    """
+    for llm_context in (False, True):
+        schema_sql = path.read_text(encoding="utf-8")
+        if llm_context:
+            "\n\n".join(re.findall(
+                r"(CREATE TABLE\b.*?\);)", schema_sql, re.DOTALL,
+            ))
+
+
+def per_request_us(fn: Callable[[], None], requests: int) -> float:
+    """
+    Mean microseconds per call.
+    """
+    start = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def run(requests: int) -> None:
+    """
+    Compare per-request cost, then show reload behavior.
+    """
+    path = SCHEMA_DIR / "schema_setup.sql"
+    logger.info(
+        f"Schema DDL cache ({path.name}, "
+        f"{path.stat().st_size / 1024:.0f} KB, {requests} requests)"
+    )
+    start = time.perf_counter()
+    load_schema_ddl(path)
+    first_ms = (time.perf_counter() - start) * 1000
+    before = per_request_us(lambda: uncached_request(path), requests)
+    after = per_request_us(lambda: load_schema_ddl(path), requests)
+    logger.info("")
+    logger.info("  Per request                      us")
+    logger.info("  " + "-" * 40)
+    logger.info(f"  Read + regex (twice)      {before:10.1f}")
+    logger.info(f"  load_schema_ddl (cached)  {after:10.1f}")
+    logger.info(f"  Speedup                   {before / after:9.0f}x")
+    logger.info(f"  First load (preload)      {first_ms * 1000:10.1f}")
+
+    changes = []
+    on_schema_change(changes.append)
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = Path(tmp) / "schema_setup.sql"
+        shutil.copy(path, copy)
+        first = load_schema_ddl(copy)
+        stat = copy.stat()
+        os.utime(copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        touched = load_schema_ddl(copy)
+        after_touch = len(changes)
+        with copy.open("a", encoding="utf-8") as f:
+            f.write("\nCREATE TABLE audit_log (id SERIAL PRIMARY KEY);\n")
+        edited = load_schema_ddl(copy)
+    logger.info("")
+    logger.info("  Event        Re-read  Listeners run")
+    logger.info("  " + "-" * 36)
+    logger.info(
+        f"  touch        {str(touched is not first):<8} {after_touch}"
+    )
+    logger.info(
+        f"  edit         {str(edited is not touched):<8} {len(changes)}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Schema DDL cache benchmark"
+    )
+    parser.add_argument(
+        "--requests", type=int, default=DEFAULT_REQUESTS,
+        help="Simulated schema-stage requests"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    run(args.requests)
@@ -0,0 +1,260 @@
+"""
+Demo: Streaming SQL generation with early abort.
+
+Usage:
+    python demos/06_agentic_streaming_benchmark.py
+    python demos/06_agentic_streaming_benchmark.py --verbose
+    python demos/06_agentic_streaming_benchmark.py --live
+
+Offline (default), replays the golden queries'
+reference_sql token by token through the streaming
+prefix check, once as is (must never abort) and once
+per corruption a model can produce:
+
+- stray table: the last table read is not among the
+  selected tables
+- not a SELECT: the query is wrapped in a CTE
+- disallowed keyword: a DELETE is appended
+
+Reports, per case, how often the stream is aborted and
+the share of SQL output tokens that were never
+generated, plus the cost of the check per streamed
+token. The real saving is larger: the explanation
+field follows the SQL in the structured output.
+
+With --live, SQL Generation runs each golden query with
+and without streaming and reports LLM calls, output
+tokens and latency per query. Requires OPENAI_API_KEY
+for --live.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+import tiktoken
+
+from dotenv import load_dotenv
+
+from text_to_sql.agents.sql_generation import (
+    SQLGenerationAgent,
+)
+from text_to_sql.app_logger import get_logger, setup_logging
+from text_to_sql.llm_gateway import get_gateway
+from text_to_sql.schema_pruner import SchemaPruner
+from text_to_sql.sql_validator import prefix_tables
+
+
+logger = get_logger(__name__)
+
+EVALS_DIR = Path(__file__).parent.parent / "evals"
+SCHEMA_DIR = Path(__file__).parent.parent / "schema"
+MODES = ["buffered", "streaming"]
+
+
+def load_golden_queries() -> List[Dict]:
+    """
+    Load allowed golden queries with a reference SQL.
+    """
+    path = EVALS_DIR / "golden_queries.json"
+    return [
+        gq for gq in json.loads(path.read_text(encoding="utf-8"))
+        if gq["expected_outcome"] == "allowed"
+        and gq.get("reference_sql")
+    ]
+
+
+def _stray_table(sql: str, tables: List[str]) -> Tuple[str, List[str]]:
+    """
+    Drop the last table read from the selection.
+    """
+    last = prefix_tables(sql + " ")[-1]
+    return sql, [t for t in tables if t != last]
+
+
+def _not_select(sql: str, tables: List[str]) -> Tuple[str, List[str]]:
+    """
+    Wrap the query in a CTE.
+    """
+    return f"WITH q AS ({sql}) SELECT * FROM q", tables
+
+
+def _disallowed(sql: str, tables: List[str]) -> Tuple[str, List[str]]:
+    """
+    Append a DELETE statement.
+    """
+    return f"{sql}; DELETE FROM orders WHERE 1 = 1", tables
+
+
+CASES: Dict[str, Optional[Callable]] = {
+    "valid": None,
+    "stray table": _stray_table,
+    "not a SELECT": _not_select,
+    "disallowed keyword": _disallowed,
+}
+
+
+def replay(
+    sql: str,
+    tables: List[str],
+    encoder: tiktoken.Encoding,
+    latencies: List[float],
+) -> Tuple[Optional[int], int]:
+    """
+    Stream SQL token by token through the prefix check.
+
+    Returns:
+        (tokens generated at the abort or None, total
+        tokens)
+    """
+    tokens = encoder.encode(sql)
+    for n in range(1, len(tokens) + 1):
+        prefix = encoder.decode(tokens[:n])
+        start = time.perf_counter()
+        reason = SQLGenerationAgent._prefix_issue(prefix, tables)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        if reason:
+            return n, len(tokens)
+    return None, len(tokens)
+
+
+def run_offline(verbose: bool = False) -> None:
+    """
+    Report aborts and output tokens saved per case.
+    """
+    encoder = tiktoken.get_encoding("o200k_base")
+    golden_queries = load_golden_queries()
+    latencies: List[float] = []
+
+    logger.info(
+        f"Streaming prefix check (offline): "
+        f"{len(golden_queries)} reference queries"
+    )
+    logger.info("")
+    logger.info("  Case                Aborted  Tokens saved")
+    logger.info("  " + "-" * 42)
+    for case, corrupt in CASES.items():
+        aborted, saved = 0, []
+        for gq in golden_queries:
+            sql = gq["reference_sql"]
+            tables = prefix_tables(sql + " ")
+            if corrupt is not None:
+                sql, tables = corrupt(sql, tables)
+            at, total = replay(sql, tables, encoder, latencies)
+            if at is not None:
+                aborted += 1
+                saved.append(1 - at / total)
+            if verbose and (at is not None) != (corrupt is not None):
+                logger.info(f"    unexpected: {gq['id']} ({case})")
+        logger.info(
+            f"  {case:18s}  {aborted:3d}/{len(golden_queries):<3d}  "
+            f"{statistics.mean(saved) if saved else 0:12.0%}"
+        )
+    logger.info("")
+    logger.info(
+        f"  Check cost per streamed token: p50 "
+        f"{statistics.median(latencies):.0f}us, "
+        f"p95 {statistics.quantiles(latencies, n=20)[-1]:.0f}us"
+    )
+
+
+async def run_live(verbose: bool = False) -> None:
+    """
+    Run SQL Generation buffered and streamed per
+    golden query.
+    """
+    logging.getLogger("text_to_sql.schema_pruner").setLevel(
+        logging.WARNING
+    )
+    ddl = (SCHEMA_DIR / "schema_setup.sql").read_text(encoding="utf-8")
+    pruner = SchemaPruner(ddl)
+    gateway = get_gateway()
+    golden_queries = load_golden_queries()
+    rows: Dict[str, List[Dict[str, float]]] = {m: [] for m in MODES}
+
+    def totals() -> Tuple[int, int]:
+        usage = gateway.usage_by_model().values()
+        return (
+            sum(u["requests"] for u in usage),
+            sum(u["output_tokens"] for u in usage),
+        )
+
+    for gq in golden_queries:
+        pruned = pruner.prune(gq["nl_query"])
+        for mode in MODES:
+            agent = SQLGenerationAgent(
+                streaming=mode == "streaming"
+            )
+            calls, output_tokens = totals()
+            start = time.perf_counter()
+            result = await agent._run_critique_loop(
+                gq["nl_query"], pruned.pruned_schema,
+                pruned.selected_tables,
+                fk_edges=pruned.fk_paths,
+            )
+            after_calls, after_tokens = totals()
+            rows[mode].append({
+                "calls": after_calls - calls,
+                "output_tokens": after_tokens - output_tokens,
+                "ms": (time.perf_counter() - start) * 1000,
+                "aborts": sum(
+                    h["action"] == "retry_stream_abort"
+                    for h in result["critique_history"]
+                ),
+            })
+            if verbose:
+                row = rows[mode][-1]
+                logger.info(
+                    f"  {gq['id']}  {mode:9s}  "
+                    f"{row['calls']} calls  "
+                    f"{row['output_tokens']} out  "
+                    f"{row['aborts']} aborts"
+                )
+
+    logger.info("")
+    logger.info(
+        "  Mode       Calls/query  Out tokens  p50 ms  Aborts"
+    )
+    logger.info("  " + "-" * 52)
+    for mode, mode_rows in rows.items():
+        logger.info(
+            f"  {mode:9s}  "
+            f"{statistics.mean(r['calls'] for r in mode_rows):11.2f}  "
+            f"{statistics.mean(r['output_tokens'] for r in mode_rows):10.0f}  "
+            f"{statistics.median(r['ms'] for r in mode_rows):6.0f}  "
+            f"{sum(r['aborts'] for r in mode_rows):6d}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Streaming SQL generation benchmark"
+    )
+    parser.add_argument(
+        "--verbose", action="store_true",
+        help="Show per-query details"
+    )
+    parser.add_argument(
+        "--live", action="store_true",
+        help="Run buffered and streamed generation (LLM calls)"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    if args.live:
+        asyncio.run(run_live(verbose=args.verbose))
+    else:
+        run_offline(verbose=args.verbose)
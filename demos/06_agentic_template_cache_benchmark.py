@@ -0,0 +1,295 @@
+"""
+Demo: SQL template cache benchmark.
+
+Usage:
+    python demos/06_agentic_template_cache_benchmark.py
+    python demos/06_agentic_template_cache_benchmark.py --verbose
+    python demos/06_agentic_template_cache_benchmark.py --live
+
+Replays a workload of questions that repeat with
+different literals: the golden queries with a
+reference_sql (code / number literals varied, the rest
+asked again verbatim) plus parameterized question
+families over the production schema.
+
+Offline (default), the first question of each skeleton
+stores its reference SQL as a template and the repeats
+are rendered and statically validated against the full
+schema. Reports hit rate, uncacheable and rejected
+templates, generation runs skipped and serve latency.
+With --live, the workload runs through the full
+OrchestratorAgent pipeline (which adds the
+SecurityGovernanceAgent re-check on every hit) with and
+without the template cache and reports LLM calls and
+latency per question. Requires OPENAI_API_KEY for
+--live.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import time
+
+from datetime import datetime
+from pathlib import Path
+from typing import (
+    Dict,
+    List,
+    Tuple,
+)
+
+from dotenv import load_dotenv
+
+from text_to_sql.agents import (
+    OrchestratorAgent,
+    QueryRefinementAgent,
+    QueryRequest,
+    SchemaIntelligenceAgent,
+    SecurityGovernanceAgent,
+    SQLGenerationAgent,
+    SQLTemplateCache,
+)
+from text_to_sql.agents.templates import extract_literals
+from text_to_sql.app_logger import get_logger, setup_logging
+from text_to_sql.llm_gateway import get_gateway
+from text_to_sql.sql_validator import (
+    SchemaCatalog,
+    validate_sql,
+)
+
+
+logger = get_logger(__name__)
+
+EVALS_DIR = Path(__file__).parent.parent / "evals"
+SCHEMA_DIR = Path(__file__).parent.parent / "schema"
+VARIANTS = 3
+USER_CONTEXT = {"role": "analyst", "user_id": "bench"}
+
+# Parameterized families: question and SQL formats with
+# the values each repeat substitutes.
+FAMILIES = [
+    (
+        "Show production runs for product {0} started "
+        "after {1}",
+        "SELECT run_id, quantity, status FROM "
+        "production_runs WHERE product_id = '{0}' "
+        "AND start_time >= '{1}' ORDER BY start_time",
+        [
+            ("P001", "2026-01-01"), ("P002", "2026-02-01"),
+            ("P003", "2026-01-15"), ("P004", "2026-03-01"),
+        ],
+    ),
+    (
+        "List products in the '{0}' category",
+        "SELECT product_id, product_name FROM products "
+        "WHERE category = '{0}' ORDER BY product_name",
+        [
+            ("Electronics",), ("Furniture",),
+            ("Home & Garden",), ("O'Brien Tools",),
+        ],
+    ),
+    (
+        "Show the top {0} warehouses by capacity",
+        "SELECT warehouse_id, warehouse_name FROM "
+        "warehouses ORDER BY capacity_sqft DESC LIMIT {0}",
+        [("5",), ("10",), ("3",), ("20",)],
+    ),
+]
+
+
+def _vary(question: str, sql: str, n: int) -> Tuple[str, str]:
+    """
+    Replace code and number literals of a golden query
+    in both its question and SQL.
+    """
+    def bump(match: re.Match) -> str:
+        digits = match.group(2)
+        value = str(int(digits) + n).zfill(len(digits))
+        return match.group(1) + value
+
+    pattern = re.compile(r"\b([A-Z]{1,4}-?)(\d{2,})\b")
+    return pattern.sub(bump, question), pattern.sub(bump, sql)
+
+
+def build_workload() -> List[Tuple[str, str]]:
+    """
+    (question, reference SQL) pairs, first occurrence
+    of each skeleton first.
+    """
+    path = EVALS_DIR / "golden_queries.json"
+    workload = []
+    for gq in json.loads(path.read_text(encoding="utf-8")):
+        if gq["expected_outcome"] != "allowed":
+            continue
+        if not gq.get("reference_sql"):
+            continue
+        for n in range(VARIANTS + 1):
+            workload.append(_vary(
+                gq["nl_query"], gq["reference_sql"], n
+            ))
+    for question, sql, values in FAMILIES:
+        for value in values:
+            workload.append((
+                question.format(*value),
+                sql.format(*(v.replace("'", "''") for v in value)),
+            ))
+    return workload
+
+
+def run_offline(verbose: bool = False) -> None:
+    """
+    Replay the workload against the template cache.
+    """
+    ddl = (SCHEMA_DIR / "schema_setup.sql").read_text(encoding="utf-8")
+    catalog = SchemaCatalog.from_ddl(ddl)
+    cache = SQLTemplateCache()
+    workload = build_workload()
+
+    logger.info(
+        f"SQL template cache (offline): {len(workload)} questions"
+    )
+    logger.info("")
+
+    served, mismatched, latencies = 0, 0, []
+    for question, reference_sql in workload:
+        skeleton, literals = extract_literals(question)
+        start = time.perf_counter()
+        hit = cache.lookup(skeleton, literals, USER_CONTEXT["role"])
+        outcome = "miss"
+        if hit is not None:
+            _, sql = hit
+            validation = validate_sql(sql, catalog)
+            latencies.append((time.perf_counter() - start) * 1e6)
+            if not validation.is_valid:
+                cache.reject()
+                outcome = "rejected"
+            else:
+                served += 1
+                mismatched += sql != reference_sql
+                outcome = "hit" if sql == reference_sql else "HIT!="
+        if outcome in ("miss", "rejected"):
+            stored = cache.store(
+                skeleton, literals, USER_CONTEXT["role"],
+                {"final_sql": reference_sql}, {},
+            )
+            if not stored:
+                outcome += " (uncacheable)"
+        if verbose:
+            logger.info(f"  {outcome:22s}  {question[:60]}")
+
+    stats = cache.stats()
+    if verbose:
+        logger.info("")
+    logger.info(
+        f"  Hit rate: {stats['hit_rate']:.0%} "
+        f"({stats['hits']} hits / {stats['misses']} misses)"
+    )
+    logger.info(
+        f"  Templates stored: {stats['stored']}, "
+        f"uncacheable: {stats['uncacheable']}, "
+        f"rejected: {stats['rejected']}"
+    )
+    logger.info(
+        f"  Generation runs skipped: {served}/{len(workload)}, "
+        f"SQL differing from reference: {mismatched}"
+    )
+    if latencies:
+        logger.info(
+            f"  Serve latency (render + validate): "
+            f"p50 {statistics.median(latencies):.0f}us"
+        )
+
+
+def _orchestrator(cache: SQLTemplateCache = None) -> OrchestratorAgent:
+    """
+    Full pipeline, optionally with a template cache.
+    """
+    orchestrator = OrchestratorAgent(template_cache=cache)
+    orchestrator.inject_agent("refinement", QueryRefinementAgent())
+    orchestrator.inject_agent("security", SecurityGovernanceAgent())
+    orchestrator.inject_agent("schema", SchemaIntelligenceAgent())
+    orchestrator.inject_agent("sql_generation", SQLGenerationAgent())
+    orchestrator.set_conversation_state(
+        {"reference_date": datetime(2026, 2, 22)}
+    )
+    return orchestrator
+
+
+async def run_live(verbose: bool = False) -> None:
+    """
+    Run the workload through the pipeline with and
+    without the template cache.
+    """
+    gateway = get_gateway()
+    workload = build_workload()
+    rows: Dict[str, Dict[str, List[float]]] = {}
+    caches = {"no cache": None, "template cache": SQLTemplateCache()}
+
+    for mode, cache in caches.items():
+        orchestrator = _orchestrator(cache)
+        rows[mode] = {"calls": [], "ms": []}
+        for question, _ in workload:
+            before = sum(
+                u["requests"]
+                for u in gateway.usage_by_model().values()
+            )
+            start = time.perf_counter()
+            response = await orchestrator.process_query(
+                QueryRequest(
+                    natural_language=question,
+                    user_context=USER_CONTEXT,
+                )
+            )
+            rows[mode]["ms"].append(
+                (time.perf_counter() - start) * 1000
+            )
+            rows[mode]["calls"].append(sum(
+                u["requests"]
+                for u in gateway.usage_by_model().values()
+            ) - before)
+            if verbose:
+                logger.info(
+                    f"  {mode:14s}  "
+                    f"{rows[mode]['calls'][-1]} calls  "
+                    f"{'ok' if response.success else 'FAIL'}  "
+                    f"{question[:50]}"
+                )
+
+    logger.info("")
+    logger.info("  Mode            Calls/query  p50 ms  Hit rate")
+    logger.info("  " + "-" * 48)
+    for mode, row in rows.items():
+        cache = caches[mode]
+        hit_rate = (
+            f"{cache.stats()['hit_rate']:.0%}" if cache else "-"
+        )
+        logger.info(
+            f"  {mode:14s}  "
+            f"{statistics.mean(row['calls']):11.2f}  "
+            f"{statistics.median(row['ms']):6.0f}  "
+            f"{hit_rate:>8s}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="SQL template cache benchmark"
+    )
+    parser.add_argument(
+        "--verbose", action="store_true",
+        help="Show per-question outcomes"
+    )
+    parser.add_argument(
+        "--live", action="store_true",
+        help="Run the full pipeline with and without cache"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    if args.live:
+        asyncio.run(run_live(verbose=args.verbose))
+    else:
+        run_offline(verbose=args.verbose)
@@ -9,12 +9,24 @@ from text_to_sql.agents.cache import (
     CacheBackend,
     InProcessTTLCache,
 )
+from text_to_sql.agents.deadline import (
+    Deadline,
+    DeadlineExceeded,
+)
+from text_to_sql.agents.few_shot import (
+    FewShotExample,
+    FewShotStore,
+)
 from text_to_sql.agents.orchestrator import (
     OrchestratorAgent,
 )
 from text_to_sql.agents.query_refinement import (
     QueryRefinementAgent,
 )
+from text_to_sql.agents.routing import (
+    RouteDecision,
+    RoutingPolicy,
+)
 from text_to_sql.agents.schema_intelligence import (
     SchemaIntelligenceAgent,
 )
@@ -24,6 +36,9 @@ from text_to_sql.agents.security_governance import (
 from text_to_sql.agents.sql_generation import (
     SQLGenerationAgent,
 )
+from text_to_sql.agents.templates import (
+    SQLTemplateCache,
+)
 from text_to_sql.agents.types import (
     AgenticResponse,
     EntityExtraction,
@@ -31,20 +46,29 @@ from text_to_sql.agents.types import (
     GeneratedSQL,
     QueryRequest,
     SQLCritique,
+    TurnRecord,
 )
 
 __all__ = [
     "AgenticResponse",
     "CacheBackend",
+    "Deadline",
+    "DeadlineExceeded",
     "EntityExtraction",
     "ExecutionChainStep",
+    "FewShotExample",
+    "FewShotStore",
     "GeneratedSQL",
     "InProcessTTLCache",
     "OrchestratorAgent",
     "QueryRefinementAgent",
     "QueryRequest",
+    "RouteDecision",
+    "RoutingPolicy",
     "SchemaIntelligenceAgent",
     "SecurityGovernanceAgent",
     "SQLCritique",
     "SQLGenerationAgent",
+    "SQLTemplateCache",
+    "TurnRecord",
 ]
@@ -2,6 +2,8 @@
 Base Agent class with common functionality for all agents.
 """
 
+import asyncio
+import dataclasses
 import time
 
 from abc import (
@@ -10,36 +12,82 @@ from abc import (
 )
 from typing import (
     Any,
+    Callable,
     Dict,
     Optional,
 )
 
-import tiktoken
-
 from pydantic_ai import Agent as PydanticAgent
 
+from text_to_sql.agents.deadline import (
+    Deadline,
+    DeadlineExceeded,
+)
 from text_to_sql.agents.types import (
     ExecutionChainStep,
     QueryRequest,
 )
 from text_to_sql.app_logger import get_logger
+from text_to_sql.llm_gateway import (
+    DEFAULT_OUTPUT_ESTIMATE,
+    get_gateway,
+)
+from text_to_sql.llm_resilience import (
+    CircuitOpenError,
+)
+from text_to_sql.model_registry import (
+    DEFAULT_CONTEXT_WINDOW,
+    DEFAULT_OUTPUT_RESERVE,
+    ContextWindows,
+    get_registry,
+)
 
 
 logger = get_logger(__name__)
 
 DEFAULT_MODEL = "openai:gpt-4o-mini"
-DEFAULT_OUTPUT_RESERVE = 4096
 
-# Model context windows (input + output tokens).
-# Conservative fallback for unknown models.
-MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
-    "openai:gpt-4o": 128_000,
-    "openai:gpt-4o-mini": 128_000,
-    "openai:gpt-4-turbo": 128_000,
-    "openai:gpt-4": 8_192,
-    "openai:gpt-3.5-turbo": 16_385,
-}
-DEFAULT_CONTEXT_WINDOW = 8_192
+# Model context windows (input + output tokens), a live
+# view of the model registry. Unknown models of an
+# unknown provider fall back to DEFAULT_CONTEXT_WINDOW.
+MODEL_CONTEXT_WINDOWS = ContextWindows()
+
+# Partial structured output -> reason to abort (None =
+# keep streaming)
+AbortCheck = Callable[[Any], Optional[str]]
+
+
+class StreamAborted(RuntimeError):
+    """
+    Raised when a streamed LLM call is cut short
+    because its partial output is already invalid.
+
+    Attributes:
+        reason: Why the partial output was rejected
+        partial: Partial structured output at the abort
+        usage: Token usage up to the abort
+    """
+
+    def __init__(self, reason: str, partial: Any, usage: Any):
+        super().__init__(reason)
+        self.reason = reason
+        self.partial = partial
+        self.usage = usage
+
+
+@dataclasses.dataclass
+class StreamedRun:
+    """
+    Result of a streamed LLM call, shaped like a
+    Pydantic AI run result (output, usage()).
+    """
+
+    output: Any
+    run_usage: Any
+    abort_reason: Optional[str] = None
+
+    def usage(self) -> Any:
+        return self.run_usage
 
 
 class BaseAgent(ABC):
@@ -71,12 +119,14 @@ class BaseAgent(ABC):
         self.agent_name = agent_name
         self.system_prompt = system_prompt
         self.model = model
+        self._gateway = get_gateway()
+        self._routed_models: Dict[str, Any] = {}
         self.pydantic_agent = PydanticAgent(
-            model=self.model,
+            model=self._llm_model(),
             system_prompt=system_prompt,
         )
-        self._encoder = tiktoken.encoding_for_model(
-            "gpt-4o-mini"
+        self._system_prompt_tokens = self._count_tokens(
+            system_prompt
         )
         logger.info(f"Initialized {agent_name}")
 
@@ -118,7 +168,8 @@ class BaseAgent(ABC):
     def _available_token_budget(
         self,
         committed_tokens: int,
-        output_reserve: int = DEFAULT_OUTPUT_RESERVE,
+        output_reserve: Optional[int] = None,
+        model: Optional[str] = None,
     ) -> int:
         """
         Helper function used to compute the token
@@ -131,25 +182,391 @@ class BaseAgent(ABC):
             committed_tokens: Tokens already used by
                 system prompt, query, etc.
             output_reserve: Tokens reserved for
-                model output
+                model output (defaults to the model's
+                registered reserve)
+            model: Model the prompt is for (None = the
+                agent's model)
 
         Returns:
             Available token budget (may be negative
             if already over)
         """
-        context_window = MODEL_CONTEXT_WINDOWS.get(
-            self.model, DEFAULT_CONTEXT_WINDOW
-        )
+        spec = get_registry().get(model or self.model)
+        if output_reserve is None:
+            output_reserve = spec.output_reserve
         return (
-            context_window
+            spec.context_window
             - committed_tokens
             - output_reserve
         )
 
+    def _llm_model(self, model: Optional[str] = None) -> Any:
+        """
+        Helper function used to resolve a model through
+        the shared LLM gateway, so all agents reuse one
+        pooled HTTP client.
+
+        Args:
+            model: Model identifier (defaults to this
+                agent's model); resolved once per name
+
+        Returns:
+            Pydantic AI model (or model identifier)
+        """
+        if model is None or model == self.model:
+            return self._gateway.model(self.model)
+        if model not in self._routed_models:
+            self._routed_models[model] = (
+                self._gateway.model(model)
+            )
+        return self._routed_models[model]
+
+    async def _gated_run(
+        self,
+        agent: PydanticAgent,
+        prompt: str,
+        lane: str,
+        model_settings: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None,
+        abort_check: Optional[AbortCheck] = None,
+    ) -> Any:
+        """
+        Helper function used to wait for rate-limit
+        capacity on the gateway, run the call, and
+        settle the token reservation with actual usage
+        (refunded when the call fails or is cancelled).
+        Cancelled calls still record the latency
+        observed until cancellation.
+
+        Args:
+            agent: Pydantic AI agent to run
+            prompt: User prompt
+            lane: Gateway lane (priority + metrics)
+            model_settings: Per-call settings (e.g.
+                temperature)
+            model: Model identifier for this call
+                (None = the agent's own model)
+            abort_check: Stream the output and pass each
+                partial output to this check; a returned
+                reason ends the call early (see
+                _streamed_run)
+
+        Returns:
+            The Pydantic AI run result (a StreamedRun
+            when streamed)
+
+        Raises:
+            StreamAborted: when abort_check rejected a
+                partial output
+        """
+        reserved = (
+            self._system_prompt_tokens
+            + self._count_tokens(prompt)
+            + DEFAULT_OUTPUT_ESTIMATE
+        )
+        await self._gateway.acquire(reserved, lane=lane)
+        start = time.monotonic()
+        run_model = (
+            self._llm_model(model)
+            if model not in (None, self.model)
+            else None
+        )
+        try:
+            if abort_check is None:
+                result = await agent.run(
+                    prompt,
+                    model=run_model,
+                    model_settings=model_settings,
+                )
+            else:
+                result = await self._streamed_run(
+                    agent, prompt, run_model,
+                    model_settings, abort_check,
+                )
+        except asyncio.CancelledError:
+            # A hedged loser or a timed-out call: the time
+            # it had been waiting is a lower bound on the
+            # lane latency; leaving it out would pull the
+            # p95 (and so the hedge delay) down just when
+            # the provider is slow.
+            self._gateway.latency(lane).record(
+                (time.monotonic() - start) * 1000
+            )
+            self._gateway.settle(reserved, 0, lane=lane)
+            raise
+        except Exception:
+            self._gateway.settle(reserved, 0, lane=lane)
+            raise
+        self._gateway.latency(lane).record(
+            (time.monotonic() - start) * 1000
+        )
+        usage = result.usage()
+        self._gateway.settle(
+            reserved,
+            usage.total_tokens or None,
+            lane=lane,
+        )
+        self._gateway.record_usage(
+            model or self.model,
+            usage.input_tokens,
+            usage.output_tokens,
+            cached_input_tokens=usage.cache_read_tokens,
+        )
+        if getattr(result, "abort_reason", None):
+            raise StreamAborted(
+                result.abort_reason, result.output, usage
+            )
+        return result
+
+    @staticmethod
+    async def _streamed_run(
+        agent: PydanticAgent,
+        prompt: str,
+        run_model: Any,
+        model_settings: Optional[Dict[str, Any]],
+        abort_check: AbortCheck,
+    ) -> StreamedRun:
+        """
+        Helper function used to stream a structured
+        output, checking every partial output as it
+        grows. Raising out of the stream on a rejected
+        prefix closes the response, so the remaining
+        output tokens are never generated.
+
+        Returns:
+            StreamedRun with the final output, or the
+            last partial output and abort_reason set
+        """
+        try:
+            async with agent.run_stream(
+                prompt,
+                model=run_model,
+                model_settings=model_settings,
+            ) as stream:
+                async for partial in stream.stream_output(
+                    debounce_by=None
+                ):
+                    reason = abort_check(partial)
+                    if reason:
+                        # Raised (not returned) so the run
+                        # does not drain the stream on exit
+                        raise StreamAborted(
+                            reason, partial, stream.usage()
+                        )
+                output = await stream.get_output()
+                return StreamedRun(output, stream.usage())
+        except StreamAborted as e:
+            return StreamedRun(e.partial, e.usage, e.reason)
+
+    async def _hedged_run(
+        self,
+        agent: PydanticAgent,
+        prompt: str,
+        lane: str,
+        model_settings: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None,
+        abort_check: Optional[AbortCheck] = None,
+    ) -> Any:
+        """
+        Helper function used to run a call and, if it is
+        still outstanding after the lane's p95 latency,
+        send one duplicate and take whichever succeeds
+        first. The loser is cancelled (and awaited, so
+        its latency and refund are accounted for).
+
+        Args:
+            agent: Pydantic AI agent to run
+            prompt: User prompt
+            lane: Gateway lane
+            model_settings: Per-call settings
+            model: Model identifier for this call
+            abort_check: Partial-output check (streamed
+                calls; an aborted call is not waited
+                on for the duplicate)
+
+        Returns:
+            The first successful Pydantic AI run result
+        """
+        delay_s = self._gateway.hedge_delay_s(lane)
+        if delay_s is None:
+            return await self._gated_run(
+                agent, prompt, lane, model_settings, model,
+                abort_check,
+            )
+        tasks = [asyncio.ensure_future(
+            self._gated_run(
+                agent, prompt, lane, model_settings, model,
+                abort_check,
+            )
+        )]
+        try:
+            done, _ = await asyncio.wait(
+                tasks, timeout=delay_s
+            )
+            if not done:
+                logger.info(
+                    f"{self.agent_name}: hedging LLM call "
+                    f"after {delay_s * 1000:.0f}ms"
+                )
+                tasks.append(asyncio.ensure_future(
+                    self._gated_run(
+                        agent, prompt, lane,
+                        model_settings, model,
+                        abort_check,
+                    )
+                ))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if isinstance(
+                        task.exception(), StreamAborted
+                    ):
+                        raise task.exception()
+                    if task.exception() is None:
+                        if len(tasks) > 1:
+                            self._gateway.record_hedge(
+                                lane, task is tasks[1]
+                            )
+                        return task.result()
+            if len(tasks) > 1:
+                self._gateway.record_hedge(lane, False)
+            return tasks[0].result()
+        finally:
+            losers = [task for task in tasks if not task.done()]
+            for task in losers:
+                task.cancel()
+            # Let the losers record their latency and
+            # refund their reservation before returning.
+            await asyncio.gather(*losers, return_exceptions=True)
+
+    def _llm_available(self) -> bool:
+        """
+        Helper function used to check whether the LLM
+        provider is healthy enough for optional calls
+        (circuit not open).
+        """
+        return not self._gateway.breaker.is_open()
+
+    async def _run_llm(
+        self,
+        agent: PydanticAgent,
+        prompt: str,
+        deadline: Optional[Deadline] = None,
+        budget_share: float = 1.0,
+        lane: Optional[str] = None,
+        optional: bool = False,
+        model_settings: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None,
+        abort_check: Optional[AbortCheck] = None,
+    ) -> Any:
+        """
+        Helper function used to run one LLM call
+        through the shared gateway, bounded by the
+        request deadline. Time spent queueing for
+        rate-limit capacity counts against the
+        deadline. Slow calls are hedged, and outcomes
+        feed the provider circuit breaker.
+
+        Optional calls (ones the caller can replace
+        with a deterministic fallback) are refused
+        while the circuit is open; essential calls
+        always go through, and once the circuit is
+        half-open one takes the free probe slot, so
+        its outcome closes or re-opens the circuit.
+
+        Args:
+            agent: Pydantic AI agent to run
+            prompt: User prompt
+            deadline: Request deadline (None = no
+                per-call timeout)
+            budget_share: Share of the remaining budget
+                this call may consume
+            lane: Gateway lane (defaults to the agent
+                name)
+            optional: Whether the caller has a fallback
+            model_settings: Per-call model settings
+                (e.g. temperature)
+            model: Model identifier for this call
+                (e.g. chosen by a routing policy; None =
+                the agent's own model)
+            abort_check: Stream the output and end the
+                call as soon as this check returns a
+                reason for a partial output
+
+        Returns:
+            The Pydantic AI run result
+
+        Raises:
+            DeadlineExceeded: when the budget is already
+                exhausted or the call times out
+            CircuitOpenError: for optional calls while
+                the provider circuit is open
+            StreamAborted: when abort_check rejected a
+                partial output
+        """
+        lane = lane or self.agent_name
+        timeout_s = None
+        if deadline is not None:
+            timeout_s = deadline.call_timeout_s(
+                budget_share
+            )
+        breaker = self._gateway.breaker
+        # allow() hands a free half-open probe slot to
+        # this call; essential calls run either way.
+        if not breaker.allow() and optional:
+            raise CircuitOpenError(
+                f"{self.agent_name}: LLM provider "
+                f"circuit is open"
+            )
+        try:
+            result = await asyncio.wait_for(
+                self._hedged_run(
+                    agent, prompt, lane,
+                    model_settings, model,
+                    abort_check,
+                ),
+                timeout=timeout_s,
+            )
+        except asyncio.TimeoutError as e:
+            if timeout_s is None:
+                # Not our deadline: a timeout raised inside
+                # the call (e.g. by the HTTP client).
+                breaker.record_failure()
+                raise
+            # Only a timeout longer than the lane's usual
+            # p95 says something about provider health.
+            p95_ms = self._gateway.latency(
+                lane
+            ).percentile(95)
+            if p95_ms is None or timeout_s * 1000 > p95_ms:
+                breaker.record_failure()
+            raise DeadlineExceeded(
+                f"{self.agent_name} LLM call exceeded "
+                f"{timeout_s * 1000:.0f}ms"
+            ) from e
+        except asyncio.CancelledError:
+            breaker.abandon()
+            raise
+        except StreamAborted:
+            # The provider answered; the output was bad
+            breaker.record_success()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return result
+
     def _count_tokens(self, text: str) -> int:
         """
-        Helper function used to count tokens via
-        tiktoken.
+        Helper function used to count tokens with the
+        agent model's tokenizer (shared, loaded on first
+        use; approximate for models without a local
+        tokenizer).
 
         Args:
             text: Text to count tokens for
@@ -157,7 +574,7 @@ class BaseAgent(ABC):
         Returns:
             Token count
         """
-        return len(self._encoder.encode(text))
+        return get_registry().count_tokens(text, self.model)
 
     @abstractmethod
     async def _execute_internal(
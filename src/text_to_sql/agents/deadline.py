@@ -0,0 +1,102 @@
+"""
+Per-request deadline propagation.
+
+A Deadline is derived once from QueryRequest.timeout_ms
+(by the orchestrator) and consulted by every agent: LLM
+calls get per-call timeouts carved out of the remaining
+budget, retry loops stop when another round trip will
+not fit, and agents switch to degraded-but-fast
+fallbacks when time is short.
+"""
+
+import time
+
+from typing import Optional
+
+from text_to_sql.agents.types import QueryRequest
+
+
+# Never give an LLM call less than this, otherwise it is
+# guaranteed to time out and only wastes a request.
+MIN_CALL_TIMEOUT_MS = 250.0
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when a request's time budget is exhausted.
+    """
+
+
+class Deadline:
+    """
+    Absolute deadline on the monotonic clock.
+
+    Args:
+        expires_at: time.monotonic() value at which the
+            request budget is exhausted
+    """
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after_ms(cls, timeout_ms: float) -> "Deadline":
+        """
+        Create a deadline timeout_ms from now.
+        """
+        return cls(time.monotonic() + timeout_ms / 1000)
+
+    @classmethod
+    def from_request(
+        cls, request: QueryRequest,
+    ) -> Optional["Deadline"]:
+        """
+        Return the request's deadline, or None when the
+        request is unbounded.
+        """
+        if request.deadline_at is None:
+            return None
+        return cls(request.deadline_at)
+
+    def call_timeout_s(
+        self,
+        share: float = 1.0,
+    ) -> float:
+        """
+        Timeout (seconds) for one call that may use the
+        given share of the remaining budget.
+
+        Raises:
+            DeadlineExceeded: when less than
+                MIN_CALL_TIMEOUT_MS remains
+        """
+        remaining = self.remaining_ms()
+        if remaining < MIN_CALL_TIMEOUT_MS:
+            raise DeadlineExceeded(
+                f"Request deadline exceeded "
+                f"({remaining:.0f}ms remaining)"
+            )
+        return max(
+            remaining * share, MIN_CALL_TIMEOUT_MS
+        ) / 1000
+
+    def can_fit(self, estimate_ms: float) -> bool:
+        """
+        Whether an operation expected to take
+        estimate_ms still fits in the budget.
+        """
+        return self.remaining_ms() >= max(
+            estimate_ms, MIN_CALL_TIMEOUT_MS
+        )
+
+    def expired(self) -> bool:
+        """
+        Whether the budget is exhausted.
+        """
+        return self.remaining_ms() <= 0
+
+    def remaining_ms(self) -> float:
+        """
+        Milliseconds left before the deadline.
+        """
+        return (self.expires_at - time.monotonic()) * 1000
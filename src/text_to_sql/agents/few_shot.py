@@ -0,0 +1,340 @@
+"""
+Retrieval-augmented few-shot examples for SQL
+generation.
+
+Keeps verified NL-to-SQL pairs (golden queries with a
+reference_sql, plus SQL the pipeline accepted) in a
+BM25 index over the questions. Retrieval only returns
+examples whose tables all belong to the query's
+selected tables, so an example never shows the model a
+table outside the pruned schema.
+"""
+
+import dataclasses
+import json
+import math
+import re
+import threading
+
+from pathlib import Path
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+)
+
+from text_to_sql.app_logger import get_logger
+from text_to_sql.db import SchemaDDL, on_schema_change
+from text_to_sql.sql_validator import (
+    catalog_for_ddl,
+    normalize_sql,
+    validate_sql,
+)
+
+
+logger = get_logger(__name__)
+
+GOLDEN_QUERIES_PATH = (
+    Path(__file__).parent.parent.parent.parent
+    / "evals" / "golden_queries.json"
+)
+# Examples per prompt and their token allowance.
+FEW_SHOT_TOP_K = 3
+FEW_SHOT_MAX_TOKENS = 600
+# BM25 term-frequency saturation and length
+# normalization.
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+SOURCE_GOLDEN = "golden"
+SOURCE_PRODUCTION = "production"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset({
+    "a", "all", "an", "and", "are", "by", "can", "each",
+    "for", "from", "give", "have", "how", "i", "in",
+    "is", "it", "list", "me", "of", "on", "or", "per",
+    "please", "show", "the", "their", "them", "to",
+    "was", "were", "what", "which", "who", "with",
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Helper function used to split a question into
+    index terms (lowercased, stopwords dropped, plural
+    "s" stripped except after s / u / i).
+
+    Args:
+        text: Natural language question
+
+    Returns:
+        List of terms
+    """
+    terms = []
+    for word in TOKEN_PATTERN.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not (
+            word.endswith(("ss", "us", "is"))
+        ):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+@dataclasses.dataclass
+class FewShotExample:
+    """
+    One verified question / SQL pair.
+
+    Attributes:
+        question: Natural language question
+        sql: SQL that answers it
+        tables: Tables the SQL reads
+        source: SOURCE_GOLDEN or SOURCE_PRODUCTION
+    """
+
+    question: str
+    sql: str
+    tables: List[str] = dataclasses.field(default_factory=list)
+    source: str = SOURCE_PRODUCTION
+
+
+def format_example(example: FewShotExample) -> str:
+    """
+    Prompt text of one example.
+    """
+    return f"Q: {example.question}\nSQL: {example.sql}\n"
+
+
+class FewShotStore:
+    """
+    BM25 index of verified NL-to-SQL examples.
+
+    Args:
+        examples: Initial examples
+        path: Optional JSONL file: examples in it are
+            loaded, and examples added later are
+            appended to it
+    """
+
+    def __init__(
+        self,
+        examples: Optional[Iterable[FewShotExample]] = None,
+        path: Optional[Path] = None,
+    ):
+        self.path = Path(path) if path else None
+        self._examples: List[FewShotExample] = []
+        self._keys: set[tuple[str, str]] = set()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._lengths: List[int] = []
+        self._lock = threading.Lock()
+        for example in examples or []:
+            self._index(example)
+        if self.path is not None and self.path.exists():
+            for line in self.path.read_text(
+                encoding="utf-8"
+            ).splitlines():
+                if line.strip():
+                    self._index(FewShotExample(**json.loads(line)))
+        on_schema_change(self._on_schema_change)
+
+    @classmethod
+    def from_golden_queries(
+        cls,
+        golden_path: Path = GOLDEN_QUERIES_PATH,
+        path: Optional[Path] = None,
+    ) -> "FewShotStore":
+        """
+        Seed a store with the allowed golden queries
+        that carry a reference_sql.
+
+        Args:
+            golden_path: golden_queries.json location
+            path: Optional JSONL file for accepted
+                production examples
+
+        Returns:
+            FewShotStore
+        """
+        golden = json.loads(
+            Path(golden_path).read_text(encoding="utf-8")
+        )
+        return cls(
+            (
+                FewShotExample(
+                    question=gq["nl_query"],
+                    sql=gq["reference_sql"],
+                    tables=gq.get("expected_tables") or [],
+                    source=SOURCE_GOLDEN,
+                )
+                for gq in golden
+                if gq.get("expected_outcome") == "allowed"
+                and gq.get("reference_sql")
+            ),
+            path=path,
+        )
+
+    def __len__(self) -> int:
+        return len(self._examples)
+
+    def add(
+        self,
+        question: str,
+        sql: str,
+        tables: List[str],
+        source: str = SOURCE_PRODUCTION,
+    ) -> bool:
+        """
+        Add a verified example (persisted when the store
+        has a path).
+
+        Args:
+            question: Natural language question
+            sql: Accepted SQL
+            tables: Tables the SQL reads
+            source: Where the example came from
+
+        Returns:
+            True if added, False if already stored
+        """
+        example = FewShotExample(
+            question=question,
+            sql=sql,
+            tables=sorted(tables),
+            source=source,
+        )
+        if not self._index(example):
+            return False
+        if self.path is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(
+                        json.dumps(dataclasses.asdict(example)) + "\n"
+                    )
+            except OSError as e:
+                logger.warning(
+                    f"Could not persist few-shot example: {e}"
+                )
+        return True
+
+    def search(
+        self,
+        question: str,
+        tables: Iterable[str],
+        k: int = FEW_SHOT_TOP_K,
+    ) -> List[FewShotExample]:
+        """
+        Retrieve the top-k examples for a question.
+
+        Args:
+            question: Natural language question
+            tables: Selected tables; only examples whose
+                tables are all among them are eligible
+            k: Maximum examples to return
+
+        Returns:
+            Examples, best BM25 score first (examples
+            sharing no term with the question are left
+            out)
+        """
+        allowed = {t.lower() for t in tables}
+        with self._lock:
+            n = len(self._examples)
+            if not n:
+                return []
+            avg_length = max(sum(self._lengths) / n, 1.0)
+            scores: Dict[int, float] = {}
+            for term in set(tokenize(question)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(
+                    1 + (n - len(postings) + 0.5)
+                    / (len(postings) + 0.5)
+                )
+                for doc, tf in postings.items():
+                    norm = BM25_K1 * (
+                        1 - BM25_B
+                        + BM25_B * self._lengths[doc] / avg_length
+                    )
+                    scores[doc] = scores.get(doc, 0.0) + (
+                        idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    )
+            ranked = sorted(
+                (
+                    (score, doc) for doc, score in scores.items()
+                    if self._examples[doc].tables
+                    and {
+                        t.lower() for t in self._examples[doc].tables
+                    } <= allowed
+                ),
+                key=lambda item: (-item[0], item[1]),
+            )
+            return [self._examples[doc] for _, doc in ranked[:k]]
+
+    def _on_schema_change(self, schema: SchemaDDL) -> None:
+        """
+        Helper function used to drop the examples whose SQL
+        no longer validates against the new schema (tables
+        or columns removed or renamed); the persisted file
+        is rewritten without them.
+        """
+        catalog = catalog_for_ddl(schema.full)
+        if not catalog.tables:
+            return
+        with self._lock:
+            examples = list(self._examples)
+        kept = [
+            e for e in examples
+            if validate_sql(e.sql, catalog).is_valid
+        ]
+        if len(kept) == len(examples):
+            return
+        with self._lock:
+            self._examples = []
+            self._keys = set()
+            self._postings = {}
+            self._lengths = []
+        for example in kept:
+            self._index(example)
+        if self.path is not None:
+            try:
+                self.path.write_text("".join(
+                    json.dumps(dataclasses.asdict(e)) + "\n"
+                    for e in kept if e.source == SOURCE_PRODUCTION
+                ), encoding="utf-8")
+            except OSError as e:
+                logger.warning(
+                    f"Could not rewrite few-shot examples: {e}"
+                )
+        logger.info(
+            f"Schema changed ({schema.digest[:12]}): "
+            f"{len(examples) - len(kept)} few-shot examples dropped"
+        )
+
+    def _index(self, example: FewShotExample) -> bool:
+        """
+        Helper function used to add an example to the
+        BM25 postings, skipping duplicates (same
+        question and normalized SQL).
+        """
+        key = (
+            " ".join(tokenize(example.question)),
+            normalize_sql(example.sql),
+        )
+        with self._lock:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            doc = len(self._examples)
+            self._examples.append(example)
+            terms = tokenize(example.question)
+            self._lengths.append(len(terms))
+            for term in terms:
+                postings = self._postings.setdefault(term, {})
+                postings[doc] = postings.get(doc, 0) + 1
+            return True
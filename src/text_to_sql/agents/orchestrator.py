@@ -7,27 +7,86 @@ Responsibilities:
 - Conflict resolution between agents
 - Final response assembly with provenance tracking
 - Conversation state management
+- Turn persistence for incremental follow-ups
+- SQL template cache: repeats that differ only in
+  literals are served without schema selection or SQL
+  generation
 """
 
+import asyncio
+import os
 import time
 from typing import (
     Any,
     Dict,
     List,
+    Optional,
 )
 
 from text_to_sql.agents.base import BaseAgent
+from text_to_sql.agents.deadline import Deadline
+from text_to_sql.agents.templates import SQLTemplateCache
 from text_to_sql.agents.types import (
+    VERIFIED_ACCEPT_ACTIONS,
     AgenticResponse,
     ExecutionChainStep,
     QueryRequest,
+    TurnRecord,
 )
 from text_to_sql.app_logger import get_logger
 from text_to_sql.prompts.prompts import get_prompt
+from text_to_sql.sql_validator import (
+    SchemaCatalog,
+    validate_sql,
+)
 
 
 logger = get_logger(__name__)
 
+DEFAULT_MAX_TURNS = 10
+
+
+def analyze_query(request: QueryRequest) -> Dict[str, Any]:
+    """
+    Analyze query complexity and intent with keyword
+    heuristics (no LLM), e.g. for model routing.
+
+    Returns:
+        Dictionary with complexity ("simple" /
+        "complex"), requires_schema_mapping,
+        might_be_ambiguous and user_role
+    """
+    # Simple heuristic analysis
+    # (will be enhanced with LLM later)
+    query_lower = request.natural_language.lower()
+    complex_words = [
+        "complex", "multiple", "cross", "join",
+        "combine", "calculate"
+    ]
+    is_complex = any(
+        word in query_lower for word in complex_words
+    )
+    requires_schema_mapping = any(
+        word in query_lower
+        for word in [
+            "product",
+            "customer",
+            "order",
+            "inventory",
+        ]
+    )
+    might_be_ambiguous = any(
+        word in query_lower
+        for word in ["best", "top", "popular", "most", "average"]
+    )
+
+    return {
+        "complexity": "complex" if is_complex else "simple",
+        "requires_schema_mapping": requires_schema_mapping,
+        "might_be_ambiguous": might_be_ambiguous,
+        "user_role": request.user_context.get("role", "user"),
+    }
+
 
 class OrchestratorAgent(BaseAgent):
     """
@@ -37,12 +96,38 @@ class OrchestratorAgent(BaseAgent):
     controller
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        turn_aware: bool = False,
+        max_turns: int = DEFAULT_MAX_TURNS,
+        template_cache: Optional[SQLTemplateCache] = None,
+    ):
         """
         Initialize the Orchestrator Agent.
+
+        Args:
+            turn_aware: Persist each completed turn
+                (tables, pruned schema, SQL) in the
+                conversation state so refinement-style
+                follow-ups skip entity extraction and
+                edit the prior SQL in one LLM call
+            max_turns: Number of turns retained in the
+                conversation state
+            template_cache: SQL templates keyed by NL
+                skeleton; accepted SQL is stored and
+                repeats are served from it (defaults to
+                an SQLTemplateCache when
+                SQL_TEMPLATE_CACHE is set, else off)
         """
         system_prompt = get_prompt("orchestrator")
         super().__init__("Orchestrator", system_prompt)
+        self.turn_aware = turn_aware
+        self.max_turns = max_turns
+        if template_cache is None and os.getenv(
+            "SQL_TEMPLATE_CACHE", "0"
+        ) != "0":
+            template_cache = SQLTemplateCache()
+        self.template_cache = template_cache
         self.conversation_state = {}
         self.available_agents = {
             "refinement": None,
@@ -56,43 +141,13 @@ class OrchestratorAgent(BaseAgent):
     async def _analyze_query(self, request: QueryRequest) -> Dict[str, Any]:
         """
         Helper function used to analyze query complexity
-        and intent.
+        and intent (see analyze_query).
 
         Returns:
             Dictionary with analysis results
         """
         step_start = time.time()
-
-        # Simple heuristic analysis
-        # (will be enhanced with LLM later)
-        query_lower = request.natural_language.lower()
-        complex_words = [
-            "complex", "multiple", "cross", "join",
-            "combine", "calculate"
-        ]
-        is_complex = any(
-            word in query_lower for word in complex_words
-        )
-        requires_schema_mapping = any(
-            word in query_lower
-            for word in [
-                "product",
-                "customer",
-                "order",
-                "inventory",
-            ]
-        )
-        might_be_ambiguous = any(
-            word in query_lower
-            for word in ["best", "top", "popular", "most", "average"]
-        )
-
-        analysis = {
-            "complexity": "complex" if is_complex else "simple",
-            "requires_schema_mapping": requires_schema_mapping,
-            "might_be_ambiguous": might_be_ambiguous,
-            "user_role": request.user_context.get("role", "user"),
-        }
+        analysis = analyze_query(request)
 
         duration_ms = (time.time() - step_start) * 1000
         logger.debug(
@@ -168,7 +223,9 @@ class OrchestratorAgent(BaseAgent):
             )
 
             summary_parts = [
-                f"SQL generated in {attempts} "
+                "SQL served from template cache."
+                if sql_result.get("template_hit")
+                else f"SQL generated in {attempts} "
                 f"attempt(s).",
             ]
             if token_bench:
@@ -223,6 +280,31 @@ class OrchestratorAgent(BaseAgent):
             "execution_chain": response.execution_chain,
         }
 
+    def _deadline_exceeded(
+        self,
+        request: QueryRequest,
+        execution_chain: List[ExecutionChainStep],
+    ) -> AgenticResponse:
+        """
+        Helper function used to build the response for a
+        request that ran out of its time budget.
+
+        Keeps the partial execution chain so the caller
+        can see which stage consumed the budget.
+        """
+        message = "Request deadline exceeded"
+        if request.timeout_ms is not None:
+            message += (
+                f" ({request.timeout_ms:.0f}ms budget)"
+            )
+        logger.warning(message)
+        return AgenticResponse(
+            success=False,
+            formatted_answer="",
+            error_message=message,
+            execution_chain=execution_chain,
+        )
+
     async def _escalate_to_human(
         self, request: QueryRequest
     ) -> AgenticResponse:
@@ -324,6 +406,51 @@ class OrchestratorAgent(BaseAgent):
             "escalate": False,
         }
 
+    def _record_turn(
+        self,
+        request: QueryRequest,
+        intermediate_results: Dict[str, Any],
+    ) -> None:
+        """
+        Helper function used to persist a completed turn
+        in the conversation state.
+
+        Only turns that produced SQL are recorded; older
+        turns beyond max_turns are dropped.
+        """
+        sql_result = intermediate_results.get(
+            "sql_generation", {}
+        )
+        final_sql = sql_result.get("final_sql")
+        if not final_sql:
+            return
+        schema_result = intermediate_results.get(
+            "schema", {}
+        )
+        refined_query = (
+            intermediate_results
+            .get("refinement", {})
+            .get("refined_query", request.natural_language)
+        )
+        turn = TurnRecord(
+            question=request.natural_language,
+            refined_query=refined_query,
+            selected_tables=schema_result.get(
+                "selected_tables", []
+            ),
+            pruned_schema=schema_result.get(
+                "pruned_schema", ""
+            ),
+            fk_paths=schema_result.get("fk_paths", []),
+            final_sql=final_sql,
+        )
+        turns = self.conversation_state.setdefault(
+            "turns", []
+        )
+        turns.append(turn)
+        del turns[:-self.max_turns]
+        logger.debug(f"Recorded turn {len(turns)}")
+
     def inject_agent(self, agent_name: str, agent_instance: BaseAgent):
         """
         Inject dependency: register an agent instance.
@@ -351,6 +478,16 @@ class OrchestratorAgent(BaseAgent):
 
         start_time = time.time()
         execution_chain: List[ExecutionChainStep] = []
+        if (
+            request.timeout_ms is not None
+            and request.deadline_at is None
+        ):
+            request = request.model_copy(update={
+                "deadline_at": Deadline.after_ms(
+                    request.timeout_ms
+                ).expires_at,
+            })
+        deadline = Deadline.from_request(request)
 
         try:
             # Step 1: Analyze query
@@ -361,68 +498,32 @@ class OrchestratorAgent(BaseAgent):
             team = await self._form_team(analysis)
             logger.debug(f"Formed team: {team['sequence']}")
 
-            # Step 3: Execute agent pipeline
-            intermediate_results = {}
-            for agent_name in team["sequence"]:
-                agent = self.available_agents.get(agent_name)
-                if agent is None:
-                    logger.warning(
-                        f"Agent {agent_name} not available, "
-                        "skipping")
-                    continue
-
-                result = await agent.execute(
-                    request=request,
-                    previous_results=intermediate_results,
-                    context=self.conversation_state,
-                )
-
-                # Check for veto (Security Agent)
-                veto = result.get("veto_reason")
-                if veto:
-                    logger.warning(
-                        f"Agent {agent_name} "
-                        f"vetoed: {veto}"
-                    )
-                    resolution = (
-                        await self._resolve_conflict(
-                            agent_name,
-                            result,
-                            intermediate_results,
-                        )
+            # Step 3: Execute agent pipeline, bounded by
+            # the request deadline when one is set. The
+            # analysis rides along for model routing.
+            intermediate_results = {"analysis": analysis}
+            pipeline = self._run_team(
+                request,
+                team["sequence"],
+                intermediate_results,
+                execution_chain,
+            )
+            if deadline is None:
+                early_response = await pipeline
+            else:
+                try:
+                    early_response = await asyncio.wait_for(
+                        pipeline,
+                        timeout=max(
+                            deadline.remaining_ms(), 0
+                        ) / 1000,
                     )
-                    if not resolution.get("override"):
-                        if resolution.get("escalate"):
-                            return (
-                                await
-                                self._escalate_to_human(
-                                    request
-                                )
-                            )
-
-                # Check security clearance gate
-                if (
-                    agent_name == "security"
-                    and not result.get("allowed", False)
-                ):
-                    intermediate_results[
-                        agent_name
-                    ] = result
-                    step = result.get(
-                        "execution_step"
+                except asyncio.TimeoutError:
+                    return self._deadline_exceeded(
+                        request, execution_chain
                     )
-                    if step:
-                        execution_chain.append(
-                            step
-                        )
-                    break
-
-                intermediate_results[
-                    agent_name
-                ] = result
-                step = result.get("execution_step")
-                if step:
-                    execution_chain.append(step)
+            if early_response is not None:
+                return early_response
 
             # Step 4: Assemble final response
             final_response = await self._assemble_response(
@@ -432,6 +533,17 @@ class OrchestratorAgent(BaseAgent):
                 execution_chain,
             )
             final_response.execution_chain = execution_chain
+            if self.turn_aware and final_response.success:
+                self._record_turn(
+                    request, intermediate_results
+                )
+            if (
+                self.template_cache is not None
+                and final_response.success
+            ):
+                self._store_template(
+                    request, intermediate_results
+                )
 
             duration_ms = (time.time() - start_time) * 1000
             logger.info(f"Query processed in {duration_ms:.2f}ms")
@@ -445,6 +557,222 @@ class OrchestratorAgent(BaseAgent):
                 error_message=str(e),
             )
 
+    async def _run_team(
+        self,
+        request: QueryRequest,
+        sequence: List[str],
+        intermediate_results: Dict[str, Any],
+        execution_chain: List[ExecutionChainStep],
+    ) -> Optional[AgenticResponse]:
+        """
+        Helper function used to run the agent team in
+        sequence, filling intermediate_results and
+        execution_chain in place.
+
+        Returns:
+            An early response (escalation) or None when
+            the pipeline ran to completion
+        """
+        for agent_name in sequence:
+            agent = self.available_agents.get(agent_name)
+            if agent is None:
+                logger.warning(
+                    f"Agent {agent_name} not available, "
+                    "skipping")
+                continue
+            if agent_name == "schema" and (
+                await self._serve_from_template(
+                    request,
+                    intermediate_results,
+                    execution_chain,
+                )
+            ):
+                break
+
+            result = await agent.execute(
+                request=request,
+                previous_results=intermediate_results,
+                context=self.conversation_state,
+            )
+
+            # Check for veto (Security Agent)
+            veto = result.get("veto_reason")
+            if veto:
+                logger.warning(
+                    f"Agent {agent_name} "
+                    f"vetoed: {veto}"
+                )
+                resolution = (
+                    await self._resolve_conflict(
+                        agent_name,
+                        result,
+                        intermediate_results,
+                    )
+                )
+                if not resolution.get("override"):
+                    if resolution.get("escalate"):
+                        return (
+                            await
+                            self._escalate_to_human(
+                                request
+                            )
+                        )
+
+            intermediate_results[agent_name] = result
+            step = result.get("execution_step")
+            if step:
+                execution_chain.append(step)
+
+            # Check security clearance gate
+            if (
+                agent_name == "security"
+                and not result.get("allowed", False)
+            ):
+                break
+
+        return None
+
+    async def _serve_from_template(
+        self,
+        request: QueryRequest,
+        intermediate_results: Dict[str, Any],
+        execution_chain: List[ExecutionChainStep],
+    ) -> bool:
+        """
+        Helper function used to answer a question from
+        the SQL template cache, in place of schema
+        selection and SQL generation.
+
+        The rendered SQL must pass the static validator
+        against the template's pruned schema and the
+        Security agent's SQL re-check; otherwise the hit
+        is rejected and the pipeline carries on.
+
+        Returns:
+            True if the schema and sql_generation results
+            were filled from a template
+        """
+        refinement = intermediate_results.get(
+            "refinement", {}
+        )
+        skeleton = refinement.get("query_skeleton")
+        if (
+            self.template_cache is None
+            or not skeleton
+            or refinement.get("follow_up", {}).get(
+                "is_follow_up"
+            )
+        ):
+            return False
+        step_start = time.time()
+        literals = refinement.get("literals", [])
+        hit = self.template_cache.lookup(
+            skeleton,
+            literals,
+            request.user_context.get("role", "user"),
+        )
+        if hit is None:
+            return False
+        template, sql = hit
+
+        validation = validate_sql(
+            sql,
+            SchemaCatalog.from_ddl(
+                template.pruned_schema, template.fk_paths
+            ),
+        )
+        reason = None
+        if not validation.is_valid:
+            reason = validation.summary()
+        else:
+            security = self.available_agents.get("security")
+            if security is not None:
+                reason = await security.check_sql(
+                    sql, request.user_context
+                )
+        if reason:
+            self.template_cache.reject()
+            logger.warning(
+                f"Template hit rejected for '{skeleton}': "
+                f"{reason}"
+            )
+            return False
+
+        duration_ms = (time.time() - step_start) * 1000
+        step = self.create_execution_step(
+            action="template_cache_hit",
+            input_data={
+                "query_skeleton": skeleton,
+                "literals": literals,
+            },
+            output_data={
+                "sql": sql,
+                "tables": template.selected_tables,
+            },
+            duration_ms=duration_ms,
+        )
+        intermediate_results["schema"] = {
+            "selected_tables": template.selected_tables,
+            "pruned_schema": template.pruned_schema,
+            "fk_paths": template.fk_paths,
+        }
+        intermediate_results["sql_generation"] = {
+            "final_sql": sql,
+            "explanation": template.explanation,
+            "confidence_score": template.confidence,
+            "attempt_count": 0,
+            "critique_history": [],
+            "template_hit": True,
+            "execution_step": step,
+        }
+        execution_chain.append(step)
+        logger.info(
+            f"Served from SQL template in {duration_ms:.2f}ms"
+        )
+        return True
+
+    def _store_template(
+        self,
+        request: QueryRequest,
+        intermediate_results: Dict[str, Any],
+    ) -> None:
+        """
+        Helper function used to store freshly accepted
+        SQL as a template for its NL skeleton.
+
+        Follow-ups (whose SQL depends on the prior turn),
+        template hits and SQL that was not accepted by
+        review (including accepted_unreviewed: critique
+        skipped for the deadline, provider health or
+        routing) are not stored.
+        """
+        refinement = intermediate_results.get(
+            "refinement", {}
+        )
+        sql_result = intermediate_results.get(
+            "sql_generation", {}
+        )
+        history = sql_result.get("critique_history") or []
+        if (
+            not refinement.get("query_skeleton")
+            or refinement.get("follow_up", {}).get(
+                "is_follow_up"
+            )
+            or sql_result.get("template_hit")
+            or not sql_result.get("final_sql")
+            or not history
+            or history[-1].get("action")
+            not in VERIFIED_ACCEPT_ACTIONS
+        ):
+            return
+        self.template_cache.store(
+            refinement["query_skeleton"],
+            refinement.get("literals", []),
+            request.user_context.get("role", "user"),
+            sql_result,
+            intermediate_results.get("schema", {}),
+        )
+
     def set_conversation_state(self, state: Dict[str, Any]):
         """
         Update conversation state (e.g., from prior turns).
@@ -7,6 +7,8 @@ Responsibilities:
 - Pronoun resolution ("my", "our", "their")
 - Query rewriting for clarity
 - Intent validation against supported operations
+- Literal extraction (dates, numbers, quoted names)
+  into an NL skeleton for the SQL template cache
 """
 
 import calendar
@@ -24,6 +26,7 @@ from typing import (
 )
 
 from text_to_sql.agents.base import BaseAgent
+from text_to_sql.agents.templates import extract_literals
 from text_to_sql.agents.types import QueryRequest
 from text_to_sql.app_logger import get_logger
 from text_to_sql.prompts.prompts import get_prompt
@@ -31,6 +34,33 @@ from text_to_sql.prompts.prompts import get_prompt
 
 logger = get_logger(__name__)
 
+# Phrases that mark a follow-up as an edit of the prior
+# turn ("now only for Germany", "same but last quarter")
+# rather than a new question.
+FOLLOW_UP_MARKERS = [
+    "and for", "break it down", "break that down",
+    "but for", "but only", "exclude", "filter those",
+    "filter them", "how about", "instead", "just for",
+    "just the", "narrow", "now filter", "now group",
+    "now only", "now show", "now sort", "only for",
+    "only in", "same but", "same for", "same query",
+    "same thing", "what about",
+]
+FOLLOW_UP_PREFIXES = ("and", "but", "now", "also")
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(?:"
+    + "|".join(re.escape(m) for m in FOLLOW_UP_MARKERS)
+    + r")\b"
+)
+# Words referring back to the prior turn's result.
+ANAPHORA_PATTERN = re.compile(
+    r"\b(?:it|those|them|these|same|previous|above)\b"
+)
+# A marker only counts in a short query, or one that
+# refers back to the prior result: longer questions
+# naming their own subject are new questions.
+FOLLOW_UP_MAX_WORDS = 8
+
 
 class QueryRefinementAgent(BaseAgent):
     """
@@ -102,6 +132,55 @@ class QueryRefinementAgent(BaseAgent):
             "ambiguities": ambiguities,
         }
 
+    def _detect_follow_up(
+        self,
+        query: str,
+        context: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """
+        Helper function used to detect refinement-style
+        follow-ups in turn-aware sessions.
+
+        Only applies when the session holds a prior turn
+        with accepted SQL (see TurnRecord); otherwise the
+        query is always treated as a new question. Markers
+        match whole words, and only in short queries or
+        ones referring back to the prior result ("it",
+        "those", "same", ...).
+
+        Args:
+            query: Original user query
+            context: Conversation context (may hold
+                "turns")
+
+        Returns:
+            {'is_follow_up': bool, 'markers': [list]}
+        """
+        turns = context.get("turns") or []
+        if not turns or not turns[-1].final_sql:
+            return {"is_follow_up": False, "markers": []}
+
+        query_lower = query.lower().strip()
+        words = re.findall(r"[\w']+", query_lower)
+        if len(words) > FOLLOW_UP_MAX_WORDS and not (
+            ANAPHORA_PATTERN.search(query_lower)
+        ):
+            return {"is_follow_up": False, "markers": []}
+        markers = sorted(set(
+            FOLLOW_UP_PATTERN.findall(query_lower)
+        ))
+        if words and words[0] in FOLLOW_UP_PREFIXES:
+            markers.append(words[0])
+
+        if markers:
+            logger.debug(
+                f"Follow-up detected via {markers}"
+            )
+        return {
+            "is_follow_up": bool(markers),
+            "markers": markers,
+        }
+
     async def _disambiguate_entities(
         self, query: str, context: Dict[str, Any]
     ) -> str:
@@ -207,6 +286,9 @@ class QueryRefinementAgent(BaseAgent):
             return await self._success_result(
                 original, refined, request,
                 (time.time() - step_start) * 1000,
+                follow_up=self._detect_follow_up(
+                    original, context
+                ),
             )
 
         except Exception as e:
@@ -253,11 +335,15 @@ class QueryRefinementAgent(BaseAgent):
         refined: str,
         request: QueryRequest,
         duration_ms: float,
+        follow_up: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """
         Build the success result with ambiguity analysis
         and execution step metadata.
         """
+        follow_up = follow_up or {
+            "is_follow_up": False, "markers": [],
+        }
         ambiguity = await self._detect_ambiguity(
             refined, request.user_context
         )
@@ -267,6 +353,7 @@ class QueryRefinementAgent(BaseAgent):
         has_ambig = ambiguity.get(
             "has_ambiguity", False
         )
+        skeleton, literals = extract_literals(refined)
 
         logger.info(
             f"Query refined in {duration_ms:.2f}ms. "
@@ -283,12 +370,20 @@ class QueryRefinementAgent(BaseAgent):
                 "ambiguities", []
             ),
             "has_ambiguity": has_ambig,
+            "follow_up": follow_up,
+            "query_skeleton": skeleton,
+            "literals": literals,
             "execution_step": self.create_execution_step(
                 action="query_refinement_complete",
                 input_data={"query": original},
                 output_data={
                     "refined_query": refined,
                     "has_ambiguity": has_ambig,
+                    "is_follow_up": (
+                        follow_up["is_follow_up"]
+                    ),
+                    "query_skeleton": skeleton,
+                    "literals": literals,
                 },
                 duration_ms=duration_ms,
             ),
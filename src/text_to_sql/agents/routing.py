@@ -0,0 +1,199 @@
+"""
+Complexity-based model routing.
+
+Maps each query to a complexity tier (from the
+orchestrator's query analysis and the tables Schema
+Intelligence resolved) and each tier to a model per
+LLM lane. A lane routed to None is skipped: simple
+single-table lookups go without an LLM critique, so
+they do not pay the latency of the heaviest path.
+"""
+
+import dataclasses
+
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+)
+
+from text_to_sql.agents.base import DEFAULT_MODEL
+from text_to_sql.model_registry import get_registry
+
+
+TIER_SIMPLE = "simple"
+TIER_STANDARD = "standard"
+TIER_COMPLEX = "complex"
+
+# Queries touching more tables than this are complex
+# regardless of wording.
+COMPLEX_TABLE_COUNT = 3
+
+# Gateway lanes of the SQL Generation agent; critique
+# calls queue behind generation when rate-limited.
+GENERATION_LANE = "SQL Generation"
+CRITIQUE_LANE = "SQL Critique"
+
+# Tier -> lane -> model (None = skip the call)
+DEFAULT_ROUTES: Dict[str, Dict[str, Optional[str]]] = {
+    TIER_SIMPLE: {
+        GENERATION_LANE: "openai:gpt-4o-mini",
+        CRITIQUE_LANE: None,
+    },
+    TIER_STANDARD: {
+        GENERATION_LANE: "openai:gpt-4o-mini",
+        CRITIQUE_LANE: "openai:gpt-4o-mini",
+    },
+    TIER_COMPLEX: {
+        GENERATION_LANE: "openai:gpt-4o",
+        CRITIQUE_LANE: "openai:gpt-4o-mini",
+    },
+}
+
+# Price of a cached (prompt-prefix hit) input token
+# relative to an uncached one.
+CACHED_INPUT_PRICE_RATIO = 0.5
+
+
+@dataclasses.dataclass
+class RouteDecision:
+    """
+    Models chosen for one query.
+
+    Attributes:
+        tier: Complexity tier
+        models: Lane -> model identifier (None =
+            skip); lanes not listed use the agent's
+            own model
+    """
+
+    tier: str
+    models: Dict[str, Optional[str]]
+
+    def model(
+        self,
+        lane: str,
+        default: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Model for a lane, or default when unrouted.
+        """
+        return self.models.get(lane, default)
+
+    def skips(self, lane: str) -> bool:
+        """
+        Whether the lane is routed to no model.
+        """
+        return lane in self.models and self.models[lane] is None
+
+
+class RoutingPolicy:
+    """
+    Picks a model per LLM lane by query complexity.
+
+    Tiers:
+    - complex: the analysis flagged the query as
+      complex, or it spans more than
+      COMPLEX_TABLE_COUNT tables
+    - simple: at most one table and no ambiguity
+      signal (superlatives, averages, ...)
+    - standard: everything else
+
+    Args:
+        routes: Tier -> lane -> model; defaults to
+            DEFAULT_ROUTES
+    """
+
+    def __init__(
+        self,
+        routes: Optional[
+            Dict[str, Dict[str, Optional[str]]]
+        ] = None,
+    ):
+        self.routes = routes if routes is not None else (
+            DEFAULT_ROUTES
+        )
+
+    @classmethod
+    def uniform(cls, model: str = DEFAULT_MODEL) -> "RoutingPolicy":
+        """
+        Baseline policy: one model and a critique for
+        every tier (the unrouted pipeline).
+        """
+        lanes = {GENERATION_LANE: model, CRITIQUE_LANE: model}
+        return cls({
+            tier: dict(lanes)
+            for tier in (
+                TIER_SIMPLE, TIER_STANDARD, TIER_COMPLEX,
+            )
+        })
+
+    def route(
+        self,
+        analysis: Optional[Dict[str, Any]],
+        tables: List[str],
+    ) -> RouteDecision:
+        """
+        Route one query.
+
+        Args:
+            analysis: Orchestrator query analysis
+                (complexity, might_be_ambiguous); may be
+                None when the agent runs standalone
+            tables: Tables the query refers to (entity
+                seeds, before FK expansion)
+
+        Returns:
+            RouteDecision for the query's tier
+        """
+        tier = self.tier(analysis, tables)
+        return RouteDecision(
+            tier=tier,
+            models=dict(self.routes.get(tier, {})),
+        )
+
+    @staticmethod
+    def tier(
+        analysis: Optional[Dict[str, Any]],
+        tables: List[str],
+    ) -> str:
+        """
+        Complexity tier of a query.
+        """
+        analysis = analysis or {}
+        if (
+            analysis.get("complexity") == "complex"
+            or len(tables) > COMPLEX_TABLE_COUNT
+        ):
+            return TIER_COMPLEX
+        if len(tables) <= 1 and not analysis.get(
+            "might_be_ambiguous"
+        ):
+            return TIER_SIMPLE
+        return TIER_STANDARD
+
+
+def estimate_cost(
+    usage_by_model: Dict[str, Dict[str, int]],
+) -> float:
+    """
+    Estimated USD cost of per-model token usage (as
+    reported by LLMGateway.usage_by_model). Cached
+    input tokens are billed at CACHED_INPUT_PRICE_RATIO;
+    prices come from the model registry and models
+    without a price count as zero.
+    """
+    registry = get_registry()
+    total = 0.0
+    for model, usage in usage_by_model.items():
+        spec = registry.get(model)
+        input_price = spec.input_price_per_1m
+        output_price = spec.output_price_per_1m
+        cached = usage.get("cached_input_tokens", 0)
+        total += (
+            (usage.get("input_tokens", 0) - cached) * input_price
+            + cached * input_price * CACHED_INPUT_PRICE_RATIO
+            + usage.get("output_tokens", 0) * output_price
+        ) / 1_000_000
+    return total
@@ -4,6 +4,8 @@ Schema Intelligence Agent: FK graph traversal and schema pruning.
 Responsibilities:
 - Parse DDL to build foreign key graph
 - Extract entities from NL query via LLM
+  (or deterministically, in hybrid mode and for
+  fused-pipeline requests)
 - BFS traversal to find minimal table set
 - Prune schema to selected tables only
 - Benchmark token reduction (before/after)
@@ -28,13 +30,21 @@ from text_to_sql.agents.cache import (
     CacheBackend,
     InProcessTTLCache,
 )
+from text_to_sql.agents.deadline import Deadline
 from text_to_sql.agents.types import (
+    PIPELINE_FUSED,
     EntityExtraction,
     QueryRequest,
 )
 from text_to_sql.app_logger import get_logger
-from text_to_sql.db import get_schema_ddl
+from text_to_sql.db import (
+    SchemaDDL,
+    load_schema_ddl,
+    on_schema_change,
+    preload_schema_ddl,
+)
 from text_to_sql.prompts.prompts import get_prompt
+from text_to_sql.schema_pruner import SchemaPruner
 from text_to_sql.usage_tracker import (
     log_llm_request,
     log_llm_response,
@@ -43,6 +53,20 @@ from text_to_sql.usage_tracker import (
 
 logger = get_logger(__name__)
 
+# Entity extraction may use this share of the remaining
+# request budget; the rest is left for SQL generation.
+ENTITY_BUDGET_SHARE = 0.3
+# Below this remaining budget, skip the LLM and use
+# keyword extraction straight away.
+MIN_LLM_EXTRACTION_MS = 1500.0
+
+# Entity resolution modes: always ask the LLM, or run
+# the deterministic resolver first and only ask the LLM
+# when its confidence is below the threshold.
+ENTITY_RESOLUTION_LLM = "llm"
+ENTITY_RESOLUTION_HYBRID = "hybrid"
+DEFAULT_HYBRID_THRESHOLD = 0.7
+
 
 def _singularize(name: str) -> str:
     """
@@ -68,12 +92,19 @@ class SchemaIntelligenceAgent(BaseAgent):
 
     Uses LLM for entity extraction (not keyword matching)
     and deterministic graph traversal for table selection.
+    In hybrid mode the deterministic SchemaPruner
+    resolver runs first and the LLM is only asked when
+    its confidence is low.
     Benchmarks token reduction as a first-class output.
     """
 
     def __init__(
         self,
         cache: Optional[CacheBackend] = None,
+        entity_resolution: str = ENTITY_RESOLUTION_LLM,
+        hybrid_threshold: float = (
+            DEFAULT_HYBRID_THRESHOLD
+        ),
     ):
         """
         Initialize the Schema Intelligence Agent.
@@ -85,13 +116,19 @@ class SchemaIntelligenceAgent(BaseAgent):
                 5 min TTL). Pass None to disable,
                 or inject a Redis-backed implementation
                 for multi-instance deployments.
+            entity_resolution: "llm" (always extract
+                entities via LLM) or "hybrid"
+                (deterministic first, LLM below
+                hybrid_threshold)
+            hybrid_threshold: Minimum deterministic
+                confidence to skip the LLM
         """
         system_prompt = get_prompt("schema_intelligence")
         super().__init__(
             "Schema Intelligence", system_prompt
         )
         self._entity_agent = PydanticAgent(
-            model=self.model,
+            model=self._llm_model(),
             system_prompt=system_prompt,
             output_type=EntityExtraction,
         )
@@ -100,11 +137,36 @@ class SchemaIntelligenceAgent(BaseAgent):
         self._table_ddl: Dict[str, str] = {}
         self._all_tables: Set[str] = set()
         self._schema_loaded = False
+        self.entity_resolution = entity_resolution
+        self.hybrid_threshold = hybrid_threshold
+        self._pruner: Optional[SchemaPruner] = None
+        self.resolution_stats: Dict[str, int] = {
+            "deterministic": 0,
+            "llm": 0,
+        }
         self._cache = (
             cache
             if cache is not None
             else InProcessTTLCache()
         )
+        # Read and parse the DDL now rather than on the
+        # first request; rebuild when the file changes
+        preload_schema_ddl()
+        on_schema_change(self._on_schema_change)
+
+    def _on_schema_change(self, schema: SchemaDDL) -> None:
+        """
+        Helper function used to drop everything built from
+        the previous schema (FK graph, resolver, pruning
+        cache); the next request rebuilds from the new DDL.
+        """
+        self._schema_loaded = False
+        self._pruner = None
+        self._cache.clear()
+        logger.info(
+            f"Schema changed ({schema.digest[:12]}): "
+            f"FK graph and schema cache reset"
+        )
 
     def _build_fk_graph(self, full_ddl: str) -> None:
         """
@@ -220,12 +282,9 @@ class SchemaIntelligenceAgent(BaseAgent):
         step_start = time.time()
 
         try:
-            full_ddl = get_schema_ddl(
-                llm_context=False
-            )
-            create_ddl = get_schema_ddl(
-                llm_context=True
-            )
+            schema = load_schema_ddl()
+            full_ddl = schema.full
+            create_ddl = schema.create_blocks
             if not self._schema_loaded:
                 self._build_fk_graph(full_ddl)
 
@@ -238,8 +297,25 @@ class SchemaIntelligenceAgent(BaseAgent):
                 )
             )
 
+            # Turn-aware follow-ups reuse (and at most
+            # narrow) the prior turn's selection
+            reused = self._reuse_prior_turn(
+                request, query, create_ddl,
+                previous_results, context, step_start,
+            )
+            if reused is not None:
+                return reused
+
+            # Fused requests get deterministic candidate
+            # tables (SQL generation picks among them),
+            # cached apart from LLM-resolved selections
+            fused = request.pipeline_mode == PIPELINE_FUSED
+            cache_key = (
+                f"{PIPELINE_FUSED}:{query}" if fused else query
+            )
+
             # Check cache before LLM entity extraction
-            cached = self._cache.get(query)
+            cached = self._cache.get(cache_key)
             if cached is not None:
                 duration_ms = (
                     (time.time() - step_start) * 1000
@@ -254,9 +330,13 @@ class SchemaIntelligenceAgent(BaseAgent):
                     query, cached, duration_ms
                 )
 
-            entities = (
-                await self._extract_entities(
-                    query, list(self._all_tables)
+            entities, resolution = (
+                await self._resolve_entities(
+                    query, full_ddl,
+                    deadline=Deadline.from_request(
+                        request
+                    ),
+                    fused=fused,
                 )
             )
             seed_tables = self._resolve_seeds(
@@ -346,7 +426,7 @@ class SchemaIntelligenceAgent(BaseAgent):
             fk_paths = self._get_fk_paths(selected)
 
             # Cache the deterministic results
-            self._cache.set(query, {
+            self._cache.set(cache_key, {
                 "selected_tables": sorted(selected),
                 "pruned_schema": pruned,
                 "token_benchmark": token_bench,
@@ -358,6 +438,7 @@ class SchemaIntelligenceAgent(BaseAgent):
                         entities.business_entities
                     ),
                 },
+                "entity_resolution": resolution,
             })
 
             duration_ms = (
@@ -374,6 +455,7 @@ class SchemaIntelligenceAgent(BaseAgent):
                 query, selected, pruned,
                 token_bench, fk_paths,
                 entities, duration_ms,
+                entity_resolution=resolution,
             )
 
         except Exception as e:
@@ -481,6 +563,9 @@ class SchemaIntelligenceAgent(BaseAgent):
         fk_paths: List[Dict[str, str]],
         entities: Any,
         duration_ms: float,
+        entity_resolution: Optional[
+            Dict[str, Any]
+        ] = None,
     ) -> Dict[str, Any]:
         """
         Assemble the full output dict with execution
@@ -499,6 +584,7 @@ class SchemaIntelligenceAgent(BaseAgent):
             "token_benchmark": token_bench,
             "fk_paths": fk_paths,
             "entities_extracted": entities_data,
+            "entity_resolution": entity_resolution,
         }
         output["execution_step"] = (
             self.create_execution_step(
@@ -522,6 +608,9 @@ class SchemaIntelligenceAgent(BaseAgent):
                     "entities_extracted": (
                         entities_data
                     ),
+                    "entity_resolution": (
+                        entity_resolution
+                    ),
                     "fk_paths": fk_paths,
                 },
                 duration_ms=duration_ms,
@@ -540,21 +629,46 @@ class SchemaIntelligenceAgent(BaseAgent):
         self,
         query: str,
         available_tables: List[str],
+        deadline: Optional[Deadline] = None,
     ) -> EntityExtraction:
         """
         Helper function used to extract table/entity
         references via LLM.
 
         Intentionally LLM-powered (not keyword matching)
-        to handle synonyms and business terms.
+        to handle synonyms and business terms. Falls
+        back to keyword matching when the request
+        deadline leaves too little time for an LLM call
+        or the LLM provider circuit is open.
 
         Args:
             query: Natural language query
             available_tables: List of all table names
+            deadline: Optional request deadline
 
         Returns:
             EntityExtraction with identified tables
         """
+        if not self._llm_available():
+            logger.info(
+                "LLM provider unhealthy. "
+                "Using keyword extraction."
+            )
+            return self._fallback_extraction(
+                query, available_tables
+            )
+        if deadline is not None and not deadline.can_fit(
+            MIN_LLM_EXTRACTION_MS
+        ):
+            logger.info(
+                f"Deadline near "
+                f"({deadline.remaining_ms():.0f}ms left). "
+                f"Using keyword extraction."
+            )
+            return self._fallback_extraction(
+                query, available_tables
+            )
+
         tables_str = ", ".join(sorted(available_tables))
         prompt = (
             f"Given these database tables: "
@@ -574,8 +688,11 @@ class SchemaIntelligenceAgent(BaseAgent):
                 user_prompt=prompt,
                 question=query,
             )
-            result = await self._entity_agent.run(
-                prompt
+            result = await self._run_llm(
+                self._entity_agent, prompt,
+                deadline=deadline,
+                budget_share=ENTITY_BUDGET_SHARE,
+                optional=True,
             )
             usage = result.usage()
             log_llm_response(
@@ -589,6 +706,9 @@ class SchemaIntelligenceAgent(BaseAgent):
                     "output_tokens": (
                         usage.output_tokens
                     ),
+                    "cached_input_tokens": (
+                        usage.cache_read_tokens
+                    ),
                 },
                 generated_sql=(
                     "[entity_extraction]"
@@ -726,6 +846,189 @@ class SchemaIntelligenceAgent(BaseAgent):
                 blocks.append(self._table_ddl[table])
         return "\n\n".join(blocks)
 
+    def _reuse_prior_turn(
+        self,
+        request: QueryRequest,
+        query: str,
+        create_ddl: str,
+        previous_results: Dict[str, Any],
+        context: Dict[str, Any],
+        step_start: float,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Helper function used to reuse the prior turn's
+        schema selection for refinement-style follow-ups.
+
+        Skips LLM entity extraction entirely. Tables
+        named directly in the follow-up (keyword match)
+        are added to the prior selection together with
+        their 1-hop FK neighbours, so "same but for
+        suppliers" still widens the schema.
+
+        Returns None when the current turn is not a
+        follow-up or no prior turn is available.
+        """
+        follow_up = (
+            previous_results
+            .get("refinement", {})
+            .get("follow_up", {})
+        )
+        turns = context.get("turns") or []
+        if not follow_up.get("is_follow_up") or not turns:
+            return None
+        prior = turns[-1]
+        if not prior.selected_tables:
+            return None
+
+        prior_tables = set(prior.selected_tables)
+        named = set(
+            self._fallback_extraction(
+                request.natural_language,
+                list(self._all_tables),
+            ).tables
+        )
+        new_tables = named - prior_tables
+        if new_tables:
+            selected = prior_tables | (
+                self._find_minimal_tables(
+                    new_tables, max_depth=1
+                )
+            )
+            pruned = self._prune_schema(selected)
+            fk_paths = self._get_fk_paths(selected)
+        else:
+            selected = prior_tables
+            pruned = prior.pruned_schema
+            fk_paths = prior.fk_paths
+
+        token_bench = self._benchmark_tokens(
+            create_ddl, pruned
+        )
+        duration_ms = (
+            (time.time() - step_start) * 1000
+        )
+        logger.info(
+            f"Reused prior turn schema: "
+            f"{len(selected)} tables "
+            f"({len(new_tables)} added)"
+        )
+        return {
+            "selected_tables": sorted(selected),
+            "pruned_schema": pruned,
+            "token_benchmark": token_bench,
+            "fk_paths": fk_paths,
+            "entities_extracted": {},
+            "reused_prior_turn": True,
+            "execution_step": self.create_execution_step(
+                action="schema_selection_reused_prior_turn",
+                input_data={
+                    "query": query,
+                    "prior_tables": sorted(prior_tables),
+                },
+                output_data={
+                    "tables": sorted(selected),
+                    "added_tables": sorted(new_tables),
+                    "tokens_before": (
+                        token_bench["full_schema_tokens"]
+                    ),
+                    "tokens_after": (
+                        token_bench["pruned_schema_tokens"]
+                    ),
+                    "reduction_pct": (
+                        token_bench["reduction_pct"]
+                    ),
+                    "fk_paths": fk_paths,
+                },
+                duration_ms=duration_ms,
+            ),
+        }
+
+    async def _resolve_entities(
+        self,
+        query: str,
+        full_ddl: str,
+        deadline: Optional[Deadline] = None,
+        fused: bool = False,
+    ) -> Tuple[EntityExtraction, Dict[str, Any]]:
+        """
+        Helper function used to resolve query entities
+        according to the configured mode.
+
+        In hybrid mode the deterministic three-layer
+        resolver runs first; its seed tables are used
+        directly when its confidence reaches the
+        threshold, saving the LLM round trip. Fused
+        requests always use the deterministic seeds:
+        their FK neighbourhood is only a candidate set
+        that SQL generation narrows down.
+
+        Args:
+            query: Natural language query
+            full_ddl: Full schema DDL (for the pruner)
+            deadline: Optional request deadline
+            fused: Request uses the fused pipeline
+
+        Returns:
+            (entities, resolution metadata: method used
+            and, in hybrid mode, the deterministic
+            confidence and unresolved terms)
+        """
+        if (
+            self.entity_resolution != ENTITY_RESOLUTION_HYBRID
+            and not fused
+        ):
+            entities = await self._extract_entities(
+                query, list(self._all_tables),
+                deadline=deadline,
+            )
+            self.resolution_stats["llm"] += 1
+            return entities, {"method": "llm"}
+
+        if self._pruner is None:
+            self._pruner = SchemaPruner(full_ddl)
+        resolution = self._pruner.resolve_with_confidence(
+            query
+        )
+        info: Dict[str, Any] = {
+            "method": "deterministic",
+            "confidence": resolution.confidence,
+            "threshold": self.hybrid_threshold,
+            "layer_tables": resolution.layer_tables,
+            "unresolved_terms": (
+                resolution.unresolved_terms
+            ),
+        }
+        if fused:
+            info["method"] = "fused"
+        if fused or (
+            resolution.confidence >= self.hybrid_threshold
+        ):
+            self.resolution_stats["deterministic"] += 1
+            logger.info(
+                f"Deterministic resolution "
+                f"(confidence "
+                f"{resolution.confidence:.2f}): "
+                f"{resolution.seed_tables}"
+            )
+            return EntityExtraction(
+                tables=resolution.seed_tables,
+                columns=[],
+                business_entities=[],
+            ), info
+
+        logger.info(
+            f"Low resolution confidence "
+            f"({resolution.confidence:.2f}, unresolved: "
+            f"{resolution.unresolved_terms}). Using LLM."
+        )
+        info["method"] = "llm"
+        self.resolution_stats["llm"] += 1
+        entities = await self._extract_entities(
+            query, list(self._all_tables),
+            deadline=deadline,
+        )
+        return entities, info
+
     def _resolve_seeds(
         self, entities: EntityExtraction
     ) -> Set[str]:
@@ -298,6 +298,48 @@ class SecurityGovernanceAgent(BaseAgent):
                 previous_results, str(e), step_start
             )
 
+    async def check_sql(
+        self,
+        sql: str,
+        user_context: Dict[str, Any],
+    ) -> Optional[str]:
+        """
+        Re-run the security checks on SQL that reaches
+        the user without going through generation (e.g.
+        rendered from the SQL template cache).
+
+        Args:
+            sql: SQL about to be returned
+            user_context: User role, permissions, etc.
+
+        Returns:
+            Veto reason, or None if the SQL passes
+        """
+        access = await self._check_access_control(
+            user_context, sql
+        )
+        if not access.get("allowed"):
+            return access.get("reason")
+        safety = await self._check_query_safety(sql)
+        if not safety.get("safe"):
+            return safety.get("reason")
+        pii = await self._detect_pii_access(sql)
+        if pii.get("found_pii") and not self._can_access_pii(
+            user_context.get("role", "user")
+        ):
+            return (
+                f"SQL accesses PII "
+                f"({', '.join(pii['pii_tables'])})"
+            )
+        risk_score = await self._assess_risk(sql)
+        threshold = self.policies.get("risk_threshold", 0.7)
+        if risk_score > threshold:
+            return (
+                f"Risk score {risk_score:.2f} exceeds "
+                f"threshold {threshold}"
+            )
+        return None
+
     def _veto(
         self,
         action: str,
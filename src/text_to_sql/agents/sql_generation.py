@@ -4,13 +4,33 @@ SQL Generation Agent: Generates SQL with self-critique loop.
 Responsibilities:
 - Generate SQL from pruned schema + refined query
 - Validate SQL syntax (deterministic)
-- Self-critique via second LLM call (B4.3 Reflection)
+- Validate tables / columns / joins against a catalog
+  built from the pruned schema (deterministic)
+- Optionally plan the SQL with EXPLAIN on a read-only
+  connection (planner errors feed the retry prompt,
+  plan cost estimates go into the execution chain)
+- Self-critique via second LLM call (B4.3 Reflection),
+  only when the static check leaves semantic doubt
 - Retry on critique failure (max 2 retries)
+- Edit the prior turn's SQL for follow-up questions
+- Respect the request deadline (stop retrying, skip
+  critique when another round trip will not fit)
+- Optionally route generation / critique to a model
+  per complexity tier (simple lookups skip critique)
+- Fused mode: pick the tables from a deterministic
+  candidate set and write the SQL in one call
+- Streaming mode: check the SQL while it is generated
+  and abort (then retry) on a clearly invalid prefix
 - Track all attempts in execution chain for provenance
 """
 
+import asyncio
+import dataclasses
+import os
 import re
 import time
+
+from collections import Counter
 from typing import (
     Any,
     Dict,
@@ -20,14 +40,44 @@ from typing import (
 
 from pydantic_ai import Agent as PydanticAgent
 
-from text_to_sql.agents.base import BaseAgent
+from text_to_sql.agents.base import (
+    BaseAgent,
+    StreamAborted,
+)
+from text_to_sql.agents.deadline import Deadline
+from text_to_sql.agents.few_shot import (
+    FEW_SHOT_MAX_TOKENS,
+    FewShotExample,
+    FewShotStore,
+    format_example,
+)
+from text_to_sql.agents.routing import (
+    CRITIQUE_LANE,
+    RouteDecision,
+    RoutingPolicy,
+)
 from text_to_sql.agents.types import (
+    PIPELINE_FUSED,
+    VERIFIED_ACCEPT_ACTIONS,
     GeneratedSQL,
     QueryRequest,
     SQLCritique,
+    TurnRecord,
 )
 from text_to_sql.app_logger import get_logger
+from text_to_sql.db import (
+    DEFAULT_EXPLAIN_TIMEOUT_MS,
+    PlannerError,
+    explain_query,
+)
+from text_to_sql.prompts.builder import PromptBuilder
 from text_to_sql.prompts.prompts import get_prompt
+from text_to_sql.sql_validator import (
+    SchemaCatalog,
+    normalize_sql,
+    prefix_tables,
+    validate_sql,
+)
 from text_to_sql.usage_tracker import (
     log_llm_request,
     log_llm_response,
@@ -39,6 +89,17 @@ logger = get_logger(__name__)
 MAX_RETRIES = 2
 BASE_CONFIDENCE = 0.9
 CONFIDENCE_DECAY = 0.15
+# Shares of the remaining request budget a single
+# generation / critique call may consume.
+GENERATION_BUDGET_SHARE = 0.6
+CRITIQUE_BUDGET_SHARE = 0.5
+# Sampling temperatures for n-best candidates (cycled);
+# the first candidate stays greedy.
+N_BEST_TEMPERATURES = (0.0, 0.4, 0.8, 1.0)
+DISALLOWED_KEYWORDS = (
+    "DROP", "DELETE", "INSERT",
+    "UPDATE", "ALTER", "TRUNCATE",
+)
 
 
 class SQLGenerationAgent(BaseAgent):
@@ -48,24 +109,96 @@ class SQLGenerationAgent(BaseAgent):
     Implements B4.3 (Reflection & Self-Critique):
     1. Generate SQL from pruned schema + query
     2. Validate syntax (deterministic)
-    3. LLM self-critique against schema
-    4. Regenerate if issues found (max retries)
+    3. Validate against the schema catalog and,
+       when enabled, the planner (EXPLAIN); errors go
+       straight back to generation, clean SQL is
+       accepted as is
+    4. LLM self-critique when the static check only
+       raised warnings (semantic doubt)
+    5. Regenerate if issues found (max retries)
 
     The critique loop uses a separate LLM call with a
     distinct prompt, ensuring genuine review rather than
     self-confirmation bias.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        explain_validation: Optional[bool] = None,
+        n_best: Optional[int] = None,
+        routing: Optional[RoutingPolicy] = None,
+        few_shot: Optional[FewShotStore] = None,
+        streaming: Optional[bool] = None,
+    ):
         """
         Initialize the SQL Generation Agent.
+
+        Args:
+            explain_validation: Plan each candidate with
+                EXPLAIN against the database before
+                accepting it. Defaults to the
+                SQL_EXPLAIN_VALIDATION env var (off
+                unless set to a non-"0" value).
+            n_best: Candidates generated concurrently in
+                the first round (1 = serial loop only).
+                Defaults to the SQL_N_BEST env var.
+            routing: Picks the generation / critique
+                model per query complexity tier. Defaults
+                to RoutingPolicy() when the SQL_ROUTING
+                env var is set to a non-"0" value, else
+                no routing (agent model, always
+                reviewed).
+            few_shot: Store of verified examples injected
+                into generation prompts; accepted SQL is
+                added to it. Defaults to a store seeded
+                from the golden queries when the
+                SQL_FEW_SHOT env var is set to a non-"0"
+                value (accepted SQL persisted to
+                SQL_FEW_SHOT_STORE, if set), else
+                zero-shot.
+            streaming: Stream generation output and
+                abort as soon as the SQL prefix is
+                clearly invalid (not a SELECT, a
+                disallowed keyword, a table outside the
+                given tables), retrying right away.
+                Defaults to the SQL_STREAMING env var
+                (off unless set to a non-"0" value).
         """
+        if few_shot is None and os.getenv(
+            "SQL_FEW_SHOT", "0"
+        ) != "0":
+            few_shot = FewShotStore.from_golden_queries(
+                path=os.getenv("SQL_FEW_SHOT_STORE") or None
+            )
+        self.few_shot = few_shot
+        if routing is None and os.getenv(
+            "SQL_ROUTING", "0"
+        ) != "0":
+            routing = RoutingPolicy()
+        self.routing = routing
+        if n_best is None:
+            n_best = int(os.getenv("SQL_N_BEST", "1"))
+        self.n_best = max(n_best, 1)
+        if streaming is None:
+            streaming = os.getenv(
+                "SQL_STREAMING", "0"
+            ) != "0"
+        self.streaming = streaming
+        if explain_validation is None:
+            explain_validation = os.getenv(
+                "SQL_EXPLAIN_VALIDATION", "0"
+            ) != "0"
+        self.explain_validation = explain_validation
+        self._explain_timeout_ms = int(os.getenv(
+            "SQL_EXPLAIN_TIMEOUT_MS",
+            DEFAULT_EXPLAIN_TIMEOUT_MS,
+        ))
         system_prompt = get_prompt("sql_generation")
         super().__init__(
             "SQL Generation", system_prompt
         )
         self._gen_agent = PydanticAgent(
-            model=self.model,
+            model=self._llm_model(),
             system_prompt=system_prompt,
             output_type=GeneratedSQL,
         )
@@ -73,16 +206,57 @@ class SQLGenerationAgent(BaseAgent):
             "sql_critique"
         )
         self._critique_agent = PydanticAgent(
-            model=self.model,
+            model=self._llm_model(),
             system_prompt=self._critique_prompt,
             output_type=SQLCritique,
         )
 
+    @staticmethod
+    def _build_critique_prompt(
+        sql: str,
+        schema: str,
+        query: str,
+    ) -> str:
+        """
+        Helper function used to lay out the critique
+        prompt: instructions, schema and checklist
+        (cacheable prefix), then question and SQL.
+
+        Args:
+            sql: Generated SQL to review
+            schema: Pruned schema for reference
+            query: Original NL query
+
+        Returns:
+            Critique user prompt
+        """
+        return (
+            PromptBuilder()
+            .stable(
+                "Review the SQL query below for "
+                "correctness against the schema.\n"
+            )
+            .schema(schema)
+            .stable(
+                "Check:\n"
+                "1. Are all table names valid?\n"
+                "2. Are all column names correct?\n"
+                "3. Are JOIN conditions correct?\n"
+                "4. Does it answer the question?\n"
+                "5. Any missing WHERE clauses?\n"
+            )
+            .variable(f"Original question: {query}\n")
+            .variable(f"Generated SQL:\n{sql}")
+            .build()
+        )
+
     async def _critique_sql(
         self,
         sql: str,
         schema: str,
         query: str,
+        deadline: Optional[Deadline] = None,
+        model: Optional[str] = None,
     ) -> SQLCritique:
         """
         Helper function used to self-critique generated
@@ -96,39 +270,37 @@ class SQLGenerationAgent(BaseAgent):
             sql: Generated SQL to review
             schema: Pruned schema for reference
             query: Original NL query
+            deadline: Optional request deadline
+            model: Model identifier (None = the agent's
+                model)
 
         Returns:
             SQLCritique with validation result
         """
-        prompt = (
-            f"Review this SQL query for correctness "
-            f"against the schema.\n\n"
-            f"Schema:\n{schema}\n\n"
-            f"Original question: {query}\n\n"
-            f"Generated SQL:\n{sql}\n\n"
-            f"Check:\n"
-            f"1. Are all table names valid?\n"
-            f"2. Are all column names correct?\n"
-            f"3. Are JOIN conditions correct?\n"
-            f"4. Does it answer the question?\n"
-            f"5. Any missing WHERE clauses?"
+        prompt = self._build_critique_prompt(
+            sql, schema, query
         )
         try:
             request_id = log_llm_request(
-                model=self.model,
+                model=model or self.model,
                 system_prompt=(
                     self._critique_prompt
                 ),
                 user_prompt=prompt,
                 question=query,
             )
-            result = await self._critique_agent.run(
-                prompt
+            result = await self._run_llm(
+                self._critique_agent, prompt,
+                deadline=deadline,
+                budget_share=CRITIQUE_BUDGET_SHARE,
+                lane=CRITIQUE_LANE,
+                optional=True,
+                model=model,
             )
             usage = result.usage()
             log_llm_response(
                 request_id=request_id,
-                model=self.model,
+                model=model or self.model,
                 question=query,
                 usage={
                     "input_tokens": (
@@ -137,6 +309,9 @@ class SQLGenerationAgent(BaseAgent):
                     "output_tokens": (
                         usage.output_tokens
                     ),
+                    "cached_input_tokens": (
+                        usage.cache_read_tokens
+                    ),
                 },
                 generated_sql=(
                     "[critique] "
@@ -158,6 +333,56 @@ class SQLGenerationAgent(BaseAgent):
                 corrected_sql=None,
             )
 
+    async def _explain(
+        self,
+        sql: str,
+        deadline: Optional[Deadline] = None,
+    ) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Helper function used to plan SQL with EXPLAIN on
+        the read-only pool.
+
+        Database trouble (not configured, unreachable,
+        timeout) only skips the check; a missing
+        configuration disables it for this agent.
+
+        Args:
+            sql: Candidate SQL
+            deadline: Optional request deadline; the check
+                is skipped when its timeout no longer fits
+
+        Returns:
+            (plan estimate or None, planner error or None)
+        """
+        if not self.explain_validation:
+            return None, None
+        if deadline is not None and not deadline.can_fit(
+            self._explain_timeout_ms
+        ):
+            return None, None
+        try:
+            plan = await asyncio.to_thread(
+                explain_query, sql,
+                self._explain_timeout_ms,
+            )
+        except PlannerError as e:
+            return None, str(e)
+        except ValueError as e:
+            logger.warning(
+                f"EXPLAIN validation disabled: {e}"
+            )
+            self.explain_validation = False
+            return None, None
+        except Exception as e:
+            logger.warning(f"EXPLAIN skipped: {e}")
+            return None, None
+        logger.info(
+            f"EXPLAIN ok in {plan['explain_ms']}ms: "
+            f"cost={plan['total_cost']}, "
+            f"rows={plan['plan_rows']}"
+        )
+        return plan, None
+
     async def _execute_internal(
         self,
         request: QueryRequest,
@@ -190,8 +415,40 @@ class SQLGenerationAgent(BaseAgent):
                 step_start,
             )
 
+        prior_turn = self._get_prior_turn(
+            previous_results, context
+        )
+        route = None
+        if self.routing is not None:
+            # Route on the tables the query names, not
+            # the FK-expanded selection
+            entities = (
+                previous_results
+                .get("schema", {})
+                .get("entities_extracted")
+            ) or {}
+            route = self.routing.route(
+                previous_results.get("analysis"),
+                entities.get("tables") or selected_tables,
+            )
+            logger.info(
+                f"Routing: {route.tier} tier, "
+                f"models={route.models}"
+            )
         result = await self._run_critique_loop(
-            query, pruned_schema, selected_tables
+            query, pruned_schema, selected_tables,
+            prior_turn=prior_turn,
+            deadline=Deadline.from_request(request),
+            fk_edges=(
+                previous_results
+                .get("schema", {})
+                .get("fk_paths")
+            ),
+            route=route,
+            fused=(
+                request.pipeline_mode == PIPELINE_FUSED
+                and prior_turn is None
+            ),
         )
         duration_ms = (
             (time.time() - step_start) * 1000
@@ -229,39 +486,153 @@ class SQLGenerationAgent(BaseAgent):
         )
         return query, pruned_schema, selected_tables
 
+    @staticmethod
+    def _get_prior_turn(
+        previous_results: Dict[str, Any],
+        context: Dict[str, Any],
+    ) -> Optional[TurnRecord]:
+        """
+        Return the prior turn to edit when the current
+        query is a refinement-style follow-up, else None.
+        """
+        follow_up = (
+            previous_results
+            .get("refinement", {})
+            .get("follow_up", {})
+        )
+        turns = context.get("turns") or []
+        if not follow_up.get("is_follow_up") or not turns:
+            return None
+        prior = turns[-1]
+        return prior if prior.final_sql else None
+
     async def _run_critique_loop(
         self,
         query: str,
         schema: str,
         tables: List[str],
+        prior_turn: Optional[TurnRecord] = None,
+        deadline: Optional[Deadline] = None,
+        fk_edges: Optional[List[Dict[str, str]]] = None,
+        route: Optional[RouteDecision] = None,
+        fused: bool = False,
     ) -> Dict[str, Any]:
         """
         Run the generate-validate-critique loop.
 
         Each iteration: generate SQL via LLM, validate
-        syntax deterministically, then self-critique via
+        syntax and then tables / columns / joins against
+        the schema catalog deterministically, and only
+        when that leaves semantic doubt self-critique via
         a second LLM call. Retries up to MAX_RETRIES
-        times on failure.
+        times on failure. Follow-up turns (prior_turn
+        set) edit the prior SQL; the edit is validated
+        and reviewed like newly generated SQL.
+
+        With n_best > 1 the first attempt is an n-best
+        round (see _run_n_best); serial retries follow
+        only if none of its candidates was accepted.
+
+        With a deadline, retrying stops as soon as the
+        remaining budget cannot fit another round trip
+        (estimated from the previous attempt).
+
+        With a route, generation and critique use the
+        routed models, and the critique is skipped when
+        the route sends it to no model.
+
+        In fused mode, tables are candidates: the
+        generation call also picks the tables it needs
+        (GeneratedSQL.tables_used, which must be among
+        the candidates), and the tables the accepted SQL
+        reads are returned as tables_used.
+
+        With a few-shot store, accepted SQL for a new
+        question is added to it as an example, unless the
+        critique was skipped (accepted_unreviewed).
         """
         history: List[Dict[str, Any]] = []
         final_sql: Optional[str] = None
         explanation = ""
         attempt = 0
         confidence = BASE_CONFIDENCE
+        round_trip_ms = 0.0
+        catalog = SchemaCatalog.from_ddl(schema, fk_edges)
 
-        for attempt in range(1, MAX_RETRIES + 2):
+        if self.n_best > 1 and prior_turn is None:
+            attempt = 1
+            attempt_start = time.time()
+            sql, explanation, delta, done = (
+                await self._run_n_best(
+                    query, schema, tables, history,
+                    deadline=deadline,
+                    catalog=catalog,
+                    route=route,
+                    fused=fused,
+                )
+            )
+            round_trip_ms = (
+                (time.time() - attempt_start) * 1000
+            )
+            confidence += delta
+            if done:
+                final_sql = sql
+
+        retries = (
+            range(attempt + 1, MAX_RETRIES + 2)
+            if final_sql is None
+            else range(0)
+        )
+        for attempt in retries:
+            if (
+                attempt > 1
+                and deadline is not None
+                and not deadline.can_fit(round_trip_ms)
+            ):
+                self._record(
+                    history, attempt,
+                    history[-1]["sql"],
+                    f"Remaining budget "
+                    f"{deadline.remaining_ms():.0f}ms "
+                    f"cannot fit another round trip "
+                    f"(~{round_trip_ms:.0f}ms)",
+                    "deadline_stop",
+                )
+                attempt -= 1
+                break
+
+            attempt_start = time.time()
             sql, expl, delta, done = (
                 await self._process_attempt(
                     attempt, query, schema,
                     tables, history,
+                    prior_turn=prior_turn,
+                    deadline=deadline,
+                    catalog=catalog,
+                    route=route,
+                    fused=fused,
                 )
             )
+            round_trip_ms = (
+                (time.time() - attempt_start) * 1000
+            )
             explanation = expl or explanation
             confidence += delta
             if done:
                 final_sql = sql
                 break
 
+        if (
+            final_sql is not None
+            and self.few_shot is not None
+            and prior_turn is None
+            and history[-1]["action"] in VERIFIED_ACCEPT_ACTIONS
+        ):
+            self.few_shot.add(
+                query, final_sql,
+                validate_sql(final_sql, catalog).tables,
+            )
+
         if final_sql is None and history:
             last = history[-1]
             if last.get("sql"):
@@ -274,8 +645,244 @@ class SQLGenerationAgent(BaseAgent):
             "confidence": max(confidence, 0.0),
             "attempt": attempt,
             "critique_history": history,
+            "route": route,
+            "edited_prior_sql": (
+                prior_turn is not None and final_sql is not None
+            ),
+            "tables_used": (
+                validate_sql(final_sql, catalog).tables
+                if fused and final_sql
+                else None
+            ),
+            "plan_estimate": next(
+                (
+                    h["plan"] for h in reversed(history)
+                    if "plan" in h and h["sql"] == final_sql
+                ),
+                None,
+            ),
         }
 
+    async def _run_n_best(
+        self,
+        query: str,
+        schema: str,
+        tables: List[str],
+        history: List[Dict[str, Any]],
+        deadline: Optional[Deadline] = None,
+        catalog: Optional[SchemaCatalog] = None,
+        route: Optional[RouteDecision] = None,
+        fused: bool = False,
+    ) -> tuple[Optional[str], str, float, bool]:
+        """
+        Helper function used to generate n_best
+        candidates concurrently (varied temperature),
+        validate them all locally and pick one.
+
+        Candidates failing syntax or the catalog check
+        are recorded and dropped. If a strict plurality
+        (2+) of the rest normalize to the same SQL, that
+        SQL is accepted without critique; on
+        disagreement the best-scoring candidate (clean
+        static check, fewest warnings, most votes) goes
+        through the regular review, critique included.
+
+        Args:
+            query: Natural language query
+            schema: Pruned schema DDL
+            tables: Available table names
+            history: Critique history to append to
+            deadline: Optional request deadline
+            catalog: Schema catalog for static checks
+            route: Optional model route
+            fused: Tables are candidates to choose from
+
+        Returns:
+            (sql, explanation, confidence_delta, done)
+        """
+        round_start = time.time()
+        temperatures = [
+            N_BEST_TEMPERATURES[i % len(N_BEST_TEMPERATURES)]
+            for i in range(self.n_best)
+        ]
+        results = await asyncio.gather(*(
+            self._generate_sql(
+                query=query, schema=schema,
+                tables=tables, prior_critique=None,
+                deadline=deadline,
+                temperature=temperature,
+                model=self._routed(route, self.agent_name),
+                fused=fused,
+            )
+            for temperature in temperatures
+        ), return_exceptions=True)
+        round_ms = (time.time() - round_start) * 1000
+
+        gens: List[Optional[GeneratedSQL]] = []
+        aborted = False
+        for result in results:
+            if isinstance(result, StreamAborted):
+                self._record_abort(history, 1, result)
+                aborted, result = True, None
+            elif isinstance(result, BaseException):
+                raise result
+            gens.append(result)
+
+        usable = []
+        for gen in gens:
+            if gen is None:
+                continue
+            ok, issues = self._validate_syntax(gen.sql)
+            if not ok:
+                self._record(
+                    history, 1, gen.sql,
+                    f"Syntax issues: {issues}",
+                    "retry_syntax",
+                )
+                continue
+            static = validate_sql(gen.sql, catalog) if (
+                catalog is not None
+            ) else None
+            if static is not None and not static.is_valid:
+                self._record(
+                    history, 1, gen.sql,
+                    f"Static check: {static.summary()}",
+                    "retry_static",
+                )
+                continue
+            stray = self._stray_tables(
+                gen, tables if fused else None
+            )
+            if stray:
+                self._record(
+                    history, 1, gen.sql, stray,
+                    "retry_tables",
+                )
+                continue
+            usable.append((gen, static, normalize_sql(gen.sql)))
+
+        if not usable:
+            if not any(gens) and not aborted:
+                self._record(
+                    history, 1, None,
+                    "Generation failed", "failed",
+                )
+            return None, "", -CONFIDENCE_DECAY, False
+
+        votes = Counter(norm for _, _, norm in usable)
+        ranking = sorted(
+            usable,
+            key=lambda c: (
+                c[1] is not None and c[1].needs_review,
+                len(c[1].warnings) if c[1] else 0,
+                -votes[c[2]],
+            ),
+        )
+        (top_sql, top_votes), *others = votes.most_common()
+        consensus = None
+        best = ranking[0]
+        if top_votes > 1 and (
+            not others or others[0][1] < top_votes
+        ):
+            best = next(c for c in ranking if c[2] == top_sql)
+            consensus = (
+                f"Consensus: {top_votes}/{len(gens)} "
+                f"candidates agree"
+            )
+        logger.info(
+            f"n-best: {len(usable)}/{len(gens)} usable, "
+            f"{len(votes)} distinct, "
+            f"{'consensus' if consensus else 'disagreement'}"
+        )
+        return await self._review_candidate(
+            1, best[0], query, schema, history,
+            round_ms,
+            deadline=deadline,
+            catalog=catalog,
+            consensus=consensus,
+            route=route,
+            candidates=tables if fused else None,
+        )
+
+    @staticmethod
+    def _prefix_issue(
+        sql: str,
+        tables: List[str],
+    ) -> Optional[str]:
+        """
+        Helper function used to check SQL while it is
+        streamed: only problems no continuation can fix
+        are reported.
+
+        Args:
+            sql: SQL generated so far
+            tables: Tables the query may read
+
+        Returns:
+            Abort reason, or None to keep streaming
+        """
+        head = sql.lstrip().upper()
+        if head and not "SELECT".startswith(head[:6]):
+            return "Query must start with SELECT"
+        for keyword in DISALLOWED_KEYWORDS:
+            # A trailing word may still be growing
+            if re.search(rf"\b{keyword}\b(?=\W)", head):
+                return f"Contains disallowed: {keyword}"
+        allowed = {t.lower() for t in tables}
+        stray = [
+            t for t in prefix_tables(sql)
+            if t.lower() not in allowed
+        ]
+        if stray:
+            return (
+                f"References tables outside "
+                f"{', '.join(sorted(allowed))}: "
+                f"{', '.join(stray)}"
+            )
+        return None
+
+    @staticmethod
+    def _stray_tables(
+        gen: GeneratedSQL,
+        candidates: Optional[List[str]],
+    ) -> Optional[str]:
+        """
+        Helper function used to check a fused-mode
+        candidate: every table the model says it used
+        must be one of the candidate tables.
+
+        Returns:
+            Retry feedback, or None when the choice is
+            valid (or not in fused mode)
+        """
+        if candidates is None:
+            return None
+        allowed = {t.lower() for t in candidates}
+        stray = sorted(
+            t for t in gen.tables_used
+            if t.lower() not in allowed
+        )
+        if not stray:
+            return None
+        return (
+            f"tables_used not among the candidate "
+            f"tables: {', '.join(stray)}. Choose only "
+            f"from: {', '.join(sorted(allowed))}"
+        )
+
+    @staticmethod
+    def _routed(
+        route: Optional[RouteDecision],
+        lane: str,
+    ) -> Optional[str]:
+        """
+        Helper function used to look up the routed
+        model for a lane (None = the agent's model).
+        """
+        if route is None:
+            return None
+        return route.model(lane)
+
     @staticmethod
     def _record(
         history: List[Dict[str, Any]],
@@ -283,16 +890,42 @@ class SQLGenerationAgent(BaseAgent):
         sql: Optional[str],
         critique: str,
         action: str,
+        plan: Optional[Dict[str, Any]] = None,
     ) -> None:
         """
-        Append one entry to the critique history.
+        Append one entry to the critique history (with
+        the EXPLAIN estimate of the SQL, if planned).
         """
-        history.append({
+        entry = {
             "attempt": attempt,
             "sql": sql,
             "critique": critique,
             "action": action,
-        })
+        }
+        if plan is not None:
+            entry["plan"] = plan
+        history.append(entry)
+
+    @classmethod
+    def _record_abort(
+        cls,
+        history: List[Dict[str, Any]],
+        attempt: int,
+        error: StreamAborted,
+    ) -> None:
+        """
+        Append an aborted stream to the critique history.
+
+        The partial SQL only goes into the feedback: it
+        must never be returned as the final SQL.
+        """
+        partial = getattr(error.partial, "sql", "") or ""
+        cls._record(
+            history, attempt, None,
+            f"Generation aborted: {error.reason} "
+            f"(output so far: {partial.strip()})",
+            "retry_stream_abort",
+        )
 
     async def _process_attempt(
         self,
@@ -301,6 +934,11 @@ class SQLGenerationAgent(BaseAgent):
         schema: str,
         tables: List[str],
         history: List[Dict[str, Any]],
+        prior_turn: Optional[TurnRecord] = None,
+        deadline: Optional[Deadline] = None,
+        catalog: Optional[SchemaCatalog] = None,
+        route: Optional[RouteDecision] = None,
+        fused: bool = False,
     ) -> tuple[Optional[str], str, float, bool]:
         """
         Process one generate-validate-critique cycle.
@@ -308,13 +946,23 @@ class SQLGenerationAgent(BaseAgent):
         Returns (sql, explanation, confidence_delta, done)
         where done=True means the SQL was accepted.
         """
-        gen = await self._generate_sql(
-            query=query, schema=schema,
-            tables=tables,
-            prior_critique=(
-                history[-1] if history else None
-            ),
-        )
+        gen_start = time.time()
+        try:
+            gen = await self._generate_sql(
+                query=query, schema=schema,
+                tables=tables,
+                prior_critique=(
+                    history[-1] if history else None
+                ),
+                prior_turn=prior_turn,
+                deadline=deadline,
+                model=self._routed(route, self.agent_name),
+                fused=fused,
+            )
+        except StreamAborted as e:
+            self._record_abort(history, attempt, e)
+            return None, "", -CONFIDENCE_DECAY, False
+        gen_ms = (time.time() - gen_start) * 1000
 
         if gen is None:
             self._record(
@@ -323,6 +971,46 @@ class SQLGenerationAgent(BaseAgent):
             )
             return None, "", 0, False
 
+        return await self._review_candidate(
+            attempt, gen, query, schema, history,
+            gen_ms,
+            deadline=deadline,
+            catalog=catalog,
+            route=route,
+            candidates=tables if fused else None,
+        )
+
+    async def _review_candidate(
+        self,
+        attempt: int,
+        gen: GeneratedSQL,
+        query: str,
+        schema: str,
+        history: List[Dict[str, Any]],
+        gen_ms: float,
+        deadline: Optional[Deadline] = None,
+        catalog: Optional[SchemaCatalog] = None,
+        consensus: Optional[str] = None,
+        route: Optional[RouteDecision] = None,
+        candidates: Optional[List[str]] = None,
+    ) -> tuple[Optional[str], str, float, bool]:
+        """
+        Validate one generated candidate and decide
+        whether it needs an LLM critique.
+
+        Deterministic checks (syntax, catalog, EXPLAIN)
+        run first; SQL that passes them is accepted
+        without critique when it is statically clean or
+        agreed on by an n-best round (consensus set).
+        Follow-up edits get no shortcut. Otherwise the critique
+        decides, unless the route skips it (simple
+        queries) or it no longer fits. In fused mode
+        (candidates set) the tables the model chose
+        must be among the candidates.
+
+        Returns (sql, explanation, confidence_delta, done)
+        where done=True means the SQL was accepted.
+        """
         ok, issues = self._validate_syntax(gen.sql)
         if not ok:
             self._record(
@@ -335,14 +1023,110 @@ class SQLGenerationAgent(BaseAgent):
                 -CONFIDENCE_DECAY, False,
             )
 
+        static = (
+            validate_sql(gen.sql, catalog)
+            if catalog is not None
+            else None
+        )
+        if static is not None and not static.is_valid:
+            # Structured issues feed the retry prompt
+            self._record(
+                history, attempt, gen.sql,
+                f"Static check: {static.summary()}",
+                "retry_static",
+            )
+            return (
+                None, gen.explanation,
+                -CONFIDENCE_DECAY, False,
+            )
+
+        stray = self._stray_tables(gen, candidates)
+        if stray:
+            self._record(
+                history, attempt, gen.sql, stray,
+                "retry_tables",
+            )
+            return (
+                None, gen.explanation,
+                -CONFIDENCE_DECAY, False,
+            )
+
+        plan, planner_error = await self._explain(
+            gen.sql, deadline
+        )
+        if planner_error is not None:
+            self._record(
+                history, attempt, gen.sql,
+                f"Planner error: {planner_error}",
+                "retry_explain",
+            )
+            return (
+                None, gen.explanation,
+                -CONFIDENCE_DECAY, False,
+            )
+
+        # Independent samples converged on the same SQL
+        if consensus is not None:
+            self._record(
+                history, attempt, gen.sql,
+                consensus, "accepted_consensus",
+                plan=plan,
+            )
+            return gen.sql, gen.explanation, 0, True
+
+        # Every table, column and join checked out
+        # against the catalog (or the planner, when the
+        # schema could not be parsed): nothing left for
+        # a critique call to catch cheaply
+        if static is not None and not static.warnings and (
+            static.checked or plan is not None
+        ):
+            self._record(
+                history, attempt, gen.sql,
+                "Static check passed",
+                "accepted_static", plan=plan,
+            )
+            return gen.sql, gen.explanation, 0, True
+
+        # Degraded-but-fast: a critique costs about as
+        # much as a generation; skip it if that no
+        # longer fits the request budget or the
+        # provider is failing.
+        skip_reason = None
+        if route is not None and route.skips(CRITIQUE_LANE):
+            skip_reason = f"{route.tier} query (routing)"
+        elif not self._llm_available():
+            skip_reason = "LLM provider unhealthy"
+        elif deadline is not None and not deadline.can_fit(
+            gen_ms
+        ):
+            skip_reason = "deadline near"
+        if skip_reason is not None:
+            self._record(
+                history, attempt, gen.sql,
+                f"Critique skipped: {skip_reason}",
+                "accepted_unreviewed", plan=plan,
+            )
+            return (
+                gen.sql, gen.explanation,
+                -CONFIDENCE_DECAY, True,
+            )
+
+        if static is not None and static.warnings:
+            logger.info(
+                f"Static check doubts, requesting "
+                f"critique: {static.summary()}"
+            )
         critique = await self._critique_sql(
             sql=gen.sql, schema=schema,
-            query=query,
+            query=query, deadline=deadline,
+            model=self._routed(route, CRITIQUE_LANE),
         )
         if critique.is_valid:
             self._record(
                 history, attempt, gen.sql,
                 "No issues found", "accepted",
+                plan=plan,
             )
             return gen.sql, gen.explanation, 0, True
 
@@ -358,6 +1142,13 @@ class SQLGenerationAgent(BaseAgent):
                     critique.corrected_sql
                 )
             )
+            if ok_corr and catalog is not None:
+                corr_static = validate_sql(
+                    critique.corrected_sql, catalog
+                )
+                if not corr_static.is_valid:
+                    ok_corr = False
+                    corr_issues = [corr_static.summary()]
             if ok_corr:
                 self._record(
                     history, attempt,
@@ -403,7 +1194,10 @@ class SQLGenerationAgent(BaseAgent):
             "confidence_score": confidence,
             "attempt_count": attempt,
             "critique_history": history,
+            "plan_estimate": result.get("plan_estimate"),
+            "tables_used": result.get("tables_used"),
         }
+        route = result.get("route")
         output["execution_step"] = (
             self.create_execution_step(
                 action="sql_generation_complete",
@@ -424,6 +1218,20 @@ class SQLGenerationAgent(BaseAgent):
                         else "none"
                     ),
                     "critique_history": history,
+                    "edited_prior_sql": result.get(
+                        "edited_prior_sql", False
+                    ),
+                    "plan_estimate": result.get(
+                        "plan_estimate"
+                    ),
+                    "routing": (
+                        dataclasses.asdict(route)
+                        if route is not None
+                        else None
+                    ),
+                    "tables_used": result.get(
+                        "tables_used"
+                    ),
                 },
                 duration_ms=duration_ms,
             )
@@ -436,41 +1244,189 @@ class SQLGenerationAgent(BaseAgent):
         )
         return output
 
-    async def _generate_sql(
-        self,
+    @staticmethod
+    def _build_generation_prompt(
         query: str,
         schema: str,
         tables: List[str],
         prior_critique: Optional[Dict[str, Any]],
-    ) -> Optional[GeneratedSQL]:
+        prior_turn: Optional[TurnRecord] = None,
+        fused: bool = False,
+        examples: Optional[List[FewShotExample]] = None,
+    ) -> str:
         """
-        Helper function used to generate SQL via LLM
-        with structured output.
+        Helper function used to lay out the generation
+        prompt: schema, tables and instruction
+        (cacheable prefix), then the question, prior
+        turn and critique feedback.
 
         Args:
             query: Natural language query
             schema: Pruned schema DDL
             tables: Available table names
             prior_critique: Previous critique for retry
+            prior_turn: Prior turn whose SQL should be
+                edited (follow-up questions only)
+            fused: Tables are candidates; the model
+                also picks the ones it needs
+            examples: Verified examples for similar
+                questions (new questions only)
 
         Returns:
-            GeneratedSQL or None if generation fails
+            Generation user prompt
         """
-        prompt_parts = [
-            f"Schema:\n{schema}\n",
-            f"Available tables: {', '.join(tables)}\n",
-            f"Question: {query}\n",
-            "Generate a PostgreSQL SELECT query.",
-        ]
+        builder = PromptBuilder()
+        if examples and prior_turn is None:
+            builder.variable(
+                "Verified SQL for similar questions:\n\n"
+                + "\n".join(format_example(e) for e in examples)
+            )
+        if prior_turn is not None:
+            (
+                builder
+                .schema(schema)
+                .tables(tables)
+                .stable(
+                    "Edit the previous SQL so it answers "
+                    "the follow-up. Keep everything the "
+                    "follow-up does not change.\n"
+                )
+                .variable(
+                    f"Previous question: "
+                    f"{prior_turn.question}\n"
+                )
+                .variable(
+                    f"Previous SQL:\n{prior_turn.final_sql}\n"
+                )
+                .variable(f"Follow-up: {query}")
+            )
+        elif fused:
+            (
+                builder
+                .schema(schema, label="Schema (candidate tables)")
+                .tables(tables, label="Candidate tables")
+                .stable(
+                    "Pick only the candidate tables the "
+                    "question needs and list them in "
+                    "tables_used, then generate a "
+                    "PostgreSQL SELECT query over them.\n"
+                )
+                .variable(f"Question: {query}")
+            )
+        else:
+            (
+                builder
+                .schema(schema)
+                .tables(tables)
+                .stable(
+                    "Generate a PostgreSQL SELECT query "
+                    "for the question below.\n"
+                )
+                .variable(f"Question: {query}")
+            )
 
         if prior_critique:
-            prompt_parts.append(
+            builder.variable(
                 f"\nPrevious attempt had issues: "
                 f"{prior_critique.get('critique', '')}"
                 f"\nPlease fix these issues."
             )
 
-        prompt = "\n".join(prompt_parts)
+        return builder.build()
+
+    def _select_examples(
+        self,
+        query: str,
+        tables: List[str],
+        committed_tokens: int,
+    ) -> List[FewShotExample]:
+        """
+        Helper function used to retrieve few-shot
+        examples restricted to the selected tables and
+        keep the best ones that fit the token budget
+        (FEW_SHOT_MAX_TOKENS, capped by what the
+        context window has left).
+
+        Args:
+            query: Natural language query
+            tables: Selected table names
+            committed_tokens: Tokens of the prompt
+                without examples
+
+        Returns:
+            Examples to inject, best first
+        """
+        allowance = min(
+            FEW_SHOT_MAX_TOKENS,
+            self._available_token_budget(committed_tokens),
+        )
+        chosen: List[FewShotExample] = []
+        for example in self.few_shot.search(query, tables):
+            cost = self._count_tokens(format_example(example))
+            if cost > allowance:
+                continue
+            chosen.append(example)
+            allowance -= cost
+        if chosen:
+            logger.info(
+                f"Few-shot: {len(chosen)} example(s) for "
+                f"tables {sorted(tables)}"
+            )
+        return chosen
+
+    async def _generate_sql(
+        self,
+        query: str,
+        schema: str,
+        tables: List[str],
+        prior_critique: Optional[Dict[str, Any]],
+        prior_turn: Optional[TurnRecord] = None,
+        deadline: Optional[Deadline] = None,
+        temperature: Optional[float] = None,
+        model: Optional[str] = None,
+        fused: bool = False,
+    ) -> Optional[GeneratedSQL]:
+        """
+        Helper function used to generate SQL via LLM
+        with structured output.
+
+        Args:
+            query: Natural language query
+            schema: Pruned schema DDL
+            tables: Available table names
+            prior_critique: Previous critique for retry
+            prior_turn: Prior turn whose SQL should be
+                edited (follow-up questions only)
+            deadline: Optional request deadline
+            temperature: Sampling temperature (None =
+                model default)
+            model: Model identifier (None = the agent's
+                model)
+            fused: Tables are candidates; the model
+                also picks the ones it needs
+
+        Returns:
+            GeneratedSQL or None if generation fails
+
+        Raises:
+            StreamAborted: when streaming and the SQL
+                prefix was rejected (see _prefix_issue)
+        """
+        prompt = self._build_generation_prompt(
+            query, schema, tables, prior_critique,
+            prior_turn=prior_turn, fused=fused,
+        )
+        if self.few_shot is not None and prior_turn is None:
+            examples = self._select_examples(
+                query, tables,
+                self._count_tokens(prompt)
+                + self._count_tokens(self.system_prompt),
+            )
+            if examples:
+                prompt = self._build_generation_prompt(
+                    query, schema, tables, prior_critique,
+                    fused=fused, examples=examples,
+                )
 
         # Context budget check
         prompt_tokens = self._count_tokens(prompt)
@@ -479,7 +1435,7 @@ class SQLGenerationAgent(BaseAgent):
         )
         committed = prompt_tokens + system_tokens
         budget = self._available_token_budget(
-            committed
+            committed, model=model
         )
         if budget < 0:
             logger.warning(
@@ -492,18 +1448,33 @@ class SQLGenerationAgent(BaseAgent):
 
         try:
             request_id = log_llm_request(
-                model=self.model,
+                model=model or self.model,
                 system_prompt=self.system_prompt,
                 user_prompt=prompt,
                 question=query,
             )
-            result = await self._gen_agent.run(
-                prompt
+            result = await self._run_llm(
+                self._gen_agent, prompt,
+                deadline=deadline,
+                budget_share=GENERATION_BUDGET_SHARE,
+                model_settings=(
+                    {"temperature": temperature}
+                    if temperature is not None
+                    else None
+                ),
+                model=model,
+                abort_check=(
+                    (lambda partial: self._prefix_issue(
+                        partial.sql, tables
+                    ))
+                    if self.streaming
+                    else None
+                ),
             )
             usage = result.usage()
             log_llm_response(
                 request_id=request_id,
-                model=self.model,
+                model=model or self.model,
                 question=query,
                 usage={
                     "input_tokens": (
@@ -512,10 +1483,29 @@ class SQLGenerationAgent(BaseAgent):
                     "output_tokens": (
                         usage.output_tokens
                     ),
+                    "cached_input_tokens": (
+                        usage.cache_read_tokens
+                    ),
                 },
                 generated_sql=result.output.sql,
             )
             return result.output
+        except StreamAborted as e:
+            logger.info(f"SQL generation aborted: {e.reason}")
+            log_llm_response(
+                request_id=request_id,
+                model=model or self.model,
+                question=query,
+                usage={
+                    "input_tokens": e.usage.input_tokens,
+                    "output_tokens": e.usage.output_tokens,
+                    "cached_input_tokens": (
+                        e.usage.cache_read_tokens
+                    ),
+                },
+                generated_sql=e.partial.sql,
+            )
+            raise
         except Exception as e:
             logger.error(
                 f"SQL generation LLM failed: {e}"
@@ -583,11 +1573,7 @@ class SQLGenerationAgent(BaseAgent):
             )
 
         # Check for dangerous operations
-        dangerous = [
-            "DROP", "DELETE", "INSERT",
-            "UPDATE", "ALTER", "TRUNCATE",
-        ]
-        for keyword in dangerous:
+        for keyword in DISALLOWED_KEYWORDS:
             pattern = rf"\b{keyword}\b"
             if re.search(pattern, sql_upper):
                 issues.append(
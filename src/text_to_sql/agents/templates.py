@@ -0,0 +1,438 @@
+"""
+Parameterized SQL template cache.
+
+Many questions differ only in their literals ("orders
+between 2026-03-01 and 2026-03-31" vs the same for
+April, another quoted category, another product code).
+Refinement reduces the refined question to an NL
+skeleton with typed placeholders; accepted SQL is
+stored per skeleton (and role) as a template whose
+literals tied to the question became bind parameters.
+A repeat renders the template with the new literals
+and is served after the static validator and a
+security re-check, with no LLM call.
+
+A template is only stored when every question literal
+appears exactly once among the SQL's literals, so a
+value that was rewritten (a derived end date, an
+interval) never gets a stale constant.
+"""
+
+import dataclasses
+import re
+
+from datetime import date
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from text_to_sql.agents.cache import (
+    CacheBackend,
+    InProcessTTLCache,
+)
+from text_to_sql.app_logger import get_logger
+from text_to_sql.db import SchemaDDL, on_schema_change
+from text_to_sql.sql_validator import literal_spans
+
+
+logger = get_logger(__name__)
+
+LITERAL_DATE = "date"
+LITERAL_NUMBER = "number"
+LITERAL_STRING = "string"
+
+# Templates outlive the per-query caches: they only go
+# stale with a schema change (which clears them).
+TEMPLATE_CACHE_SIZE = 1024
+TEMPLATE_CACHE_TTL = 24 * 3600
+
+# Literal patterns, in priority order: quoted names,
+# ISO dates (as refinement resolves relative dates),
+# codes such as P001, plain numbers.
+LITERAL_PATTERN = re.compile(
+    r"""
+    '(?P<single>[^']+)'
+    |"(?P<double>[^"]+)"
+    |(?P<date>\b\d{4}-\d{2}-\d{2}\b)
+    |(?P<code>\b[A-Z]{1,4}-?\d{2,}\b)
+    |(?P<number>(?<![\w.])\d+(?:\.\d+)?(?![\w.]))
+    """,
+    re.VERBOSE,
+)
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+def extract_literals(
+    query: str,
+) -> Tuple[str, List[Dict[str, str]]]:
+    """
+    Helper function used to split a question into its
+    NL skeleton and literals.
+
+    Args:
+        query: Refined natural language question
+
+    Returns:
+        (skeleton, literals): the lower-cased question
+        with each literal replaced by {date} / {number}
+        / {string}, and the literals in order as
+        {"kind", "value"} dicts
+    """
+    literals: List[Dict[str, str]] = []
+
+    def replace(match: re.Match) -> str:
+        group = match.lastgroup
+        if group in ("single", "double", "code"):
+            kind = LITERAL_STRING
+        elif group == "date":
+            kind = LITERAL_DATE
+        else:
+            kind = LITERAL_NUMBER
+        literals.append({"kind": kind, "value": match.group(group)})
+        return "{" + kind + "}"
+
+    skeleton = LITERAL_PATTERN.sub(replace, query)
+    return " ".join(skeleton.lower().split()), literals
+
+
+@dataclasses.dataclass
+class TemplateSlot:
+    """
+    One bind parameter of a template.
+
+    Attributes:
+        literal: Index into the question's literals
+        kind: Literal kind
+        prefix: Text kept before the value inside the
+            SQL string literal (e.g. "%" for LIKE)
+        suffix: Text kept after the value
+    """
+
+    literal: int
+    kind: str
+    prefix: str = ""
+    suffix: str = ""
+
+
+@dataclasses.dataclass
+class SQLTemplate:
+    """
+    Accepted SQL with its literals as bind parameters.
+
+    Attributes:
+        sql: SQL with %(pN)s placeholders
+        slots: Parameter N -> question literal
+        kinds: Literal kinds of the question, in order
+        selected_tables: Schema selection of the
+            original request
+        pruned_schema: Pruned DDL the SQL was validated
+            against
+        fk_paths: FK relationships of the selection
+        explanation: Generation explanation
+        confidence: Confidence of the original SQL
+    """
+
+    sql: str
+    slots: List[TemplateSlot]
+    kinds: List[str]
+    selected_tables: List[str] = dataclasses.field(
+        default_factory=list
+    )
+    pruned_schema: str = ""
+    fk_paths: List[Dict[str, str]] = dataclasses.field(
+        default_factory=list
+    )
+    explanation: str = ""
+    confidence: float = 0.0
+
+
+def _sql_literal_value(text: str, kind: str) -> Optional[str]:
+    """
+    Helper function used to read a string / number
+    token's value (None for E'' / B'' / X'' strings).
+    """
+    if kind == "number":
+        return text
+    if not text.startswith("'"):
+        return None
+    return text[1:-1].replace("''", "'")
+
+
+def build_template(
+    sql: str,
+    literals: List[Dict[str, str]],
+) -> Optional[SQLTemplate]:
+    """
+    Helper function used to turn accepted SQL into a
+    template over the question's literals.
+
+    Each literal must match exactly one SQL literal
+    (numbers by value, dates and strings as the whole
+    string or a LIKE pattern around it), and no SQL
+    literal may serve two question literals.
+
+    Args:
+        sql: Accepted SQL
+        literals: Question literals from
+            extract_literals
+
+    Returns:
+        SQLTemplate, or None when the SQL cannot be
+        parameterized safely
+    """
+    tokens = literal_spans(sql)
+    if any(kind == "param" for _, _, kind in tokens):
+        return None
+    spans = [
+        (start, end, kind, _sql_literal_value(sql[start:end], kind))
+        for start, end, kind in tokens
+    ]
+    bound: Dict[int, TemplateSlot] = {}
+    for index, literal in enumerate(literals):
+        value = literal["value"]
+        matches = []
+        for position, (_, _, kind, text) in enumerate(spans):
+            if text is None:
+                continue
+            if literal["kind"] == LITERAL_NUMBER:
+                if kind == "number" and _same_number(text, value):
+                    matches.append((position, "", ""))
+            elif kind == "string":
+                at = text.lower().find(value.lower())
+                if at < 0:
+                    continue
+                prefix, suffix = text[:at], text[at + len(value):]
+                if prefix.strip("%") or suffix.strip("%"):
+                    continue
+                matches.append((position, prefix, suffix))
+        if len(matches) != 1 or matches[0][0] in bound:
+            return None
+        position, prefix, suffix = matches[0]
+        bound[position] = TemplateSlot(
+            index, literal["kind"], prefix, suffix
+        )
+
+    parts, slots, cursor = [], [], 0
+    for position in sorted(bound):
+        start, end, _, _ = spans[position]
+        parts.append(sql[cursor:start])
+        parts.append(f"%(p{len(slots)})s")
+        slots.append(bound[position])
+        cursor = end
+    parts.append(sql[cursor:])
+    return SQLTemplate(
+        sql="".join(parts),
+        slots=slots,
+        kinds=[literal["kind"] for literal in literals],
+    )
+
+
+def render_template(
+    template: SQLTemplate,
+    literals: List[Dict[str, str]],
+) -> Optional[str]:
+    """
+    Helper function used to bind a question's literals
+    into a template.
+
+    Values are checked against their kind (numbers and
+    ISO dates must parse) and strings are quoted with
+    embedded quotes doubled.
+
+    Args:
+        template: Stored template
+        literals: Literals of the new question
+
+    Returns:
+        SQL, or None when the literals do not fit the
+        template
+    """
+    if [literal["kind"] for literal in literals] != template.kinds:
+        return None
+    values = []
+    for slot in template.slots:
+        value = literals[slot.literal]["value"]
+        if slot.kind == LITERAL_NUMBER:
+            if not NUMBER_PATTERN.fullmatch(value):
+                return None
+            values.append(value)
+            continue
+        if slot.kind == LITERAL_DATE:
+            try:
+                date.fromisoformat(value)
+            except ValueError:
+                return None
+        text = f"{slot.prefix}{value}{slot.suffix}"
+        values.append("'" + text.replace("'", "''") + "'")
+
+    parts, cursor = [], 0
+    params = [
+        (start, end)
+        for start, end, kind in literal_spans(template.sql)
+        if kind == "param"
+    ]
+    if len(params) != len(values):
+        return None
+    for (start, end), value in zip(params, values):
+        parts.append(template.sql[cursor:start])
+        parts.append(value)
+        cursor = end
+    parts.append(template.sql[cursor:])
+    return "".join(parts)
+
+
+def _same_number(a: str, b: str) -> bool:
+    """
+    Helper function used to compare numeric literals
+    by value.
+    """
+    try:
+        return float(a) == float(b)
+    except ValueError:
+        return False
+
+
+class SQLTemplateCache:
+    """
+    SQL templates keyed by NL skeleton and role.
+
+    Args:
+        backend: Cache storage (defaults to an
+            InProcessTTLCache of TEMPLATE_CACHE_SIZE
+            entries kept TEMPLATE_CACHE_TTL seconds)
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self._backend = backend or InProcessTTLCache(
+            maxsize=TEMPLATE_CACHE_SIZE,
+            ttl=TEMPLATE_CACHE_TTL,
+        )
+        self.stored = 0
+        self.uncacheable = 0
+        self.rejected = 0
+        on_schema_change(self._on_schema_change)
+
+    def _on_schema_change(self, schema: SchemaDDL) -> None:
+        """
+        Helper function used to drop every template: their
+        SQL and pruned schema were built for the old DDL.
+        """
+        self.clear()
+        logger.info(
+            f"Schema changed ({schema.digest[:12]}): "
+            f"SQL templates cleared"
+        )
+
+    def clear(self) -> None:
+        """
+        Drop all templates.
+        """
+        self._backend.clear()
+
+    @staticmethod
+    def key(skeleton: str, role: str) -> str:
+        """
+        Cache key of a skeleton for a role.
+        """
+        return f"{role}|{skeleton}"
+
+    def lookup(
+        self,
+        skeleton: str,
+        literals: List[Dict[str, str]],
+        role: str,
+    ) -> Optional[Tuple[SQLTemplate, str]]:
+        """
+        Find a template for the question and render it.
+
+        Args:
+            skeleton: NL skeleton
+            literals: Question literals
+            role: User role
+
+        Returns:
+            (template, rendered SQL), or None on a miss
+        """
+        template = self._backend.get(self.key(skeleton, role))
+        if template is None:
+            return None
+        sql = render_template(template, literals)
+        if sql is None:
+            self.rejected += 1
+            return None
+        return template, sql
+
+    def store(
+        self,
+        skeleton: str,
+        literals: List[Dict[str, str]],
+        role: str,
+        sql_result: Dict[str, Any],
+        schema_result: Dict[str, Any],
+    ) -> bool:
+        """
+        Store accepted SQL as a template.
+
+        Args:
+            skeleton: NL skeleton
+            literals: Question literals
+            role: User role
+            sql_result: SQL Generation result (final
+                SQL, explanation, confidence)
+            schema_result: Schema Intelligence result
+                (selected tables, pruned schema, FK
+                paths)
+
+        Returns:
+            True if stored, False if the SQL cannot be
+            parameterized
+        """
+        template = build_template(sql_result["final_sql"], literals)
+        if template is None:
+            self.uncacheable += 1
+            logger.debug(
+                f"SQL not templatable for skeleton '{skeleton}'"
+            )
+            return False
+        template.selected_tables = list(
+            schema_result.get("selected_tables", [])
+        )
+        template.pruned_schema = schema_result.get(
+            "pruned_schema", ""
+        )
+        template.fk_paths = list(schema_result.get("fk_paths") or [])
+        template.explanation = sql_result.get("explanation", "")
+        template.confidence = sql_result.get("confidence_score", 0.0)
+        self._backend.set(self.key(skeleton, role), template)
+        self.stored += 1
+        return True
+
+    def reject(self) -> None:
+        """
+        Count a hit whose SQL failed validation or the
+        security re-check.
+        """
+        self.rejected += 1
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Hit-rate metrics.
+
+        Returns:
+            hits, misses, hit_rate, stored, uncacheable
+            and rejected counts
+        """
+        hits, misses = self._backend.hits, self._backend.misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3)
+            if hits + misses else 0.0,
+            "stored": self.stored,
+            "uncacheable": self.uncacheable,
+            "rejected": self.rejected,
+        }
@@ -6,6 +6,7 @@ from typing import (
     Any,
     Dict,
     List,
+    Literal,
     Optional,
 )
 
@@ -15,6 +16,24 @@ from pydantic import (
 )
 
 
+# Pipeline modes: separate entity extraction and SQL
+# generation calls, or deterministic candidate pruning
+# followed by one call that picks tables and writes SQL.
+PIPELINE_STANDARD = "standard"
+PIPELINE_FUSED = "fused"
+# Critique-history actions accepting SQL that was
+# reviewed (critique, correction, n-best consensus) or
+# statically clean; accepted_unreviewed (critique
+# skipped) is not among them. Only these are reused as
+# few-shot examples or templates.
+VERIFIED_ACCEPT_ACTIONS = frozenset({
+    "accepted",
+    "accepted_consensus",
+    "accepted_correction",
+    "accepted_static",
+})
+
+
 class AgenticResponse(BaseModel):
     """
     Complete response from the agentic system.
@@ -149,7 +168,10 @@ class GeneratedSQL(BaseModel):
     )
     tables_used: List[str] = Field(
         default_factory=list,
-        description="Tables referenced in the SQL",
+        description=(
+            "Tables referenced in the SQL (in fused "
+            "mode: chosen from the candidate tables)"
+        ),
     )
     confidence: float = Field(
         default=0.0,
@@ -187,6 +209,31 @@ class QueryRequest(BaseModel):
             "awareness"
         ),
     )
+    timeout_ms: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description=(
+            "End-to-end time budget in milliseconds "
+            "(None = unbounded)"
+        ),
+    )
+    pipeline_mode: Literal["standard", "fused"] = Field(
+        default=PIPELINE_STANDARD,
+        description=(
+            "'standard': LLM entity extraction, then "
+            "SQL generation; 'fused': deterministic "
+            "candidate tables, then one call returning "
+            "tables and SQL"
+        ),
+    )
+    deadline_at: Optional[float] = Field(
+        default=None,
+        description=(
+            "Absolute time.monotonic() deadline, "
+            "stamped from timeout_ms by the "
+            "orchestrator"
+        ),
+    )
 
 
 class SQLCritique(BaseModel):
@@ -212,3 +259,42 @@ class SQLCritique(BaseModel):
             "Corrected SQL if issues were found"
         ),
     )
+
+
+class TurnRecord(BaseModel):
+    """
+    Persisted state of one completed conversation turn.
+
+    Stored in the orchestrator's conversation state when
+    turn-aware mode is enabled, so follow-up turns can
+    reuse the prior schema selection and SQL.
+    """
+
+    question: str = Field(
+        ...,
+        description="The user's original question",
+    )
+    refined_query: str = Field(
+        default="",
+        description="Query after refinement",
+    )
+    selected_tables: List[str] = Field(
+        default_factory=list,
+        description=(
+            "Tables selected by schema intelligence"
+        ),
+    )
+    pruned_schema: str = Field(
+        default="",
+        description="Pruned DDL used for generation",
+    )
+    fk_paths: List[Dict[str, str]] = Field(
+        default_factory=list,
+        description=(
+            "FK relationships between selected tables"
+        ),
+    )
+    final_sql: Optional[str] = Field(
+        default=None,
+        description="SQL accepted for this turn",
+    )
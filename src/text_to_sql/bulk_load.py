@@ -0,0 +1,458 @@
+"""
+Bulk data loading with COPY.
+
+Loads large datasets (see text_to_sql.synthetic_data, or
+CSV / binary COPY files) far faster than INSERT scripts:
+
+- rows stream through `COPY ... FROM STDIN`, a batch of
+  CSV at a time, so neither the client nor the server
+  holds a table in memory
+- secondary indexes of the loaded tables are dropped
+  before the load and rebuilt afterwards (one sort per
+  index instead of one insert per row); primary key and
+  UNIQUE indexes stay, foreign keys need them
+- tables are truncated in the same transaction, which
+  lets COPY write frozen rows (no hint-bit rewrite or
+  freeze vacuum later)
+- tables load parents first, in one transaction, and
+  are analyzed at the end
+
+Usage:
+    python -m text_to_sql.bulk_load --order-items 10000000
+    python -m text_to_sql.bulk_load --csv-dir data/
+"""
+
+import argparse
+import csv
+import io
+import os
+import time
+
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+import psycopg2
+import psycopg2.extensions
+
+from text_to_sql.app_logger import get_logger
+from text_to_sql.db import SEARCH_PATH, load_schema_ddl
+from text_to_sql.result_cache import get_result_cache
+from text_to_sql.synthetic_data import (
+    SyntheticDataset,
+    load_order,
+    parse_schema,
+)
+
+
+logger = get_logger(__name__)
+
+DATA_SCHEMA = SEARCH_PATH.split(",")[0].strip()
+# Rows encoded per read() of the COPY stream.
+DEFAULT_COPY_BATCH_ROWS = 5_000
+DEFAULT_MAINTENANCE_WORK_MEM = "256MB"
+COPY_FORMATS = ("csv", "binary")
+
+# Secondary indexes: not backing a PRIMARY KEY / UNIQUE
+# constraint.
+_SECONDARY_INDEXES = """
+    SELECT i.indexname, i.indexdef
+    FROM pg_indexes i
+    WHERE i.schemaname = %s
+      AND i.tablename = ANY(%s)
+      AND NOT EXISTS (
+        SELECT 1 FROM pg_constraint c
+        WHERE c.conindid = format('%%I.%%I', i.schemaname,
+                                  i.indexname)::regclass
+      )
+    ORDER BY i.tablename, i.indexname
+"""
+
+
+class _CsvStream:
+    """
+    File-like view of rows as CSV text, read by
+    cursor.copy_expert a chunk at a time.
+    """
+
+    def __init__(
+        self,
+        rows: Iterable[Sequence[Optional[str]]],
+        batch_rows: int,
+    ):
+        self._rows = iter(rows)
+        self._batch_rows = batch_rows
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+        self._pending = ""
+        self.rows = 0
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            if not self._fill():
+                break
+        if size < 0:
+            size = len(self._pending)
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+    def readline(self, size: int = -1) -> str:
+        return self.read(size)
+
+    def _fill(self) -> bool:
+        """
+        Encode the next batch of rows; False at the end.
+        """
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        count = 0
+        for row in self._rows:
+            self._writer.writerow(row)
+            count += 1
+            if count == self._batch_rows:
+                break
+        self.rows += count
+        self._pending += self._buffer.getvalue()
+        return count > 0
+
+
+def _copy_sql(
+    table: str,
+    columns: Optional[Sequence[str]],
+    fmt: str,
+    freeze: bool = False,
+) -> str:
+    """
+    COPY ... FROM STDIN statement.
+    """
+    target = table
+    if columns:
+        target += f" ({', '.join(columns)})"
+    options = [f"FORMAT {fmt}"]
+    if freeze:
+        options.append("FREEZE true")
+    return f"COPY {target} FROM STDIN WITH ({', '.join(options)})"
+
+
+def copy_rows(
+    cur: psycopg2.extensions.cursor,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Optional[str]]],
+    freeze: bool = False,
+    batch_rows: int = DEFAULT_COPY_BATCH_ROWS,
+) -> int:
+    """
+    Stream rows into a table with COPY (CSV format).
+
+    Args:
+        cur: Cursor of the loading transaction
+        table: Target table
+        columns: Column of each row value
+        rows: Text values (None is NULL), e.g.
+            SyntheticDataset.rows
+        freeze: COPY FREEZE (the table must have been
+            created or truncated in this transaction)
+        batch_rows: Rows encoded per chunk sent
+
+    Returns:
+        Rows copied
+    """
+    stream = _CsvStream(rows, batch_rows)
+    cur.copy_expert(_copy_sql(table, columns, "csv", freeze=freeze), stream)
+    return stream.rows
+
+
+def copy_file(
+    cur: psycopg2.extensions.cursor,
+    table: str,
+    path: Union[str, Path],
+    fmt: str = "csv",
+    freeze: bool = False,
+) -> None:
+    """
+    Stream a file into a table with COPY.
+
+    CSV files start with a header row naming the columns
+    (as written by SyntheticDataset.write_csv); binary
+    files are PostgreSQL binary COPY files of every
+    column but generated ones (as written by `COPY table
+    TO STDOUT (FORMAT binary)`).
+    """
+    if fmt not in COPY_FORMATS:
+        raise ValueError(f"Unsupported COPY format: {fmt}")
+    path = Path(path)
+    if fmt == "binary":
+        with path.open("rb") as f:
+            cur.copy_expert(_copy_sql(table, None, fmt, freeze=freeze), f)
+        return
+    with path.open(newline="", encoding="utf-8") as f:
+        columns = next(csv.reader([f.readline()]))
+        cur.copy_expert(
+            _copy_sql(table, columns, fmt, freeze=freeze), f
+        )
+
+
+def drop_indexes(
+    cur: psycopg2.extensions.cursor,
+    tables: Sequence[str],
+    schema: str = DATA_SCHEMA,
+) -> List[str]:
+    """
+    Drop the secondary indexes of some tables.
+
+    Returns:
+        CREATE INDEX statements to rebuild them with
+    """
+    cur.execute(_SECONDARY_INDEXES, (schema, list(tables)))
+    indexes = cur.fetchall()
+    for name, _ in indexes:
+        cur.execute(f'DROP INDEX "{schema}"."{name}"')
+    return [definition for _, definition in indexes]
+
+
+def create_indexes(
+    cur: psycopg2.extensions.cursor,
+    definitions: Sequence[str],
+) -> None:
+    """
+    Rebuild indexes dropped by drop_indexes.
+    """
+    for definition in definitions:
+        cur.execute(definition)
+
+
+def _load(
+    conn: psycopg2.extensions.connection,
+    tables: Sequence[str],
+    copy_table: Callable[..., Optional[int]],
+    truncate: bool,
+    rebuild_indexes: bool,
+) -> Dict[str, float]:
+    """
+    Helper function used to load tables in one
+    transaction: truncate, drop indexes, COPY each table
+    (copy_table(cursor, table, freeze) returns the rows
+    copied, None when unknown), rebuild indexes, analyze.
+
+    Returns:
+        Timings: seconds per table, "indexes" and "total"
+    """
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SET LOCAL maintenance_work_mem = %s",
+                (os.getenv(
+                    "BULK_LOAD_MAINTENANCE_WORK_MEM",
+                    DEFAULT_MAINTENANCE_WORK_MEM,
+                ),),
+            )
+            if truncate:
+                cur.execute(
+                    f"TRUNCATE {', '.join(tables)} RESTART IDENTITY CASCADE"
+                )
+            definitions = (
+                drop_indexes(cur, tables) if rebuild_indexes else []
+            )
+            for table in tables:
+                table_start = time.perf_counter()
+                rows = copy_table(cur, table, truncate)
+                timings[table] = time.perf_counter() - table_start
+                counted = f" ({rows:,} rows)" if rows is not None else ""
+                logger.info(
+                    f"Copied {table}{counted} in {timings[table]:.1f}s"
+                )
+            index_start = time.perf_counter()
+            create_indexes(cur, definitions)
+            timings["indexes"] = time.perf_counter() - index_start
+            cur.execute(f"ANALYZE {', '.join(tables)}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    timings["total"] = time.perf_counter() - start
+    cache = get_result_cache()
+    if cache is not None:
+        cache.invalidate_tables(tables)
+    logger.info(
+        f"Loaded {len(tables)} tables in {timings['total']:.1f}s "
+        f"({len(definitions)} indexes rebuilt in "
+        f"{timings['indexes']:.1f}s)"
+    )
+    return timings
+
+
+def load_dataset(
+    conn: psycopg2.extensions.connection,
+    dataset: SyntheticDataset,
+    tables: Optional[Sequence[str]] = None,
+    truncate: bool = True,
+    rebuild_indexes: bool = True,
+) -> Dict[str, float]:
+    """
+    Load a synthetic dataset with COPY, parents first.
+
+    Args:
+        conn: Connection with the data schema on its
+            search_path (committed on success, rolled
+            back on failure)
+        dataset: Rows to load
+        tables: Subset of tables (default all)
+        truncate: Empty the tables (and tables
+            referencing them) first, and COPY FREEZE;
+            False appends
+        rebuild_indexes: Drop secondary indexes during
+            the load and rebuild them after
+
+    Returns:
+        Timings: seconds per table, "indexes" and "total"
+    """
+    wanted = set(tables or dataset.order)
+
+    def copy_table(cur, table, freeze):
+        return copy_rows(
+            cur, table, dataset.columns(table), dataset.rows(table),
+            freeze=freeze,
+        )
+
+    return _load(
+        conn, [t for t in dataset.order if t in wanted], copy_table,
+        truncate, rebuild_indexes,
+    )
+
+
+def load_files(
+    conn: psycopg2.extensions.connection,
+    directory: Union[str, Path],
+    fmt: str = "csv",
+    truncate: bool = True,
+    rebuild_indexes: bool = True,
+) -> Dict[str, float]:
+    """
+    Load <table>.csv (or <table>.bin for binary) files of
+    a directory with COPY, parents first (order from the
+    project schema). Tables without a file are skipped.
+
+    Returns:
+        Timings: seconds per table, "indexes" and "total"
+    """
+    if fmt not in COPY_FORMATS:
+        raise ValueError(f"Unsupported COPY format: {fmt}")
+    directory = Path(directory)
+    suffix = ".bin" if fmt == "binary" else ".csv"
+    order = load_order(parse_schema(load_schema_ddl().full))
+    tables = [t for t in order if (directory / f"{t}{suffix}").exists()]
+    if not tables:
+        raise ValueError(f"No {suffix} files for schema tables in {directory}")
+
+    def copy_table(cur, table, freeze):
+        copy_file(cur, table, directory / f"{table}{suffix}", fmt, freeze)
+
+    return _load(conn, tables, copy_table, truncate, rebuild_indexes)
+
+
+def connect() -> psycopg2.extensions.connection:
+    """
+    Dedicated loading connection (not pooled: a load is
+    one long transaction) with the data schema on its
+    search_path.
+    """
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL not set in .env")
+    return psycopg2.connect(
+        database_url,
+        options=f"-c search_path={SEARCH_PATH.replace(' ', '')}",
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(
+        description="Bulk load data with COPY"
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--order-items", type=int,
+        help="Generate a synthetic dataset of this many order_items"
+    )
+    source.add_argument(
+        "--scale", type=float, default=1.0,
+        help="Synthetic dataset scale (1.0 = 100k order_items)"
+    )
+    source.add_argument(
+        "--csv-dir", type=Path,
+        help="Load <table>.csv files from this directory"
+    )
+    source.add_argument(
+        "--binary-dir", type=Path,
+        help="Load <table>.bin binary COPY files from this directory"
+    )
+    parser.add_argument(
+        "--write-csv", type=Path,
+        help="Write the synthetic dataset as CSV files instead"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--append", action="store_true",
+        help="Keep existing rows (default truncates)"
+    )
+    parser.add_argument(
+        "--keep-indexes", action="store_true",
+        help="Do not drop and rebuild secondary indexes"
+    )
+    args = parser.parse_args(argv)
+
+    options = {
+        "truncate": not args.append,
+        "rebuild_indexes": not args.keep_indexes,
+    }
+    if args.csv_dir or args.binary_dir:
+        conn = connect()
+        try:
+            if args.csv_dir:
+                load_files(conn, args.csv_dir, "csv", **options)
+            else:
+                load_files(conn, args.binary_dir, "binary", **options)
+        finally:
+            conn.close()
+        return
+    if args.order_items:
+        dataset = SyntheticDataset.for_order_items(
+            args.order_items, seed=args.seed
+        )
+    else:
+        dataset = SyntheticDataset(args.scale, seed=args.seed)
+    logger.info(
+        f"Synthetic dataset: {dataset.total_rows():,} rows in "
+        f"{len(dataset.order)} tables"
+    )
+    if args.write_csv:
+        dataset.write_csv(args.write_csv)
+        logger.info(f"Wrote CSV files to {args.write_csv}")
+        return
+    conn = connect()
+    try:
+        load_dataset(conn, dataset, **options)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    from text_to_sql.app_logger import setup_logging
+    load_dotenv()
+    setup_logging()
+    main()
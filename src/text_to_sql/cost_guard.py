@@ -0,0 +1,418 @@
+"""
+Execution cost guard.
+
+Admission control for generated SQL, per user role:
+
+- rows: the outer SELECT gets a LIMIT of the role's
+  max_rows (a larger LIMIT is lowered to it), see
+  sql_validator.cap_limit
+- cost: the capped query is planned with EXPLAIN (no
+  execution); plans above the role's max_cost are
+  rejected, plans above queue_cost wait for one of a
+  few heavy-query slots, so expensive queries run one
+  or two at a time instead of all at once
+- time: the query runs under the role's
+  statement_timeout
+
+When EXPLAIN cannot run (database not configured or
+unreachable) the query is admitted and only the row cap
+and statement timeout apply; a query that does not
+plan is rejected.
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import json
+import os
+import threading
+
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    Optional,
+    Union,
+)
+
+from text_to_sql.app_logger import get_logger
+from text_to_sql.db import (
+    PlannerError,
+    execute_query,
+    execute_query_async,
+    explain_query,
+)
+from text_to_sql.sql_validator import cap_limit
+
+if TYPE_CHECKING:
+    from text_to_sql.agents.deadline import Deadline
+
+
+logger = get_logger(__name__)
+
+DEFAULT_HEAVY_SLOTS = 2
+DEFAULT_QUEUE_TIMEOUT_S = 30.0
+
+
+@dataclasses.dataclass(frozen=True)
+class CostBudget:
+    """
+    Execution limits for one role.
+
+    Attributes:
+        max_rows: Rows returned at most (outer LIMIT)
+        queue_cost: Planner cost above which the query
+            waits for a heavy-query slot
+        max_cost: Planner cost above which the query is
+            rejected
+        statement_timeout_ms: Server-side time limit
+    """
+
+    max_rows: int
+    queue_cost: float
+    max_cost: float
+    statement_timeout_ms: int
+
+
+DEFAULT_BUDGETS: Dict[str, CostBudget] = {
+    "analyst": CostBudget(10_000, 100_000.0, 1_000_000.0, 30_000),
+    "admin": CostBudget(100_000, 1_000_000.0, 10_000_000.0, 120_000),
+}
+# Roles without a budget of their own.
+DEFAULT_BUDGET = CostBudget(1_000, 10_000.0, 100_000.0, 10_000)
+
+
+@dataclasses.dataclass
+class GuardDecision:
+    """
+    Outcome of checking a query against a role's budget.
+
+    Attributes:
+        sql: Query to run (row cap applied)
+        role: User role
+        budget: Budget applied
+        admitted: False if the query must not run
+        heavy: Needs a heavy-query slot
+        reason: Why the query was rejected
+        total_cost: Planner's total cost (None when
+            EXPLAIN was skipped)
+        plan_rows: Planner's row estimate
+    """
+
+    sql: str
+    role: str
+    budget: CostBudget
+    admitted: bool = True
+    heavy: bool = False
+    reason: Optional[str] = None
+    total_cost: Optional[float] = None
+    plan_rows: Optional[int] = None
+
+
+class QueryRejected(Exception):
+    """
+    Raised when the cost guard refuses to run a query
+    (over budget, does not plan, or no heavy-query slot
+    freed up in time).
+    """
+
+    def __init__(self, decision: GuardDecision):
+        super().__init__(decision.reason)
+        self.decision = decision
+
+
+class CostGuard:
+    """
+    Per-role row caps, cost admission and timeouts for
+    query execution.
+
+    Args:
+        budgets: Budget per role (default
+            DEFAULT_BUDGETS)
+        default_budget: Budget of other roles
+        heavy_slots: Heavy queries running at once
+        queue_timeout_s: Longest wait for a heavy slot
+        explain: Planner call returning total_cost and
+            plan_rows (default db.explain_query)
+    """
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, CostBudget]] = None,
+        default_budget: CostBudget = DEFAULT_BUDGET,
+        heavy_slots: int = DEFAULT_HEAVY_SLOTS,
+        queue_timeout_s: float = DEFAULT_QUEUE_TIMEOUT_S,
+        explain: Callable[[str], Dict[str, Any]] = explain_query,
+    ):
+        self.budgets = dict(
+            DEFAULT_BUDGETS if budgets is None else budgets
+        )
+        self.default_budget = default_budget
+        self.queue_timeout_s = queue_timeout_s
+        self._explain = explain
+        self._heavy = threading.BoundedSemaphore(heavy_slots)
+        self._lock = threading.Lock()
+        self._counts = {
+            "checked": 0,
+            "limited": 0,
+            "explain_skipped": 0,
+            "rejected": 0,
+            "queued": 0,
+            "queue_timeouts": 0,
+        }
+
+    @classmethod
+    def from_file(
+        cls,
+        path: Union[str, Path],
+        **kwargs: Any,
+    ) -> "CostGuard":
+        """
+        Built-in budgets overridden / extended by a JSON
+        config file ({"role": {budget fields}, ...}; the
+        "default" entry is the budget of other roles).
+        Fields missing from an entry keep the built-in
+        value for that role, else the default budget's.
+        """
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        default = dataclasses.replace(
+            DEFAULT_BUDGET, **data.pop("default", {})
+        )
+        budgets = dict(DEFAULT_BUDGETS)
+        for role, fields in data.items():
+            budgets[role] = dataclasses.replace(
+                budgets.get(role, default), **fields
+            )
+        logger.info(f"Loaded {len(data)} role budgets from {path}")
+        return cls(budgets, default, **kwargs)
+
+    @classmethod
+    def from_env(cls) -> "CostGuard":
+        """
+        Guard with budgets from COST_BUDGETS_FILE (built-in
+        budgets when unset), COST_GUARD_HEAVY_SLOTS and
+        COST_GUARD_QUEUE_TIMEOUT_S.
+        """
+        kwargs = {
+            "heavy_slots": int(os.getenv(
+                "COST_GUARD_HEAVY_SLOTS", DEFAULT_HEAVY_SLOTS
+            )),
+            "queue_timeout_s": float(os.getenv(
+                "COST_GUARD_QUEUE_TIMEOUT_S", DEFAULT_QUEUE_TIMEOUT_S
+            )),
+        }
+        path = os.getenv("COST_BUDGETS_FILE")
+        if path:
+            return cls.from_file(path, **kwargs)
+        return cls(**kwargs)
+
+    def budget(self, role: str) -> CostBudget:
+        """
+        Budget of a role.
+        """
+        return self.budgets.get(role, self.default_budget)
+
+    def check(self, sql: str, role: str) -> GuardDecision:
+        """
+        Apply the row cap and plan the query against the
+        role's budget (nothing is executed).
+
+        Args:
+            sql: Query
+            role: User role
+
+        Returns:
+            GuardDecision (admitted False with a reason
+            when the query must not run)
+        """
+        budget = self.budget(role)
+        decision = GuardDecision(
+            cap_limit(sql, budget.max_rows), role, budget
+        )
+        self._count("checked")
+        if decision.sql != sql:
+            self._count("limited")
+        try:
+            plan = self._explain(decision.sql)
+        except PlannerError as e:
+            return self._reject(decision, f"Query does not plan: {e}")
+        except Exception as e:
+            logger.warning(f"Cost check skipped: {e}")
+            self._count("explain_skipped")
+            return decision
+        decision.total_cost = plan["total_cost"]
+        decision.plan_rows = plan["plan_rows"]
+        if decision.total_cost > budget.max_cost:
+            return self._reject(
+                decision,
+                f"Estimated cost {decision.total_cost:,.0f} exceeds "
+                f"the {role} budget of {budget.max_cost:,.0f}",
+            )
+        decision.heavy = decision.total_cost > budget.queue_cost
+        return decision
+
+    def execute(self, sql: str, role: str) -> list[dict]:
+        """
+        Run a query within the role's budget.
+
+        Raises:
+            QueryRejected: Over budget, does not plan, or
+                no heavy slot within queue_timeout_s
+            psycopg2.extensions.QueryCanceledError: The
+                query ran past the role's timeout
+        """
+        decision = self.admit(self.check(sql, role))
+        with self._slot(decision):
+            return execute_query(
+                decision.sql,
+                timeout_ms=decision.budget.statement_timeout_ms,
+                role=role,
+            )
+
+    async def execute_async(
+        self,
+        sql: str,
+        role: str,
+        deadline: Optional["Deadline"] = None,
+    ) -> list[dict]:
+        """
+        Run a query within the role's budget without
+        blocking the event loop (see
+        db.execute_query_async); the wait for a heavy slot
+        also ends with the deadline.
+
+        Raises:
+            QueryRejected: Over budget, does not plan, or
+                no heavy slot in time
+            TimeoutError: The deadline is exhausted
+        """
+        decision = self.admit(
+            await asyncio.to_thread(self.check, sql, role)
+        )
+        if decision.heavy:
+            await self._acquire_async(decision, deadline)
+        try:
+            return await execute_query_async(
+                decision.sql,
+                timeout_ms=decision.budget.statement_timeout_ms,
+                deadline=deadline,
+                role=role,
+            )
+        finally:
+            if decision.heavy:
+                self._heavy.release()
+
+    def admit(self, decision: GuardDecision) -> GuardDecision:
+        """
+        Return an admitted decision; raise QueryRejected
+        otherwise.
+        """
+        if not decision.admitted:
+            raise QueryRejected(decision)
+        return decision
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters: checked, limited (row cap added or
+        lowered), explain_skipped, rejected, queued (heavy)
+        and queue_timeouts.
+        """
+        with self._lock:
+            return dict(self._counts)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def _reject(
+        self,
+        decision: GuardDecision,
+        reason: str,
+    ) -> GuardDecision:
+        logger.warning(f"Query rejected ({decision.role}): {reason}")
+        self._count("rejected")
+        decision.admitted = False
+        decision.reason = reason
+        return decision
+
+    def _queue_timeout(self, decision: GuardDecision) -> None:
+        self._count("queue_timeouts")
+        self._reject(
+            decision,
+            f"No heavy-query slot freed up in time (estimated "
+            f"cost {decision.total_cost:,.0f})",
+        )
+        raise QueryRejected(decision)
+
+    @contextlib.contextmanager
+    def _slot(self, decision: GuardDecision) -> Iterator[None]:
+        """
+        Hold a heavy-query slot while a heavy query runs.
+        """
+        if not decision.heavy:
+            yield
+            return
+        self._count("queued")
+        if not self._heavy.acquire(timeout=self.queue_timeout_s):
+            self._queue_timeout(decision)
+        try:
+            yield
+        finally:
+            self._heavy.release()
+
+    async def _acquire_async(
+        self,
+        decision: GuardDecision,
+        deadline: Optional["Deadline"],
+    ) -> None:
+        """
+        Wait off the event loop for a heavy-query slot.
+        """
+        self._count("queued")
+        timeout = self.queue_timeout_s
+        if deadline is not None:
+            timeout = min(timeout, deadline.remaining_ms() / 1000)
+        loop = asyncio.get_running_loop()
+        acquire = loop.run_in_executor(
+            None, self._heavy.acquire, True, max(timeout, 0)
+        )
+        try:
+            acquired = await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # Give the slot back once the wait ends.
+            acquire.add_done_callback(
+                lambda f: f.result() and self._heavy.release()
+            )
+            raise
+        if not acquired:
+            self._queue_timeout(decision)
+
+
+_guard: Optional[CostGuard] = None
+_guard_lock = threading.Lock()
+
+
+def get_cost_guard() -> Optional[CostGuard]:
+    """
+    Return the process-wide cost guard: the one set with
+    set_cost_guard, else one built from the environment
+    when SQL_COST_GUARD is set, else None (guard off).
+    """
+    global _guard
+    with _guard_lock:
+        if _guard is None and os.getenv("SQL_COST_GUARD", "0") != "0":
+            _guard = CostGuard.from_env()
+        return _guard
+
+
+def set_cost_guard(guard: Optional[CostGuard]) -> None:
+    """
+    Replace the process-wide cost guard (None resets it
+    to follow the environment).
+    """
+    global _guard
+    with _guard_lock:
+        _guard = guard
@@ -1,18 +1,61 @@
 """
 Database connection and query execution for Neon PostgreSQL.
+
+Queries run through the process-wide execution backend
+(get_backend): PostgreSQL by default, or the embedded
+SQLite stand-in (text_to_sql.sqlite_backend) with
+`SQL_BACKEND=sqlite` for offline runs.
 """
 
+import asyncio
+import dataclasses
+import functools
+import hashlib
+import inspect
+import itertools
 import os
 import re
+import threading
+import time
+import weakref
 
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    runtime_checkable,
+)
 
 from dotenv import load_dotenv
 
 from text_to_sql.app_logger import get_logger
+from text_to_sql.db_pool import (
+    DEFAULT_HEALTH_CHECK_AFTER_S,
+    DEFAULT_MAX_IDLE_S,
+    DEFAULT_MAX_LIFETIME_S,
+    DEFAULT_POOL_MAX_SIZE,
+    DEFAULT_POOL_MIN_SIZE,
+    DEFAULT_POOL_TIMEOUT_S,
+    ConnectionPool,
+    PooledConnection,
+)
+from text_to_sql.prepared_statements import get_prepared_cache
+from text_to_sql.result_cache import get_result_cache
+from text_to_sql.results import ColumnarResult
+
+if TYPE_CHECKING:
+    from text_to_sql.agents.deadline import Deadline
 
 
 load_dotenv()
@@ -21,39 +64,880 @@ logger = get_logger(__name__)
 
 SCHEMA_DIR = Path(__file__).parent.parent.parent / "schema"
 
+SEARCH_PATH = "mfg_ecommerce, public"
+DEFAULT_READONLY_POOL_SIZE = 4
+# EXPLAIN only plans; anything slower than this is a
+# sign of trouble, not a query worth waiting on.
+DEFAULT_EXPLAIN_TIMEOUT_MS = 250
+# Rows fetched per round trip by streaming queries.
+DEFAULT_STREAM_ITERSIZE = 2000
+# SQLSTATE classes raised while parsing / planning:
+# 42 syntax error or access rule violation (unknown
+# table / column / function, type mismatch), 22 data
+# exception (bad literals folded at plan time), 0A
+# feature not supported.
+PLANNER_ERROR_CLASSES = ("42", "22", "0A")
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+_readonly_pool: Optional[ConnectionPool] = None
+_readonly_pool_lock = threading.Lock()
+_query_executor: Optional[ThreadPoolExecutor] = None
+_query_executor_lock = threading.Lock()
+# Names of server-side cursors (unique per process).
+_cursor_ids = itertools.count(1)
+# Schema DDL per file, and callbacks run when it changes.
+_schema_ddl: Dict[Path, "SchemaDDL"] = {}
+_schema_ddl_lock = threading.Lock()
+_schema_listeners: List[Callable[[], Optional[Callable]]] = []
+_backend: Optional["ExecutionBackend"] = None
+_backend_lock = threading.Lock()
+
+
+class _QueryHandle:
+    """
+    Connection running one async query, so the awaiting
+    side can cancel it on the server (anything with
+    `closed` and `cancel()`, e.g. the SQLite backend's
+    interrupter).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn = None
+        self.cancelled = False
+
+    def attach(self, conn) -> None:
+        with self._lock:
+            if self.cancelled:
+                raise asyncio.CancelledError()
+            self._conn = conn
+
+    def detach(self) -> None:
+        with self._lock:
+            self._conn = None
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self._conn is not None and not self._conn.closed:
+                try:
+                    self._conn.cancel()
+                except psycopg2.Error as e:
+                    logger.warning(f"Query cancel failed: {e}")
+
+
+class PlannerError(Exception):
+    """
+    Raised when PostgreSQL rejects a query while parsing
+    or planning it (the query itself is wrong, as
+    opposed to the database being unavailable).
+    """
+
+    def __init__(
+        self,
+        message: str,
+        sqlstate: Optional[str] = None,
+        hint: Optional[str] = None,
+    ):
+        super().__init__(message)
+        self.sqlstate = sqlstate
+        self.hint = hint
+
+    def __str__(self) -> str:
+        message = super().__str__()
+        if self.hint:
+            return f"{message} (HINT: {self.hint})"
+        return message
+
+
+@runtime_checkable
+class ExecutionBackend(Protocol):
+    """
+    Protocol for swappable execution backends.
+
+    execute_query and the other query helpers resolve
+    statement timeouts and the result cache, then hand
+    the SQL to the process-wide backend. PostgresBackend
+    is the default; the embedded SQLite backend runs the
+    same schema offline. The interface stays the same.
+    """
+
+    name: str
+
+    def execute(
+        self,
+        sql: str,
+        timeout_ms: Optional[float] = None,
+        handle: Optional[_QueryHandle] = None,
+    ) -> list[dict]:
+        """
+        Run a statement (committing writes) and return its
+        rows as dicts ([] when it returns none).
+        """
+        ...
+
+    def execute_columnar(
+        self,
+        sql: str,
+        timeout_ms: Optional[float] = None,
+    ) -> ColumnarResult:
+        """
+        Run a statement and return its rows column by
+        column.
+        """
+        ...
+
+    def explain(
+        self,
+        sql: str,
+        timeout_ms: float,
+    ) -> Dict[str, Any]:
+        """
+        Plan a query without running it (keys as in
+        explain_query); raise PlannerError when it does
+        not plan.
+        """
+        ...
+
+    def stream_batches(
+        self,
+        sql: str,
+        batch_size: int,
+        max_rows: Optional[int] = None,
+        timeout_ms: Optional[float] = None,
+    ) -> Iterator[List[dict]]:
+        """
+        Yield a query's rows in batches without
+        materializing the result.
+        """
+        ...
+
+    def close(self) -> None:
+        """
+        Release connections.
+        """
+        ...
+
+
+def _connect_options(read_only: bool = False) -> str:
+    """
+    Helper function used to build the libpq options that
+    set up each physical session once, at connect time.
+    """
+    options = f"-c search_path={SEARCH_PATH.replace(' ', '')}"
+    if read_only:
+        options += " -c default_transaction_read_only=on"
+    return options
+
+
+def _new_pool(
+    database_url: str,
+    read_only: bool,
+    max_size: int,
+    name: str,
+) -> ConnectionPool:
+    """
+    Helper function used to create a connection pool,
+    with lifetime, idle and health check settings from
+    `DB_POOL_*`.
+    """
+    options = _connect_options(read_only)
+    return ConnectionPool(
+        lambda: psycopg2.connect(database_url, options=options),
+        min_size=min(
+            int(os.getenv("DB_POOL_MIN_SIZE", DEFAULT_POOL_MIN_SIZE)),
+            max_size,
+        ),
+        max_size=max_size,
+        timeout_s=float(
+            os.getenv("DB_POOL_TIMEOUT_S", DEFAULT_POOL_TIMEOUT_S)
+        ),
+        max_lifetime_s=float(os.getenv(
+            "DB_POOL_MAX_LIFETIME_S", DEFAULT_MAX_LIFETIME_S
+        )),
+        max_idle_s=float(
+            os.getenv("DB_POOL_MAX_IDLE_S", DEFAULT_MAX_IDLE_S)
+        ),
+        health_check_after_s=float(os.getenv(
+            "DB_POOL_HEALTH_CHECK_S", DEFAULT_HEALTH_CHECK_AFTER_S
+        )),
+        name=name,
+    )
+
+
+def close_pool() -> None:
+    """
+    Helper function used to close the read-write pool (it is
+    rebuilt from the environment on next use).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+        _pool = None
+
+
+def close_readonly_pool() -> None:
+    """
+    Helper function used to close the read-only pool (it is
+    rebuilt from the environment on next use).
+    """
+    global _readonly_pool
+    with _readonly_pool_lock:
+        if _readonly_pool is not None:
+            _readonly_pool.closeall()
+        _readonly_pool = None
+
+
+def close_query_executor() -> None:
+    """
+    Helper function used to shut down the async query
+    executor (it is rebuilt from the environment on next
+    use).
+    """
+    global _query_executor
+    with _query_executor_lock:
+        if _query_executor is not None:
+            _query_executor.shutdown(wait=False, cancel_futures=True)
+        _query_executor = None
+
 
-def execute_query(sql: str) -> list[dict]:
+def _statement_timeout_ms(
+    timeout_ms: Optional[float],
+) -> Optional[float]:
+    """
+    Helper function used to default a query's statement
+    timeout to `DB_STATEMENT_TIMEOUT_MS` (None = the server
+    default).
     """
-    Helper function used to execute a SQL query and return results
-    as a list of dicts.
+    if timeout_ms is None and os.getenv("DB_STATEMENT_TIMEOUT_MS"):
+        return int(os.getenv("DB_STATEMENT_TIMEOUT_MS"))
+    return timeout_ms
+
+
+def _invalidate_written(sql: str) -> None:
     """
-    conn = get_connection()
+    Helper function used to drop cached results reading
+    the tables a committed statement wrote.
+    """
+    cache = get_result_cache()
+    if cache is not None:
+        cache.invalidate_sql(sql)
+
+
+def _execute(
+    conn: psycopg2.extensions.connection,
+    cur: psycopg2.extensions.cursor,
+    sql: str,
+    timeout_ms: Optional[float],
+) -> None:
+    """
+    Helper function used to run a query on a cursor,
+    optionally under a statement timeout, as a prepared
+    statement when the prepared-statement cache is on
+    (falling back to the plain SQL when the statement
+    cannot be prepared or went stale).
+    """
+    cache = get_prepared_cache()
+    call = cache.call(conn, sql) if cache is not None else None
+    if call is not None and call.prepare is not None:
+        try:
+            cur.execute(call.prepare)
+        except psycopg2.Error as e:
+            if conn.closed or not cache.prepare_failed(conn, call, e.pgcode):
+                raise
+            conn.rollback()
+            call = None
+    _set_statement_timeout(cur, timeout_ms)
+    if call is None:
+        cur.execute(sql)
+        return
     try:
-        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-            cur.execute(sql)
-            if cur.description:
-                return [dict(row) for row in cur.fetchall()]
-            conn.commit()
-            return []
-    except Exception:
+        cur.execute(call.execute)
+    except psycopg2.Error as e:
+        if conn.closed or not cache.execute_failed(conn, call, e.pgcode):
+            raise
         conn.rollback()
+        _set_statement_timeout(cur, timeout_ms)
+        cur.execute(sql)
+
+
+def _set_statement_timeout(
+    cur: psycopg2.extensions.cursor,
+    timeout_ms: Optional[float],
+) -> None:
+    """
+    Helper function used to bound the statements of the
+    current transaction (no-op without a timeout).
+    """
+    if timeout_ms is not None:
+        cur.execute(
+            f"SET LOCAL statement_timeout = {max(int(timeout_ms), 1)}"
+        )
+
+
+def _run_query(
+    sql: str,
+    timeout_ms: Optional[float],
+    handle: Optional[_QueryHandle] = None,
+) -> list[dict]:
+    """
+    Helper function used to run one query on a pooled
+    connection, optionally under a statement timeout and
+    attached to a cancellation handle.
+    """
+    with get_pool().connection() as conn:
+        if handle is not None:
+            handle.attach(conn)
+        try:
+            with conn.cursor(
+                cursor_factory=psycopg2.extras.RealDictCursor
+            ) as cur:
+                _execute(conn, cur, sql, timeout_ms)
+                if cur.description:
+                    return cur.fetchall()
+                conn.commit()
+                _invalidate_written(sql)
+                return []
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            if handle is not None:
+                handle.detach()
+
+
+def _run_query_columnar(
+    sql: str,
+    timeout_ms: Optional[float],
+) -> ColumnarResult:
+    """
+    Helper function used to run one query on a pooled
+    connection and read its result column by column.
+    """
+    with get_pool().connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                _execute(conn, cur, sql, timeout_ms)
+                if cur.description:
+                    return ColumnarResult.from_cursor(
+                        cur, DEFAULT_STREAM_ITERSIZE
+                    )
+                conn.commit()
+                _invalidate_written(sql)
+                return ColumnarResult([], [])
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+
+
+def _explain_query(
+    sql: str,
+    timeout_ms: float,
+) -> Dict[str, Any]:
+    """
+    Helper function used to run `EXPLAIN (FORMAT JSON)` on
+    a pooled read-only connection.
+    """
+    pool = get_readonly_pool()
+    conn = pool.getconn()
+    broken = False
+    start = time.perf_counter()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"SET LOCAL statement_timeout = {int(timeout_ms)}"
+            )
+            cur.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            plan = cur.fetchone()[0][0]["Plan"]
+        return {
+            "total_cost": plan["Total Cost"],
+            "startup_cost": plan["Startup Cost"],
+            "plan_rows": plan["Plan Rows"],
+            "node_type": plan["Node Type"],
+            "explain_ms": round(
+                (time.perf_counter() - start) * 1000, 2
+            ),
+        }
+    except psycopg2.Error as e:
+        if e.pgcode and e.pgcode[:2] in PLANNER_ERROR_CLASSES:
+            raise PlannerError(
+                e.diag.message_primary
+                or str(e).strip().splitlines()[0],
+                sqlstate=e.pgcode,
+                hint=e.diag.message_hint,
+            ) from e
+        broken = isinstance(
+            e, psycopg2.OperationalError
+        ) and not isinstance(
+            e, psycopg2.extensions.QueryCanceledError
+        )
         raise
     finally:
-        conn.close()
+        if not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        pool.putconn(conn, close=broken or bool(conn.closed))
 
 
-def get_connection():
+class PostgresBackend:
     """
-    Helper function used to connect to a PostgreSQL database
-    using `DATABASE_URL` specified in the `.env`.
+    Execution backend running queries on the PostgreSQL
+    database at `DATABASE_URL`, through the shared
+    connection pools (the default).
     """
-    database_url = os.getenv("DATABASE_URL")
-    if not database_url:
-        raise ValueError("DATABASE_URL not set in .env")
-    conn = psycopg2.connect(database_url)
-    with conn.cursor() as cur:
-        cur.execute("SET search_path TO mfg_ecommerce, public")
-    return conn
+
+    name = "postgres"
+
+    def execute(
+        self,
+        sql: str,
+        timeout_ms: Optional[float] = None,
+        handle: Optional[_QueryHandle] = None,
+    ) -> list[dict]:
+        return _run_query(sql, timeout_ms, handle)
+
+    def execute_columnar(
+        self,
+        sql: str,
+        timeout_ms: Optional[float] = None,
+    ) -> ColumnarResult:
+        return _run_query_columnar(sql, timeout_ms)
+
+    def explain(
+        self,
+        sql: str,
+        timeout_ms: float,
+    ) -> Dict[str, Any]:
+        return _explain_query(sql, timeout_ms)
+
+    def stream_batches(
+        self,
+        sql: str,
+        batch_size: int,
+        max_rows: Optional[int] = None,
+        timeout_ms: Optional[float] = None,
+    ) -> Iterator[List[dict]]:
+        return _stream_query_batches(
+            sql, batch_size, max_rows, timeout_ms
+        )
+
+    def close(self) -> None:
+        close_pool()
+        close_readonly_pool()
+
+
+def get_backend() -> ExecutionBackend:
+    """
+    Helper function used to return the process-wide
+    execution backend: the one set with set_backend, else
+    the one named by `SQL_BACKEND` (`postgres`, the
+    default, or `sqlite` for the embedded stand-in, see
+    text_to_sql.sqlite_backend).
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = os.getenv("SQL_BACKEND", "postgres").strip().lower()
+            if name == "postgres":
+                _backend = PostgresBackend()
+            elif name == "sqlite":
+                # Imported here: sqlite_backend imports this module
+                from text_to_sql.sqlite_backend import SQLiteBackend
+                _backend = SQLiteBackend.from_env()
+            else:
+                raise ValueError(f"Unknown SQL_BACKEND: {name!r}")
+        return _backend
+
+
+def set_backend(backend: Optional[ExecutionBackend]) -> None:
+    """
+    Helper function used to replace the process-wide
+    execution backend (None resets it to follow the
+    environment). The previous backend is not closed.
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def execute_query(
+    sql: str,
+    timeout_ms: Optional[int] = None,
+    role: Optional[str] = None,
+) -> list[dict]:
+    """
+    Helper function used to execute a SQL query on the
+    execution backend (a pooled connection by default) and
+    return results as a list of dicts.
+
+    With a role and the result cache enabled
+    (`SQL_RESULT_CACHE`), reads are answered from the cache
+    when the same query ran for that role within the TTL
+    and no table it reads was written since.
+
+    Args:
+        sql: Query to run
+        timeout_ms: statement_timeout for the query (None =
+            `DB_STATEMENT_TIMEOUT_MS` if set, else the
+            server default)
+        role: Role of the user the query runs for (None =
+            bypass the result cache)
+
+    Raises:
+        psycopg2.extensions.QueryCanceledError: The query
+            ran past its statement timeout
+    """
+    backend = get_backend()
+    cache = get_result_cache() if role is not None else None
+    if cache is None:
+        return backend.execute(sql, _statement_timeout_ms(timeout_ms))
+    lookup = cache.lookup(sql, role)
+    if lookup.rows is not None:
+        return lookup.rows
+    rows = backend.execute(sql, _statement_timeout_ms(timeout_ms))
+    cache.store(lookup, rows)
+    return rows
+
+
+def execute_query_columnar(
+    sql: str,
+    timeout_ms: Optional[int] = None,
+) -> ColumnarResult:
+    """
+    Helper function used to execute a SQL query on the
+    execution backend and return the result column by column
+    (column names stored once, numeric columns as compact
+    arrays) instead of as a list of dicts.
+
+    Args:
+        sql: Query to run
+        timeout_ms: statement_timeout for the query (None =
+            `DB_STATEMENT_TIMEOUT_MS` if set, else the
+            server default)
+
+    Returns:
+        ColumnarResult (empty, with no columns, for
+        statements that return no rows)
+    """
+    return get_backend().execute_columnar(
+        sql, _statement_timeout_ms(timeout_ms)
+    )
+
+
+async def execute_query_async(
+    sql: str,
+    timeout_ms: Optional[int] = None,
+    deadline: Optional["Deadline"] = None,
+    role: Optional[str] = None,
+) -> list[dict]:
+    """
+    Helper function used to execute a SQL query without
+    blocking the event loop: the query runs on the
+    execution backend (a pooled connection by default) in
+    the bounded query executor.
+
+    The statement timeout is the smaller of timeout_ms and
+    what is left of the deadline. When the awaiting task is
+    cancelled or the wait exceeds that timeout (e.g. while
+    queued for a connection), the query is cancelled on the
+    server and its connection returned to the pool.
+
+    Args:
+        sql: Query to run
+        timeout_ms: statement_timeout for the query (None =
+            `DB_STATEMENT_TIMEOUT_MS` if set)
+        deadline: Optional request deadline
+        role: Role of the user the query runs for (None =
+            bypass the result cache, as in execute_query)
+
+    Returns:
+        Rows as a list of dicts
+
+    Raises:
+        TimeoutError: The deadline is exhausted, or the
+            query did not finish within its timeout
+        psycopg2.extensions.QueryCanceledError: The server
+            stopped the query at its statement timeout
+    """
+    cache = get_result_cache() if role is not None else None
+    lookup = cache.lookup(sql, role) if cache is not None else None
+    if lookup is not None and lookup.rows is not None:
+        return lookup.rows
+    timeout_ms = _statement_timeout_ms(timeout_ms)
+    if deadline is not None:
+        remaining = deadline.remaining_ms()
+        if remaining <= 0:
+            raise TimeoutError("Request deadline exceeded")
+        timeout_ms = (
+            remaining if timeout_ms is None
+            else min(timeout_ms, remaining)
+        )
+    handle = _QueryHandle()
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(
+        get_query_executor(),
+        functools.partial(
+            get_backend().execute, sql, timeout_ms, handle
+        ),
+    )
+    try:
+        rows = await asyncio.wait_for(
+            future,
+            timeout_ms / 1000 if timeout_ms is not None else None,
+        )
+    except (asyncio.CancelledError, TimeoutError):
+        # The cancel request opens its own connection to
+        # the server: send it off the event loop.
+        loop.run_in_executor(None, handle.cancel)
+        raise
+    if lookup is not None:
+        cache.store(lookup, rows)
+    return rows
+
+
+def explain_query(
+    sql: str,
+    timeout_ms: int = DEFAULT_EXPLAIN_TIMEOUT_MS,
+) -> Dict[str, Any]:
+    """
+    Helper function used to plan a query with `EXPLAIN` (no
+    ANALYZE, so nothing is executed) on the execution
+    backend (a pooled read-only connection by default)
+    under a tight statement timeout.
+
+    Args:
+        sql: Query to plan
+        timeout_ms: statement_timeout for the EXPLAIN
+
+    Returns:
+        Dict with the root plan node's total_cost,
+        startup_cost, plan_rows and node_type, plus
+        explain_ms (round trip)
+
+    Raises:
+        PlannerError: The query does not parse / plan
+        psycopg2.Error: Connection problems, timeouts
+    """
+    return get_backend().explain(sql, timeout_ms)
+
+
+def get_connection() -> PooledConnection:
+    """
+    Helper function used to check out a connection to the
+    PostgreSQL database at `DATABASE_URL` (specified in the
+    `.env`) from the shared pool; `close()` returns it to
+    the pool.
+    """
+    pool = get_pool()
+    return PooledConnection(pool, pool.getconn())
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Helper function used to return the shared read-write
+    connection pool, creating it on first use.
+
+    Connects to `DATABASE_URL` with the schema
+    search_path set at connect time. Pool size comes from
+    `DB_POOL_MIN_SIZE` / `DB_POOL_MAX_SIZE`.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            database_url = os.getenv("DATABASE_URL")
+            if not database_url:
+                raise ValueError("DATABASE_URL not set in .env")
+            _pool = _new_pool(
+                database_url,
+                read_only=False,
+                max_size=int(os.getenv(
+                    "DB_POOL_MAX_SIZE", DEFAULT_POOL_MAX_SIZE
+                )),
+                name="db",
+            )
+        return _pool
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Helper function used to report checkout metrics (wait
+    time, timeouts, recycled connections) of the pools in
+    use.
+    """
+    stats = {}
+    for name, pool in (("db", _pool), ("readonly", _readonly_pool)):
+        if pool is not None:
+            stats[name] = pool.stats()
+    return stats
+
+
+def get_query_executor() -> ThreadPoolExecutor:
+    """
+    Helper function used to return the shared executor that
+    runs async queries, creating it on first use.
+
+    It has `DB_EXECUTOR_WORKERS` threads (defaults to
+    `DB_POOL_MAX_SIZE`), so concurrent queries beyond what
+    the pool can serve queue here rather than on the event
+    loop.
+    """
+    global _query_executor
+    with _query_executor_lock:
+        if _query_executor is None:
+            workers = int(os.getenv(
+                "DB_EXECUTOR_WORKERS",
+                os.getenv("DB_POOL_MAX_SIZE", DEFAULT_POOL_MAX_SIZE),
+            ))
+            _query_executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="db-query",
+            )
+        return _query_executor
+
+
+def get_readonly_pool() -> ConnectionPool:
+    """
+    Helper function used to return the shared read-only
+    connection pool, creating it on first use.
+
+    Connects to `READONLY_DATABASE_URL` if set (e.g. a
+    replica or a role with SELECT-only grants), else
+    `DATABASE_URL`. Every session is read-only and has
+    the schema search_path set at connect time. Pool size
+    comes from `DB_READONLY_POOL_SIZE`.
+    """
+    global _readonly_pool
+    with _readonly_pool_lock:
+        if _readonly_pool is None:
+            database_url = (
+                os.getenv("READONLY_DATABASE_URL")
+                or os.getenv("DATABASE_URL")
+            )
+            if not database_url:
+                raise ValueError("DATABASE_URL not set in .env")
+            _readonly_pool = _new_pool(
+                database_url,
+                read_only=True,
+                max_size=int(os.getenv(
+                    "DB_READONLY_POOL_SIZE",
+                    DEFAULT_READONLY_POOL_SIZE,
+                )),
+                name="readonly",
+            )
+        return _readonly_pool
+
+
+@dataclasses.dataclass(frozen=True)
+class SchemaDDL:
+    """
+    One version of a schema DDL file.
+
+    Attributes:
+        path: DDL file
+        mtime_ns: Modification time it was read at
+        size: Size in bytes it was read at
+        digest: SHA-256 of the content
+        full: Whole file
+        create_blocks: CREATE TABLE blocks only (what the
+            LLM sees)
+    """
+
+    path: Path
+    mtime_ns: int
+    size: int
+    digest: str
+    full: str
+    create_blocks: str
+
+
+def load_schema_ddl(path: Optional[Path] = None) -> SchemaDDL:
+    """
+    Helper function used to return the schema DDL, reading
+    and parsing the file only when it changed.
+
+    Each call costs one stat(); the file is re-read when
+    its mtime or size differs from the cached version, and
+    change listeners (on_schema_change) run when the new
+    content differs from the old.
+
+    Args:
+        path: DDL file (default schema/schema_setup.sql)
+
+    Returns:
+        SchemaDDL with the full file and its CREATE TABLE
+        blocks
+    """
+    path = path or SCHEMA_DIR / "schema_setup.sql"
+    stat = path.stat()
+    with _schema_ddl_lock:
+        cached = _schema_ddl.get(path)
+        if cached is not None and (
+            cached.mtime_ns == stat.st_mtime_ns
+            and cached.size == stat.st_size
+        ):
+            return cached
+        full = path.read_text(encoding="utf-8")
+        digest = hashlib.sha256(full.encode("utf-8")).hexdigest()
+        if cached is not None and cached.digest == digest:
+            # Touched, not changed
+            create_blocks = cached.create_blocks
+        else:
+            create_blocks = "\n\n".join(re.findall(
+                r"(CREATE TABLE\b.*?\);)", full, re.DOTALL,
+            ))
+        schema = SchemaDDL(
+            path, stat.st_mtime_ns, stat.st_size, digest,
+            full, create_blocks,
+        )
+        _schema_ddl[path] = schema
+        changed = cached is not None and cached.digest != digest
+        listeners = list(_schema_listeners) if changed else []
+    if changed:
+        logger.info(f"Schema DDL changed: {path.name} reloaded")
+    for ref in listeners:
+        callback = ref()
+        if callback is not None:
+            callback(schema)
+    return schema
+
+
+def on_schema_change(callback: Callable[[SchemaDDL], None]) -> None:
+    """
+    Helper function used to register a callback run with
+    the new SchemaDDL whenever a loaded DDL file changes
+    (e.g. to rebuild a graph or drop caches built from the
+    old schema). Bound methods are held weakly, so
+    registering does not keep their object alive.
+    """
+    if inspect.ismethod(callback):
+        ref = weakref.WeakMethod(callback)
+    else:
+        def ref() -> Callable[[SchemaDDL], None]:
+            return callback
+
+    with _schema_ddl_lock:
+        _schema_listeners[:] = [
+            r for r in _schema_listeners if r() is not None
+        ]
+        _schema_listeners.append(ref)
+
+
+def preload_schema_ddl() -> Optional[SchemaDDL]:
+    """
+    Helper function used to load the schema DDL at startup,
+    so the first request does not read and parse it (None
+    with a warning if the file cannot be read).
+    """
+    try:
+        return load_schema_ddl()
+    except OSError as e:
+        logger.warning(f"Schema DDL preload failed: {e}")
+        return None
 
 
 def get_schema_ddl(llm_context: bool = True) -> str:
@@ -66,27 +950,135 @@ def get_schema_ddl(llm_context: bool = True) -> str:
 
     When llm_context=False, returns the full file as-is
     (used by init_db to set up the database).
+
+    Both come from load_schema_ddl: the file is read and
+    parsed once per change, not per call.
+    """
+    schema = load_schema_ddl()
+    return schema.create_blocks if llm_context else schema.full
+
+
+def stream_query(
+    sql: str,
+    itersize: int = DEFAULT_STREAM_ITERSIZE,
+    max_rows: Optional[int] = None,
+    timeout_ms: Optional[int] = None,
+) -> Iterator[dict]:
+    """
+    Helper function used to iterate over a query's rows
+    without materializing the result; see
+    stream_query_batches.
+
+    Args:
+        sql: Row-returning query
+        itersize: Rows fetched per round trip
+        max_rows: Stop after this many rows (None = all)
+        timeout_ms: statement_timeout for the query
+
+    Returns:
+        Iterator of rows (dicts)
+    """
+    for batch in stream_query_batches(
+        sql, itersize, max_rows=max_rows, timeout_ms=timeout_ms,
+    ):
+        yield from batch
+
+
+def stream_query_batches(
+    sql: str,
+    batch_size: int = DEFAULT_STREAM_ITERSIZE,
+    max_rows: Optional[int] = None,
+    timeout_ms: Optional[int] = None,
+) -> Iterator[List[dict]]:
     """
-    schema_file = SCHEMA_DIR / "schema_setup.sql"
-    schema_sql = schema_file.read_text(encoding="utf-8")
+    Helper function used to fetch a query's rows in
+    batches through a named (server-side) cursor on a
+    pooled connection (on the default backend): only one
+    batch is held in memory and rows past max_rows are
+    never sent by the server.
 
-    if not llm_context:
-        return schema_sql
+    The connection is held until the iterator is
+    exhausted or closed; breaking out of a for-loop over
+    it (or calling close()) closes the cursor and returns
+    the connection to the pool. Only queries that return
+    rows (SELECT / VALUES / WITH ... SELECT) can be
+    streamed.
 
-    blocks = re.findall(
-        r"(CREATE TABLE\b.*?\);)",
-        schema_sql,
-        re.DOTALL,
+    Args:
+        sql: Row-returning query
+        batch_size: Rows fetched per round trip
+        max_rows: Stop after this many rows (None = all)
+        timeout_ms: statement_timeout for the query (None =
+            `DB_STATEMENT_TIMEOUT_MS` if set)
+
+    Returns:
+        Iterator of row batches (lists of dicts)
+    """
+    return get_backend().stream_batches(
+        sql, batch_size, max_rows, _statement_timeout_ms(timeout_ms),
     )
-    return "\n\n".join(blocks)
 
 
-def init_db():
+def _stream_query_batches(
+    sql: str,
+    batch_size: int,
+    max_rows: Optional[int],
+    timeout_ms: Optional[float],
+) -> Iterator[List[dict]]:
+    """
+    Helper function used to fetch a query's rows in
+    batches through a named (server-side) cursor on a
+    pooled connection.
+    """
+    remaining = max_rows
+    with get_pool().connection() as conn:
+        try:
+            if timeout_ms is not None:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        f"SET LOCAL statement_timeout = "
+                        f"{max(int(timeout_ms), 1)}"
+                    )
+            with conn.cursor(
+                name=f"stream_{next(_cursor_ids)}",
+                cursor_factory=psycopg2.extras.RealDictCursor,
+            ) as cur:
+                cur.execute(sql)
+                while remaining is None or remaining > 0:
+                    size = (
+                        batch_size if remaining is None
+                        else min(batch_size, remaining)
+                    )
+                    batch = cur.fetchmany(size)
+                    if not batch:
+                        break
+                    if remaining is not None:
+                        remaining -= len(batch)
+                    yield batch
+                    if len(batch) < size:
+                        break
+        finally:
+            if not conn.closed:
+                conn.rollback()
+
+
+def init_db(scale: Optional[float] = None):
     """
     Helper function used to initialize the database: create tables
     and load sample data.
+
+    Uses a dedicated connection rather than a pooled one: the
+    setup scripts change the session search_path.
+
+    Args:
+        scale: Load a synthetic dataset of this scale with COPY
+            instead (text_to_sql.bulk_load; 1.0 is 100k
+            order_items)
     """
-    conn = get_connection()
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL not set in .env")
+    conn = psycopg2.connect(database_url)
     try:
         with conn.cursor() as cur:
             # Create schema
@@ -94,10 +1086,16 @@ def init_db():
             cur.execute(schema_sql)
 
             # Load sample data
-            data_sql = (SCHEMA_DIR / "sample_data.sql")\
-                .read_text(encoding="utf-8")
-            cur.execute(data_sql)
+            if scale is None:
+                data_sql = (SCHEMA_DIR / "sample_data.sql")\
+                    .read_text(encoding="utf-8")
+                cur.execute(data_sql)
 
+        if scale is not None:
+            # Imported here: bulk_load imports this module
+            from text_to_sql.bulk_load import load_dataset
+            from text_to_sql.synthetic_data import SyntheticDataset
+            load_dataset(conn, SyntheticDataset(scale))
         conn.commit()
         logger.info("DB initialized: schema created and sample data loaded.")
     except Exception:
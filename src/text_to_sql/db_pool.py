@@ -0,0 +1,430 @@
+"""
+Thread-safe PostgreSQL connection pool.
+
+Keeps physical connections open between queries, so a
+lookup pays for the query and not for the TCP / TLS
+handshake and session setup (search_path and other
+settings go in the connection options, applied once
+per physical connection).
+
+- min_size connections are opened up front and kept;
+  up to max_size are opened on demand, beyond that
+  callers wait (up to timeout_s) for a connection to
+  come back
+- connections older than max_lifetime_s are closed
+  when they come back (or are checked out), idle ones
+  above min_size after max_idle_s
+- a connection idle for longer than
+  health_check_after_s is pinged (SELECT 1) before it
+  is handed out; dead ones are replaced
+- stats() reports checkouts, wait time percentiles,
+  timeouts and recycled connections
+"""
+
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+
+from text_to_sql.app_logger import get_logger
+from text_to_sql.llm_resilience import LatencyTracker
+
+
+logger = get_logger(__name__)
+
+DEFAULT_POOL_MIN_SIZE = 1
+DEFAULT_POOL_MAX_SIZE = 8
+DEFAULT_POOL_TIMEOUT_S = 10.0
+DEFAULT_MAX_LIFETIME_S = 1800.0
+DEFAULT_MAX_IDLE_S = 300.0
+DEFAULT_HEALTH_CHECK_AFTER_S = 30.0
+# Checkout wait samples kept for percentiles.
+WAIT_WINDOW = 1000
+
+IDLE = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+class PoolTimeout(psycopg2.pool.PoolError):
+    """
+    Raised when no connection frees up within the
+    pool's checkout timeout.
+    """
+
+
+class _Slot:
+    """
+    A physical connection and its timestamps.
+    """
+
+    __slots__ = ("conn", "created_at", "returned_at")
+
+    def __init__(self, conn: Any):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.returned_at = self.created_at
+
+
+class ConnectionPool:
+    """
+    Bounded pool of reusable connections.
+
+    Args:
+        connect: Opens one physical connection
+        min_size: Connections kept open
+        max_size: Upper bound on open connections
+        timeout_s: Longest wait for a connection
+        max_lifetime_s: Age after which a connection
+            is replaced (None = never)
+        max_idle_s: Idle time after which connections
+            above min_size are closed at the next
+            checkout (None = never)
+        health_check_after_s: Idle time after which a
+            connection is pinged before checkout
+            (None = never)
+        name: Pool name for logs
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        min_size: int = DEFAULT_POOL_MIN_SIZE,
+        max_size: int = DEFAULT_POOL_MAX_SIZE,
+        timeout_s: float = DEFAULT_POOL_TIMEOUT_S,
+        max_lifetime_s: Optional[float] = DEFAULT_MAX_LIFETIME_S,
+        max_idle_s: Optional[float] = DEFAULT_MAX_IDLE_S,
+        health_check_after_s: Optional[float] = (
+            DEFAULT_HEALTH_CHECK_AFTER_S
+        ),
+        name: str = "db",
+    ):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError(
+                f"Invalid pool size: min {min_size}, max {max_size}"
+            )
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout_s = timeout_s
+        self.max_lifetime_s = max_lifetime_s
+        self.max_idle_s = max_idle_s
+        self.health_check_after_s = health_check_after_s
+        self.name = name
+
+        self._idle: List[_Slot] = []
+        self._in_use: Dict[int, _Slot] = {}
+        # Open + being opened connections.
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._waits = LatencyTracker(window=WAIT_WINDOW, min_samples=1)
+
+        self.checkouts = 0
+        self.timeouts = 0
+        self.created = 0
+        self.recycled_lifetime = 0
+        self.recycled_idle = 0
+        self.health_check_failures = 0
+
+        for _ in range(min_size):
+            self._size += 1
+            self._idle.append(self._open())
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _open(self) -> _Slot:
+        """
+        Open a physical connection for a reserved slot
+        (the slot is released if it fails).
+        """
+        try:
+            conn = self.connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.created += 1
+        return _Slot(conn)
+
+    def _discard(self, slot: _Slot) -> None:
+        """
+        Close a connection and release its slot.
+        """
+        try:
+            if not slot.conn.closed:
+                slot.conn.close()
+        except Exception as e:
+            logger.debug(f"Pool {self.name}: close failed: {e}")
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _expired(self, slot: _Slot, now: float) -> bool:
+        return (
+            self.max_lifetime_s is not None
+            and now - slot.created_at >= self.max_lifetime_s
+        )
+
+    def _healthy(self, slot: _Slot, now: float) -> bool:
+        """
+        Ping a connection that sat idle for a while.
+        """
+        if slot.conn.closed:
+            return False
+        if (
+            self.health_check_after_s is None
+            or now - slot.returned_at < self.health_check_after_s
+        ):
+            return True
+        try:
+            with slot.conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            slot.conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _take_idle(
+        self, now: float,
+    ) -> Tuple[Optional[_Slot], List[_Slot]]:
+        """
+        Pop the most recently returned connection, plus
+        the connections to close (expired, or idle too
+        long above min_size). Caller holds the lock.
+        """
+        stale: List[_Slot] = []
+        if self.max_idle_s is not None:
+            # Least recently used first.
+            keep = []
+            surplus = self._size - self.min_size
+            for slot in self._idle:
+                if (
+                    surplus > 0
+                    and now - slot.returned_at >= self.max_idle_s
+                ):
+                    stale.append(slot)
+                    surplus -= 1
+                    self.recycled_idle += 1
+                else:
+                    keep.append(slot)
+            self._idle = keep
+        while self._idle:
+            slot = self._idle.pop()
+            if self._expired(slot, now):
+                stale.append(slot)
+                self.recycled_lifetime += 1
+                continue
+            return slot, stale
+        return None, stale
+
+    def getconn(self, timeout_s: Optional[float] = None) -> Any:
+        """
+        Check out a connection, waiting for one to come
+        back when max_size are in use.
+
+        Args:
+            timeout_s: Longest wait (None = the pool's
+                timeout_s)
+
+        Returns:
+            An open connection (return it with putconn)
+
+        Raises:
+            PoolTimeout: No connection freed up in time
+            psycopg2.pool.PoolError: The pool is closed
+        """
+        timeout_s = self.timeout_s if timeout_s is None else timeout_s
+        start = time.monotonic()
+        deadline = start + timeout_s
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise psycopg2.pool.PoolError(
+                            f"Pool {self.name} is closed"
+                        )
+                    now = time.monotonic()
+                    slot, stale = self._take_idle(now)
+                    if slot is not None or stale:
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            f"No connection from pool {self.name} "
+                            f"within {timeout_s:.1f}s "
+                            f"({self.max_size} in use)"
+                        )
+                    self._cond.wait(remaining)
+
+            for old in stale:
+                self._discard(old)
+            if slot is None and not stale:
+                slot = self._open()
+            elif slot is None:
+                # Stale connections freed slots: retry
+                # (reuse or open) under the lock.
+                continue
+            elif not self._healthy(slot, time.monotonic()):
+                with self._cond:
+                    self.health_check_failures += 1
+                logger.warning(
+                    f"Pool {self.name}: dropping dead connection"
+                )
+                self._discard(slot)
+                continue
+
+            with self._cond:
+                self._in_use[id(slot.conn)] = slot
+                self.checkouts += 1
+            self._waits.record((time.monotonic() - start) * 1000)
+            return slot.conn
+
+    def putconn(self, conn: Any, close: bool = False) -> None:
+        """
+        Return a checked-out connection. An open
+        transaction is rolled back; broken, closed or
+        expired connections are replaced.
+
+        Args:
+            conn: Connection from getconn
+            close: Close it instead of reusing it
+        """
+        with self._cond:
+            slot = self._in_use.pop(id(conn), None)
+        if slot is None:
+            raise psycopg2.pool.PoolError(
+                f"Connection not checked out from pool {self.name}"
+            )
+        if not close and not conn.closed:
+            try:
+                if conn.get_transaction_status() != IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                close = True
+        now = time.monotonic()
+        if self._closed or close or conn.closed:
+            self._discard(slot)
+            return
+        if self._expired(slot, now):
+            with self._cond:
+                self.recycled_lifetime += 1
+            self._discard(slot)
+            return
+        slot.returned_at = now
+        with self._cond:
+            self._idle.append(slot)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(
+        self, timeout_s: Optional[float] = None,
+    ) -> Iterator[Any]:
+        """
+        Check out a connection for a with-block; it is
+        closed instead of reused after a connection
+        error (a cancelled query is not one).
+        """
+        conn = self.getconn(timeout_s)
+        broken = False
+        try:
+            yield conn
+        except psycopg2.extensions.QueryCanceledError:
+            raise
+        except (
+            psycopg2.OperationalError, psycopg2.InterfaceError,
+        ):
+            broken = True
+            raise
+        finally:
+            self.putconn(conn, close=broken)
+
+    def closeall(self) -> None:
+        """
+        Close idle connections now and the checked-out
+        ones when they come back; further checkouts
+        fail.
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for slot in idle:
+            self._discard(slot)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Pool metrics.
+
+        Returns:
+            size, idle and in_use connections, checkouts,
+            wait_ms_p50 / p95 / max (None before the first
+            checkout), timeouts, created,
+            recycled_lifetime, recycled_idle and
+            health_check_failures
+        """
+        with self._cond:
+            stats = {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "created": self.created,
+                "recycled_lifetime": self.recycled_lifetime,
+                "recycled_idle": self.recycled_idle,
+                "health_check_failures": self.health_check_failures,
+            }
+        for key, q in (("p50", 50), ("p95", 95), ("max", 100)):
+            value = self._waits.percentile(q)
+            stats[f"wait_ms_{key}"] = (
+                round(value, 3) if value is not None else None
+            )
+        return stats
+
+
+class PooledConnection:
+    """
+    Connection wrapper whose close() returns the
+    connection to its pool (for callers written against
+    a plain psycopg2 connection). Everything else is
+    delegated.
+    """
+
+    def __init__(self, pool: ConnectionPool, conn: Any):
+        self._pool = pool
+        self._conn = conn
+        self._returned = False
+
+    def __getattr__(self, name: str) -> Any:
+        if self._returned:
+            raise psycopg2.InterfaceError("connection already closed")
+        return getattr(self._conn, name)
+
+    @property
+    def closed(self) -> int:
+        return 1 if self._returned else self._conn.closed
+
+    def close(self) -> None:
+        if not self._returned:
+            self._returned = True
+            self._pool.putconn(self._conn)
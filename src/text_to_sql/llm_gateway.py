@@ -0,0 +1,704 @@
+"""
+Process-wide LLM gateway.
+
+Every LLM call in the package (agents, naive pipeline,
+demos) goes through one shared gateway so that:
+
+- HTTP connections to the provider are pooled (one
+  AsyncOpenAI / OpenAI client per process instead of one
+  per agent or per call)
+- request and token rates are coordinated across agents
+  with RPM / TPM token buckets, so bursts queue locally
+  instead of turning into provider 429s and retry storms
+- callers are served in priority order per lane (e.g.
+  SQL generation before critique) when capacity is short
+- time spent queueing is reported per lane
+- slow calls can be hedged (p95-derived delay per
+  lane) and a shared circuit breaker tracks provider
+  health
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from dataclasses import (
+    dataclass,
+    field,
+)
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+)
+
+import httpx
+from openai import (
+    AsyncOpenAI,
+    OpenAI,
+)
+
+from text_to_sql.app_logger import get_logger
+from text_to_sql.llm_resilience import (
+    CircuitBreaker,
+    LatencyTracker,
+)
+from text_to_sql.model_registry import get_registry
+
+
+logger = get_logger(__name__)
+
+DEFAULT_RPM = 500
+DEFAULT_TPM = 200_000
+DEFAULT_MAX_CONNECTIONS = 20
+
+# Rough completion size used when reserving tokens
+# before a call; the reservation is settled against
+# the real usage afterwards.
+DEFAULT_OUTPUT_ESTIMATE = 512
+
+# How often a queued caller re-checks its turn.
+QUEUE_POLL_S = 0.01
+
+# Lower value = served first.
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+DEFAULT_LANE_PRIORITIES: Dict[str, int] = {
+    "SQL Generation": PRIORITY_HIGH,
+    "Query Refinement": PRIORITY_HIGH,
+    "Schema Intelligence": PRIORITY_NORMAL,
+    "Security Governance": PRIORITY_NORMAL,
+    "SQL Critique": PRIORITY_LOW,
+    "naive": PRIORITY_NORMAL,
+    "demo": PRIORITY_LOW,
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously.
+
+    Args:
+        capacity: Maximum tokens held (burst size)
+        refill_per_s: Tokens added per second
+    """
+
+    def __init__(
+        self,
+        capacity: float,
+        refill_per_s: float,
+    ):
+        self.capacity = float(capacity)
+        self.refill_per_s = float(refill_per_s)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, limit: float) -> "TokenBucket":
+        """
+        Create a bucket enforcing limit units per
+        minute.
+        """
+        return cls(limit, limit / 60)
+
+    def _refill(self) -> None:
+        """
+        Helper function used to add tokens for the time
+        elapsed since the last update. Caller holds the
+        lock.
+        """
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity,
+            self._tokens
+            + (now - self._updated) * self.refill_per_s,
+        )
+        self._updated = now
+
+    def available(self) -> float:
+        """
+        Tokens currently available.
+        """
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def credit(self, amount: float) -> None:
+        """
+        Return unused tokens to the bucket (capped at
+        capacity).
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(
+                self.capacity, self._tokens + amount
+            )
+
+    def debit(self, amount: float) -> None:
+        """
+        Take tokens unconditionally (may go negative,
+        e.g. when actual usage exceeded the estimate).
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Seconds until amount tokens are available.
+        """
+        with self._lock:
+            self._refill()
+            deficit = min(amount, self.capacity) - self._tokens
+            if deficit <= 0:
+                return 0.0
+            return deficit / self.refill_per_s
+
+
+@dataclass(order=True)
+class _Ticket:
+    """
+    Queued acquisition, ordered by priority then
+    arrival.
+    """
+
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    lane: str = field(compare=False)
+
+
+@dataclass
+class LaneStats:
+    """
+    Queueing metrics for one lane.
+    """
+
+    requests: int = 0
+    queued: int = 0
+    total_queue_ms: float = 0.0
+    max_queue_ms: float = 0.0
+    reserved_tokens: int = 0
+    used_tokens: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+
+    @property
+    def avg_queue_ms(self) -> float:
+        """
+        Mean queueing delay per request.
+        """
+        if not self.requests:
+            return 0.0
+        return self.total_queue_ms / self.requests
+
+
+class LLMGateway:
+    """
+    Shared client pool and rate limiter for all LLM
+    calls.
+
+    Args:
+        rpm: Requests per minute allowed
+        tpm: Estimated tokens per minute allowed
+        max_connections: HTTP connection pool size
+        lane_priorities: Lane name -> priority (lower
+            is served first); unknown lanes get
+            PRIORITY_NORMAL
+        api_key: Provider API key (defaults to
+            OPENAI_API_KEY)
+        hedging: Send a duplicate request when a call
+            exceeds its lane's p95 latency
+        breaker: Provider circuit breaker (defaults to
+            a new CircuitBreaker)
+    """
+
+    def __init__(
+        self,
+        rpm: int = DEFAULT_RPM,
+        tpm: int = DEFAULT_TPM,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        lane_priorities: Optional[Dict[str, int]] = None,
+        api_key: Optional[str] = None,
+        hedging: bool = True,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_connections = max_connections
+        self.lane_priorities = dict(
+            lane_priorities
+            if lane_priorities is not None
+            else DEFAULT_LANE_PRIORITIES
+        )
+        self._api_key = api_key
+        self.hedging = hedging
+        self.breaker = breaker or CircuitBreaker()
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._requests = TokenBucket.per_minute(rpm)
+        self._tokens = TokenBucket.per_minute(tpm)
+        self._queue: List[_Ticket] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, LaneStats] = {}
+        self._usage: Dict[str, Dict[str, int]] = {}
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._sync_client: Optional[OpenAI] = None
+
+    @classmethod
+    def from_env(cls) -> "LLMGateway":
+        """
+        Create a gateway configured from LLM_RPM_LIMIT,
+        LLM_TPM_LIMIT, LLM_MAX_CONNECTIONS and
+        LLM_HEDGING ("0" disables hedging).
+        """
+        return cls(
+            rpm=int(os.getenv(
+                "LLM_RPM_LIMIT", DEFAULT_RPM
+            )),
+            tpm=int(os.getenv(
+                "LLM_TPM_LIMIT", DEFAULT_TPM
+            )),
+            max_connections=int(os.getenv(
+                "LLM_MAX_CONNECTIONS",
+                DEFAULT_MAX_CONNECTIONS,
+            )),
+            hedging=os.getenv("LLM_HEDGING", "1") != "0",
+        )
+
+    def hedge_delay_s(self, lane: str) -> Optional[float]:
+        """
+        Delay after which a call on this lane should be
+        hedged, or None when hedging is off, the
+        provider is unhealthy, or the lane has too few
+        latency samples.
+        """
+        if not self.hedging or self.breaker.is_open():
+            return None
+        return self.latency(lane).hedge_delay_s()
+
+    def _http_limits(self) -> httpx.Limits:
+        """
+        Helper function used to size the shared HTTP
+        connection pool.
+        """
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+
+    def async_client(self) -> AsyncOpenAI:
+        """
+        Shared async OpenAI client (created lazily).
+        """
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                api_key=self._api_key
+                or os.getenv("OPENAI_API_KEY"),
+                http_client=httpx.AsyncClient(
+                    limits=self._http_limits()
+                ),
+            )
+        return self._async_client
+
+    def sync_client(self) -> OpenAI:
+        """
+        Shared sync OpenAI client (created lazily).
+        """
+        if self._sync_client is None:
+            self._sync_client = OpenAI(
+                api_key=self._api_key
+                or os.getenv("OPENAI_API_KEY"),
+                http_client=httpx.Client(
+                    limits=self._http_limits()
+                ),
+            )
+        return self._sync_client
+
+    def latency(self, lane: str) -> LatencyTracker:
+        """
+        Latency tracker for a lane (created on first
+        use).
+        """
+        with self._lock:
+            return self._latency.setdefault(
+                lane, LatencyTracker()
+            )
+
+    def model(self, model: str) -> Any:
+        """
+        Pydantic AI model bound to the shared client.
+
+        Args:
+            model: Model identifier, e.g.
+                "openai:gpt-4o-mini"
+
+        Returns:
+            An OpenAI chat model using the pooled
+            client, or the identifier unchanged for
+            other providers (Pydantic AI resolves it)
+        """
+        provider, _, name = model.partition(":")
+        if provider != "openai" or not name:
+            return model
+        try:
+            from pydantic_ai.models.openai import (
+                OpenAIChatModel as ChatModel,
+            )
+        except ImportError:
+            from pydantic_ai.models.openai import (
+                OpenAIModel as ChatModel,
+            )
+        from pydantic_ai.providers.openai import (
+            OpenAIProvider,
+        )
+        return ChatModel(
+            name,
+            provider=OpenAIProvider(
+                openai_client=self.async_client()
+            ),
+        )
+
+    def count_tokens(
+        self,
+        text: str,
+        model: str = "openai:gpt-4o-mini",
+    ) -> int:
+        """
+        Helper function used to estimate prompt tokens
+        for callers without their own tokenizer (the
+        model's shared counter from the model registry).
+        """
+        return get_registry().count_tokens(text, model)
+
+    def _priority(self, lane: str) -> int:
+        """
+        Helper function used to look up a lane's
+        priority.
+        """
+        return self.lane_priorities.get(
+            lane, PRIORITY_NORMAL
+        )
+
+    def _enqueue(self, tokens: int, lane: str) -> _Ticket:
+        """
+        Helper function used to add a ticket to the
+        priority queue.
+        """
+        ticket = _Ticket(
+            priority=self._priority(lane),
+            seq=next(self._seq),
+            tokens=min(tokens, self.tpm),
+            lane=lane,
+        )
+        with self._lock:
+            heapq.heappush(self._queue, ticket)
+        return ticket
+
+    def _dequeue(self, ticket: _Ticket) -> None:
+        """
+        Helper function used to drop a ticket (served or
+        abandoned) from the queue.
+        """
+        with self._lock:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+
+    def _try_acquire(self, ticket: _Ticket) -> float:
+        """
+        Helper function used to take capacity for the
+        ticket if it is at the head of the queue.
+
+        Returns:
+            0.0 when acquired, otherwise seconds to wait
+            before trying again
+        """
+        with self._lock:
+            if self._queue[0] is not ticket:
+                return QUEUE_POLL_S
+            wait = max(
+                self._requests.wait_time(1),
+                self._tokens.wait_time(ticket.tokens),
+            )
+            if wait > 0:
+                return wait
+            self._requests.debit(1)
+            self._tokens.debit(ticket.tokens)
+            heapq.heappop(self._queue)
+            return 0.0
+
+    def _record(
+        self,
+        ticket: _Ticket,
+        queue_ms: float,
+    ) -> None:
+        """
+        Helper function used to record the queueing
+        delay for a served ticket.
+        """
+        with self._lock:
+            stats = self._stats.setdefault(
+                ticket.lane, LaneStats()
+            )
+            stats.requests += 1
+            stats.reserved_tokens += ticket.tokens
+            stats.total_queue_ms += queue_ms
+            stats.max_queue_ms = max(
+                stats.max_queue_ms, queue_ms
+            )
+            if queue_ms > QUEUE_POLL_S * 1000:
+                stats.queued += 1
+        if queue_ms > QUEUE_POLL_S * 1000:
+            logger.info(
+                f"LLM gateway: {ticket.lane} queued "
+                f"{queue_ms:.0f}ms"
+            )
+
+    async def acquire(
+        self,
+        tokens: int,
+        lane: str = "default",
+    ) -> float:
+        """
+        Wait (without blocking the event loop) until the
+        rate limits admit one request of the estimated
+        size.
+
+        Args:
+            tokens: Estimated tokens (prompt + output)
+            lane: Caller lane, used for priority and
+                metrics
+
+        Returns:
+            Queueing delay in milliseconds
+        """
+        start = time.monotonic()
+        ticket = self._enqueue(tokens, lane)
+        try:
+            while True:
+                wait = self._try_acquire(ticket)
+                if wait == 0:
+                    break
+                await asyncio.sleep(
+                    min(wait, QUEUE_POLL_S * 10)
+                )
+        except BaseException:
+            self._dequeue(ticket)
+            raise
+        queue_ms = (time.monotonic() - start) * 1000
+        self._record(ticket, queue_ms)
+        return queue_ms
+
+    def acquire_sync(
+        self,
+        tokens: int,
+        lane: str = "default",
+    ) -> float:
+        """
+        Blocking variant of acquire() for sync callers.
+        """
+        start = time.monotonic()
+        ticket = self._enqueue(tokens, lane)
+        try:
+            while True:
+                wait = self._try_acquire(ticket)
+                if wait == 0:
+                    break
+                time.sleep(min(wait, QUEUE_POLL_S * 10))
+        except BaseException:
+            self._dequeue(ticket)
+            raise
+        queue_ms = (time.monotonic() - start) * 1000
+        self._record(ticket, queue_ms)
+        return queue_ms
+
+    def record_hedge(self, lane: str, won: bool) -> None:
+        """
+        Count a hedged call and whether the duplicate
+        answered first.
+        """
+        with self._lock:
+            stats = self._stats.setdefault(
+                lane, LaneStats()
+            )
+            stats.hedged += 1
+            stats.hedge_wins += int(won)
+
+    def record_usage(
+        self,
+        model: str,
+        input_tokens: Optional[int],
+        output_tokens: Optional[int],
+        cached_input_tokens: Optional[int] = None,
+    ) -> None:
+        """
+        Count one completed call and its token usage
+        against the model that served it.
+
+        cached_input_tokens is the part of input_tokens
+        the provider served from its prompt-prefix
+        cache, when reported.
+        """
+        with self._lock:
+            usage = self._usage.setdefault(model, {
+                "requests": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "cached_input_tokens": 0,
+            })
+            usage["requests"] += 1
+            usage["input_tokens"] += input_tokens or 0
+            usage["output_tokens"] += output_tokens or 0
+            usage["cached_input_tokens"] += (
+                cached_input_tokens or 0
+            )
+
+    def settle(
+        self,
+        reserved: int,
+        used: Optional[int],
+        lane: str = "default",
+    ) -> None:
+        """
+        Reconcile a token reservation with the usage
+        the provider reported.
+
+        Args:
+            reserved: Tokens reserved in acquire()
+            used: Actual total tokens (None = unknown,
+                keep the reservation)
+            lane: Caller lane, for metrics
+        """
+        if used is None:
+            return
+        reserved = min(reserved, self.tpm)
+        if used < reserved:
+            self._tokens.credit(reserved - used)
+        elif used > reserved:
+            self._tokens.debit(used - reserved)
+        with self._lock:
+            self._stats.setdefault(
+                lane, LaneStats()
+            ).used_tokens += used
+
+    def chat_completion(
+        self,
+        lane: str = "default",
+        output_estimate: int = DEFAULT_OUTPUT_ESTIMATE,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Rate-limited chat.completions.create on the
+        shared sync client.
+
+        Args:
+            lane: Caller lane, for priority and metrics
+            output_estimate: Expected completion tokens
+            **kwargs: Passed to
+                client.chat.completions.create
+
+        Returns:
+            The OpenAI ChatCompletion response
+        """
+        model = f"openai:{kwargs.get('model', 'gpt-4o-mini')}"
+        prompt_tokens = sum(
+            self.count_tokens(str(m.get("content", "")), model)
+            for m in kwargs.get("messages", [])
+        )
+        reserved = prompt_tokens + output_estimate
+        self.acquire_sync(reserved, lane=lane)
+        used: Optional[int] = 0
+        try:
+            response = self.sync_client().chat.completions.create(
+                **kwargs
+            )
+            usage = getattr(response, "usage", None)
+            used = usage.total_tokens if usage else None
+        finally:
+            # A failed request refunds its reservation
+            self.settle(reserved, used, lane=lane)
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.record_usage(
+            f"openai:{kwargs.get('model', '')}",
+            usage.prompt_tokens if usage else None,
+            usage.completion_tokens if usage else None,
+            cached_input_tokens=getattr(
+                details, "cached_tokens", None
+            ),
+        )
+        return response
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-lane queueing and token metrics.
+
+        Returns:
+            Lane name -> metrics dict
+        """
+        with self._lock:
+            return {
+                lane: {
+                    "requests": s.requests,
+                    "queued": s.queued,
+                    "avg_queue_ms": round(
+                        s.avg_queue_ms, 2
+                    ),
+                    "max_queue_ms": round(
+                        s.max_queue_ms, 2
+                    ),
+                    "reserved_tokens": s.reserved_tokens,
+                    "used_tokens": s.used_tokens,
+                    "hedged": s.hedged,
+                    "hedge_wins": s.hedge_wins,
+                }
+                for lane, s in self._stats.items()
+            }
+
+    def usage_by_model(self) -> Dict[str, Dict[str, int]]:
+        """
+        Per-model request and token counts (input for
+        cost accounting).
+
+        Returns:
+            Model identifier -> {requests, input_tokens,
+            output_tokens, cached_input_tokens}
+        """
+        with self._lock:
+            return {
+                model: dict(usage)
+                for model, usage in self._usage.items()
+            }
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """
+    Return the process-wide gateway, creating it from
+    the environment on first use.
+    """
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway.from_env()
+        return _gateway
+
+
+def set_gateway(gateway: Optional[LLMGateway]) -> None:
+    """
+    Replace the process-wide gateway (None resets it to
+    be rebuilt from the environment on next use).
+    """
+    global _gateway
+    with _gateway_lock:
+        _gateway = gateway
@@ -0,0 +1,222 @@
+"""
+Latency tracking and circuit breaking for LLM calls.
+
+Used by the LLM gateway to decide when to hedge a slow
+call (send a duplicate after a p95-derived delay and
+take whichever answers first) and when the provider is
+unhealthy enough that agents should skip optional LLM
+calls and use their deterministic fallbacks instead.
+"""
+
+import math
+import threading
+import time
+
+from collections import deque
+from typing import (
+    Deque,
+    Optional,
+)
+
+from text_to_sql.app_logger import get_logger
+
+
+logger = get_logger(__name__)
+
+DEFAULT_LATENCY_WINDOW = 200
+# Don't hedge until the percentile is meaningful.
+MIN_HEDGE_SAMPLES = 20
+DEFAULT_HEDGE_PERCENTILE = 95.0
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RECOVERY_TIMEOUT_S = 30.0
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised when an LLM call is refused because the
+    provider circuit is open.
+    """
+
+
+class LatencyTracker:
+    """
+    Sliding window of recent call latencies.
+
+    Args:
+        window: Number of recent samples kept
+        min_samples: Samples required before
+            percentiles (and hedging) are reported
+    """
+
+    def __init__(
+        self,
+        window: int = DEFAULT_LATENCY_WINDOW,
+        min_samples: int = MIN_HEDGE_SAMPLES,
+    ):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def hedge_delay_s(
+        self,
+        percentile: float = DEFAULT_HEDGE_PERCENTILE,
+    ) -> Optional[float]:
+        """
+        Delay after which a duplicate request should be
+        sent, or None while there are too few samples.
+        """
+        value = self.percentile(percentile)
+        if value is None:
+            return None
+        return value / 1000
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Nearest-rank percentile of the window in ms, or
+        None below min_samples.
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        rank = max(math.ceil(q / 100 * len(ordered)), 1)
+        return ordered[rank - 1]
+
+    def record(self, latency_ms: float) -> None:
+        """
+        Add one call latency (ms).
+        """
+        with self._lock:
+            self._samples.append(latency_ms)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: calls flow. After failure_threshold
+    consecutive failures the circuit opens and calls are
+    refused for recovery_timeout_s; then a single probe
+    is let through (half-open) and its outcome closes or
+    re-opens the circuit.
+
+    Args:
+        failure_threshold: Consecutive failures that
+            open the circuit
+        recovery_timeout_s: Seconds to stay open before
+            probing
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        recovery_timeout_s: float = (
+            DEFAULT_RECOVERY_TIMEOUT_S
+        ),
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout_s = recovery_timeout_s
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def abandon(self) -> None:
+        """
+        Release an admitted call that was cancelled
+        before it produced an outcome.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """
+        Whether a call may proceed. In half-open state
+        only one probe is admitted at a time.
+        """
+        with self._lock:
+            state = self._state()
+            if state == CIRCUIT_CLOSED:
+                return True
+            if (
+                state == CIRCUIT_HALF_OPEN
+                and not self._probe_in_flight
+            ):
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def is_open(self) -> bool:
+        """
+        Whether the provider is currently considered
+        unhealthy (open, not yet due for a probe).
+        Does not consume the half-open probe.
+        """
+        with self._lock:
+            return self._state() == CIRCUIT_OPEN
+
+    def record_failure(self) -> None:
+        """
+        Count a failed call; opens the circuit at the
+        threshold or when a half-open probe fails.
+        """
+        with self._lock:
+            self._failures += 1
+            was_probe = self._probe_in_flight
+            self._probe_in_flight = False
+            if (
+                was_probe
+                or self._failures >= self.failure_threshold
+            ):
+                if self._opened_at is None or was_probe:
+                    logger.warning(
+                        f"LLM circuit opened after "
+                        f"{self._failures} failures"
+                    )
+                self._opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        """
+        Count a successful call. Only the half-open
+        probe closes an open circuit; other calls that
+        succeed meanwhile don't cut recovery short.
+        """
+        with self._lock:
+            if (
+                self._state() != CIRCUIT_CLOSED
+                and not self._probe_in_flight
+            ):
+                return
+            if self._opened_at is not None:
+                logger.info("LLM circuit closed")
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def _state(self) -> str:
+        """
+        Helper function used to compute the state.
+        Caller holds the lock.
+        """
+        if self._opened_at is None:
+            return CIRCUIT_CLOSED
+        elapsed = time.monotonic() - self._opened_at
+        if elapsed >= self.recovery_timeout_s:
+            return CIRCUIT_HALF_OPEN
+        return CIRCUIT_OPEN
+
+    @property
+    def state(self) -> str:
+        """
+        Current state: closed, open or half_open.
+        """
+        with self._lock:
+            return self._state()
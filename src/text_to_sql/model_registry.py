@@ -0,0 +1,345 @@
+"""
+Process-wide model registry.
+
+One place for what the pipeline needs to know about a
+model before calling it:
+
+- context window and output reserve, for the context
+  budget checks (schema pruning, prompt size)
+- tokenizer, for counting prompt tokens: tiktoken
+  encodings are loaded lazily and shared across agents;
+  models without a local tokenizer (e.g. Anthropic) use
+  a fast character-based approximation
+- input / output price, for cost reports
+
+Built-in specs cover the OpenAI and Anthropic models
+the project uses. MODEL_REGISTRY_FILE may point to a
+JSON file whose entries override or extend them:
+
+    {"models": [{"name": "anthropic:claude-x",
+                 "context_window": 200000,
+                 "input_price_per_1m": 3.0}]}
+
+Unknown models get their provider's defaults (or
+DEFAULT_CONTEXT_WINDOW and the approximate counter for
+an unknown provider).
+"""
+
+import dataclasses
+import functools
+import json
+import math
+import os
+import threading
+
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Union,
+)
+
+import tiktoken
+
+from text_to_sql.app_logger import get_logger
+
+
+logger = get_logger(__name__)
+
+DEFAULT_CONTEXT_WINDOW = 8_192
+DEFAULT_OUTPUT_RESERVE = 4096
+
+# Characters per token for the approximate counter:
+# below what English text and SQL DDL average, so the
+# estimate errs on the side of too many tokens.
+APPROX_CHARS_PER_TOKEN = 3.2
+
+
+@dataclasses.dataclass
+class ModelSpec:
+    """
+    What the pipeline knows about one model.
+
+    Attributes:
+        name: Model identifier ("provider:model")
+        context_window: Input + output tokens
+        output_reserve: Tokens kept free for the output
+            in budget checks
+        tokenizer: tiktoken encoding name (None = the
+            approximate counter)
+        input_price_per_1m: USD per 1M input tokens
+        output_price_per_1m: USD per 1M output tokens
+    """
+
+    name: str
+    context_window: int = DEFAULT_CONTEXT_WINDOW
+    output_reserve: int = DEFAULT_OUTPUT_RESERVE
+    tokenizer: Optional[str] = None
+    input_price_per_1m: float = 0.0
+    output_price_per_1m: float = 0.0
+
+
+BUILTIN_MODELS = [
+    ModelSpec("openai:gpt-4o", 128_000, tokenizer="o200k_base",
+              input_price_per_1m=2.50, output_price_per_1m=10.00),
+    ModelSpec("openai:gpt-4o-mini", 128_000, tokenizer="o200k_base",
+              input_price_per_1m=0.15, output_price_per_1m=0.60),
+    ModelSpec("openai:gpt-4-turbo", 128_000, tokenizer="cl100k_base",
+              input_price_per_1m=10.00, output_price_per_1m=30.00),
+    ModelSpec("openai:gpt-4", 8_192, tokenizer="cl100k_base",
+              input_price_per_1m=30.00, output_price_per_1m=60.00),
+    ModelSpec("openai:gpt-3.5-turbo", 16_385, tokenizer="cl100k_base",
+              input_price_per_1m=0.50, output_price_per_1m=1.50),
+    ModelSpec("anthropic:claude-3-5-haiku-latest", 200_000,
+              output_reserve=8192,
+              input_price_per_1m=0.80, output_price_per_1m=4.00),
+    ModelSpec("anthropic:claude-3-5-sonnet-latest", 200_000,
+              output_reserve=8192,
+              input_price_per_1m=3.00, output_price_per_1m=15.00),
+    ModelSpec("anthropic:claude-3-7-sonnet-latest", 200_000,
+              output_reserve=8192,
+              input_price_per_1m=3.00, output_price_per_1m=15.00),
+    ModelSpec("anthropic:claude-sonnet-4-0", 200_000,
+              output_reserve=8192,
+              input_price_per_1m=3.00, output_price_per_1m=15.00),
+    ModelSpec("anthropic:claude-opus-4-0", 200_000,
+              output_reserve=8192,
+              input_price_per_1m=15.00, output_price_per_1m=75.00),
+]
+
+# Defaults for unlisted models of a known provider
+# (no price: cost reports count them as zero).
+PROVIDER_DEFAULTS: Dict[str, ModelSpec] = {
+    "openai": ModelSpec("openai", tokenizer="o200k_base"),
+    "anthropic": ModelSpec(
+        "anthropic", 200_000, output_reserve=8192
+    ),
+}
+
+
+class TokenCounter(Protocol):
+    """
+    Counts the tokens of a text for one model family.
+    """
+
+    def count(self, text: str) -> int:
+        ...
+
+
+class TiktokenCounter:
+    """
+    Exact counter over a tiktoken encoding, loaded on
+    first use.
+
+    Args:
+        encoding: tiktoken encoding name
+    """
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        self._encoder: Optional[tiktoken.Encoding] = None
+        self._lock = threading.Lock()
+
+    def count(self, text: str) -> int:
+        if self._encoder is None:
+            with self._lock:
+                if self._encoder is None:
+                    self._encoder = tiktoken.get_encoding(
+                        self.encoding
+                    )
+        return len(self._encoder.encode(text))
+
+
+class ApproxTokenCounter:
+    """
+    Fast estimate for models without a local tokenizer:
+    characters / APPROX_CHARS_PER_TOKEN, rounded up.
+    """
+
+    def count(self, text: str) -> int:
+        return math.ceil(len(text) / APPROX_CHARS_PER_TOKEN)
+
+
+@functools.lru_cache(maxsize=None)
+def get_counter(tokenizer: Optional[str]) -> TokenCounter:
+    """
+    Shared counter for a tokenizer (None = the
+    approximate counter); one instance per process.
+    """
+    if tokenizer is None:
+        return ApproxTokenCounter()
+    return TiktokenCounter(tokenizer)
+
+
+class ModelRegistry:
+    """
+    Model specs by identifier.
+
+    Args:
+        specs: Specs to register (defaults to
+            BUILTIN_MODELS)
+        provider_defaults: Provider -> spec used for
+            unlisted models (defaults to
+            PROVIDER_DEFAULTS)
+    """
+
+    def __init__(
+        self,
+        specs: Optional[Iterable[ModelSpec]] = None,
+        provider_defaults: Optional[Dict[str, ModelSpec]] = None,
+    ):
+        self._specs: Dict[str, ModelSpec] = {}
+        self._lock = threading.Lock()
+        self.provider_defaults = (
+            provider_defaults
+            if provider_defaults is not None
+            else PROVIDER_DEFAULTS
+        )
+        for spec in specs if specs is not None else BUILTIN_MODELS:
+            self.register(dataclasses.replace(spec))
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "ModelRegistry":
+        """
+        Built-in specs overridden / extended by a JSON
+        config file ({"models": [spec fields, ...]}).
+        Fields missing from an entry keep the built-in
+        value for that model, if any.
+        """
+        registry = cls()
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        for entry in data.get("models", []):
+            base = registry._specs.get(entry["name"])
+            registry.register(
+                dataclasses.replace(base, **entry)
+                if base is not None
+                else ModelSpec(**entry)
+            )
+        logger.info(
+            f"Loaded {len(data.get('models', []))} model "
+            f"specs from {path}"
+        )
+        return registry
+
+    @classmethod
+    def from_env(cls) -> "ModelRegistry":
+        """
+        Registry from MODEL_REGISTRY_FILE, or the
+        built-in specs when unset.
+        """
+        path = os.getenv("MODEL_REGISTRY_FILE")
+        return cls.from_file(path) if path else cls()
+
+    def register(self, spec: ModelSpec) -> None:
+        """
+        Add or replace a model spec.
+        """
+        with self._lock:
+            self._specs[spec.name] = spec
+
+    def unregister(self, name: str) -> None:
+        """
+        Remove a model spec (KeyError if absent).
+        """
+        with self._lock:
+            del self._specs[name]
+
+    def names(self) -> List[str]:
+        """
+        Registered model identifiers.
+        """
+        with self._lock:
+            return list(self._specs)
+
+    def lookup(self, model: str) -> Optional[ModelSpec]:
+        """
+        Registered spec of a model, or None.
+        """
+        with self._lock:
+            return self._specs.get(model)
+
+    def get(self, model: str) -> ModelSpec:
+        """
+        Spec of a model: registered, else its
+        provider's defaults, else the generic fallback.
+        """
+        spec = self.lookup(model)
+        if spec is not None:
+            return spec
+        provider = model.partition(":")[0]
+        default = self.provider_defaults.get(provider)
+        if default is not None:
+            return dataclasses.replace(default, name=model)
+        return ModelSpec(model)
+
+    def counter(self, model: str) -> TokenCounter:
+        """
+        Shared token counter for a model.
+        """
+        return get_counter(self.get(model).tokenizer)
+
+    def count_tokens(self, text: str, model: str) -> int:
+        """
+        Tokens of a text for a model.
+        """
+        return self.counter(model).count(text)
+
+
+class ContextWindows(MutableMapping):
+    """
+    Model -> context window, as a live view of the
+    process-wide registry (setting an entry updates or
+    registers the model's spec).
+    """
+
+    def __getitem__(self, model: str) -> int:
+        spec = get_registry().lookup(model)
+        if spec is None:
+            raise KeyError(model)
+        return spec.context_window
+
+    def __setitem__(self, model: str, tokens: int) -> None:
+        registry = get_registry()
+        registry.register(dataclasses.replace(
+            registry.get(model), context_window=tokens
+        ))
+
+    def __delitem__(self, model: str) -> None:
+        get_registry().unregister(model)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(get_registry().names())
+
+    def __len__(self) -> int:
+        return len(get_registry().names())
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    """
+    Return the process-wide registry, loading it from
+    the environment on first use.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry.from_env()
+        return _registry
+
+
+def set_registry(registry: Optional[ModelRegistry]) -> None:
+    """
+    Replace the process-wide registry (None resets it to
+    be reloaded from the environment on next use).
+    """
+    global _registry
+    with _registry_lock:
+        _registry = registry
@@ -9,10 +9,10 @@ and it's exactly what breaks in production.
 import os
 
 from dotenv import load_dotenv
-from openai import OpenAI
 
 from text_to_sql.app_logger import get_logger
-from text_to_sql.db import execute_query, get_schema_ddl
+from text_to_sql.db import execute_query, get_schema_ddl, stream_query
+from text_to_sql.llm_gateway import get_gateway
 from text_to_sql.prompts.prompts import get_prompt
 from text_to_sql.usage_tracker import log_llm_request, log_llm_response
 
@@ -27,12 +27,17 @@ SYSTEM_PROMPT = get_prompt("naive")
 def ask(
         question: str,
         verbose: bool = False,
-        max_num_result_rows: int = 10) -> list[dict]:
+        max_num_result_rows: int = 10,
+        max_rows: int | None = None) -> list[dict]:
     """
     Helper function used to take in as input a natural language question,
     use LLM to generate SQL, execute it, and then return results.
 
     That's it. No validation. No safety. No guardrails.
+
+    With max_rows set, rows are streamed from the database and
+    fetching stops after max_rows (only row-returning SQL can be
+    streamed); otherwise the full result is fetched.
     """
     # Step 1: Load the entire schema as context
     schema = get_schema_ddl()
@@ -48,8 +53,8 @@ def ask(
         question=question,
     )
 
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    response = client.chat.completions.create(
+    response = get_gateway().chat_completion(
+        lane="naive",
         model=model,
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
@@ -76,16 +81,27 @@ def ask(
         logger.info(f"Generated SQL:\n{sql}")
 
     # Step 3: Execute the SQL directly — no validation whatsoever
-    results = execute_query(sql)
+    truncated = False
+    if max_rows is None:
+        results = execute_query(sql)
+    else:
+        # One extra row tells whether the result was cut off
+        results = list(stream_query(sql, max_rows=max_rows + 1))
+        truncated = len(results) > max_rows
+        results = results[:max_rows]
 
     if verbose:
         results_filtered = results[:max_num_result_rows]
         results_to_show = "".join(f"{row}\n" for row in results_filtered)
         results_to_show = results_to_show.strip() if results_to_show \
             else "  (no results)"
-        logger.info(f"Results ({len(results)} rows):\n{results_to_show}")
+        row_count = f"{len(results)}{'+' if truncated else ''}"
+        logger.info(f"Results ({row_count} rows):\n{results_to_show}")
         if len(results) > max_num_result_rows:
             num_remaining = len(results) - max_num_result_rows
-            logger.info(f"  ... and {num_remaining} more rows")
+            logger.info(
+                f"  ... and {num_remaining}{'+' if truncated else ''} "
+                f"more rows"
+            )
 
     return results
@@ -0,0 +1,328 @@
+"""
+Prepared-statement cache for generated queries.
+
+Generated dashboard queries repeat with different
+literal values. Each query is parameterized
+(sql_validator.parameterize_sql: literals become $1..$n,
+equal literals share one parameter) and run as
+`EXECUTE name(literals)` of a statement PREPAREd once
+per pooled connection under the query's skeleton and
+parameter types, so a
+repeat skips parsing and analysis, and PostgreSQL can
+switch to a cached generic plan after its first five
+executions instead of planning every time.
+
+Prepared statements belong to a server session, so the
+cache keeps one LRU map ((skeleton, types) -> statement
+name) per connection, weakly keyed: a connection the pool closes
+takes its entries with it. When a connection holds
+max_statements statements, the least recently used one
+is DEALLOCATEd in the same round trip as the next
+PREPARE. Statement names are never reused.
+
+A skeleton PostgreSQL will not prepare (a parameter
+whose type cannot be inferred) is remembered and runs as
+plain SQL from then on. Statements lost on the server
+(26000) or whose cached plan no longer matches the
+schema (0A000) are forgotten and the query runs as plain
+SQL once; any other error is the query's own and is
+raised as is.
+"""
+
+import dataclasses
+import itertools
+import os
+import threading
+import weakref
+
+from collections import OrderedDict
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from cachetools import LRUCache
+
+from text_to_sql.app_logger import get_logger
+from text_to_sql.sql_validator import parameterize_sql
+
+
+logger = get_logger(__name__)
+
+DEFAULT_PREPARED_CACHE_SIZE = 128
+DEFAULT_UNPREPARABLE_SIZE = 1024
+STATEMENT_PREFIX = "tts_ps_"
+# SQLSTATEs after which a statement is gone or unusable
+# but the query itself may be fine: invalid statement
+# name (lost on the server), cached plan must not change
+# result type (schema changed under it).
+STALE_STATEMENT_SQLSTATES = ("26000", "0A000")
+
+_names = itertools.count(1)
+
+
+@dataclasses.dataclass
+class PreparedCall:
+    """
+    How to run one query through the cache.
+
+    Attributes:
+        key: Query skeleton and parameter types (the cache
+            key: a statement prepared for integer
+            parameters must not run numeric literals)
+        name: Prepared statement name
+        prepare: DEALLOCATE / PREPARE batch to send first
+            (None when the statement is already prepared)
+        execute: EXECUTE statement running the query
+    """
+
+    key: Tuple[str, Tuple[str, ...]]
+    name: str
+    prepare: Optional[str]
+    execute: str
+
+
+@dataclasses.dataclass
+class _Session:
+    """
+    Statements prepared on one connection.
+    """
+
+    statements: "OrderedDict[Tuple, str]" = dataclasses.field(
+        default_factory=OrderedDict
+    )
+    stale: List[str] = dataclasses.field(default_factory=list)
+
+
+class PreparedStatementCache:
+    """
+    Per-connection LRU of prepared statements by query
+    skeleton and parameter types.
+
+    Args:
+        max_statements: Statements kept prepared per
+            connection
+    """
+
+    def __init__(self, max_statements: int = DEFAULT_PREPARED_CACHE_SIZE):
+        self.max_statements = max(1, max_statements)
+        self._sessions: "weakref.WeakKeyDictionary[object, _Session]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._unpreparable: LRUCache = LRUCache(DEFAULT_UNPREPARABLE_SIZE)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.prepares = 0
+        self.evictions = 0
+        self.skipped = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def from_env(cls) -> "PreparedStatementCache":
+        """
+        Cache sized by SQL_PREPARED_CACHE_SIZE.
+        """
+        return cls(int(os.getenv(
+            "SQL_PREPARED_CACHE_SIZE", DEFAULT_PREPARED_CACHE_SIZE
+        )))
+
+    def call(self, conn: object, sql: str) -> Optional[PreparedCall]:
+        """
+        Plan running a query on a connection as a
+        prepared statement.
+
+        Args:
+            conn: Connection the query runs on
+            sql: Query
+
+        Returns:
+            PreparedCall (send its prepare batch, if any,
+            then its execute statement; report errors to
+            prepare_failed / execute_failed), or None to run
+            the SQL as is: not a single read query, already
+            has bind parameters, or its skeleton does not
+            prepare
+        """
+        query = parameterize_sql(sql)
+        key = (query.skeleton, query.types) if query is not None else None
+        with self._lock:
+            if key is None or key in self._unpreparable:
+                self.skipped += 1
+                return None
+            session = self._sessions.setdefault(conn, _Session())
+            arguments = _arguments(query.values)
+            name = session.statements.get(key)
+            if name is not None:
+                session.statements.move_to_end(key)
+                self.hits += 1
+                return PreparedCall(
+                    key, name, None,
+                    f"EXECUTE {name}{arguments}",
+                )
+            batch = [f"DEALLOCATE {stale};" for stale in session.stale]
+            session.stale.clear()
+            while len(session.statements) >= self.max_statements:
+                _, evicted = session.statements.popitem(last=False)
+                batch.append(f"DEALLOCATE {evicted};")
+                self.evictions += 1
+            name = f"{STATEMENT_PREFIX}{next(_names)}"
+            session.statements[key] = name
+            self.prepares += 1
+        batch.append(
+            f"PREPARE {name}{_arguments(query.types)} AS {query.sql}"
+        )
+        return PreparedCall(
+            key, name, "\n".join(batch),
+            f"EXECUTE {name}{arguments}",
+        )
+
+    def prepare_failed(
+        self,
+        conn: object,
+        call: PreparedCall,
+        sqlstate: Optional[str],
+    ) -> bool:
+        """
+        Record that a call's prepare batch failed.
+
+        Args:
+            conn: Connection the batch ran on
+            call: The call
+            sqlstate: Error SQLSTATE (None for connection
+                errors)
+
+        Returns:
+            True to run the query as plain SQL (after a
+            rollback); False to raise the error
+        """
+        if sqlstate is None:
+            return False
+        with self._lock:
+            session = self._sessions.get(conn)
+            if sqlstate == "26000":
+                # A DEALLOCATE found nothing: the session's
+                # statements are gone (DISCARD ALL, pooler).
+                if session is not None:
+                    session.statements.clear()
+                    session.stale.clear()
+            else:
+                if session is not None:
+                    session.statements.pop(call.key, None)
+                self._unpreparable[call.key] = sqlstate
+                logger.debug(
+                    f"Not preparable ({sqlstate}): {call.key[0][:120]}"
+                )
+            self.fallbacks += 1
+        return True
+
+    def execute_failed(
+        self,
+        conn: object,
+        call: PreparedCall,
+        sqlstate: Optional[str],
+    ) -> bool:
+        """
+        Record that a call's EXECUTE failed.
+
+        Args:
+            conn: Connection the statement ran on
+            call: The call
+            sqlstate: Error SQLSTATE (None for connection
+                errors)
+
+        Returns:
+            True to run the query as plain SQL (after a
+            rollback): the statement was lost or went
+            stale and is forgotten; False to raise the
+            error (it is the query's own)
+        """
+        if sqlstate not in STALE_STATEMENT_SQLSTATES:
+            return False
+        with self._lock:
+            session = self._sessions.get(conn)
+            if session is not None:
+                if session.statements.get(call.key) == call.name:
+                    del session.statements[call.key]
+                if sqlstate != "26000":
+                    session.stale.append(call.name)
+            self.fallbacks += 1
+        return True
+
+    def clear(self) -> None:
+        """
+        Forget all connections and skeletons and reset
+        counters. Statements stay prepared on open
+        connections until they close.
+        """
+        with self._lock:
+            self._sessions.clear()
+            self._unpreparable.clear()
+            self.hits = self.prepares = self.evictions = 0
+            self.skipped = self.fallbacks = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Hit-rate and size metrics.
+
+        Returns:
+            hits (EXECUTE of a prepared statement),
+            prepares, hit_rate, evictions, skipped (run as
+            plain SQL), fallbacks (prepared run failed,
+            retried as plain SQL), connections, statements
+            and unpreparable skeletons
+        """
+        with self._lock:
+            hits, prepares = self.hits, self.prepares
+            sessions = list(self._sessions.values())
+            return {
+                "hits": hits,
+                "prepares": prepares,
+                "hit_rate": round(hits / (hits + prepares), 3)
+                if hits + prepares else 0.0,
+                "evictions": self.evictions,
+                "skipped": self.skipped,
+                "fallbacks": self.fallbacks,
+                "connections": len(sessions),
+                "statements": sum(len(s.statements) for s in sessions),
+                "unpreparable": len(self._unpreparable),
+            }
+
+
+def _arguments(items: Tuple[str, ...]) -> str:
+    """
+    Parenthesized PREPARE types / EXECUTE arguments
+    (nothing for a query without parameters).
+    """
+    return f" ({', '.join(items)})" if items else ""
+
+
+_prepared_cache: Optional[PreparedStatementCache] = None
+_prepared_cache_lock = threading.Lock()
+
+
+def get_prepared_cache() -> Optional[PreparedStatementCache]:
+    """
+    Return the process-wide prepared-statement cache: the
+    one set with set_prepared_cache, else one built from
+    the environment when SQL_PREPARED_STATEMENTS is set,
+    else None (queries run as plain SQL).
+    """
+    global _prepared_cache
+    with _prepared_cache_lock:
+        if _prepared_cache is None and os.getenv(
+            "SQL_PREPARED_STATEMENTS", "0"
+        ) != "0":
+            _prepared_cache = PreparedStatementCache.from_env()
+        return _prepared_cache
+
+
+def set_prepared_cache(cache: Optional[PreparedStatementCache]) -> None:
+    """
+    Replace the process-wide prepared-statement cache
+    (None resets it to follow the environment).
+    """
+    global _prepared_cache
+    with _prepared_cache_lock:
+        _prepared_cache = cache
@@ -0,0 +1,123 @@
+"""
+Cache-friendly prompt assembly.
+
+Providers cache the longest prompt prefix they have
+already seen (OpenAI: prompts of 1024+ tokens, matched
+in 128-token increments) and bill it at a discount, so
+prompts are laid out stable-first: the schema (CREATE
+TABLE blocks in canonical order), table list and
+instructions come before the per-request question,
+SQL and critique feedback. Any two calls over the same
+pruned schema then share everything up to the question,
+on top of the agent's system prompt.
+"""
+
+import re
+
+from typing import (
+    Iterable,
+    List,
+)
+
+
+CREATE_TABLE_PATTERN = re.compile(
+    r"^CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?"
+    r"([\w.\"]+)",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+def canonical_schema(ddl: str) -> str:
+    """
+    Helper function used to order CREATE TABLE blocks
+    by table name.
+
+    Text before the first CREATE TABLE (comments) is
+    kept in front; DDL without CREATE TABLE blocks is
+    returned unchanged.
+
+    Args:
+        ddl: Pruned schema DDL
+
+    Returns:
+        DDL with its CREATE TABLE blocks sorted
+    """
+    starts = [m.start() for m in CREATE_TABLE_PATTERN.finditer(ddl)]
+    if not starts:
+        return ddl
+    preamble = ddl[:starts[0]].strip()
+    blocks = [
+        ddl[start:end].strip()
+        for start, end in zip(starts, starts[1:] + [len(ddl)])
+    ]
+    blocks.sort(
+        key=lambda block: CREATE_TABLE_PATTERN.match(block)
+        .group(1).strip('"').lower()
+    )
+    return "\n\n".join(
+        ([preamble] if preamble else []) + blocks
+    )
+
+
+class PromptBuilder:
+    """
+    Builds a user prompt with stable content first.
+
+    Parts added with stable() form the cacheable prefix
+    and are emitted before every variable() part,
+    whatever order they were added in.
+    """
+
+    def __init__(self) -> None:
+        self._stable: List[str] = []
+        self._variable: List[str] = []
+
+    def stable(self, text: str) -> "PromptBuilder":
+        """
+        Add content shared by requests over the same
+        schema (instructions, checklists).
+        """
+        self._stable.append(text)
+        return self
+
+    def variable(self, text: str) -> "PromptBuilder":
+        """
+        Add per-request content (question, SQL,
+        feedback).
+        """
+        self._variable.append(text)
+        return self
+
+    def schema(
+        self,
+        ddl: str,
+        label: str = "Schema",
+    ) -> "PromptBuilder":
+        """
+        Add the pruned schema in canonical order.
+        """
+        return self.stable(f"{label}:\n{canonical_schema(ddl)}\n")
+
+    def tables(
+        self,
+        tables: Iterable[str],
+        label: str = "Available tables",
+    ) -> "PromptBuilder":
+        """
+        Add the table list, sorted.
+        """
+        return self.stable(f"{label}: {', '.join(sorted(tables))}\n")
+
+    @property
+    def prefix(self) -> str:
+        """
+        The stable part of the prompt.
+        """
+        return "\n".join(self._stable)
+
+    def build(self) -> str:
+        """
+        The full prompt: stable parts, then variable
+        parts.
+        """
+        return "\n".join(self._stable + self._variable)
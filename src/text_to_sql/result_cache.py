@@ -0,0 +1,351 @@
+"""
+Query result cache.
+
+Results of read queries are cached under the
+normalized SQL (sql_validator.normalize_sql: case,
+whitespace and comments do not matter) and the user's
+role, for a TTL, within a byte budget (least recently
+used entries are evicted first).
+
+Invalidation is by table: every entry records the
+version of each table its SQL reads, and
+invalidate_tables bumps those versions, so entries
+reading a written table are dropped on their next
+lookup. db.execute_query calls it for the tables a
+write statement touches (the write-event hook); other
+writers (ETL jobs, LISTEN/NOTIFY listeners) can call
+it directly. Views are not expanded: a query on a
+view is invalidated by writes naming the view, else
+by its TTL. The version snapshot is taken before the
+query runs, so a write that lands while a result is
+being computed also makes that result stale.
+
+Results above compress_min_bytes are stored
+zlib-compressed (off unless configured).
+"""
+
+import dataclasses
+import hashlib
+import os
+import pickle
+import re
+import threading
+import zlib
+
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+)
+
+from cachetools import TTLCache
+
+from text_to_sql.app_logger import get_logger
+from text_to_sql.sql_validator import normalize_sql, prefix_tables
+
+
+logger = get_logger(__name__)
+
+DEFAULT_RESULT_CACHE_MB = 64
+DEFAULT_RESULT_CACHE_TTL_S = 300
+
+# Statements that write to tables, with the table names
+# (TRUNCATE takes a list).
+_NAME = r"(?:\"[^\"]+\"|\w+)(?:\.(?:\"[^\"]+\"|\w+))?"
+WRITE_PATTERN = re.compile(
+    r"\b(?:INSERT\s+INTO|UPDATE(?:\s+ONLY)?"
+    r"|DELETE\s+FROM(?:\s+ONLY)?"
+    r"|TRUNCATE(?:\s+TABLE)?(?:\s+ONLY)?"
+    r"|ALTER\s+TABLE(?:\s+IF\s+EXISTS)?(?:\s+ONLY)?"
+    r"|DROP\s+TABLE(?:\s+IF\s+EXISTS)?"
+    r"|COPY|MERGE\s+INTO"
+    r"|REFRESH\s+MATERIALIZED\s+VIEW(?:\s+CONCURRENTLY)?)"
+    rf"\s+({_NAME}(?:\s*,\s*{_NAME})*)",
+    re.IGNORECASE,
+)
+
+
+def read_tables(sql: str) -> List[str]:
+    """
+    Tables a query reads (FROM / JOIN items at any
+    nesting level, schema qualifiers dropped).
+    """
+    return sorted(set(prefix_tables(sql, complete=True)))
+
+
+def written_tables(sql: str) -> List[str]:
+    """
+    Tables a statement writes (INSERT / UPDATE / DELETE /
+    TRUNCATE / ALTER / DROP / COPY / MERGE / REFRESH),
+    schema qualifiers dropped.
+    """
+    tables = set()
+    for match in WRITE_PATTERN.finditer(sql):
+        for item in match.group(1).split(","):
+            name = item.strip().split(".")[-1]
+            tables.add(
+                name.strip('"') if name.startswith('"')
+                else name.lower()
+            )
+    return sorted(tables)
+
+
+@dataclasses.dataclass
+class CacheLookup:
+    """
+    Outcome of a result cache lookup.
+
+    Attributes:
+        key: Cache key (role + normalized SQL)
+        rows: Cached rows, or None on a miss
+        tables: Tables the query reads
+        versions: Their versions at lookup time (what a
+            result computed now is valid for)
+    """
+
+    key: str
+    rows: Optional[List[Dict[str, Any]]]
+    tables: List[str]
+    versions: Dict[str, int]
+
+
+@dataclasses.dataclass
+class _Entry:
+    """
+    One cached result.
+    """
+
+    payload: bytes
+    compressed: bool
+    versions: Dict[str, int]
+    size: int
+
+
+class ResultCache:
+    """
+    Query results by role and normalized SQL.
+
+    Args:
+        max_bytes: Byte budget for cached payloads
+        ttl_s: Seconds an entry stays valid
+        compress_min_bytes: Compress payloads at least
+            this large (None = never)
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_RESULT_CACHE_MB * 1024 * 1024,
+        ttl_s: float = DEFAULT_RESULT_CACHE_TTL_S,
+        compress_min_bytes: Optional[int] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.compress_min_bytes = compress_min_bytes
+        self._entries: TTLCache = TTLCache(
+            maxsize=max_bytes, ttl=ttl_s,
+            getsizeof=lambda entry: entry.size,
+        )
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.uncacheable = 0
+        self.stale = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        """
+        Cache sized by SQL_RESULT_CACHE_MB, with TTL
+        SQL_RESULT_CACHE_TTL_S and compression from
+        SQL_RESULT_CACHE_COMPRESS_BYTES.
+        """
+        compress = os.getenv("SQL_RESULT_CACHE_COMPRESS_BYTES")
+        return cls(
+            max_bytes=int(float(os.getenv(
+                "SQL_RESULT_CACHE_MB", DEFAULT_RESULT_CACHE_MB
+            )) * 1024 * 1024),
+            ttl_s=float(os.getenv(
+                "SQL_RESULT_CACHE_TTL_S", DEFAULT_RESULT_CACHE_TTL_S
+            )),
+            compress_min_bytes=int(compress) if compress else None,
+        )
+
+    @staticmethod
+    def key(sql: str, role: str) -> str:
+        """
+        Cache key of a query for a role.
+        """
+        digest = hashlib.sha256(
+            normalize_sql(sql).encode("utf-8")
+        ).hexdigest()
+        return f"{role}|{digest}"
+
+    def lookup(self, sql: str, role: str) -> CacheLookup:
+        """
+        Find cached rows for a query. Entries reading a
+        table invalidated since they were stored are
+        dropped; statements that write are never cached.
+
+        Args:
+            sql: Query
+            role: User role
+
+        Returns:
+            CacheLookup (rows None on a miss); pass it to
+            store() with the rows computed on a miss
+        """
+        key = self.key(sql, role)
+        tables = [] if written_tables(sql) else read_tables(sql)
+        with self._lock:
+            versions = {t: self._versions.get(t, 0) for t in tables}
+            entry = self._entries.get(key)
+            if entry is not None and entry.versions != versions:
+                del self._entries[key]
+                self.stale += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return CacheLookup(key, None, tables, versions)
+            self.hits += 1
+        payload = entry.payload
+        if entry.compressed:
+            payload = zlib.decompress(payload)
+        return CacheLookup(key, pickle.loads(payload), tables, versions)
+
+    def store(
+        self,
+        lookup: CacheLookup,
+        rows: List[Dict[str, Any]],
+    ) -> bool:
+        """
+        Cache the rows computed after a miss.
+
+        Args:
+            lookup: The miss from lookup()
+            rows: Query result
+
+        Returns:
+            True if stored; False when the tables read are
+            unknown (the entry could never be
+            invalidated), the result exceeds the byte
+            budget, or a table was written meanwhile
+        """
+        if not lookup.tables:
+            with self._lock:
+                self.uncacheable += 1
+            return False
+        payload = pickle.dumps(
+            [dict(row) for row in rows],
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        compressed = (
+            self.compress_min_bytes is not None
+            and len(payload) >= self.compress_min_bytes
+        )
+        if compressed:
+            payload = zlib.compress(payload, 1)
+        entry = _Entry(
+            payload, compressed, lookup.versions,
+            len(payload) + len(lookup.key),
+        )
+        with self._lock:
+            current = {
+                t: self._versions.get(t, 0) for t in lookup.tables
+            }
+            if current != lookup.versions or entry.size > self.max_bytes:
+                self.uncacheable += 1
+                return False
+            self._entries[lookup.key] = entry
+            self.stored += 1
+        return True
+
+    def invalidate_tables(self, tables: Iterable[str]) -> None:
+        """
+        Mark every cached result reading these tables as
+        stale.
+        """
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+                self.invalidations += 1
+
+    def invalidate_sql(self, sql: str) -> List[str]:
+        """
+        Write-event hook: invalidate the tables a
+        statement writes.
+
+        Returns:
+            The tables invalidated
+        """
+        tables = written_tables(sql)
+        if tables:
+            self.invalidate_tables(tables)
+            logger.debug(f"Result cache invalidated: {tables}")
+        return tables
+
+    def clear(self) -> None:
+        """
+        Drop all entries and reset counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.stored = 0
+            self.uncacheable = self.stale = self.invalidations = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Hit-rate and size metrics.
+
+        Returns:
+            hits, misses, hit_rate, stored, uncacheable,
+            stale (dropped after invalidation),
+            invalidations, entries and bytes
+        """
+        with self._lock:
+            hits, misses = self.hits, self.misses
+            return {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3)
+                if hits + misses else 0.0,
+                "stored": self.stored,
+                "uncacheable": self.uncacheable,
+                "stale": self.stale,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": int(self._entries.currsize),
+            }
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """
+    Return the process-wide result cache: the one set
+    with set_result_cache, else one built from the
+    environment when SQL_RESULT_CACHE is set, else None
+    (caching off).
+    """
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None and os.getenv(
+            "SQL_RESULT_CACHE", "0"
+        ) != "0":
+            _result_cache = ResultCache.from_env()
+        return _result_cache
+
+
+def set_result_cache(cache: Optional[ResultCache]) -> None:
+    """
+    Replace the process-wide result cache (None resets
+    it to follow the environment).
+    """
+    global _result_cache
+    with _result_cache_lock:
+        _result_cache = cache
@@ -0,0 +1,309 @@
+"""
+Columnar query results.
+
+A ColumnarResult holds the column names once and the
+values column by column: integer and float columns as
+compact `array.array`s (8 bytes per value), anything
+else (strings, Decimals, dates, NULL-bearing columns)
+as lists. Compared with a list of dicts this drops the
+per-row dict and its key table, and serializing works
+on whole columns.
+
+- rows are read through lazy RowView mappings
+- slicing (result[10:20]) copies whole columns (array
+  slices, no per-row objects)
+- to_json / to_csv export, to_arrow_ipc when pyarrow
+  is installed (`pip install text-to-sql[arrow]`)
+- same_rows compares two results as multisets of rows
+  without serializing them
+"""
+
+import array
+import collections
+import csv
+import io
+import json
+
+from collections.abc import Mapping
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+
+# Rows fetched per round trip when reading a cursor.
+DEFAULT_FETCH_SIZE = 2000
+
+_INT64_MIN = -(2 ** 63)
+_INT64_MAX = 2 ** 63 - 1
+
+
+class _ColumnBuilder:
+    """
+    Accumulates one column, as an array while every value
+    fits its typecode and as a list from the first one
+    that does not.
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self):
+        self.values: Union[array.array, List[Any], None] = None
+
+    def append(self, value: Any) -> None:
+        values = self.values
+        if values is None:
+            self.values = self._start(value)
+            self.values.append(value)
+            return
+        if isinstance(values, array.array):
+            if self._fits(values.typecode, value):
+                values.append(value)
+                return
+            self.values = values = values.tolist()
+        values.append(value)
+
+    @staticmethod
+    def _start(value: Any) -> Union[array.array, List[Any]]:
+        if _ColumnBuilder._fits("q", value):
+            return array.array("q")
+        if _ColumnBuilder._fits("d", value):
+            return array.array("d")
+        return []
+
+    @staticmethod
+    def _fits(typecode: str, value: Any) -> bool:
+        if typecode == "q":
+            return (
+                type(value) is int
+                and _INT64_MIN <= value <= _INT64_MAX
+            )
+        return type(value) is float
+
+    def finish(self) -> Union[array.array, List[Any]]:
+        return self.values if self.values is not None else []
+
+
+class RowView(Mapping):
+    """
+    Read-only mapping over one row of a ColumnarResult;
+    values are read from the columns on access.
+    """
+
+    __slots__ = ("_result", "_index")
+
+    def __init__(self, result: "ColumnarResult", index: int):
+        self._result = result
+        self._index = index
+
+    def __getitem__(self, name: str) -> Any:
+        return self._result.column(name)[self._index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._result.columns)
+
+    def __len__(self) -> int:
+        return len(self._result.columns)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class ColumnarResult:
+    """
+    Query result stored by column.
+
+    Args:
+        columns: Column names
+        data: One sequence of values per column, all of
+            the same length
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        data: Sequence[Sequence[Any]],
+    ):
+        if len(columns) != len(data):
+            raise ValueError(
+                f"{len(columns)} columns but {len(data)} "
+                f"value sequences"
+            )
+        lengths = {len(values) for values in data}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns differ in length: {lengths}")
+        self.columns = list(columns)
+        self._data = list(data)
+        self._index = {name: i for i, name in enumerate(self.columns)}
+        self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[Mapping],
+        columns: Optional[Sequence[str]] = None,
+    ) -> "ColumnarResult":
+        """
+        Build from dict-like rows (columns default to the
+        first row's keys).
+        """
+        builders: Optional[List[_ColumnBuilder]] = None
+        for row in rows:
+            if builders is None:
+                columns = list(columns or row.keys())
+                builders = [_ColumnBuilder() for _ in columns]
+            for builder, name in zip(builders, columns):
+                builder.append(row[name])
+        columns = list(columns or [])
+        if builders is None:
+            return cls(columns, [[] for _ in columns])
+        return cls(columns, [b.finish() for b in builders])
+
+    @classmethod
+    def from_cursor(
+        cls,
+        cursor: Any,
+        fetch_size: int = DEFAULT_FETCH_SIZE,
+    ) -> "ColumnarResult":
+        """
+        Build from an executed DB-API cursor returning
+        tuples, fetch_size rows at a time.
+        """
+        columns = [d[0] for d in cursor.description]
+        builders = [_ColumnBuilder() for _ in columns]
+        while True:
+            batch = cursor.fetchmany(fetch_size)
+            if not batch:
+                break
+            for row in batch:
+                for builder, value in zip(builders, row):
+                    builder.append(value)
+        return cls(columns, [b.finish() for b in builders])
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[RowView]:
+        for i in range(self._length):
+            yield RowView(self, i)
+
+    def __getitem__(
+        self, key: Union[int, slice],
+    ) -> Union[RowView, "ColumnarResult"]:
+        if isinstance(key, slice):
+            return ColumnarResult(
+                self.columns,
+                [values[key] for values in self._data],
+            )
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError("row index out of range")
+        return RowView(self, key)
+
+    def __repr__(self) -> str:
+        return (
+            f"ColumnarResult({len(self)} rows x "
+            f"{len(self.columns)} columns)"
+        )
+
+    def column(self, name: str) -> Sequence[Any]:
+        """
+        Values of one column.
+        """
+        return self._data[self._index[name]]
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """
+        Materialize as a list of dicts.
+        """
+        return [
+            dict(zip(self.columns, values))
+            for values in zip(*self._data)
+        ]
+
+    def to_json(self, orient: str = "columns") -> str:
+        """
+        Serialize to JSON: {"column": [values]} per column
+        (orient="columns") or a list of row objects
+        (orient="records"). Non-JSON types (Decimal,
+        dates) become strings.
+        """
+        if orient == "columns":
+            payload = {
+                name: list(values)
+                for name, values in zip(self.columns, self._data)
+            }
+        elif orient == "records":
+            payload = self.to_rows()
+        else:
+            raise ValueError(f"Unknown orient: {orient}")
+        return json.dumps(payload, default=str)
+
+    def to_csv(self) -> str:
+        """
+        Serialize to CSV with a header row (NULL = empty).
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(self.columns)
+        writer.writerows(zip(*self._data))
+        return buffer.getvalue()
+
+    def to_arrow_ipc(self) -> bytes:
+        """
+        Serialize to an Arrow IPC stream.
+
+        Raises:
+            ImportError: pyarrow is not installed
+        """
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError(
+                "Arrow output requires pyarrow "
+                "(pip install text-to-sql[arrow])"
+            ) from e
+        table = pa.table({
+            name: pa.array(list(values))
+            for name, values in zip(self.columns, self._data)
+        })
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def same_rows(self, other: "ColumnarResult") -> bool:
+        """
+        Whether both results hold the same rows in any
+        order (columns matched by name, in any order).
+        """
+        if len(self) != len(other):
+            return False
+        if sorted(self.columns) != sorted(other.columns):
+            return False
+        names = sorted(self.columns)
+        mine = list(zip(*(self.column(n) for n in names)))
+        theirs = list(zip(*(other.column(n) for n in names)))
+        try:
+            return collections.Counter(mine) == collections.Counter(theirs)
+        except TypeError:
+            # JSON / JSONB values come back as dicts and
+            # lists: compare their canonical encoding.
+            return collections.Counter(map(_row_key, mine)) == (
+                collections.Counter(map(_row_key, theirs))
+            )
+
+
+def _row_key(row: Sequence[Any]) -> str:
+    """
+    Hashable, order-stable encoding of a row with
+    unhashable (JSON) values.
+    """
+    return json.dumps(row, sort_keys=True, default=repr)
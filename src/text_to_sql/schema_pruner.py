@@ -91,6 +91,41 @@ ENTITY_MAP: Dict[str, Set[str]] = {
     "warehouse": {"warehouses"},
 }
 
+# Query vocabulary that never names a table: verbs,
+# aggregations, ranking, time and filler words. Anything
+# else left unresolved counts against confidence.
+QUERY_STOP_WORDS: Set[str] = {
+    "about", "above", "across", "after", "again", "all",
+    "also", "amount", "and", "any", "average", "below",
+    "best", "between", "bottom", "breakdown", "compare",
+    "count", "current", "daily", "data", "details",
+    "does", "each", "every", "find", "first", "from",
+    "give", "have", "high", "highest", "how", "last",
+    "latest", "least", "level", "levels", "list", "lowest",
+    "many", "maximum", "minimum", "month", "monthly",
+    "months", "more", "most", "much", "number", "only",
+    "over", "past", "percent", "placed", "quarter",
+    "quarterly", "rate", "show", "since", "some", "than",
+    "that", "their", "them", "there", "these", "this",
+    "those", "today", "top", "total", "trend", "trends",
+    "under", "week", "weekly", "weeks", "were", "what",
+    "when", "where", "which", "while", "with", "within",
+    "worst", "year", "yearly", "years", "yesterday",
+}
+
+# Confidence contributed by the strongest layer that
+# produced a seed table.
+LAYER_CONFIDENCE: Dict[str, float] = {
+    "table_name": 1.0,
+    "entity_map": 0.85,
+    "column_name": 0.6,
+}
+# Confidence lost per content word no layer resolved.
+UNRESOLVED_PENALTY = 0.2
+
+# Seeds used when no layer resolves anything.
+FALLBACK_TABLES: Set[str] = {"orders", "products", "customers"}
+
 # Column names too generic to be useful for table resolution.
 COLUMN_STOP_LIST: Set[str] = {
     "created_at",
@@ -122,6 +157,20 @@ class PruneResult:
     reduction_pct: float
 
 
+@dataclasses.dataclass
+class Resolution:
+    """
+    Deterministic entity resolution with a confidence
+    score, used to decide whether an LLM is needed.
+    """
+
+    seed_tables: List[str]
+    layer_tables: Dict[str, List[str]]
+    unresolved_terms: List[str]
+    used_fallback: bool
+    confidence: float
+
+
 class SchemaPruner:
     """
     Deterministic schema pruner using FK graph traversal.
@@ -144,6 +193,7 @@ class SchemaPruner:
         self._table_ddl: Dict[str, str] = {}
         self._all_tables: Set[str] = set()
         self._column_index: Dict[str, Set[str]] = defaultdict(set)
+        self._table_columns: Dict[str, Set[str]] = defaultdict(set)
         self._encoder = tiktoken.get_encoding(
             "o200k_base"  # GPT-4o / 4o-mini tokenizer
         )
@@ -184,7 +234,8 @@ class SchemaPruner:
 
         Parses each table's DDL block to extract column
         names. Excludes generic columns via
-        COLUMN_STOP_LIST.
+        COLUMN_STOP_LIST from the index; the per-table
+        column sets keep every column.
         """
         col_pattern = re.compile(
             r"^\s+(\w+)\s+"
@@ -197,6 +248,7 @@ class SchemaPruner:
         for table, ddl_block in self._table_ddl.items():
             for match in col_pattern.finditer(ddl_block):
                 col_name = match.group(1).lower()
+                self._table_columns[table].add(col_name)
                 if col_name not in COLUMN_STOP_LIST:
                     self._column_index[col_name].add(table)
 
@@ -409,29 +461,26 @@ class SchemaPruner:
                 blocks.append(self._table_ddl[table])
         return "\n\n".join(blocks)
 
-    def resolve_tables(
+    def _resolve_layers(
         self,
         query: str,
-        max_layers: int = 3,
-    ) -> Set[str]:
+        max_layers: int,
+    ) -> Tuple[Dict[str, Set[str]], Set[str]]:
         """
-        Deterministic entity resolution from a NL query.
-
-        Combines three strategies in order:
-        1. Direct table name matching (incl. singular forms)
-        2. Business entity mapping via ENTITY_MAP
-        3. Column name matching via column index
-           (skips words already resolved by layers 1-2)
+        Helper function used to run the resolution
+        layers and report what each one found.
 
         Args:
             query: Natural language query
-            max_layers: Number of resolution layers to
-                apply (1-3). Default 3 (all layers).
+            max_layers: Number of layers to apply (1-3)
 
         Returns:
-            Set of seed table names for BFS
+            (layer name -> tables found, query terms
+            consumed by the layers)
         """
-        seeds: Set[str] = set()
+        layer_tables: Dict[str, Set[str]] = {
+            name: set() for name in LAYER_CONFIDENCE
+        }
         query_lower = query.lower()
         query_words = set(re.findall(r"\w+", query_lower))
         resolved_words: Set[str] = set()
@@ -440,17 +489,17 @@ class SchemaPruner:
         for table in self._all_tables:
             singular = _singularize(name=table)
             if table in query_lower:
-                seeds.add(table)
+                layer_tables["table_name"].add(table)
                 resolved_words.add(table)
             elif singular in query_lower:
-                seeds.add(table)
+                layer_tables["table_name"].add(table)
                 resolved_words.add(singular)
 
         # Layer 2: Business entity mapping
         if max_layers >= 2:
             for term, tables in ENTITY_MAP.items():
                 if term in query_words:
-                    seeds.update(tables)
+                    layer_tables["entity_map"].update(tables)
                     resolved_words.add(term)
 
         # Layer 3: Column name matching
@@ -464,17 +513,149 @@ class SchemaPruner:
                 if col_name in resolved_words:
                     continue
                 if col_name in query_lower:
-                    seeds.update(tables)
+                    layer_tables["column_name"].update(tables)
+                    resolved_words.add(col_name)
+
+        return layer_tables, resolved_words
+
+    def resolve_tables(
+        self,
+        query: str,
+        max_layers: int = 3,
+    ) -> Set[str]:
+        """
+        Deterministic entity resolution from a NL query.
+
+        Combines three strategies in order:
+        1. Direct table name matching (incl. singular forms)
+        2. Business entity mapping via ENTITY_MAP
+        3. Column name matching via column index
+           (skips words already resolved by layers 1-2)
+
+        Args:
+            query: Natural language query
+            max_layers: Number of resolution layers to
+                apply (1-3). Default 3 (all layers).
+
+        Returns:
+            Set of seed table names for BFS
+        """
+        layer_tables, _ = self._resolve_layers(
+            query, max_layers
+        )
+        seeds: Set[str] = set().union(*layer_tables.values())
 
         if not seeds:
             logger.warning(
                 "No seed tables resolved. "
                 "Falling back to common tables."
             )
-            seeds = {"orders", "products", "customers"}
+            seeds = set(FALLBACK_TABLES)
 
         return seeds
 
+    def resolve_with_confidence(
+        self,
+        query: str,
+        max_layers: int = 3,
+    ) -> Resolution:
+        """
+        Deterministic entity resolution plus a
+        confidence score in [0, 1].
+
+        Confidence starts from the strongest layer that
+        matched (direct table name > business term >
+        column name), loses UNRESOLVED_PENALTY for each
+        content word no layer accounted for, and is 0
+        when nothing matched and the common-table
+        fallback would be used.
+
+        Args:
+            query: Natural language query
+            max_layers: Number of resolution layers to
+                apply (1-3)
+
+        Returns:
+            Resolution with seeds, per-layer hits,
+            unresolved terms and confidence
+        """
+        layer_tables, resolved_words = self._resolve_layers(
+            query, max_layers
+        )
+        seeds: Set[str] = set().union(*layer_tables.values())
+        # Words naming a seed table's parts or columns
+        # (e.g. "status" of shipments) are accounted for
+        for table in seeds:
+            resolved_words.add(table)
+            resolved_words.update(self._table_columns[table])
+        unresolved = self._unresolved_terms(
+            query, resolved_words
+        )
+        if not seeds:
+            return Resolution(
+                seed_tables=sorted(FALLBACK_TABLES),
+                layer_tables={},
+                unresolved_terms=unresolved,
+                used_fallback=True,
+                confidence=0.0,
+            )
+        coverage = max(
+            LAYER_CONFIDENCE[name]
+            for name, tables in layer_tables.items()
+            if tables
+        )
+        confidence = max(
+            0.0,
+            coverage - UNRESOLVED_PENALTY * len(unresolved),
+        )
+        return Resolution(
+            seed_tables=sorted(seeds),
+            layer_tables={
+                name: sorted(tables)
+                for name, tables in layer_tables.items()
+                if tables
+            },
+            unresolved_terms=unresolved,
+            used_fallback=False,
+            confidence=round(confidence, 2),
+        )
+
+    @staticmethod
+    def _unresolved_terms(
+        query: str,
+        resolved_words: Set[str],
+    ) -> List[str]:
+        """
+        Helper function used to list content words
+        (likely nouns) that no resolution layer
+        accounted for.
+
+        A word counts as resolved when it, or its
+        singular form, is part of a resolved term
+        (e.g. "items" in "order_items").
+
+        Args:
+            query: Natural language query
+            resolved_words: Terms consumed by the layers
+
+        Returns:
+            Sorted unresolved content words
+        """
+        resolved_parts = set()
+        for term in resolved_words:
+            resolved_parts.update(term.split("_"))
+        unresolved = []
+        for word in set(re.findall(r"[a-z]+", query.lower())):
+            if len(word) < 4 or word in QUERY_STOP_WORDS:
+                continue
+            if (
+                word in resolved_parts
+                or _singularize(name=word) in resolved_parts
+            ):
+                continue
+            unresolved.append(word)
+        return sorted(unresolved)
+
 
 def prune_for_query(
     query: str,
@@ -0,0 +1,2094 @@
+"""
+Catalog-aware static validator for generated SQL.
+
+Tokenizes and parses the PostgreSQL SELECT subset the
+generator emits (CTEs, joins, derived tables, scalar /
+EXISTS / IN subqueries, set operations, window and
+aggregate functions), resolves table aliases through
+nested scopes, and checks every table, column and join
+condition against a catalog built from the (pruned)
+schema DDL.
+
+Issues are structured (severity, code, message, hint)
+so the retry prompt can quote them:
+
+- errors: the query cannot run as written (unknown
+  table / alias / column, ambiguous column, JOIN
+  without a condition, parse error)
+- warnings: the query runs but its semantics are
+  doubtful (join not following a foreign key, cartesian
+  product, non-aggregated column outside GROUP BY);
+  these are what an LLM review is still needed for
+
+No database or LLM involved; a typical generated query
+validates in well under a millisecond.
+"""
+
+import dataclasses
+import difflib
+import re
+
+from functools import lru_cache
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+
+SEVERITY_ERROR = "error"
+SEVERITY_WARNING = "warning"
+
+# Depth-0 keywords that end an expression.
+CLAUSE_KEYWORDS: Set[str] = {
+    "AS", "ASC", "CROSS", "DESC", "EXCEPT", "FETCH",
+    "FOR", "FROM", "FULL", "GROUP", "HAVING", "INNER",
+    "INTERSECT", "JOIN", "LEFT", "LIMIT", "NATURAL",
+    "NULLS", "OFFSET", "ON", "ORDER", "RETURNING",
+    "RIGHT", "UNION", "USING", "WHERE", "WINDOW",
+}
+
+# Keywords inside expressions that are never column
+# references. Operand keywords end an operand (so an
+# identifier right after them is an alias).
+OPERAND_KEYWORDS: Set[str] = {
+    "CURRENT_DATE", "CURRENT_TIME", "CURRENT_TIMESTAMP",
+    "CURRENT_USER", "END", "FALSE", "LOCALTIME",
+    "LOCALTIMESTAMP", "NULL", "SESSION_USER", "TRUE",
+    "UNKNOWN",
+}
+OPERATOR_KEYWORDS: Set[str] = {
+    "ALL", "AND", "ANY", "ARRAY", "AT", "BETWEEN", "BOTH",
+    "BY", "CASE", "CAST", "COLLATE", "CURRENT", "DEFAULT",
+    "DISTINCT", "ELSE", "ESCAPE", "EXCLUDE", "EXISTS",
+    "FILTER", "FOLLOWING", "GROUPS", "ILIKE", "IN",
+    "INTERVAL", "IS", "ISNULL", "LEADING", "LIKE", "NO",
+    "NOT", "NOTNULL", "OR", "OTHERS", "OVER", "PARTITION",
+    "PRECEDING", "RANGE", "ROW", "ROWS", "SIMILAR", "SOME",
+    "SYMMETRIC", "THEN", "TIES", "TIME", "TO", "TRAILING",
+    "UNBOUNDED", "WHEN", "WITHIN", "ZONE",
+}
+EXPR_KEYWORDS = OPERAND_KEYWORDS | OPERATOR_KEYWORDS
+
+# Identifiers followed by a string literal form a typed
+# literal (DATE '2026-01-01').
+TYPE_LITERAL_PREFIXES: Set[str] = {
+    "DATE", "INTERVAL", "TIME", "TIMESTAMP", "TIMESTAMPTZ",
+}
+
+# Identifiers whose parenthesized numbers are type
+# modifiers (VARCHAR(20), NUMERIC(10, 2)).
+TYPE_MODIFIER_NAMES: Set[str] = {
+    "BIT", "CHAR", "CHARACTER", "DECIMAL", "FLOAT",
+    "INTERVAL", "NUMERIC", "TIME", "TIMESTAMP", "VARCHAR",
+    "VARYING",
+}
+
+# Functions whose string arguments are units or formats
+# (part of the query's shape, not a filter value).
+FORMAT_FUNCTIONS: Set[str] = {
+    "DATE_PART", "DATE_TRUNC", "TO_CHAR", "TO_DATE", "TO_NUMBER",
+    "TO_TIMESTAMP",
+}
+
+# Literals right after these keep their value in a
+# parameterized query (row counts shape the plan).
+ROW_COUNT_KEYWORDS: Set[str] = {"FIRST", "LIMIT", "NEXT", "OFFSET"}
+
+TIME_UNITS: Set[str] = {
+    "CENTURY", "DAY", "DAYS", "DECADE", "DOW", "DOY",
+    "EPOCH", "HOUR", "HOURS", "ISODOW", "ISOYEAR",
+    "MICROSECONDS", "MILLENNIUM", "MILLISECONDS",
+    "MINUTE", "MINUTES", "MONTH", "MONTHS", "QUARTER",
+    "SECOND", "SECONDS", "WEEK", "WEEKS", "YEAR", "YEARS",
+}
+
+TYPE_CONTINUATIONS: Set[str] = {
+    "LOCAL", "PRECISION", "TIME", "VARYING", "WITH",
+    "WITHOUT", "ZONE",
+}
+
+AGGREGATES: Set[str] = {
+    "array_agg", "avg", "bit_and", "bit_or", "bool_and",
+    "bool_or", "count", "every", "json_agg",
+    "json_object_agg", "jsonb_agg", "jsonb_object_agg",
+    "max", "min", "mode", "percentile_cont",
+    "percentile_disc", "stddev", "stddev_pop",
+    "stddev_samp", "string_agg", "sum", "var_pop",
+    "var_samp", "variance",
+}
+
+JOIN_KEYWORDS: Set[str] = {
+    "CROSS", "FULL", "INNER", "JOIN", "LEFT", "NATURAL",
+    "RIGHT",
+}
+
+ALIAS_STOP = CLAUSE_KEYWORDS | JOIN_KEYWORDS | {
+    "LATERAL", "TABLESAMPLE", "WITH",
+}
+
+MAX_HINT_COLUMNS = 12
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+    |(?P<comment>--[^\n]*|/\*.*?\*/)
+    |(?P<string>[EeBbXx]?'(?:[^']|'')*')
+    |(?P<dollar>\$(?P<tag>[A-Za-z_]*)\$.*?\$(?P=tag)\$)
+    |(?P<qident>"(?:[^"]|"")+")
+    |(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+    |(?P<param>\$\d+|%s|%\(\w+\)s)
+    |(?P<ident>[A-Za-z_][A-Za-z0-9_$]*)
+    |(?P<op>::|<=|>=|<>|!=|\|\||->>|->|\#>>|\#>|[-+*/%<>=~!^&|@\#?])
+    |(?P<punct>[(),.;\[\]])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+@dataclasses.dataclass
+class ValidationIssue:
+    """
+    One problem found in a query.
+    """
+
+    severity: str
+    code: str
+    message: str
+    hint: str = ""
+
+    def __str__(self) -> str:
+        if self.hint:
+            return f"{self.message} ({self.hint})"
+        return self.message
+
+
+@dataclasses.dataclass
+class ValidationResult:
+    """
+    Outcome of static validation.
+    """
+
+    issues: List[ValidationIssue]
+    tables: List[str]
+    checked: bool = True
+
+    @property
+    def errors(self) -> List[ValidationIssue]:
+        """
+        Issues that make the query fail.
+        """
+        return [
+            i for i in self.issues
+            if i.severity == SEVERITY_ERROR
+        ]
+
+    @property
+    def is_valid(self) -> bool:
+        """
+        Whether no errors were found.
+        """
+        return not self.errors
+
+    @property
+    def needs_review(self) -> bool:
+        """
+        Whether semantic doubt remains: warnings were
+        raised, or there was no catalog to check
+        against.
+        """
+        return bool(self.warnings) or not self.checked
+
+    @property
+    def warnings(self) -> List[ValidationIssue]:
+        """
+        Issues that cast doubt on the semantics.
+        """
+        return [
+            i for i in self.issues
+            if i.severity == SEVERITY_WARNING
+        ]
+
+    def summary(self) -> str:
+        """
+        One-line summary of all issues.
+        """
+        return "; ".join(str(i) for i in self.issues)
+
+
+class SchemaCatalog:
+    """
+    Tables, columns, primary keys and foreign keys of a
+    schema.
+
+    Args:
+        tables: Table name -> ordered column names
+        foreign_keys: (table, column, ref_table,
+            ref_column) edges
+        primary_keys: Table name -> primary key columns
+    """
+
+    def __init__(
+        self,
+        tables: Dict[str, List[str]],
+        foreign_keys: Iterable[Tuple[str, str, str, str]] = (),
+        primary_keys: Optional[Dict[str, Set[str]]] = None,
+    ):
+        self.tables = tables
+        self.foreign_keys: Set[Tuple[str, str, str, str]] = set(
+            foreign_keys
+        )
+        self.primary_keys = primary_keys or {}
+
+    @classmethod
+    def from_ddl(
+        cls,
+        ddl: str,
+        fk_edges: Optional[List[Dict[str, str]]] = None,
+    ) -> "SchemaCatalog":
+        """
+        Build a catalog from CREATE TABLE statements.
+
+        Args:
+            ddl: Schema DDL
+            fk_edges: Extra FK edges already parsed
+                elsewhere, as dicts with from, from_col,
+                to, to_col (e.g. schema fk_paths)
+
+        Returns:
+            SchemaCatalog
+        """
+        tables: Dict[str, List[str]] = {}
+        fks: Set[Tuple[str, str, str, str]] = set()
+        pks: Dict[str, Set[str]] = {}
+        header = re.compile(
+            r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?"
+            r"((?:\"[^\"]+\"|\w+)(?:\.(?:\"[^\"]+\"|\w+))?)\s*\(",
+            re.IGNORECASE,
+        )
+        for match in header.finditer(ddl):
+            table = _normalize_name(
+                match.group(1).split(".")[-1]
+            )
+            body = _balanced_body(ddl, match.end() - 1)
+            columns: List[str] = []
+            for element in _split_top_level(body):
+                _parse_table_element(
+                    table, element, columns, fks, pks
+                )
+            tables[table] = columns
+        alter = re.compile(
+            r"ALTER\s+TABLE\s+(?:ONLY\s+)?([\w\".]+)\s+ADD\s+"
+            r"((?:CONSTRAINT\s+\S+\s+)?FOREIGN\s+KEY[^;]*)",
+            re.IGNORECASE,
+        )
+        for match in alter.finditer(ddl):
+            table = _normalize_name(match.group(1).split(".")[-1])
+            _parse_table_element(
+                table, match.group(2), [], fks, pks
+            )
+        for edge in fk_edges or []:
+            fks.add((
+                edge["from"], edge["from_col"],
+                edge["to"], edge["to_col"],
+            ))
+        catalog = cls(tables, fks, pks)
+        view = re.compile(
+            r"CREATE\s+(?:OR\s+REPLACE\s+)?VIEW\s+([\w\".]+)"
+            r"(?:\s*\(([^)]*)\))?\s+AS\s+([^;]*)",
+            re.IGNORECASE,
+        )
+        for match in view.finditer(ddl):
+            columns = (
+                [_normalize_name(c) for c in match.group(2).split(",")]
+                if match.group(2)
+                else _view_columns(match.group(3), catalog)
+            )
+            if columns:
+                tables[
+                    _normalize_name(match.group(1).split(".")[-1])
+                ] = columns
+        return catalog
+
+    def columns(self, table: str) -> List[str]:
+        """
+        Columns of a table (empty when unknown).
+        """
+        return self.tables.get(table, [])
+
+    def fks_between(
+        self, left: str, right: str,
+    ) -> List[Tuple[str, str, str, str]]:
+        """
+        FK edges linking two tables in either direction.
+        """
+        return sorted(
+            fk for fk in self.foreign_keys
+            if {fk[0], fk[2]} == {left, right}
+            or (left == right == fk[0] == fk[2])
+        )
+
+    def has_fk(
+        self,
+        left: str,
+        left_col: str,
+        right: str,
+        right_col: str,
+    ) -> bool:
+        """
+        Whether left.left_col = right.right_col follows
+        a foreign key (either direction).
+        """
+        return (
+            (left, left_col, right, right_col)
+            in self.foreign_keys
+            or (right, right_col, left, left_col)
+            in self.foreign_keys
+        )
+
+    def has_table(self, table: str) -> bool:
+        """
+        Whether the table exists.
+        """
+        return table in self.tables
+
+
+@lru_cache(maxsize=32)
+def catalog_for_ddl(ddl: str) -> SchemaCatalog:
+    """
+    Cached SchemaCatalog.from_ddl for repeated
+    validation against the same schema.
+    """
+    return SchemaCatalog.from_ddl(ddl)
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Canonical text of a query for equality checks:
+    comments, whitespace and a trailing semicolon
+    dropped, keywords and unquoted identifiers
+    lower-cased, literals and quoted identifiers kept.
+
+    Args:
+        sql: SQL text
+
+    Returns:
+        Normalized SQL (whitespace-collapsed lower case
+        if it cannot be tokenized)
+    """
+    try:
+        tokens = _tokenize(sql)
+    except _ParseError:
+        return " ".join(sql.lower().split()).rstrip(";")
+    while tokens and tokens[-1].value == ";":
+        tokens.pop()
+    return " ".join(
+        tok.value.lower() if tok.kind == "ident" else tok.value
+        for tok in tokens
+    )
+
+
+def literal_spans(sql: str) -> List[Tuple[int, int, str]]:
+    """
+    Positions of the literals and bind parameters in a
+    query (comments and quoted identifiers skipped).
+
+    Args:
+        sql: SQL text
+
+    Returns:
+        (start, end, kind) per string / number / param
+        token, in order; empty if the SQL cannot be
+        tokenized
+    """
+    try:
+        tokens = _tokenize(sql)
+    except _ParseError:
+        return []
+    return [
+        (tok.pos, tok.pos + len(tok.value), tok.kind)
+        for tok in tokens
+        if tok.kind in ("string", "number", "param")
+    ]
+
+
+def cap_limit(sql: str, max_rows: int) -> str:
+    """
+    Bound the rows a query returns: add LIMIT max_rows to
+    the outer SELECT, or lower a larger (or ALL) outer
+    LIMIT to it. Outer limits that are expressions or
+    FETCH FIRST, and text that does not tokenize, are
+    wrapped in SELECT * FROM (...) LIMIT max_rows.
+
+    Args:
+        sql: Query
+        max_rows: Row cap
+
+    Returns:
+        Rewritten query (unchanged if it already returns
+        at most max_rows, or is not a SELECT / WITH /
+        VALUES query)
+    """
+    def wrapped() -> str:
+        return (
+            f"SELECT * FROM (\n{sql.strip().rstrip(';')}\n) "
+            f"AS capped LIMIT {max_rows}"
+        )
+
+    try:
+        tokens = _tokenize(sql)
+    except _ParseError:
+        return wrapped()
+    while tokens and tokens[-1].value == ";":
+        tokens.pop()
+    if not tokens or (
+        tokens[0].upper not in ("SELECT", "WITH", "VALUES")
+        and tokens[0].value != "("
+    ):
+        return sql
+    depth = 0
+    limit: Optional[int] = None
+    for i, tok in enumerate(tokens):
+        if tok.value == "(":
+            depth += 1
+        elif tok.value == ")":
+            depth -= 1
+        elif depth == 0 and tok.value == ";":
+            # Several statements: let the server reject them
+            return wrapped()
+        elif depth == 0 and tok.upper in ("LIMIT", "FETCH", "FOR"):
+            if tok.upper != "LIMIT":
+                return wrapped()
+            limit = i
+    if limit is None:
+        end = tokens[-1].pos + len(tokens[-1].value)
+        return f"{sql[:end]} LIMIT {max_rows}"
+    if limit + 1 >= len(tokens):
+        return wrapped()
+    value = tokens[limit + 1]
+    following = tokens[limit + 2] if limit + 2 < len(tokens) else None
+    if following is not None and following.upper != "OFFSET":
+        return wrapped()
+    if value.kind == "number" and value.value.isdigit():
+        if int(value.value) <= max_rows:
+            return sql
+    elif value.upper != "ALL":
+        return wrapped()
+    return (
+        f"{sql[:value.pos]}{max_rows}"
+        f"{sql[value.pos + len(value.value):]}"
+    )
+
+
+@dataclasses.dataclass(frozen=True)
+class ParameterizedSQL:
+    """
+    A query with its literals as bind parameters.
+
+    Attributes:
+        sql: Query with $1..$n in place of the literals
+        skeleton: Normalized sql (see normalize_sql), the
+            same for every query differing only in the
+            parameterized literals
+        values: Literal text of each parameter, as
+            written in the query
+        types: PostgreSQL type of each parameter:
+            integer / bigint / numeric as the literal
+            would be typed, unknown for strings (the
+            type is inferred from the context, as for
+            the literal)
+    """
+
+    sql: str
+    skeleton: str
+    values: Tuple[str, ...]
+    types: Tuple[str, ...]
+
+
+def _number_type(text: str) -> str:
+    """
+    Type PostgreSQL gives a numeric literal.
+    """
+    if not text.isdigit():
+        return "numeric"
+    value = int(text)
+    if value < 2 ** 31:
+        return "integer"
+    return "bigint" if value < 2 ** 63 else "numeric"
+
+
+@lru_cache(maxsize=1024)
+def parameterize_sql(sql: str) -> Optional[ParameterizedSQL]:
+    """
+    Replace the literals of a query with bind parameters,
+    so queries differing only in literal values share
+    one prepared statement (and plan).
+
+    Literals stay where a parameter would be a syntax
+    error or change the meaning or the plan: typed
+    literals (DATE '...', INTERVAL '...'), type
+    modifiers, ORDER BY / GROUP BY positions, LIMIT /
+    OFFSET / FETCH counts, DATE_TRUNC units and TO_CHAR
+    formats, E'' / B'' / X'' / dollar strings, and
+    strings in the select list or after THEN / ELSE (a
+    parameter there has no type to infer). Equal
+    literals share one parameter, so an expression
+    repeated in SELECT and GROUP BY stays the same
+    expression.
+
+    Args:
+        sql: Single SELECT / WITH / VALUES query
+
+    Returns:
+        ParameterizedSQL (with no parameters when no
+        literal can be replaced), or None for other
+        statements, several statements, queries that
+        already have bind parameters and text that does
+        not tokenize
+    """
+    try:
+        tokens = _tokenize(sql)
+    except _ParseError:
+        return None
+    while tokens and tokens[-1].value == ";":
+        tokens.pop()
+    if not tokens or (
+        tokens[0].upper not in ("SELECT", "WITH", "VALUES")
+        and tokens[0].value != "("
+    ):
+        return None
+    if any(tok.kind == "param" or tok.value == ";" for tok in tokens):
+        return None
+    # Per parenthesis depth: current clause keyword and
+    # the identifier before the opening parenthesis.
+    clauses, owners = [""], [""]
+    params: Dict[Tuple[str, str], int] = {}
+    values: List[str] = []
+    types: List[str] = []
+    parts, skeleton, cursor = [], [], 0
+    prev: Optional[_Token] = None
+    for tok in tokens:
+        if tok.value == "(":
+            clauses.append("")
+            owners.append(prev.upper if prev is not None else "")
+        elif tok.value == ")" and len(clauses) > 1:
+            clauses.pop()
+            owners.pop()
+        elif tok.upper in CLAUSE_KEYWORDS or tok.upper in (
+            "SELECT", "VALUES"
+        ):
+            clauses[-1] = tok.upper
+        if tok.kind not in ("string", "number") or _keep_literal(
+            tok, prev, clauses[-1], owners[-1]
+        ):
+            skeleton.append(
+                tok.value.lower() if tok.kind == "ident" else tok.value
+            )
+            prev = tok
+            continue
+        kind = "unknown" if tok.kind == "string" else _number_type(
+            tok.value.lower().lstrip("0") or "0"
+        )
+        index = params.get((tok.value, kind))
+        if index is None:
+            values.append(tok.value)
+            types.append(kind)
+            index = params[(tok.value, kind)] = len(values)
+        parts.append(sql[cursor:tok.pos])
+        parts.append(f"${index}")
+        skeleton.append(f"${index}")
+        cursor = tok.pos + len(tok.value)
+        prev = tok
+    end = tokens[-1].pos + len(tokens[-1].value)
+    parts.append(sql[cursor:end])
+    return ParameterizedSQL(
+        sql="".join(parts),
+        skeleton=" ".join(skeleton),
+        values=tuple(values),
+        types=tuple(types),
+    )
+
+
+def prefix_tables(prefix: str, complete: bool = False) -> List[str]:
+    """
+    Tables named in the FROM / JOIN items of a partial
+    query (e.g. streamed model output), or of a whole
+    query with complete.
+
+    Only complete names count: the last token of a
+    prefix may still be growing, and a name followed by
+    "(" is a set-returning function. FROM inside function calls
+    (EXTRACT(... FROM x)) and IS DISTINCT FROM are not
+    table references; derived tables are skipped.
+
+    Args:
+        prefix: Start of a SQL query
+        complete: The query is whole: its last token
+            counts
+
+    Returns:
+        Table names as PostgreSQL folds them, in order
+        (empty if a complete query cannot be tokenized)
+    """
+    if complete:
+        try:
+            tokens = _tokenize(prefix)
+        except _ParseError:
+            return []
+    else:
+        tokens = _tokenize(prefix, partial=True)[:-1]
+    not_functions = (
+        CLAUSE_KEYWORDS | EXPR_KEYWORDS | ALIAS_STOP
+        | {"HAVING", "ON", "SELECT", "WHERE"}
+    )
+    # Per parenthesis level: inside a function call,
+    # inside a FROM list, expecting a table name next
+    frames = [{"func": False, "from": False, "expect": False}]
+    tables: List[str] = []
+    prev: Optional[_Token] = None
+    for i, tok in enumerate(tokens):
+        frame = frames[-1]
+        if tok.value == "(":
+            frame["expect"] = False
+            frames.append({
+                "func": prev is not None
+                and prev.kind in ("ident", "qident")
+                and prev.upper not in not_functions,
+                "from": False,
+                "expect": False,
+            })
+        elif tok.value == ")":
+            if len(frames) > 1:
+                frames.pop()
+        elif frame["func"] or tok.value == ".":
+            pass
+        elif tok.upper in ("FROM", "JOIN") and not (
+            prev is not None and prev.upper == "DISTINCT"
+        ):
+            frame["from"] = frame["expect"] = True
+        elif tok.upper in CLAUSE_KEYWORDS:
+            frame["from"] = frame["expect"] = False
+        elif tok.value == ",":
+            frame["expect"] = frame["from"]
+        elif frame["expect"] and tok.kind in ("ident", "qident"):
+            if tok.upper in ("LATERAL", "ONLY"):
+                continue
+            following = tokens[i + 1] if i + 1 < len(tokens) else None
+            if following is None and not complete:
+                break
+            if following is not None and following.value == ".":
+                continue
+            if following is None or following.value != "(":
+                tables.append(tok.name)
+            frame["expect"] = False
+        else:
+            frame["expect"] = False
+        prev = tok
+    return tables
+
+
+def validate_sql(
+    sql: str,
+    catalog: SchemaCatalog,
+) -> ValidationResult:
+    """
+    Statically validate a SELECT query against a schema
+    catalog.
+
+    Args:
+        sql: SQL to validate
+        catalog: Schema catalog (e.g. from the pruned
+            DDL)
+
+    Returns:
+        ValidationResult with structured issues
+    """
+    try:
+        tokens = _tokenize(sql)
+    except _ParseError as e:
+        return ValidationResult(
+            issues=[ValidationIssue(
+                SEVERITY_ERROR, "syntax", str(e)
+            )],
+            tables=[],
+            checked=bool(catalog.tables),
+        )
+    parser = _Parser(tokens, catalog)
+    try:
+        parser.parse_statement()
+    except _ParseError as e:
+        parser.issues.append(ValidationIssue(
+            SEVERITY_ERROR, "syntax", str(e)
+        ))
+        return ValidationResult(
+            issues=parser.issues,
+            tables=sorted(parser.tables),
+            checked=bool(catalog.tables),
+        )
+    if catalog.tables:
+        for select in parser.selects:
+            _Checker(select, catalog, parser.issues).run()
+    seen: Set[str] = set()
+    issues = []
+    for issue in parser.issues:
+        key = f"{issue.severity}:{issue}"
+        if key not in seen:
+            seen.add(key)
+            issues.append(issue)
+    return ValidationResult(
+        issues=issues,
+        tables=sorted(parser.tables),
+        checked=bool(catalog.tables),
+    )
+
+
+class _ParseError(Exception):
+    """
+    Raised on input the parser cannot handle.
+    """
+
+
+@dataclasses.dataclass
+class _Token:
+    kind: str
+    value: str
+    pos: int
+
+    @property
+    def upper(self) -> str:
+        return self.value.upper() if self.kind == "ident" else ""
+
+    @property
+    def name(self) -> str:
+        """
+        Identifier as PostgreSQL folds it.
+        """
+        if self.kind == "qident":
+            return self.value[1:-1].replace('""', '"')
+        return self.value.lower()
+
+
+@dataclasses.dataclass
+class _ColumnRef:
+    qualifier: Optional[str]
+    name: str
+    clause: str
+    in_aggregate: bool
+
+
+@dataclasses.dataclass
+class _Relation:
+    alias: str
+    table: Optional[str]
+    columns: Optional[Set[str]]
+
+
+@dataclasses.dataclass
+class _Select:
+    parent: Optional["_Select"]
+    ctes: Dict[str, _Relation]
+    relations: Dict[str, _Relation] = dataclasses.field(
+        default_factory=dict
+    )
+    refs: List[_ColumnRef] = dataclasses.field(
+        default_factory=list
+    )
+    outputs: List[object] = dataclasses.field(
+        default_factory=list
+    )
+    join_pairs: List[Tuple[_ColumnRef, _ColumnRef]] = (
+        dataclasses.field(default_factory=list)
+    )
+    where_pairs: List[Tuple[_ColumnRef, _ColumnRef]] = (
+        dataclasses.field(default_factory=list)
+    )
+    from_groups: List[Set[str]] = dataclasses.field(
+        default_factory=list
+    )
+    group_refs: Optional[List[_ColumnRef]] = None
+    has_aggregate: bool = False
+
+    def output_columns(self) -> Optional[Set[str]]:
+        """
+        Output column names, or None when they cannot
+        be determined (star over unknown columns).
+        """
+        names: Set[str] = set()
+        for item in self.outputs:
+            if isinstance(item, str):
+                names.add(item)
+                continue
+            qualifier = item[1]
+            relations = (
+                [self.relations.get(qualifier)]
+                if qualifier
+                else list(self.relations.values())
+            )
+            for rel in relations:
+                if rel is None or rel.columns is None:
+                    return None
+                names.update(rel.columns)
+        return names
+
+
+@dataclasses.dataclass
+class _Expr:
+    refs: List[_ColumnRef] = dataclasses.field(
+        default_factory=list
+    )
+    pairs: List[Tuple[_ColumnRef, _ColumnRef]] = (
+        dataclasses.field(default_factory=list)
+    )
+    atoms: List[object] = dataclasses.field(
+        default_factory=list
+    )
+    func_name: Optional[str] = None
+
+    @property
+    def simple_ref(self) -> Optional[_ColumnRef]:
+        """
+        The column reference when the expression is
+        exactly one column.
+        """
+        if len(self.atoms) == 1 and isinstance(
+            self.atoms[0], _ColumnRef
+        ):
+            return self.atoms[0]
+        return None
+
+
+def _normalize_name(raw: str) -> str:
+    """
+    Fold an identifier from DDL the way PostgreSQL does.
+    """
+    raw = raw.strip()
+    if raw.startswith('"') and raw.endswith('"'):
+        return raw[1:-1]
+    return raw.lower()
+
+
+def _balanced_body(text: str, open_pos: int) -> str:
+    """
+    Text between the parenthesis at open_pos and its
+    matching close.
+    """
+    depth = 0
+    for i in range(open_pos, len(text)):
+        if text[i] == "(":
+            depth += 1
+        elif text[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return text[open_pos + 1:i]
+    return text[open_pos + 1:]
+
+
+def _split_top_level(body: str) -> List[str]:
+    """
+    Split a CREATE TABLE body at depth-0 commas.
+    """
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(body):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(body[start:i])
+            start = i + 1
+    parts.append(body[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _view_columns(
+    sql: str,
+    catalog: SchemaCatalog,
+) -> Optional[List[str]]:
+    """
+    Output columns of a view's defining query, or None
+    when they cannot be determined.
+    """
+    try:
+        parser = _Parser(_tokenize(sql), catalog)
+        parser.parse_statement()
+    except _ParseError:
+        return None
+    columns = parser.selects[0].output_columns()
+    return sorted(columns) if columns is not None else None
+
+
+def _parse_table_element(
+    table: str,
+    element: str,
+    columns: List[str],
+    fks: Set[Tuple[str, str, str, str]],
+    pks: Dict[str, Set[str]],
+) -> None:
+    """
+    Record one column definition or table constraint.
+    """
+    element = re.sub(r"--[^\n]*", "", element).strip()
+    if not element:
+        return
+    words = element.split()
+    first = words[0].upper()
+    if first == "CONSTRAINT" and len(words) > 2:
+        element = element.split(None, 2)[2]
+        first = element.split()[0].upper()
+    if first in ("PRIMARY", "FOREIGN", "UNIQUE", "CHECK",
+                 "EXCLUDE", "LIKE"):
+        pk = re.match(
+            r"PRIMARY\s+KEY\s*\(([^)]*)\)", element, re.I
+        )
+        if pk:
+            pks.setdefault(table, set()).update(
+                _normalize_name(c) for c in pk.group(1).split(",")
+            )
+        fk = re.match(
+            r"FOREIGN\s+KEY\s*\(([^)]*)\)\s*REFERENCES\s+"
+            r"([\w\".]+)\s*\(([^)]*)\)",
+            element, re.I,
+        )
+        if fk:
+            ref = _normalize_name(fk.group(2).split(".")[-1])
+            for col, ref_col in zip(
+                fk.group(1).split(","), fk.group(3).split(",")
+            ):
+                fks.add((
+                    table, _normalize_name(col),
+                    ref, _normalize_name(ref_col),
+                ))
+        return
+    column = _normalize_name(words[0])
+    columns.append(column)
+    if re.search(r"\bPRIMARY\s+KEY\b", element, re.I):
+        pks.setdefault(table, set()).add(column)
+    inline = re.search(
+        r"\bREFERENCES\s+([\w\".]+)\s*\(([^)]*)\)", element, re.I
+    )
+    if inline:
+        fks.add((
+            table, column,
+            _normalize_name(inline.group(1).split(".")[-1]),
+            _normalize_name(inline.group(2)),
+        ))
+
+
+def _keep_literal(
+    tok: _Token,
+    prev: Optional[_Token],
+    clause: str,
+    owner: str,
+) -> bool:
+    """
+    Whether a literal stays in a parameterized query
+    (see parameterize_sql).
+    """
+    before = prev.upper if prev is not None else ""
+    if before in TYPE_LITERAL_PREFIXES or before in ROW_COUNT_KEYWORDS:
+        return True
+    if tok.kind == "string":
+        if not tok.value.startswith("'"):
+            return True
+        if before in ("THEN", "ELSE") or owner in FORMAT_FUNCTIONS:
+            return True
+        return clause == "SELECT" and prev is not None and (
+            before in ("SELECT", "DISTINCT") or prev.value == ","
+        )
+    if owner in TYPE_MODIFIER_NAMES:
+        return True
+    return clause in ("GROUP", "ORDER") and prev is not None and (
+        before == "BY" or prev.value == ","
+    )
+
+
+def _is_interval_unit(
+    tok: _Token,
+    prev_tok: Optional[_Token],
+) -> bool:
+    """
+    Whether tok is the unit of INTERVAL '1' DAY.
+    """
+    return (
+        tok.upper in TIME_UNITS
+        and prev_tok is not None
+        and prev_tok.kind == "string"
+    )
+
+
+def _tokenize(sql: str, partial: bool = False) -> List[_Token]:
+    """
+    Split SQL into tokens, dropping whitespace and
+    comments (with partial, a prefix: tokenizing stops
+    at an unterminated literal or comment instead of
+    failing).
+    """
+    tokens = []
+    pos = 0
+    while pos < len(sql):
+        match = _TOKEN_RE.match(sql, pos)
+        if match is None:
+            if partial:
+                break
+            if sql[pos] in "'\"":
+                raise _ParseError(
+                    f"Unterminated quoted literal at "
+                    f"position {pos}"
+                )
+            raise _ParseError(
+                f"Unexpected character {sql[pos]!r} at "
+                f"position {pos}"
+            )
+        kind = match.lastgroup
+        if kind == "tag":
+            kind = "dollar"
+        if kind not in ("ws", "comment"):
+            if kind == "dollar":
+                kind = "string"
+            tokens.append(_Token(kind, match.group(), pos))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive-descent parser for the SELECT subset.
+    Collects scopes (one _Select per SELECT body) for
+    the checker; FROM-clause problems are reported
+    while parsing.
+    """
+
+    def __init__(
+        self,
+        tokens: List[_Token],
+        catalog: SchemaCatalog,
+    ):
+        self.tokens = tokens
+        self.pos = 0
+        self.catalog = catalog
+        self.selects: List[_Select] = []
+        self.issues: List[ValidationIssue] = []
+        self.tables: Set[str] = set()
+        self._anonymous = 0
+
+    # -- token helpers -------------------------------------
+
+    def _peek(self, offset: int = 0) -> Optional[_Token]:
+        idx = self.pos + offset
+        return self.tokens[idx] if idx < len(self.tokens) else None
+
+    def _next(self) -> _Token:
+        tok = self._peek()
+        if tok is None:
+            raise _ParseError("Unexpected end of query")
+        self.pos += 1
+        return tok
+
+    def _at_kw(self, *words: str, offset: int = 0) -> bool:
+        tok = self._peek(offset)
+        return tok is not None and tok.upper in words
+
+    def _at_punct(self, value: str, offset: int = 0) -> bool:
+        tok = self._peek(offset)
+        return (
+            tok is not None
+            and tok.kind == "punct"
+            and tok.value == value
+        )
+
+    def _accept_kw(self, *words: str) -> Optional[str]:
+        if self._at_kw(*words):
+            return self._next().upper
+        return None
+
+    def _accept_punct(self, value: str) -> bool:
+        if self._at_punct(value):
+            self.pos += 1
+            return True
+        return False
+
+    def _expect_kw(self, word: str) -> None:
+        if not self._accept_kw(word):
+            raise _ParseError(
+                f"Expected {word} {self._near()}"
+            )
+
+    def _expect_punct(self, value: str) -> None:
+        if not self._accept_punct(value):
+            raise _ParseError(
+                f"Expected '{value}' {self._near()}"
+            )
+
+    def _expect_name(self) -> str:
+        tok = self._peek()
+        if tok is None or tok.kind not in ("ident", "qident"):
+            raise _ParseError(
+                f"Expected identifier {self._near()}"
+            )
+        self.pos += 1
+        return tok.name
+
+    def _near(self) -> str:
+        tok = self._peek()
+        if tok is None:
+            return "at end of query"
+        return f"near '{tok.value}'"
+
+    def _issue(
+        self,
+        severity: str,
+        code: str,
+        message: str,
+        hint: str = "",
+    ) -> None:
+        self.issues.append(
+            ValidationIssue(severity, code, message, hint)
+        )
+
+    # -- statements ----------------------------------------
+
+    def parse_statement(self) -> None:
+        """
+        Parse one SELECT statement (optional trailing
+        semicolon).
+        """
+        if not (
+            self._at_kw("SELECT", "WITH")
+            or self._at_punct("(")
+        ):
+            tok = self._peek()
+            found = tok.value if tok else "nothing"
+            raise _ParseError(
+                f"Only SELECT queries are allowed "
+                f"(found {found!r})"
+            )
+        self._parse_query(parent=None, ctes={})
+        self._accept_punct(";")
+        if self._peek() is not None:
+            if self._at_kw("SELECT", "WITH"):
+                raise _ParseError(
+                    "Only a single statement is allowed"
+                )
+            raise _ParseError(
+                f"Unexpected token {self._near()}"
+            )
+
+    def _parse_query(
+        self,
+        parent: Optional[_Select],
+        ctes: Dict[str, _Relation],
+    ) -> _Select:
+        """
+        Parse [WITH ...] body {set-op body} [ORDER BY]
+        [LIMIT] [OFFSET] [FETCH]. Returns the first
+        body, whose outputs name the result columns.
+        """
+        ctes = dict(ctes)
+        if self._accept_kw("WITH"):
+            self._accept_kw("RECURSIVE")
+            while True:
+                self._parse_cte(parent, ctes)
+                if not self._accept_punct(","):
+                    break
+        first = self._parse_select_body(parent, ctes)
+        while self._accept_kw("UNION", "INTERSECT", "EXCEPT"):
+            self._accept_kw("ALL", "DISTINCT")
+            self._parse_select_body(parent, ctes)
+        if self._accept_kw("ORDER"):
+            self._expect_kw("BY")
+            while True:
+                self._parse_expr(first, "order")
+                self._accept_kw("ASC", "DESC")
+                if self._accept_kw("NULLS"):
+                    self._expect_first_last()
+                if not self._accept_punct(","):
+                    break
+        if self._accept_kw("LIMIT"):
+            if not self._accept_kw("ALL"):
+                self._parse_expr(first, "limit")
+        if self._accept_kw("OFFSET"):
+            self._parse_expr(first, "limit")
+            self._accept_kw("ROW", "ROWS")
+        if self._accept_kw("FETCH"):
+            self._expect_first_next()
+            tok = self._peek()
+            if tok is not None and tok.kind in ("number", "param"):
+                self.pos += 1
+            elif self._accept_punct("("):
+                self._parse_expr(first, "limit")
+                self._expect_punct(")")
+            self._accept_kw("ROW", "ROWS")
+            if self._accept_kw("WITH"):
+                self._expect_kw("TIES")
+            else:
+                self._expect_kw("ONLY")
+        return first
+
+    def _expect_first_last(self) -> None:
+        if not self._accept_kw("FIRST", "LAST"):
+            raise _ParseError(
+                f"Expected FIRST or LAST {self._near()}"
+            )
+
+    def _expect_first_next(self) -> None:
+        if not self._accept_kw("FIRST", "NEXT"):
+            raise _ParseError(
+                f"Expected FIRST or NEXT {self._near()}"
+            )
+
+    def _parse_cte(
+        self,
+        parent: Optional[_Select],
+        ctes: Dict[str, _Relation],
+    ) -> None:
+        """
+        Parse name [(cols)] AS [NOT] [MATERIALIZED]
+        (query) and register it.
+        """
+        name = self._expect_name()
+        columns = None
+        if self._accept_punct("("):
+            columns = set(self._parse_name_list())
+        self._expect_kw("AS")
+        self._accept_kw("NOT")
+        self._accept_kw("MATERIALIZED")
+        self._expect_punct("(")
+        if not self._at_kw("SELECT", "WITH") and not self._at_punct("("):
+            raise _ParseError(
+                f"CTE {name!r} must be a SELECT "
+                f"{self._near()}"
+            )
+        # Visible inside its own body (WITH RECURSIVE)
+        ctes[name] = _Relation(name, None, columns)
+        body = self._parse_query(parent, ctes)
+        self._expect_punct(")")
+        ctes[name] = _Relation(
+            name, None,
+            columns if columns is not None
+            else body.output_columns(),
+        )
+
+    def _parse_name_list(self) -> List[str]:
+        """
+        Parse name {, name} ) — the opening parenthesis
+        is already consumed.
+        """
+        names = [self._expect_name()]
+        while self._accept_punct(","):
+            names.append(self._expect_name())
+        self._expect_punct(")")
+        return names
+
+    def _parse_select_body(
+        self,
+        parent: Optional[_Select],
+        ctes: Dict[str, _Relation],
+    ) -> _Select:
+        """
+        Parse SELECT ... [FROM] [WHERE] [GROUP BY]
+        [HAVING] [WINDOW], or a parenthesized query.
+        """
+        if self._accept_punct("("):
+            body = self._parse_query(parent, ctes)
+            self._expect_punct(")")
+            return body
+        self._expect_kw("SELECT")
+        select = _Select(parent=parent, ctes=ctes)
+        self.selects.append(select)
+        if self._accept_kw("DISTINCT"):
+            if self._accept_kw("ON"):
+                self._expect_punct("(")
+                while True:
+                    self._parse_expr(select, "order")
+                    if not self._accept_punct(","):
+                        break
+                self._expect_punct(")")
+        else:
+            self._accept_kw("ALL")
+        self._parse_select_list(select)
+        if self._accept_kw("FROM"):
+            while True:
+                select.from_groups.append(
+                    self._parse_from_item(select)
+                )
+                if not self._accept_punct(","):
+                    break
+        if self._accept_kw("WHERE"):
+            select.where_pairs = self._parse_expr(
+                select, "where"
+            ).pairs
+        if self._accept_kw("GROUP"):
+            self._expect_kw("BY")
+            self._parse_group_by(select)
+        if self._accept_kw("HAVING"):
+            self._parse_expr(select, "having")
+        if self._accept_kw("WINDOW"):
+            while True:
+                self._expect_name()
+                self._expect_kw("AS")
+                self._parse_expr(select, "window")
+                if not self._accept_punct(","):
+                    break
+        return select
+
+    def _parse_select_list(self, select: _Select) -> None:
+        """
+        Parse select items and record output names.
+        """
+        if self._at_kw("FROM") or self._peek() is None:
+            raise _ParseError("Empty SELECT list")
+        while True:
+            tok = self._peek()
+            if (
+                tok is not None
+                and tok.kind == "op"
+                and tok.value == "*"
+            ):
+                self._next()
+                select.outputs.append(("*", None))
+            else:
+                expr = self._parse_expr(select, "select")
+                alias = None
+                if self._accept_kw("AS"):
+                    alias = self._expect_name()
+                elif self._at_alias():
+                    alias = self._expect_name()
+                ref = expr.simple_ref
+                if alias is None and ref and ref.name == "*":
+                    select.outputs.append(("*", ref.qualifier))
+                else:
+                    select.outputs.append(
+                        alias
+                        or (ref.name if ref else None)
+                        or expr.func_name
+                        or "?column?"
+                    )
+            if not self._accept_punct(","):
+                break
+
+    def _at_alias(self) -> bool:
+        tok = self._peek()
+        if tok is None:
+            return False
+        if tok.kind == "qident":
+            return True
+        return tok.kind == "ident" and tok.upper not in ALIAS_STOP
+
+    def _parse_group_by(self, select: _Select) -> None:
+        """
+        Parse GROUP BY items. Only plain column lists
+        are kept for the GROUP BY check.
+        """
+        self._accept_kw("ALL", "DISTINCT")
+        refs: Optional[List[_ColumnRef]] = []
+        while True:
+            expr = self._parse_expr(select, "group")
+            ref = expr.simple_ref
+            if ref is None or refs is None:
+                refs = None
+            else:
+                refs.append(ref)
+            if not self._accept_punct(","):
+                break
+        select.group_refs = refs if refs else None
+        if refs is None:
+            # Ordinals / expressions / ROLLUP: grouping
+            # exists but isn't checked
+            select.group_refs = []
+
+    # -- FROM clause ---------------------------------------
+
+    def _parse_from_item(self, select: _Select) -> Set[str]:
+        """
+        Parse a table reference followed by any joins;
+        returns the aliases it introduces.
+        """
+        aliases = self._parse_table_ref(select)
+        while True:
+            natural = self._accept_kw("NATURAL")
+            kind = self._accept_kw(
+                "CROSS", "INNER", "LEFT", "RIGHT", "FULL"
+            )
+            if kind in ("LEFT", "RIGHT", "FULL"):
+                self._accept_kw("OUTER")
+            if kind or natural:
+                self._expect_kw("JOIN")
+            elif not self._accept_kw("JOIN"):
+                break
+            right = self._parse_table_ref(select)
+            if kind != "CROSS" and not natural:
+                if self._accept_kw("ON"):
+                    select.join_pairs.extend(
+                        self._parse_expr(select, "on").pairs
+                    )
+                elif self._accept_kw("USING"):
+                    self._expect_punct("(")
+                    self._check_using(
+                        select, aliases, right,
+                        self._parse_name_list(),
+                    )
+                else:
+                    self._issue(
+                        SEVERITY_ERROR,
+                        "missing_join_condition",
+                        f"JOIN {', '.join(sorted(right))} "
+                        f"has no ON or USING condition",
+                    )
+            aliases |= right
+        return aliases
+
+    def _check_using(
+        self,
+        select: _Select,
+        left: Set[str],
+        right: Set[str],
+        columns: List[str],
+    ) -> None:
+        """
+        Check USING columns exist on both sides.
+        """
+        for column in columns:
+            for side in (left, right):
+                rels = [select.relations[a] for a in side]
+                if any(
+                    r.columns is None or column in r.columns
+                    for r in rels
+                ):
+                    continue
+                self._issue(
+                    SEVERITY_ERROR, "unknown_column",
+                    f"USING column {column!r} does not "
+                    f"exist in {', '.join(sorted(side))}",
+                )
+
+    def _parse_table_ref(self, select: _Select) -> Set[str]:
+        """
+        Parse a table, CTE, derived table, table function
+        or parenthesized join.
+        """
+        self._accept_kw("LATERAL")
+        if self._accept_punct("("):
+            if self._at_kw("SELECT", "WITH") or self._at_punct("("):
+                body = self._parse_query(select, select.ctes)
+                self._expect_punct(")")
+                alias, columns = self._parse_alias()
+                if alias is None:
+                    self._anonymous += 1
+                    alias = f"?subquery{self._anonymous}"
+                return self._register(select, _Relation(
+                    alias, None,
+                    set(columns) if columns
+                    else body.output_columns(),
+                ))
+            aliases = self._parse_from_item(select)
+            self._expect_punct(")")
+            self._parse_alias()
+            return aliases
+
+        parts = [self._expect_name()]
+        while self._accept_punct("."):
+            parts.append(self._expect_name())
+        name = parts[-1]
+        if self._accept_punct("("):
+            # Table function, e.g. generate_series(...)
+            while not self._at_punct(")"):
+                self._parse_expr(select, "from")
+                if not self._accept_punct(","):
+                    break
+            self._expect_punct(")")
+            if self._accept_kw("WITH"):
+                self._expect_kw("ORDINALITY")
+            alias, _ = self._parse_alias()
+            return self._register(
+                select, _Relation(alias or name, None, None)
+            )
+
+        alias, columns = self._parse_alias()
+        if len(parts) == 1 and name in select.ctes:
+            cte = select.ctes[name]
+            relation = _Relation(
+                alias or name, None,
+                set(columns) if columns else cte.columns,
+            )
+        elif self.catalog.has_table(name):
+            self.tables.add(name)
+            relation = _Relation(
+                alias or name, name,
+                set(self.catalog.columns(name)),
+            )
+        else:
+            if self.catalog.tables:
+                close = difflib.get_close_matches(
+                    name, list(self.catalog.tables), n=3
+                )
+                self._issue(
+                    SEVERITY_ERROR, "unknown_table",
+                    f"Table {name!r} does not exist in "
+                    f"the schema",
+                    f"did you mean {', '.join(close)}?"
+                    if close else
+                    f"available: "
+                    f"{', '.join(sorted(self.catalog.tables))}",
+                )
+            relation = _Relation(alias or name, None, None)
+        return self._register(select, relation)
+
+    def _parse_alias(
+        self,
+    ) -> Tuple[Optional[str], Optional[List[str]]]:
+        """
+        Parse [AS] alias [(col, ...)].
+        """
+        alias = None
+        if self._accept_kw("AS"):
+            alias = self._expect_name()
+        elif self._at_alias():
+            alias = self._expect_name()
+        columns = None
+        if alias is not None and self._accept_punct("("):
+            columns = self._parse_name_list()
+        return alias, columns
+
+    def _register(
+        self,
+        select: _Select,
+        relation: _Relation,
+    ) -> Set[str]:
+        if relation.alias in select.relations:
+            self._issue(
+                SEVERITY_ERROR, "duplicate_alias",
+                f"Table name {relation.alias!r} is "
+                f"specified more than once",
+                "give each occurrence its own alias",
+            )
+        select.relations[relation.alias] = relation
+        return {relation.alias}
+
+    # -- expressions ---------------------------------------
+
+    def _parse_expr(
+        self,
+        select: _Select,
+        clause: str,
+    ) -> _Expr:
+        """
+        Consume one expression, recording column
+        references (with aggregate context), equality
+        pairs between columns, and nested subqueries.
+
+        Stops at a depth-0 comma, closing parenthesis,
+        clause keyword, or an implicit alias.
+        """
+        expr = _Expr()
+        frames: List[Optional[str]] = []
+        pending_func: Optional[str] = None
+        prev_operand = False
+        prev_tok: Optional[_Token] = None
+        extract_field = False
+        last_closed: Optional[str] = None
+        top_level_closes = 0
+        while True:
+            tok = self._peek()
+            if tok is None:
+                break
+            depth = len(frames)
+            if depth == 0:
+                if tok.kind == "punct" and tok.value in (
+                    ",", ")", ";", "]",
+                ):
+                    break
+                if (
+                    tok.upper in CLAUSE_KEYWORDS
+                    and not self._at_punct("(", 1)
+                    and not (
+                        tok.upper == "FROM"
+                        and prev_tok is not None
+                        and prev_tok.upper == "DISTINCT"
+                    )
+                ):
+                    break
+                if (
+                    prev_operand
+                    and tok.kind in ("ident", "qident")
+                    and tok.upper not in EXPR_KEYWORDS
+                    and not _is_interval_unit(tok, prev_tok)
+                ):
+                    break
+            elif tok.kind == "punct" and tok.value == ";":
+                raise _ParseError("Unbalanced parentheses")
+
+            self.pos += 1
+            if tok.kind == "punct":
+                if tok.value in ("(", "["):
+                    if tok.value == "(" and self._at_kw("SELECT", "WITH"):
+                        self._parse_query(select, select.ctes)
+                        self._expect_punct(")")
+                        expr.atoms.append("subquery")
+                        prev_operand = True
+                    else:
+                        frames.append(pending_func)
+                        extract_field = pending_func == "extract"
+                        pending_func = None
+                        prev_operand = False
+                elif tok.value in (")", "]"):
+                    func = last_closed = frames.pop()
+                    if not frames:
+                        top_level_closes += 1
+                    if func in AGGREGATES and not self._at_kw("OVER"):
+                        select.has_aggregate = True
+                    prev_operand = True
+                else:
+                    prev_operand = False
+                prev_tok = tok
+                continue
+
+            if tok.kind == "op":
+                if tok.value == "::":
+                    self._skip_type()
+                    prev_operand = True
+                elif tok.value == "*" and not prev_operand:
+                    prev_operand = True
+                else:
+                    expr.atoms.append(tok.value)
+                    prev_operand = False
+                prev_tok = tok
+                continue
+
+            if tok.kind in ("string", "number", "param"):
+                expr.atoms.append("literal")
+                prev_operand = True
+                prev_tok = tok
+                continue
+
+            # identifiers
+            upper = tok.upper
+            if (
+                upper in ("FILTER", "GROUP")
+                and last_closed in AGGREGATES
+                and self._at_punct("(")
+            ):
+                # agg(...) FILTER (WHERE ...) and
+                # agg(...) WITHIN GROUP (ORDER BY ...)
+                # keep aggregate context
+                pending_func = last_closed
+            elif upper == "WITHIN":
+                prev_operand = False
+            elif self._at_punct("("):
+                pending_func = tok.name
+                if not expr.atoms:
+                    expr.func_name = tok.name
+                expr.atoms.append(("func", tok.name))
+                prev_operand = False
+            elif extract_field:
+                extract_field = False
+            elif (
+                upper in TYPE_LITERAL_PREFIXES
+                and self._peek() is not None
+                and self._peek().kind == "string"
+            ):
+                pass
+            elif _is_interval_unit(tok, prev_tok):
+                prev_operand = True
+            elif upper == "AS" and frames:
+                self._skip_type()
+                prev_operand = True
+            elif upper == "OVER":
+                tok_after = self._peek()
+                if tok_after is not None and tok_after.kind in (
+                    "ident", "qident",
+                ):
+                    self.pos += 1
+                    prev_operand = True
+            elif upper in EXPR_KEYWORDS or upper in CLAUSE_KEYWORDS:
+                expr.atoms.append(upper)
+                prev_operand = upper in OPERAND_KEYWORDS
+            else:
+                func = self._parse_column_ref(
+                    tok, select, clause, expr,
+                    in_aggregate=any(
+                        f in AGGREGATES for f in frames
+                    ),
+                )
+                if func is not None:
+                    # schema-qualified function call
+                    pending_func = func
+                    expr.atoms.append(("func", func))
+                prev_operand = func is None
+            prev_tok = tok
+        if (
+            expr.func_name is not None
+            and top_level_closes != 1
+        ):
+            expr.func_name = None
+        if frames:
+            raise _ParseError("Unbalanced parentheses")
+        return expr
+
+    def _parse_column_ref(
+        self,
+        tok: _Token,
+        select: _Select,
+        clause: str,
+        expr: _Expr,
+        in_aggregate: bool,
+    ) -> Optional[str]:
+        """
+        Parse name[.name[.name]] or alias.* starting at
+        tok (already consumed) and record it.
+
+        Returns:
+            The function name when the dotted name turns
+            out to be a qualified function call, else None
+        """
+        parts = [tok.name]
+        star = False
+        while self._at_punct("."):
+            after = self._peek(1)
+            if after is None:
+                break
+            if after.kind == "op" and after.value == "*":
+                self.pos += 2
+                star = True
+                break
+            if after.kind not in ("ident", "qident"):
+                break
+            self.pos += 2
+            parts.append(after.name)
+        if not star and self._at_punct("("):
+            return parts[-1]
+        if star:
+            ref = _ColumnRef(parts[-1], "*", clause, in_aggregate)
+        else:
+            ref = _ColumnRef(
+                parts[-2] if len(parts) > 1 else None,
+                parts[-1], clause, in_aggregate,
+            )
+        select.refs.append(ref)
+        expr.refs.append(ref)
+        expr.atoms.append(ref)
+        if (
+            len(expr.atoms) >= 3
+            and expr.atoms[-2] == "="
+            and isinstance(expr.atoms[-3], _ColumnRef)
+        ):
+            expr.pairs.append((expr.atoms[-3], ref))
+
+    def _skip_type(self) -> None:
+        """
+        Consume a type name after :: or CAST(... AS.
+        """
+        self._expect_name()
+        while self._accept_punct("."):
+            self._expect_name()
+        while self._at_kw(*TYPE_CONTINUATIONS):
+            self.pos += 1
+        if self._accept_punct("("):
+            depth = 1
+            while depth:
+                tok = self._next()
+                if tok.kind == "punct" and tok.value == "(":
+                    depth += 1
+                elif tok.kind == "punct" and tok.value == ")":
+                    depth -= 1
+        while self._at_punct("[") and self._at_punct("]", 1):
+            self.pos += 2
+
+
+class _Checker:
+    """
+    Resolves one scope's column references and checks
+    joins and grouping.
+    """
+
+    def __init__(
+        self,
+        select: _Select,
+        catalog: SchemaCatalog,
+        issues: List[ValidationIssue],
+    ):
+        self.select = select
+        self.catalog = catalog
+        self.issues = issues
+        self.resolved: Dict[int, Tuple[int, str]] = {}
+
+    def run(self) -> None:
+        for ref in self.select.refs:
+            self._resolve(ref)
+        self._check_joins(self.select.join_pairs)
+        self._check_cartesian()
+        self._check_grouping()
+
+    def _issue(self, *args) -> None:
+        self.issues.append(ValidationIssue(*args))
+
+    def _resolve(self, ref: _ColumnRef) -> None:
+        """
+        Resolve a reference through the scope chain,
+        reporting unknown / ambiguous references.
+        """
+        scope: Optional[_Select] = self.select
+        while scope is not None:
+            if ref.qualifier is not None:
+                rel = scope.relations.get(ref.qualifier)
+                if rel is not None:
+                    self._check_column(ref, rel)
+                    self.resolved[id(ref)] = (id(scope), rel.alias)
+                    return
+            else:
+                matches = [
+                    rel for rel in scope.relations.values()
+                    if rel.columns is None
+                    or ref.name in rel.columns
+                ]
+                known = [r for r in matches if r.columns is not None]
+                if len(known) > 1 and len(known) == len(matches):
+                    self._issue(
+                        SEVERITY_ERROR, "ambiguous_column",
+                        f"Column reference {ref.name!r} is "
+                        f"ambiguous",
+                        f"qualify it: "
+                        + ", ".join(
+                            f"{r.alias}.{ref.name}"
+                            for r in known
+                        ),
+                    )
+                    return
+                if len(matches) == 1 and known:
+                    self.resolved[id(ref)] = (
+                        id(scope), known[0].alias
+                    )
+                    return
+                if matches:
+                    return
+                if ref.clause in ("order", "group") and (
+                    ref.name in (scope.output_columns() or ())
+                ):
+                    # Output column alias
+                    return
+            scope = scope.parent
+        self._report_unresolved(ref)
+
+    def _check_column(
+        self, ref: _ColumnRef, rel: _Relation,
+    ) -> None:
+        if ref.name == "*" or rel.columns is None:
+            return
+        if ref.name in rel.columns:
+            return
+        source = rel.table or rel.alias
+        close = difflib.get_close_matches(
+            ref.name, sorted(rel.columns), n=3
+        )
+        self._issue(
+            SEVERITY_ERROR, "unknown_column",
+            f"Column {ref.qualifier}.{ref.name} does not "
+            f"exist ({source})",
+            f"did you mean {', '.join(close)}?" if close
+            else f"{source} has: "
+            + ", ".join(sorted(rel.columns)[:MAX_HINT_COLUMNS]),
+        )
+
+    def _report_unresolved(self, ref: _ColumnRef) -> None:
+        """
+        Report a reference no scope could resolve.
+        """
+        aliases: Dict[str, _Relation] = {}
+        scope = self.select
+        while scope is not None:
+            for alias, rel in scope.relations.items():
+                aliases.setdefault(alias, rel)
+            scope = scope.parent
+        if ref.qualifier is not None:
+            hint = ""
+            for alias, rel in aliases.items():
+                if rel.table == ref.qualifier:
+                    hint = (
+                        f"{ref.qualifier} is aliased as "
+                        f"{alias}; use {alias}.{ref.name}"
+                    )
+                    break
+            if not hint and aliases:
+                hint = "tables in scope: " + ", ".join(
+                    sorted(aliases)
+                )
+            self._issue(
+                SEVERITY_ERROR, "unknown_alias",
+                f"Missing FROM-clause entry for "
+                f"{ref.qualifier!r} in "
+                f"{ref.qualifier}.{ref.name}",
+                hint,
+            )
+            return
+        candidates = sorted({
+            f"{alias}.{col}"
+            for alias, rel in aliases.items()
+            for col in (rel.columns or ())
+        })
+        close = difflib.get_close_matches(
+            ref.name,
+            [c.split(".", 1)[1] for c in candidates],
+            n=3,
+        )
+        hint = ""
+        if close:
+            hint = "did you mean " + ", ".join(
+                c for c in candidates
+                if c.split(".", 1)[1] in close
+            )[:200] + "?"
+        self._issue(
+            SEVERITY_ERROR, "unknown_column",
+            f"Column {ref.name!r} does not exist in any "
+            f"table in scope",
+            hint,
+        )
+
+    def _base_table(
+        self, ref: _ColumnRef,
+    ) -> Optional[Tuple[str, str]]:
+        """
+        (alias, table) for a reference resolved in this
+        scope to a catalog table.
+        """
+        found = self.resolved.get(id(ref))
+        if found is None or found[0] != id(self.select):
+            return None
+        rel = self.select.relations[found[1]]
+        if rel.table is None:
+            return None
+        return rel.alias, rel.table
+
+    def _check_joins(
+        self,
+        pairs: List[Tuple[_ColumnRef, _ColumnRef]],
+    ) -> None:
+        """
+        Warn on equality joins that don't follow a
+        foreign key.
+        """
+        for left, right in pairs:
+            lhs = self._base_table(left)
+            rhs = self._base_table(right)
+            if lhs is None or rhs is None or lhs[0] == rhs[0]:
+                continue
+            if self.catalog.has_fk(
+                lhs[1], left.name, rhs[1], right.name
+            ):
+                continue
+            fks = self.catalog.fks_between(lhs[1], rhs[1])
+            if not fks and left.name == right.name:
+                continue
+            hint = (
+                "foreign keys: " + ", ".join(
+                    f"{a}.{b} -> {c}.{d}"
+                    for a, b, c, d in fks
+                )
+                if fks
+                else f"no foreign key between {lhs[1]} "
+                f"and {rhs[1]}"
+            )
+            self._issue(
+                SEVERITY_WARNING, "non_fk_join",
+                f"Join condition {lhs[0]}.{left.name} = "
+                f"{rhs[0]}.{right.name} does not follow a "
+                f"foreign key",
+                hint,
+            )
+
+    def _check_cartesian(self) -> None:
+        """
+        Warn when comma-separated FROM items are not
+        linked by any join predicate.
+        """
+        groups = self.select.from_groups
+        if len(groups) < 2:
+            return
+        owner = {
+            alias: idx
+            for idx, aliases in enumerate(groups)
+            for alias in aliases
+        }
+        parent = list(range(len(groups)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                i = parent[i]
+            return i
+
+        for left, right in (
+            self.select.where_pairs + self.select.join_pairs
+        ):
+            lhs = self.resolved.get(id(left))
+            rhs = self.resolved.get(id(right))
+            if lhs is None or rhs is None:
+                continue
+            if lhs[1] in owner and rhs[1] in owner:
+                parent[find(owner[lhs[1]])] = find(owner[rhs[1]])
+        roots = {find(i) for i in range(len(groups))}
+        if len(roots) > 1:
+            self._issue(
+                SEVERITY_WARNING, "cartesian_product",
+                "FROM items "
+                + ", ".join(
+                    "/".join(sorted(g)) for g in groups
+                )
+                + " are not all linked by a join condition",
+                "add a JOIN ... ON or WHERE equality",
+            )
+
+    def _check_grouping(self) -> None:
+        """
+        Warn on select-list columns that are neither
+        grouped nor aggregated.
+        """
+        select = self.select
+        group_refs = select.group_refs
+        if group_refs is None and not select.has_aggregate:
+            return
+        if group_refs == [] or any(
+            id(r) not in self.resolved for r in group_refs or []
+        ):
+            # Expressions, ordinals or output aliases
+            return
+        grouped = {
+            self.resolved.get(id(r)) for r in group_refs or []
+        }
+        grouped_aliases = set()
+        for alias_key in grouped:
+            if alias_key is None:
+                continue
+            rel = select.relations.get(alias_key[1])
+            if rel is None or rel.table is None:
+                continue
+            pk = self.catalog.primary_keys.get(rel.table)
+            grouped_cols = {
+                r.name for r in group_refs or []
+                if self.resolved.get(id(r)) == alias_key
+            }
+            if pk and pk <= grouped_cols:
+                grouped_aliases.add(alias_key)
+        for ref in select.refs:
+            if (
+                ref.clause != "select"
+                or ref.in_aggregate
+                or ref.name == "*"
+            ):
+                continue
+            key = self.resolved.get(id(ref))
+            if key is None or key[0] != id(select):
+                continue
+            if key in grouped_aliases:
+                continue
+            if any(
+                self.resolved.get(id(g)) == key
+                and g.name == ref.name
+                for g in group_refs or []
+            ):
+                continue
+            self._issue(
+                SEVERITY_WARNING, "group_by",
+                f"Column {key[1]}.{ref.name} must appear in "
+                f"GROUP BY or be used in an aggregate",
+            )
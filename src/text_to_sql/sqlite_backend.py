@@ -0,0 +1,1002 @@
+"""
+Embedded SQLite execution backend.
+
+An in-process stand-in for PostgreSQL, so the pipeline,
+its benchmarks and the e2e / ablation demos run offline
+(no DATABASE_URL, no network round trips). Select it
+with `SQL_BACKEND=sqlite` (see db.get_backend).
+
+- the project schema (schema_setup.sql) is translated
+  and loaded into an in-memory database (or the file at
+  `SQLITE_DATABASE`, reused when it already has tables)
+  with sample_data.sql, or a synthetic dataset of
+  `SQLITE_SCALE` (text_to_sql.synthetic_data)
+- every statement goes through translate_sql, a
+  lightweight dialect translation of common PostgreSQL
+  constructs: `::` casts, ILIKE, DATE_TRUNC, EXTRACT /
+  DATE_PART, `+ / - INTERVAL`, NOW(), STRING_AGG,
+  TO_CHAR, LEFT / RIGHT, GREATEST / LEAST, POSITION,
+  CONCAT, IS [NOT] DISTINCT FROM, and schema-qualified
+  names. Anything else is passed through unchanged, so
+  SQLite reports what it does not support
+- statements share one connection, one at a time;
+  statement timeouts and cancellation interrupt the
+  running statement
+- EXPLAIN runs EXPLAIN QUERY PLAN: planning errors
+  raise PlannerError, and total_cost is a rough
+  estimate (rows of fully scanned tables plus a
+  log-sized probe per index search) as SQLite has no
+  cost model
+
+Results differ from PostgreSQL in representation:
+DECIMAL values are floats, dates and timestamps are
+ISO strings, booleans are 0 / 1.
+"""
+
+import functools
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from text_to_sql.app_logger import get_logger
+from text_to_sql.db import (
+    DEFAULT_STREAM_ITERSIZE,
+    SCHEMA_DIR,
+    SEARCH_PATH,
+    PlannerError,
+    _QueryHandle,
+    load_schema_ddl,
+)
+from text_to_sql.result_cache import get_result_cache
+from text_to_sql.results import ColumnarResult
+from text_to_sql.synthetic_data import SyntheticDataset
+
+
+logger = get_logger(__name__)
+
+DEFAULT_DATABASE = ":memory:"
+# SQLite VM instructions between statement timeout checks.
+PROGRESS_STEPS = 1000
+# Translated statements kept (translation is per call
+# otherwise; the same SQL often runs many times).
+TRANSLATION_CACHE_SIZE = 1024
+# Schema qualifiers dropped from names (one database).
+SCHEMAS = frozenset(
+    name.strip().lower() for name in SEARCH_PATH.split(",")
+)
+# Statements with no SQLite equivalent, skipped when
+# loading DDL.
+SKIPPED_STATEMENTS = (
+    "SET", "RESET", "COMMENT", "GRANT", "REVOKE",
+    "CREATE SCHEMA", "CREATE EXTENSION",
+)
+DDL_TYPES = {
+    "SERIAL": "INTEGER",
+    "BIGSERIAL": "INTEGER",
+    "SMALLSERIAL": "INTEGER",
+    "JSONB": "TEXT",
+    "JSON": "TEXT",
+}
+# First words of SQLite error messages -> SQLSTATE of
+# the matching PostgreSQL error.
+SQLSTATES = {
+    "no such table": "42P01",
+    "no such column": "42703",
+    "no such function": "42883",
+    "ambiguous column": "42702",
+    "near": "42601",
+    "incomplete input": "42601",
+    "unrecognized token": "42601",
+    "wrong number of arguments": "42883",
+    "misuse of aggregate": "42803",
+}
+# Words that are not function names when followed by
+# "(" (the operand of a cast is then just the group).
+NOT_FUNCTIONS = frozenset({
+    "ALL", "AND", "ANY", "AS", "BETWEEN", "BY", "CASE",
+    "ELSE", "EXISTS", "FROM", "IN", "IS", "LIKE", "NOT",
+    "ON", "OR", "SELECT", "SOME", "THEN", "WHEN", "WHERE",
+})
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+|--[^\n]*|/\*.*?\*/)
+    | (?P<string>'(?:[^']|'')*')
+    | (?P<ident>"(?:[^"]|"")*")
+    | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+)
+    | (?P<word>[A-Za-z_][\w$]*)
+    | (?P<op>::|->>|->|<=|>=|<>|!=|\|\||[-+*/%<>=,;.])
+    | (?P<open>\()
+    | (?P<close>\))
+    | (?P<other>.)
+    """,
+    re.S | re.X,
+)
+
+_Token = Tuple[str, str]
+
+DATE_TRUNC = {
+    "year": "date({x}, 'start of year')",
+    "quarter": (
+        "date({x}, 'start of month', '-' || "
+        "((CAST(strftime('%m', {x}) AS INTEGER) - 1) % 3) "
+        "|| ' months')"
+    ),
+    "month": "date({x}, 'start of month')",
+    "week": "date({x}, '-6 days', 'weekday 1')",
+    "day": "date({x})",
+    "hour": "strftime('%Y-%m-%d %H:00:00', {x})",
+    "minute": "strftime('%Y-%m-%d %H:%M:00', {x})",
+    "second": "datetime({x})",
+}
+EXTRACT = {
+    "year": "CAST(strftime('%Y', {x}) AS INTEGER)",
+    "quarter": "((CAST(strftime('%m', {x}) AS INTEGER) + 2) / 3)",
+    "month": "CAST(strftime('%m', {x}) AS INTEGER)",
+    "week": "CAST(strftime('%W', {x}) AS INTEGER)",
+    "day": "CAST(strftime('%d', {x}) AS INTEGER)",
+    "doy": "CAST(strftime('%j', {x}) AS INTEGER)",
+    "dow": "CAST(strftime('%w', {x}) AS INTEGER)",
+    "isodow": "((CAST(strftime('%w', {x}) AS INTEGER) + 6) % 7 + 1)",
+    "hour": "CAST(strftime('%H', {x}) AS INTEGER)",
+    "minute": "CAST(strftime('%M', {x}) AS INTEGER)",
+    "second": "CAST(strftime('%S', {x}) AS INTEGER)",
+    "epoch": "CAST(strftime('%s', {x}) AS INTEGER)",
+}
+TO_CHAR = {
+    "YYYY": "%Y", "HH24": "%H", "HH": "%H", "MI": "%M",
+    "SS": "%S", "MM": "%m", "DD": "%d", "DDD": "%j",
+    "IW": "%W",
+}
+INTERVAL_UNITS = {
+    "year": "years", "years": "years", "y": "years",
+    "month": "months", "months": "months", "mon": "months",
+    "mons": "months",
+    "week": "weeks", "weeks": "weeks", "w": "weeks",
+    "day": "days", "days": "days", "d": "days",
+    "hour": "hours", "hours": "hours", "h": "hours",
+    "minute": "minutes", "minutes": "minutes", "min": "minutes",
+    "mins": "minutes", "m": "minutes",
+    "second": "seconds", "seconds": "seconds", "sec": "seconds",
+    "secs": "seconds", "s": "seconds",
+}
+
+
+class _Group:
+    """
+    Parenthesized tokens.
+    """
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: List[Union[_Token, "_Group"]]):
+        self.items = items
+
+
+_Item = Union[_Token, _Group]
+
+
+def _parse(sql: str) -> Optional[List[_Item]]:
+    """
+    Tokens nested by parentheses (None when they do not
+    balance).
+    """
+    stack: List[List[_Item]] = [[]]
+    for match in _TOKEN_RE.finditer(sql):
+        kind = match.lastgroup
+        if kind == "open":
+            stack.append([])
+        elif kind == "close":
+            if len(stack) == 1:
+                return None
+            group = _Group(stack.pop())
+            stack[-1].append(group)
+        else:
+            stack[-1].append((kind, match.group()))
+    return stack[0] if len(stack) == 1 else None
+
+
+def _render(items: List[_Item]) -> str:
+    return "".join(
+        f"({_render(item.items)})" if isinstance(item, _Group)
+        else item[1]
+        for item in items
+    )
+
+
+def _next(items: List[_Item], i: int) -> Optional[int]:
+    """
+    Index of the first non-whitespace item after i.
+    """
+    for j in range(i + 1, len(items)):
+        if isinstance(items[j], _Group) or items[j][0] != "ws":
+            return j
+    return None
+
+
+def _prev(items: List[_Item], end: int) -> Optional[int]:
+    """
+    Index of the last non-whitespace item before end.
+    """
+    for j in range(end - 1, -1, -1):
+        if isinstance(items[j], _Group) or items[j][0] != "ws":
+            return j
+    return None
+
+
+def _is_word(item: Optional[_Item], *words: str) -> bool:
+    return (
+        item is not None
+        and not isinstance(item, _Group)
+        and item[0] == "word"
+        and (not words or item[1].upper() in words)
+    )
+
+
+def _operand_start(out: List[_Item]) -> int:
+    """
+    Start of the operand ending out: a literal, a
+    (qualified) name, a group or a function call.
+    """
+    k = _prev(out, len(out))
+    if k is None:
+        return len(out)
+    if isinstance(out[k], _Group):
+        j = _prev(out, k)
+        if j is not None and _is_word(out[j]) and (
+            out[j][1].upper() not in NOT_FUNCTIONS
+        ):
+            return j
+        return k
+    while k >= 2 and out[k - 1] == ("op", ".") and (
+        not isinstance(out[k - 2], _Group)
+        and out[k - 2][0] in ("word", "ident")
+    ):
+        k -= 2
+    return k
+
+
+def _split(items: List[_Item], *words: str) -> List[str]:
+    """
+    Rendered arguments: items split at top-level commas
+    (or at the given keywords).
+    """
+    parts: List[List[_Item]] = [[]]
+    for item in items:
+        if (
+            (not words and item == ("op", ","))
+            or (words and _is_word(item, *words))
+        ):
+            parts.append([])
+        else:
+            parts[-1].append(item)
+    return [_render(part).strip() for part in parts]
+
+
+def _literal(text: str) -> Optional[str]:
+    """
+    Content of a '...' literal (None for anything else).
+    """
+    if len(text) >= 2 and text[0] == text[-1] == "'":
+        return text[1:-1].replace("''", "'")
+    return None
+
+
+def _cast(expr: str, type_name: str) -> str:
+    """
+    SQLite expression for expr cast to a PostgreSQL type.
+    """
+    base = type_name.split("(")[0].strip().lower()
+    if base == "date":
+        return f"date({expr})"
+    if base.startswith("timestamp"):
+        return f"datetime({expr})"
+    if base in ("text", "varchar", "char", "character",
+                "character varying", "bpchar", "name"):
+        return f"CAST({expr} AS TEXT)"
+    if base in ("int", "integer", "bigint", "smallint",
+                "int2", "int4", "int8"):
+        return f"CAST({expr} AS INTEGER)"
+    if base in ("numeric", "decimal", "real", "float",
+                "float4", "float8", "double precision"):
+        return f"CAST({expr} AS REAL)"
+    if base in ("json", "jsonb", "boolean", "bool", "interval"):
+        return expr
+    return f"CAST({expr} AS {type_name})"
+
+
+def _is_date(expr: str) -> bool:
+    upper = expr.upper()
+    return upper == "CURRENT_DATE" or upper.startswith("DATE(")
+
+
+def _interval(
+    expr: str,
+    sign: str,
+    literal: str,
+    unit: Optional[str] = None,
+) -> Optional[str]:
+    """
+    expr +/- INTERVAL literal as a date() / datetime()
+    call (None when the interval does not parse).
+    """
+    if unit is not None:
+        literal = f"{literal} {unit}"
+    parts = re.findall(r"([-+]?\d+(?:\.\d+)?)\s*([a-z]+)", literal.lower())
+    if not parts or re.sub(
+        r"[-+]?\d+(?:\.\d+)?\s*[a-z]+|\s", "", literal.lower()
+    ):
+        return None
+    modifiers = []
+    for amount, name in parts:
+        unit_name = INTERVAL_UNITS.get(name)
+        if unit_name is None:
+            return None
+        value = float(amount) * (-1 if sign == "-" else 1)
+        if unit_name == "weeks":
+            value, unit_name = value * 7, "days"
+        number = int(value) if value == int(value) else value
+        modifiers.append(f"'{number:+} {unit_name}'")
+    whole_days = all(
+        INTERVAL_UNITS[name] in ("years", "months", "weeks", "days")
+        for _, name in parts
+    )
+    fn = "date" if whole_days and _is_date(expr) else "datetime"
+    return f"{fn}({expr}, {', '.join(modifiers)})"
+
+
+def _date_trunc(args: List[str]) -> Optional[str]:
+    unit = _literal(args[0]) if len(args) == 2 else None
+    template = DATE_TRUNC.get((unit or "").lower())
+    return template.format(x=args[1]) if template else None
+
+
+def _extract(field: str, expr: str) -> Optional[str]:
+    template = EXTRACT.get(field.strip().strip("'").lower())
+    return template.format(x=expr) if template else None
+
+
+def _string_agg(args: List[str]) -> Optional[str]:
+    if len(args) != 2:
+        return None
+    expr = args[0]
+    # ORDER BY inside aggregates needs SQLite 3.44
+    separator = re.split(r"\s+ORDER\s+BY\s+", args[1], flags=re.I)[0]
+    if re.match(r"DISTINCT\b", expr, re.I):
+        # GROUP_CONCAT(DISTINCT x) takes no separator
+        return f"GROUP_CONCAT({expr})"
+    return f"GROUP_CONCAT({expr}, {separator})"
+
+
+def _to_char(args: List[str]) -> Optional[str]:
+    fmt = _literal(args[1]) if len(args) == 2 else None
+    if fmt is None:
+        return None
+    pattern = "|".join(sorted(TO_CHAR, key=len, reverse=True))
+    converted = re.sub(pattern, lambda m: TO_CHAR[m.group()], fmt)
+    return f"strftime('{converted}', {args[0]})"
+
+
+def _concat(args: List[str]) -> str:
+    # CONCAT skips NULLs; || would make the result NULL
+    return "(" + " || ".join(f"COALESCE({a}, '')" for a in args) + ")"
+
+
+def _extreme(function: str) -> Callable[[List[str]], str]:
+    # GREATEST / LEAST skip NULLs; scalar MAX / MIN return
+    # NULL if any argument is NULL. Each argument falls back
+    # to the others, so only all-NULL arguments give NULL.
+    def translate(args: List[str]) -> str:
+        if len(args) == 1:
+            return args[0]
+        return f"{function}(" + ", ".join(
+            f"COALESCE({', '.join(args[i:] + args[:i])})"
+            for i in range(len(args))
+        ) + ")"
+    return translate
+
+
+# Function name -> translation of its rendered arguments
+# (None leaves the call unchanged). EXTRACT, POSITION
+# and CAST split their arguments at keywords.
+FUNCTIONS: Dict[str, Callable[[List[str]], Optional[str]]] = {
+    "NOW": lambda a: "datetime('now')" if a == [""] else None,
+    "DATE_TRUNC": _date_trunc,
+    "DATE_PART": lambda a: (
+        _extract(a[0], a[1]) if len(a) == 2 else None
+    ),
+    "STRING_AGG": _string_agg,
+    "ARRAY_AGG": lambda a: f"json_group_array({a[0]})",
+    "TO_CHAR": _to_char,
+    "LEFT": lambda a: (
+        f"SUBSTR({a[0]}, 1, {a[1]})" if len(a) == 2 else None
+    ),
+    "RIGHT": lambda a: (
+        f"SUBSTR({a[0]}, -({a[1]}))" if len(a) == 2 else None
+    ),
+    "GREATEST": _extreme("MAX"),
+    "LEAST": _extreme("MIN"),
+    "CONCAT": _concat,
+    "BOOL_AND": lambda a: f"MIN({a[0]})",
+    "BOOL_OR": lambda a: f"MAX({a[0]})",
+}
+
+
+def _call(name: str, items: List[_Item]) -> Optional[str]:
+    """
+    Translation of the call name(items), or None.
+    """
+    if name == "EXTRACT":
+        args = _split(items, "FROM")
+        return _extract(*args) if len(args) == 2 else None
+    if name == "POSITION":
+        args = _split(items, "IN")
+        return f"INSTR({args[1]}, {args[0]})" if len(args) == 2 else None
+    if name == "CAST":
+        args = _split(items, "AS")
+        if len(args) < 2:
+            return None
+        expr = " AS ".join(args[:-1])
+        return _cast(expr, args[-1])
+    return FUNCTIONS[name](_split(items))
+
+
+def _type_name(items: List[_Item], i: int) -> Tuple[str, int]:
+    """
+    Type name starting at items[i] (e.g. double
+    precision, numeric(10,2)), and the index after it.
+    """
+    words = [items[i][1]]
+    i += 1
+    while True:
+        j = _next(items, i - 1)
+        if j is None or not _is_word(items[j]):
+            break
+        word = items[j][1].upper()
+        if word not in ("PRECISION", "VARYING", "WITH", "WITHOUT",
+                        "TIME", "ZONE"):
+            break
+        words.append(items[j][1])
+        i = j + 1
+    name = " ".join(words)
+    if i < len(items) and isinstance(items[i], _Group):
+        name += f"({_render(items[i].items)})"
+        i += 1
+    return name, i
+
+
+def _rewrite(items: List[_Item], ddl: bool) -> List[_Item]:
+    out: List[_Item] = []
+    i = 0
+    while i < len(items):
+        item = items[i]
+        if isinstance(item, _Group):
+            out.append(_Group(_rewrite(item.items, ddl)))
+            i += 1
+            continue
+        kind, text = item
+        upper = text.upper()
+        j = _next(items, i)
+        following = items[j] if j is not None else None
+        if kind in ("word", "ident") and following == ("op", ".") and (
+            text.strip('"').lower() in SCHEMAS
+        ):
+            i = j + 1
+            continue
+        if kind == "word" and isinstance(following, _Group) and (
+            upper in FUNCTIONS
+            or upper in ("EXTRACT", "POSITION", "CAST")
+        ):
+            args = _rewrite(following.items, ddl)
+            translated = _call(upper, args)
+            if translated is not None:
+                out.append(("atom", translated))
+            else:
+                out.extend(items[i:j])
+                out.append(_Group(args))
+            i = j + 1
+            continue
+        if kind == "op" and text == "::" and _is_word(following):
+            type_name, i = _type_name(items, j)
+            start = _operand_start(out)
+            expr = _render(out[start:]).strip()
+            del out[start:]
+            out.append(("atom", _cast(expr, type_name)))
+            continue
+        if _is_word(item, "INTERVAL") and following is not None and (
+            not isinstance(following, _Group)
+            and following[0] == "string"
+        ):
+            end = _interval_arithmetic(out, items, j)
+            if end is not None:
+                i = end
+                continue
+        if _is_word(item, "IS"):
+            k = j
+            negated = _is_word(following, "NOT")
+            if negated:
+                k = _next(items, j)
+            if k is not None and _is_word(items[k], "DISTINCT"):
+                f = _next(items, k)
+                if f is not None and _is_word(items[f], "FROM"):
+                    out.append(("word", "IS" if negated else "IS NOT"))
+                    i = f + 1
+                    continue
+        if _is_word(item, "ILIKE"):
+            item = ("word", "LIKE")
+        elif ddl and kind == "word" and upper in DDL_TYPES:
+            item = ("word", DDL_TYPES[upper])
+        out.append(item)
+        i += 1
+    return out
+
+
+def _interval_arithmetic(
+    out: List[_Item],
+    items: List[_Item],
+    j: int,
+) -> Optional[int]:
+    """
+    Replace `operand +/- INTERVAL 'n unit'` ending out
+    (the literal at items[j]); returns the index to
+    continue at, or None when there is nothing to
+    replace.
+    """
+    end = j + 1
+    unit = None
+    k = _next(items, j)
+    if k is not None and _is_word(items[k]) and (
+        items[k][1].lower() in INTERVAL_UNITS
+    ):
+        unit, end = items[k][1], k + 1
+    op = _prev(out, len(out))
+    if op is None or out[op] not in (("op", "+"), ("op", "-")):
+        return None
+    start = _operand_start(out[:op])
+    expr = _render(out[start:op]).strip()
+    if not expr:
+        return None
+    translated = _interval(expr, out[op][1], _literal(items[j][1]), unit)
+    if translated is None:
+        return None
+    del out[start:]
+    out.append(("atom", translated))
+    return end
+
+
+@functools.lru_cache(maxsize=TRANSLATION_CACHE_SIZE)
+def translate_sql(sql: str, ddl: bool = False) -> str:
+    """
+    Translate PostgreSQL SQL to SQLite.
+
+    Rewrites the constructs listed in the module
+    docstring; string literals, comments and everything
+    else are left as written. SQL whose parentheses do
+    not balance is returned unchanged.
+
+    Args:
+        sql: PostgreSQL statement(s)
+        ddl: Also map PostgreSQL-only column types
+            (SERIAL, JSONB)
+
+    Returns:
+        SQLite SQL
+    """
+    items = _parse(sql)
+    if items is None:
+        return sql
+    return _render(_rewrite(items, ddl))
+
+
+def translate_ddl(script: str) -> List[str]:
+    """
+    Translate a PostgreSQL DDL / data script to SQLite
+    statements.
+
+    Statements with no SQLite equivalent (SET, COMMENT
+    ON, CREATE SCHEMA, ...) are dropped, as are ALTER
+    TABLE ... ADD constraints (SQLite cannot add them
+    to an existing table) and the CASCADE of DROP
+    statements.
+
+    Args:
+        script: Statements separated by semicolons
+
+    Returns:
+        Translated statements, without semicolons
+    """
+    items = _parse(script)
+    if items is None:
+        raise ValueError("Unbalanced parentheses in DDL script")
+    statements: List[List[_Item]] = [[]]
+    for item in items:
+        if item == ("op", ";"):
+            statements.append([])
+        else:
+            statements[-1].append(item)
+    translated = []
+    for statement in statements:
+        words = [
+            item[1].upper() for item in statement
+            if not isinstance(item, _Group) and item[0] == "word"
+        ]
+        if not words:
+            continue
+        head = " ".join(words[:2])
+        if words[0] in SKIPPED_STATEMENTS or head in SKIPPED_STATEMENTS:
+            continue
+        if head == "ALTER TABLE" and "ADD" in words and (
+            "CONSTRAINT" in words or "FOREIGN" in words
+        ):
+            continue
+        if words[0] == "DROP":
+            statement = [
+                item for item in statement
+                if not _is_word(item, "CASCADE", "RESTRICT")
+            ]
+        translated.append(_render(_rewrite(statement, True)).strip())
+    return translated
+
+
+def _sqlstate(message: str) -> str:
+    """
+    PostgreSQL SQLSTATE matching a SQLite error message.
+    """
+    for prefix, sqlstate in SQLSTATES.items():
+        if message.startswith(prefix):
+            return sqlstate
+    return "42000"
+
+
+class _Interrupter:
+    """
+    What a _QueryHandle cancels: interrupts the statement
+    running on the connection.
+    """
+
+    closed = False
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def cancel(self) -> None:
+        self._conn.interrupt()
+
+
+class SQLiteBackend:
+    """
+    Execution backend running queries on an embedded
+    SQLite database loaded with the project schema.
+
+    Args:
+        path: Database file, or ":memory:" (an existing
+            file with tables is used as is)
+        scale: Load a synthetic dataset of this scale
+            instead of sample_data.sql (1.0 is 100k
+            order_items)
+    """
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DATABASE,
+        scale: Optional[float] = None,
+    ):
+        self.path = path
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None,
+        )
+        # One statement at a time; re-entrant so a thread
+        # consuming a stream can still run queries.
+        self._lock = threading.RLock()
+        self._deadlines: List[float] = []
+        self._row_counts: Dict[str, int] = {}
+        self._conn.set_progress_handler(self._timed_out, PROGRESS_STEPS)
+        if not self.tables():
+            start = time.perf_counter()
+            self.load_schema()
+            if scale is None:
+                self.load_script(
+                    (SCHEMA_DIR / "sample_data.sql").read_text(
+                        encoding="utf-8"
+                    )
+                )
+            else:
+                self.load_dataset(SyntheticDataset(scale))
+            logger.info(
+                f"SQLite backend loaded ({path}, "
+                f"{(time.perf_counter() - start) * 1000:.0f}ms)"
+            )
+
+    @classmethod
+    def from_env(cls) -> "SQLiteBackend":
+        """
+        Build from `SQLITE_DATABASE` and `SQLITE_SCALE`.
+        """
+        scale = os.getenv("SQLITE_SCALE")
+        return cls(
+            os.getenv("SQLITE_DATABASE", DEFAULT_DATABASE),
+            float(scale) if scale else None,
+        )
+
+    def tables(self) -> List[str]:
+        """
+        Names of the tables in the database.
+        """
+        with self._lock:
+            return [
+                row[0] for row in self._conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' "
+                    "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+                )
+            ]
+
+    def load_schema(self) -> None:
+        """
+        (Re)create the tables, indexes and views of
+        schema_setup.sql.
+        """
+        self.load_script(load_schema_ddl().full)
+
+    def load_script(self, script: str) -> None:
+        """
+        Run a PostgreSQL script (see translate_ddl) in
+        one transaction.
+        """
+        statements = translate_ddl(script)
+        with self._lock:
+            self._conn.executescript(
+                "BEGIN;\n" + ";\n".join(statements) + ";\nCOMMIT;"
+            )
+            self._row_counts.clear()
+
+    def load_dataset(self, dataset: SyntheticDataset) -> Dict[str, int]:
+        """
+        Replace the data of the dataset's tables with its
+        rows, in one transaction.
+
+        Returns:
+            Rows loaded per table
+        """
+        loaded = {}
+        start = time.perf_counter()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for table in reversed(dataset.order):
+                    self._conn.execute(f"DELETE FROM {table}")
+                for table in dataset.order:
+                    columns = dataset.columns(table)
+                    spec = dataset.tables[table].columns
+                    booleans = [
+                        i for i, name in enumerate(columns)
+                        if spec[name].type == "BOOLEAN"
+                    ]
+                    rows = dataset.rows(table)
+                    if booleans:
+                        rows = (
+                            _booleans(row, booleans) for row in rows
+                        )
+                    self._conn.executemany(
+                        f"INSERT INTO {table} ({', '.join(columns)}) "
+                        f"VALUES ({', '.join('?' * len(columns))})",
+                        rows,
+                    )
+                    loaded[table] = dataset.counts[table]
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._row_counts.clear()
+        cache = get_result_cache()
+        if cache is not None:
+            cache.invalidate_tables(loaded)
+        logger.info(
+            f"SQLite backend: {sum(loaded.values()):,} rows loaded "
+            f"into {len(loaded)} tables in "
+            f"{time.perf_counter() - start:.1f}s"
+        )
+        return loaded
+
+    def _timed_out(self) -> bool:
+        """
+        Progress handler: stop the running statement once
+        its deadline passed.
+        """
+        return bool(self._deadlines) and (
+            time.monotonic() > min(self._deadlines)
+        )
+
+    @contextmanager
+    def _statement(
+        self,
+        sql: str,
+        timeout_ms: Optional[float],
+        handle: Optional[_QueryHandle] = None,
+    ) -> Iterator[sqlite3.Cursor]:
+        """
+        Run one translated statement under the lock, its
+        timeout and the cancellation handle; yields the
+        cursor.
+        """
+        translated = translate_sql(sql)
+        with self._lock:
+            deadline = None
+            if timeout_ms is not None:
+                deadline = time.monotonic() + max(timeout_ms, 1) / 1000
+                self._deadlines.append(deadline)
+            if handle is not None:
+                handle.attach(_Interrupter(self._conn))
+            try:
+                yield self._conn.execute(translated)
+            except sqlite3.OperationalError as e:
+                if str(e) == "interrupted" and deadline is not None and (
+                    time.monotonic() > deadline
+                ):
+                    raise TimeoutError(
+                        "canceling statement due to statement timeout"
+                    ) from e
+                raise
+            finally:
+                if handle is not None:
+                    handle.detach()
+                if deadline is not None:
+                    self._deadlines.remove(deadline)
+
+    def _wrote(self, sql: str) -> None:
+        """
+        After a statement without rows: drop row counts and
+        cached results of the tables it wrote.
+        """
+        self._row_counts.clear()
+        cache = get_result_cache()
+        if cache is not None:
+            cache.invalidate_sql(sql)
+
+    def execute(
+        self,
+        sql: str,
+        timeout_ms: Optional[float] = None,
+        handle: Optional[_QueryHandle] = None,
+    ) -> list[dict]:
+        with self._statement(sql, timeout_ms, handle) as cur:
+            if cur.description is None:
+                self._wrote(sql)
+                return []
+            names = [d[0] for d in cur.description]
+            return [dict(zip(names, row)) for row in cur.fetchall()]
+
+    def execute_columnar(
+        self,
+        sql: str,
+        timeout_ms: Optional[float] = None,
+    ) -> ColumnarResult:
+        with self._statement(sql, timeout_ms) as cur:
+            if cur.description is None:
+                self._wrote(sql)
+                return ColumnarResult([], [])
+            return ColumnarResult.from_cursor(cur, DEFAULT_STREAM_ITERSIZE)
+
+    def stream_batches(
+        self,
+        sql: str,
+        batch_size: int,
+        max_rows: Optional[int] = None,
+        timeout_ms: Optional[float] = None,
+    ) -> Iterator[List[dict]]:
+        remaining = max_rows
+        with self._statement(sql, timeout_ms) as cur:
+            names = [d[0] for d in cur.description or ()]
+            while remaining is None or remaining > 0:
+                size = (
+                    batch_size if remaining is None
+                    else min(batch_size, remaining)
+                )
+                batch = cur.fetchmany(size)
+                if not batch:
+                    break
+                if remaining is not None:
+                    remaining -= len(batch)
+                yield [dict(zip(names, row)) for row in batch]
+                if len(batch) < size:
+                    break
+
+    def explain(
+        self,
+        sql: str,
+        timeout_ms: float,
+    ) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            with self._statement(
+                f"EXPLAIN QUERY PLAN {sql}", timeout_ms
+            ) as cur:
+                plan = [row[3] for row in cur.fetchall()]
+            total_cost = self._plan_cost(plan, translate_sql(sql))
+        except (sqlite3.OperationalError, sqlite3.ProgrammingError,
+                sqlite3.Warning) as e:
+            message = str(e)
+            if message == "interrupted":
+                raise
+            raise PlannerError(message, sqlstate=_sqlstate(message)) from e
+        return {
+            "total_cost": total_cost,
+            "startup_cost": 0.0,
+            "plan_rows": None,
+            "node_type": plan[0].split()[0] if plan else "SCAN",
+            "explain_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    def _plan_cost(self, plan: List[str], sql: str) -> float:
+        """
+        Rows of the fully scanned tables plus log2(rows)
+        per index search (aliases resolved through the
+        FROM / JOIN items of sql).
+        """
+        names = {}
+        for table, alias in re.findall(
+            r"\b(?:FROM|JOIN)\s+([A-Za-z_]\w*)(?:\s+(?:AS\s+)?"
+            r"([A-Za-z_]\w*))?",
+            sql, re.I,
+        ):
+            names[table] = table
+            if alias:
+                names.setdefault(alias, table)
+        cost = 0.0
+        for detail in plan:
+            match = re.match(r"(SCAN|SEARCH) (\w+)", detail)
+            if match is None:
+                continue
+            rows = self._table_rows(names.get(match.group(2), ""))
+            if match.group(1) == "SCAN":
+                cost += max(rows, 1)
+            else:
+                cost += math.log2(rows + 1) + 1
+        return round(cost, 2)
+
+    def _table_rows(self, table: str) -> int:
+        """
+        Row count of a table (0 when unknown), cached until
+        the next write.
+        """
+        if table not in self._row_counts:
+            with self._lock:
+                known = self._conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                    "AND name = ?", (table,)
+                ).fetchone()
+                self._row_counts[table] = self._conn.execute(
+                    f'SELECT COUNT(*) FROM "{table}"'
+                ).fetchone()[0] if known else 0
+        return self._row_counts[table]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _booleans(row: Tuple[Optional[str], ...], indexes: List[int]) -> tuple:
+    """
+    A synthetic row with its 't' / 'f' booleans as 1 / 0.
+    """
+    values = list(row)
+    for i in indexes:
+        if values[i] is not None:
+            values[i] = 1 if values[i] == "t" else 0
+    return tuple(values)
@@ -0,0 +1,1121 @@
+"""
+Synthetic data for the mfg_ecommerce schema.
+
+Generates rows for every table of schema_setup.sql at a
+configurable scale (scale 1.0 is 100k order_items; fact
+tables grow linearly with the scale, dimension tables
+with its square root), for bulk loading with COPY (see
+text_to_sql.bulk_load). The generator is driven by the
+DDL rather than hand-written per table:
+
+- columns, types, NOT NULL, DEFAULT, single-column
+  CHECKs (IN lists, lower bounds, BETWEEN) and
+  column-to-column CHECKs (a <= b, a != b, ...) are
+  parsed from the CREATE TABLE blocks; GENERATED and
+  SERIAL columns are left to the database
+- foreign keys (inline, table-level and ALTER TABLE)
+  give the load order; every foreign key value is the
+  primary key of an existing parent row, and a column
+  whose parent is reachable through another foreign
+  key of the row is derived from it (an order item's
+  product is the product of its variant), so rows are
+  consistent across tables, not just valid
+- composite UNIQUE constraints are met by enumerating
+  their value tuples (table size is capped at the
+  number of tuples)
+
+Foreign keys are pure functions of the row number, so
+any table can be generated on its own, in any order,
+without keeping parent rows in memory.
+"""
+
+import collections
+import csv
+import dataclasses
+import datetime
+import json
+import math
+import random
+import re
+import zlib
+
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from text_to_sql.app_logger import get_logger
+from text_to_sql.db import load_schema_ddl
+
+
+logger = get_logger(__name__)
+
+# Rows per table at scale 1.0 and how they grow with the
+# scale (1.0 linear for fact tables, 0.5 square root for
+# dimension tables).
+BASE_ROWS: Dict[str, Tuple[int, float]] = {
+    "products": (50, 0.5),
+    "product_variants": (150, 0.5),
+    "suppliers": (20, 0.5),
+    "raw_materials": (100, 0.5),
+    "bill_of_materials": (500, 0.5),
+    "production_lines": (10, 0.5),
+    "production_runs": (2_000, 1.0),
+    "quality_inspections": (2_000, 1.0),
+    "finished_goods_inventory": (1_500, 0.5),
+    "raw_material_inventory": (500, 0.5),
+    "inventory_transactions": (20_000, 1.0),
+    "safety_stock_levels": (1_500, 0.5),
+    "inventory_valuation": (2_000, 1.0),
+    "stock_reconciliation": (2_000, 1.0),
+    "obsolete_inventory": (300, 1.0),
+    "warehouses": (10, 0.5),
+    "delivery_partners": (8, 0.5),
+    "shipping_routes": (60, 0.5),
+    "shipments": (25_000, 1.0),
+    "customs_documentation": (5_000, 1.0),
+    "customers": (10_000, 1.0),
+    "orders": (30_000, 1.0),
+    "order_items": (100_000, 1.0),
+    "returns": (2_000, 1.0),
+    "website_sessions": (50_000, 1.0),
+    "campaigns": (50, 0.5),
+    "conversion_funnels": (250, 0.5),
+    "customer_lifetime_value": (10_000, 1.0),
+    "demand_forecasts": (10_000, 1.0),
+    "transactions": (40_000, 1.0),
+    "invoices": (30_000, 1.0),
+    "cost_allocations": (500, 0.5),
+    "profitability_analysis": (3_600, 0.5),
+    "employees": (500, 0.5),
+    "departments": (20, 0.5),
+}
+# Tables missing from BASE_ROWS.
+DEFAULT_BASE_ROWS = (100, 0.5)
+MIN_ROWS = 2
+
+DATE_START = datetime.date(2023, 1, 1)
+DATE_SPAN_DAYS = 3 * 365 + 1
+DEFAULT_INT_HIGH = 1_000
+DEFAULT_NUMERIC_HIGH = 10_000.0
+# Upper bounds by "table.column" or column name, where
+# the defaults above are unrealistic.
+VALUE_HIGH: Dict[str, float] = {
+    "order_items.quantity": 10,
+    "returns.quantity": 5,
+    "order_items.tax": 200.0,
+    "weight_kg": 50.0,
+    "fx_rate": 2.0,
+    "level": 5,
+    "estimated_days": 30,
+    "lead_time_days": 120,
+    "avg_lead_time_days": 120,
+}
+# Direct reports per manager / child departments.
+HIERARCHY_FANOUT = 8
+
+FUNNEL_STAGES = [
+    "Ad Impression", "Landing Page Visit", "Product View",
+    "Add to Cart", "Checkout", "Purchase",
+]
+# Value pools by column name (any table), or by
+# "table.column".
+VOCABULARY: Dict[str, List[str]] = {
+    "first_name": [
+        "Emily", "Raj", "Yuki", "Sarah", "David", "Maria",
+        "Chen", "Aisha", "Lukas", "Sofia", "Omar", "Hana",
+    ],
+    "last_name": [
+        "Thompson", "Patel", "Nakamura", "Johnson", "Kim",
+        "Garcia", "Wei", "Khan", "Muller", "Rossi", "Haddad",
+    ],
+    "country": [
+        "USA", "Singapore", "Germany", "Japan", "India",
+        "United Kingdom", "Netherlands", "Australia", "Brazil",
+    ],
+    "region": ["NA", "EU", "SEA", "APAC", "LATAM", "ME"],
+    "currency": ["USD", "EUR", "GBP", "SGD", "JPY"],
+    "color": ["Black", "Silver", "Space Gray", "White", "Blue"],
+    "size": ["S", "M", "L", "XL", "10\"", "13\"", "16\""],
+    "category": ["Electronics", "Audio", "Wearables", "Accessories"],
+    "primary_product_category": [
+        "Electronics", "Audio", "Wearables", "Accessories",
+    ],
+    "unit_of_measure": ["kg", "g", "pcs", "m", "l"],
+    "location": [
+        "Singapore", "Los Angeles, CA", "Rotterdam", "Osaka",
+        "Shenzhen", "Pune",
+    ],
+    "payment_terms": ["NET30", "NET45", "NET60", "Prepaid"],
+    "payment_method": ["credit_card", "paypal", "bank_transfer"],
+    "payment_gateway": ["Stripe", "Adyen", "PayPal"],
+    "acquisition_channel": [
+        "search", "social", "email", "affiliate", "display",
+    ],
+    "device_type": ["desktop", "mobile", "tablet"],
+    "browser": ["Chrome", "Safari", "Firefox", "Edge"],
+    "calculation_method": ["statistical", "min_max", "demand_based"],
+    "segment": ["high_value", "medium_value", "low_value", "at_risk"],
+    "department": [
+        "Executive", "Manufacturing", "Logistics", "Sales",
+        "Marketing", "Finance", "Engineering",
+    ],
+    "job_title": [
+        "Manager", "Analyst", "Engineer", "Specialist",
+        "Coordinator", "Director",
+    ],
+    "production_lines.status": ["active", "maintenance", "idle"],
+    "reason": [
+        "Defective", "Wrong size", "Not as described",
+        "Changed mind", "Damaged in transit",
+    ],
+    "discrepancy_reason": [
+        "Miscount", "Damage", "Theft", "System error",
+    ],
+    "profitability_analysis.period": [
+        f"{DATE_START.year + m // 12}-{m % 12 + 1:02d}"
+        for m in range(36)
+    ],
+    "conversion_funnels.stage_name": FUNNEL_STAGES,
+}
+
+_COLUMN = re.compile(
+    r"^(\w+)\s+(VARCHAR|DECIMAL|NUMERIC|INTEGER|BIGINT|SMALLINT|"
+    r"SERIAL|BIGSERIAL|BOOLEAN|DATE|TIMESTAMP|JSONB|JSON|TEXT)"
+    r"(?:\s*\((\d+)(?:\s*,\s*(\d+))?\))?",
+    re.IGNORECASE,
+)
+_FOREIGN_KEY = re.compile(
+    r"FOREIGN\s+KEY\s*\((\w+)\)\s*REFERENCES\s+(\w+)\s*\((\w+)\)",
+    re.IGNORECASE,
+)
+_ALTER_FOREIGN_KEY = re.compile(
+    r"ALTER\s+TABLE\s+(\w+)\s+ADD\s+" + _FOREIGN_KEY.pattern,
+    re.IGNORECASE,
+)
+_INLINE_REFERENCES = re.compile(
+    r"\bREFERENCES\s+(\w+)\s*\((\w+)\)", re.IGNORECASE
+)
+_NUMBER = r"(-?\d+(?:\.\d+)?)"
+_CHECK_IN = re.compile(r"^(\w+) IN \((.*)\)$", re.IGNORECASE)
+_CHECK_BETWEEN = re.compile(
+    rf"^(\w+) BETWEEN {_NUMBER} AND {_NUMBER}$", re.IGNORECASE
+)
+_CHECK_BOUND = re.compile(rf"^(\w+) (>=|>) {_NUMBER}$")
+_CHECK_COMPARE = re.compile(
+    r"^(?:(\w+) IS NULL OR )?(\w+) (<=|<|>=|>|!=|<>) (\w+)$",
+    re.IGNORECASE,
+)
+_MASK = (1 << 64) - 1
+
+
+@dataclasses.dataclass
+class ColumnSpec:
+    """
+    One column of a CREATE TABLE block.
+
+    Attributes:
+        name: Column name
+        type: SQL type, upper case (VARCHAR, DECIMAL, ...)
+        length: VARCHAR length / DECIMAL precision
+        scale: DECIMAL scale
+        not_null: NOT NULL (or PRIMARY KEY)
+        primary_key: Single-column PRIMARY KEY
+        unique: Single-column UNIQUE
+        generated: GENERATED ALWAYS or SERIAL (not
+            loaded, the database fills it)
+        default: DEFAULT expression, as written
+        choices: Allowed values of an IN-list CHECK
+        low: Lower bound from a CHECK
+        low_strict: The lower bound is exclusive
+        high: Upper bound from a BETWEEN CHECK
+    """
+
+    name: str
+    type: str
+    length: Optional[int] = None
+    scale: Optional[int] = None
+    not_null: bool = False
+    primary_key: bool = False
+    unique: bool = False
+    generated: bool = False
+    default: Optional[str] = None
+    choices: Optional[List[str]] = None
+    low: Optional[float] = None
+    low_strict: bool = False
+    high: Optional[float] = None
+
+
+@dataclasses.dataclass
+class TableSpec:
+    """
+    Columns and constraints of one table.
+
+    Attributes:
+        name: Table name
+        columns: Columns in declaration order
+        foreign_keys: Column -> (parent table, parent
+            column)
+        uniques: Composite UNIQUE constraints
+        comparisons: Column-to-column CHECKs as (left,
+            operator, right)
+        unparsed_checks: CHECK expressions the generator
+            does not understand (need an override)
+    """
+
+    name: str
+    columns: Dict[str, ColumnSpec] = dataclasses.field(
+        default_factory=dict
+    )
+    foreign_keys: Dict[str, Tuple[str, str]] = dataclasses.field(
+        default_factory=dict
+    )
+    uniques: List[Tuple[str, ...]] = dataclasses.field(
+        default_factory=list
+    )
+    comparisons: List[Tuple[str, str, str]] = dataclasses.field(
+        default_factory=list
+    )
+    unparsed_checks: List[str] = dataclasses.field(
+        default_factory=list
+    )
+
+    @property
+    def primary_key(self) -> Optional[str]:
+        """
+        Name of the single-column primary key.
+        """
+        for column in self.columns.values():
+            if column.primary_key:
+                return column.name
+        return None
+
+    @property
+    def load_columns(self) -> List[str]:
+        """
+        Columns to load (generated and serial excluded).
+        """
+        return [c.name for c in self.columns.values() if not c.generated]
+
+
+def _split_top_level(body: str) -> List[str]:
+    """
+    Split a CREATE TABLE body on commas outside
+    parentheses and quotes.
+    """
+    items, depth, quoted, start = [], 0, False, 0
+    for pos, char in enumerate(body):
+        if char == "'":
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            items.append(body[start:pos].strip())
+            start = pos + 1
+    items.append(body[start:].strip())
+    return [item for item in items if item]
+
+
+def _check_expressions(item: str) -> List[str]:
+    """
+    Expressions of the CHECK (...) clauses in a column or
+    constraint definition, whitespace collapsed.
+    """
+    found = []
+    for match in re.finditer(r"\bCHECK\s*\(", item, re.IGNORECASE):
+        depth, pos = 1, match.end()
+        while depth:
+            depth += {"(": 1, ")": -1}.get(item[pos], 0)
+            pos += 1
+        found.append(" ".join(item[match.end():pos - 1].split()))
+    return found
+
+
+def _apply_check(table: TableSpec, expression: str) -> None:
+    """
+    Record a CHECK on the table / its columns.
+    """
+    if match := _CHECK_IN.match(expression):
+        column = table.columns[match.group(1)]
+        column.choices = re.findall(r"'([^']*)'", match.group(2))
+    elif match := _CHECK_BETWEEN.match(expression):
+        column = table.columns[match.group(1)]
+        column.low = float(match.group(2))
+        column.high = float(match.group(3))
+    elif match := _CHECK_BOUND.match(expression):
+        column = table.columns[match.group(1)]
+        column.low = float(match.group(3))
+        column.low_strict = match.group(2) == ">"
+    elif (
+        (match := _CHECK_COMPARE.match(expression))
+        and match.group(2) in table.columns
+        and match.group(4) in table.columns
+    ):
+        op = "!=" if match.group(3) == "<>" else match.group(3)
+        table.comparisons.append((match.group(2), op, match.group(4)))
+    else:
+        table.unparsed_checks.append(expression)
+
+
+def _parse_column(table: TableSpec, item: str) -> None:
+    """
+    Add a column definition to the table.
+    """
+    match = _COLUMN.match(item)
+    if not match:
+        raise ValueError(f"Unsupported column in {table.name}: {item}")
+    upper = item.upper()
+    sql_type = match.group(2).upper()
+    default = re.search(
+        r"\bDEFAULT\s+('[^']*'|[\w.\-]+)", item, re.IGNORECASE
+    )
+    column = ColumnSpec(
+        name=match.group(1),
+        type=sql_type,
+        length=int(match.group(3)) if match.group(3) else None,
+        scale=int(match.group(4)) if match.group(4) else None,
+        primary_key="PRIMARY KEY" in upper,
+        unique=bool(re.search(r"\bUNIQUE\b", upper)),
+        generated=(
+            "GENERATED ALWAYS" in upper or sql_type.endswith("SERIAL")
+        ),
+        default=default.group(1) if default else None,
+    )
+    column.not_null = column.primary_key or "NOT NULL" in upper
+    table.columns[column.name] = column
+    if references := _INLINE_REFERENCES.search(item):
+        table.foreign_keys[column.name] = (
+            references.group(1), references.group(2)
+        )
+    if not column.generated:
+        for expression in _check_expressions(item):
+            _apply_check(table, expression)
+
+
+def parse_schema(ddl: str) -> Dict[str, TableSpec]:
+    """
+    Parse the CREATE TABLE blocks and ALTER TABLE ... ADD
+    FOREIGN KEY statements of a DDL script.
+
+    Args:
+        ddl: Schema script (e.g. schema_setup.sql)
+
+    Returns:
+        Table name -> TableSpec, in declaration order
+    """
+    ddl = re.sub(r"--[^\n]*", "", ddl)
+    tables: Dict[str, TableSpec] = {}
+    for match in re.finditer(
+        r"CREATE TABLE\s+(\w+)\s*\((.*?)\);", ddl, re.DOTALL
+    ):
+        table = TableSpec(match.group(1))
+        for item in _split_top_level(match.group(2)):
+            keyword = item.split(None, 1)[0].upper()
+            if keyword == "FOREIGN":
+                fk = _FOREIGN_KEY.match(item)
+                table.foreign_keys[fk.group(1)] = (
+                    fk.group(2), fk.group(3)
+                )
+            elif keyword == "UNIQUE":
+                columns = re.search(r"\((.*)\)", item).group(1)
+                table.uniques.append(
+                    tuple(c.strip() for c in columns.split(","))
+                )
+            elif keyword == "CHECK":
+                for expression in _check_expressions(item):
+                    _apply_check(table, expression)
+            elif keyword in ("PRIMARY", "CONSTRAINT"):
+                raise ValueError(
+                    f"Unsupported constraint in {table.name}: {item}"
+                )
+            else:
+                _parse_column(table, item)
+        tables[table.name] = table
+    for match in _ALTER_FOREIGN_KEY.finditer(ddl):
+        tables[match.group(1)].foreign_keys[match.group(2)] = (
+            match.group(3), match.group(4)
+        )
+    return tables
+
+
+def load_order(tables: Dict[str, TableSpec]) -> List[str]:
+    """
+    Tables ordered parents first (self references
+    ignored), otherwise in declaration order.
+
+    Raises:
+        ValueError: Foreign keys form a cycle
+    """
+    remaining = {
+        name: {
+            parent for parent, _ in table.foreign_keys.values()
+            if parent != name
+        }
+        for name, table in tables.items()
+    }
+    order: List[str] = []
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(
+                f"Foreign key cycle between {sorted(remaining)}"
+            )
+        name = ready[0]
+        order.append(name)
+        del remaining[name]
+        for deps in remaining.values():
+            deps.discard(name)
+    return order
+
+
+def _mix(value: int, salt: int) -> int:
+    """
+    64-bit hash of a row number (splitmix64 finalizer).
+    """
+    x = (value * 0x9E3779B97F4A7C15 + salt) & _MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK
+    return x ^ (x >> 31)
+
+
+def _initials(name: str) -> str:
+    """
+    Upper-case initials of a snake_case name.
+    """
+    return "".join(word[0] for word in name.split("_")).upper()
+
+
+def _key_prefixes(tables: Sequence[str]) -> Dict[str, str]:
+    """
+    Primary key prefix per table: its initials, or the
+    first three letters plus initials where those clash
+    (customers CUS, campaigns CAM).
+    """
+    initials = {table: _initials(table) for table in tables}
+    clashes = collections.Counter(initials.values())
+    return {
+        table: prefix if clashes[prefix] == 1
+        else table[:3].upper() + prefix[1:]
+        for table, prefix in initials.items()
+    }
+
+
+def implied_keys(
+    tables: Dict[str, TableSpec],
+) -> Dict[str, Dict[str, Tuple[str, str]]]:
+    """
+    Columns without a declared foreign key that are named
+    after the primary key of exactly one other table
+    (shipments.order_id -> orders.order_id).
+
+    Returns:
+        Table -> column -> (parent table, parent column)
+    """
+    owners = collections.defaultdict(list)
+    for table in tables.values():
+        if table.primary_key:
+            owners[table.primary_key].append(table.name)
+    found: Dict[str, Dict[str, Tuple[str, str]]] = {}
+    for table in tables.values():
+        for column in table.columns.values():
+            parents = owners.get(column.name, [])
+            if (
+                len(parents) == 1
+                and parents[0] != table.name
+                and column.name not in table.foreign_keys
+            ):
+                found.setdefault(table.name, {})[column.name] = (
+                    parents[0], column.name
+                )
+    return found
+
+
+def _format_value(column: ColumnSpec) -> Callable[[Any], Optional[str]]:
+    """
+    CSV text of a generated value for COPY.
+    """
+    if column.type in ("DECIMAL", "NUMERIC"):
+        scale = column.scale or 0
+        return lambda v: None if v is None else f"{v:.{scale}f}"
+    if column.type == "BOOLEAN":
+        return lambda v: None if v is None else ("t" if v else "f")
+    if column.type in ("JSONB", "JSON"):
+        return lambda v: None if v is None else json.dumps(v)
+    if column.type == "TIMESTAMP":
+        return lambda v: None if v is None else v.isoformat(sep=" ")
+    return lambda v: None if v is None else str(v)
+
+
+class SyntheticDataset:
+    """
+    Deterministic synthetic rows for every table of a
+    schema.
+
+    Columns named after another table's primary key but
+    without a declared foreign key (shipments.order_id)
+    are generated as if they had one (see implied_keys).
+
+    Args:
+        scale: 1.0 is BASE_ROWS (100k order_items)
+        rows: Exact row counts for some tables
+        seed: Seed of values and foreign key choices
+        ddl: Schema script (default the project schema)
+    """
+
+    def __init__(
+        self,
+        scale: float = 1.0,
+        rows: Optional[Dict[str, int]] = None,
+        seed: int = 0,
+        ddl: Optional[str] = None,
+    ):
+        self.scale = scale
+        self.seed = seed
+        self.tables = parse_schema(
+            ddl if ddl is not None else load_schema_ddl().full
+        )
+        for table, keys in implied_keys(self.tables).items():
+            self.tables[table].foreign_keys.update(keys)
+        self._prefixes = _key_prefixes(list(self.tables))
+        self.order = load_order(self.tables)
+        self._fk_fns: Dict[Tuple[str, str], Callable] = {}
+        self._digit_fns: Dict[
+            str, Tuple[Tuple[str, ...], Callable[[int], List[int]]]
+        ] = {}
+        self.counts: Dict[str, int] = {}
+        overrides = rows or {}
+        for name in self.order:
+            base, growth = BASE_ROWS.get(name, DEFAULT_BASE_ROWS)
+            wanted = overrides.get(
+                name, max(MIN_ROWS, round(base * scale ** growth))
+            )
+            self.counts[name] = wanted
+            capacity = self._capacity(name)
+            if capacity is not None and wanted > capacity:
+                logger.warning(
+                    f"{name}: {wanted:,} rows requested, only "
+                    f"{capacity:,} unique combinations; capped"
+                )
+                self.counts[name] = capacity
+        self._key_formats = {
+            name: f"{self._prefixes[name]}-%0{max(4, len(str(n)))}d"
+            for name, n in self.counts.items()
+        }
+
+    @classmethod
+    def for_order_items(
+        cls,
+        order_items: int,
+        **kwargs: Any,
+    ) -> "SyntheticDataset":
+        """
+        Dataset scaled to a number of order_items rows.
+        """
+        base, growth = BASE_ROWS["order_items"]
+        return cls(scale=(order_items / base) ** (1 / growth), **kwargs)
+
+    def columns(self, table: str) -> List[str]:
+        """
+        Columns generated (and loaded) for a table.
+        """
+        return self.tables[table].load_columns
+
+    def key(self, table: str, index: int) -> str:
+        """
+        Primary key value of a row.
+        """
+        return self._key_formats[table] % (index + 1)
+
+    def total_rows(self) -> int:
+        """
+        Rows across all tables.
+        """
+        return sum(self.counts.values())
+
+    def parent_index(
+        self,
+        table: str,
+        column: str,
+        index: int,
+    ) -> Optional[int]:
+        """
+        Row number of the parent row a foreign key of row
+        `index` points to (None for hierarchy roots).
+        """
+        return self._fk_fn(table, column)(index)
+
+    def rows(self, table: str) -> Iterator[Tuple[Optional[str], ...]]:
+        """
+        Rows of a table as CSV-ready text tuples (None is
+        NULL), in load_columns order.
+        """
+        spec = self.tables[table]
+        names = spec.load_columns
+        makers = [self._value_fn(spec, name) for name in names]
+        formats = [_format_value(spec.columns[name]) for name in names]
+        fixes = self._comparison_fixes(spec)
+        overrides = [
+            (name, COLUMN_OVERRIDES[(table, name)]) for name in names
+            if (table, name) in COLUMN_OVERRIDES
+        ]
+        rng = random.Random(f"{self.seed}:{table}")
+        for i in range(self.counts[table]):
+            row = {
+                name: make(i, rng) for name, make in zip(names, makers)
+            }
+            for name, override in overrides:
+                row[name] = override(self, row, i, rng)
+            for fix in fixes:
+                fix(row)
+            yield tuple(
+                fmt(row[name]) for name, fmt in zip(names, formats)
+            )
+
+    def write_csv(
+        self,
+        directory: Union[str, Path],
+        tables: Optional[Sequence[str]] = None,
+    ) -> Dict[str, int]:
+        """
+        Write <table>.csv files (with a header row) for
+        text_to_sql.bulk_load.load_files.
+
+        Returns:
+            Rows written per table
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        written = {}
+        for table in tables or self.order:
+            path = directory / f"{table}.csv"
+            with path.open("w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(self.columns(table))
+                writer.writerows(self.rows(table))
+            written[table] = self.counts[table]
+        return written
+
+    def _salt(self, *parts: str) -> int:
+        return zlib.crc32(":".join((str(self.seed),) + parts).encode())
+
+    def _capacity(self, table: str) -> Optional[int]:
+        """
+        Distinct value tuples of the table's composite
+        UNIQUE (None when it has none).
+        """
+        members, _ = self._digits(table)
+        if not members:
+            return None
+        return math.prod(self._domain(table, c) for c in members)
+
+    def _derived_from(self, table: str, column: str) -> Optional[Tuple]:
+        """
+        (other column, parent's column) when the parent of
+        `column` is reachable through another foreign key
+        of the same row; the source covering the most
+        foreign keys of the row wins.
+        """
+        spec = self.tables[table]
+        target = spec.foreign_keys[column][0]
+        best, best_cover = None, 0
+        for other, (parent, _) in spec.foreign_keys.items():
+            if other == column or parent in (table, target):
+                continue
+            parent_fks = self.tables[parent].foreign_keys
+            via = [c for c, (t, _) in parent_fks.items() if t == target]
+            if not via:
+                continue
+            cover = len({t for t, _ in parent_fks.values()} & {
+                t for t, _ in spec.foreign_keys.values()
+            })
+            if cover > best_cover:
+                best, best_cover = (other, via[0]), cover
+        return best
+
+    def _distinct_from(self, table: str, column: str) -> Optional[str]:
+        """
+        Earlier foreign key column that `column` must
+        differ from (CHECK (a != b), same parent).
+        """
+        spec = self.tables[table]
+        for left, op, right in spec.comparisons:
+            if op == "!=" and column in (left, right):
+                other = left if column == right else right
+                if (
+                    other in spec.foreign_keys
+                    and list(spec.foreign_keys).index(other)
+                    < list(spec.foreign_keys).index(column)
+                ):
+                    return other
+        return None
+
+    def _domain(self, table: str, column: str) -> int:
+        """
+        Distinct values of a composite UNIQUE member.
+        """
+        spec = self.tables[table]
+        col = spec.columns[column]
+        if column in spec.foreign_keys:
+            parent = self.counts[spec.foreign_keys[column][0]]
+            if self._distinct_from(table, column):
+                return parent - 1
+            return parent
+        pool = _pool(table, col)
+        if pool is not None:
+            return len(pool)
+        if col.type == "DATE":
+            return DATE_SPAN_DAYS
+        raise ValueError(
+            f"Cannot enumerate {table}.{column} for its UNIQUE constraint"
+        )
+
+    def _digits(
+        self,
+        table: str,
+    ) -> Tuple[Tuple[str, ...], Callable[[int], List[int]]]:
+        """
+        Members of the first composite UNIQUE (derived
+        foreign keys left out) and a function from row
+        number to their value indexes.
+
+        Rows are spread over the tuple space with a stride
+        coprime to its size, so a small table still covers
+        all parents instead of the first few.
+        """
+        if table in self._digit_fns:
+            return self._digit_fns[table]
+        spec = self.tables[table]
+        members: Tuple[str, ...] = ()
+        if spec.uniques:
+            members = tuple(
+                c for c in spec.uniques[0]
+                if not (
+                    c in spec.foreign_keys
+                    and self._derived_from(table, c)
+                )
+            )
+        if not members:
+            self._digit_fns[table] = ((), lambda i: [])
+            return self._digit_fns[table]
+        domains = [self._domain(table, c) for c in members]
+        capacity = math.prod(domains)
+        stride = max(1, capacity // max(1, self.counts[table]))
+        while math.gcd(stride, capacity) != 1:
+            stride += 1
+
+        def digits(i: int) -> List[int]:
+            t = i * stride % capacity
+            out = []
+            for size in reversed(domains):
+                t, d = divmod(t, size)
+                out.append(d)
+            return out[::-1]
+
+        self._digit_fns[table] = (members, digits)
+        return self._digit_fns[table]
+
+    def _fk_fn(self, table: str, column: str) -> Callable:
+        """
+        Row number -> parent row number of a foreign key.
+
+        Self references form a tree (HIERARCHY_FANOUT
+        children per row, row 0 is the root). Derived
+        columns follow the other foreign key. Composite
+        UNIQUE members come from the tuple enumeration.
+        The first foreign key of a table assigns
+        contiguous blocks of rows to each parent (an
+        order's items are adjacent); the others pick a
+        parent by hash.
+        """
+        cache_key = (table, column)
+        if cache_key in self._fk_fns:
+            return self._fk_fns[cache_key]
+        spec = self.tables[table]
+        parent = spec.foreign_keys[column][0]
+        n_parent = self.counts[parent]
+        members, digits = self._digits(table)
+        derived = self._derived_from(table, column)
+        distinct = self._distinct_from(table, column)
+        salt = self._salt(table, column)
+        if parent == table:
+            def fn(i):
+                return None if i == 0 else (i - 1) // HIERARCHY_FANOUT
+        elif derived:
+            source, via = derived
+            source_fn = self._fk_fn(table, source)
+            via_fn = self._fk_fn(spec.foreign_keys[source][0], via)
+
+            def fn(i):
+                return via_fn(source_fn(i))
+        elif column in members:
+            k = members.index(column)
+            if distinct:
+                other = self._fk_fn(table, distinct)
+
+                def fn(i):
+                    return (other(i) + 1 + digits(i)[k]) % n_parent
+            else:
+                def fn(i):
+                    return digits(i)[k]
+        elif distinct:
+            other = self._fk_fn(table, distinct)
+
+            def fn(i):
+                step = _mix(i, salt) % (n_parent - 1)
+                return (other(i) + 1 + step) % n_parent
+        elif next(iter(spec.foreign_keys)) == column:
+            n_rows = self.counts[table]
+
+            def fn(i):
+                return i * n_parent // n_rows
+        else:
+            def fn(i):
+                return _mix(i, salt) % n_parent
+        self._fk_fns[cache_key] = fn
+        return fn
+
+    def _value_fn(
+        self,
+        spec: TableSpec,
+        name: str,
+    ) -> Callable[[int, random.Random], Any]:
+        """
+        Generator of one column's value from (row number,
+        table rng).
+        """
+        table = spec.name
+        col = spec.columns[name]
+        if name in spec.foreign_keys:
+            parent, parent_column = spec.foreign_keys[name]
+            if self.tables[parent].primary_key != parent_column:
+                raise ValueError(
+                    f"{table}.{name} references a non-key column"
+                )
+            fk = self._fk_fn(table, name)
+
+            def foreign_key(i, rng):
+                index = fk(i)
+                return None if index is None else self.key(parent, index)
+            return foreign_key
+        if col.primary_key:
+            return lambda i, rng: self.key(table, i)
+        members, digits = self._digits(table)
+        pool = _pool(table, col)
+        if name in members:
+            k = members.index(name)
+            if pool is not None:
+                return lambda i, rng: pool[digits(i)[k]]
+            return lambda i, rng: DATE_START + datetime.timedelta(
+                days=digits(i)[k]
+            )
+        if col.unique:
+            if "email" in name:
+                user = self._prefixes[table].lower()
+                return lambda i, rng: f"{user}{i + 1}@example.com"
+            tag = name.upper() if len(name) <= 4 else _initials(name)
+            return lambda i, rng: f"{tag}-{i + 1}"
+        if pool is not None:
+            return lambda i, rng: rng.choice(pool)
+        return _random_value(table, col)
+
+    def _comparison_fixes(
+        self,
+        spec: TableSpec,
+    ) -> List[Callable[[Dict[str, Any]], None]]:
+        """
+        Row fix-ups making column-to-column CHECKs hold
+        (foreign key pairs are handled when generating).
+        """
+        fixes = []
+        for left, op, right in spec.comparisons:
+            if left in spec.foreign_keys and right in spec.foreign_keys:
+                continue
+            if op in (">=", ">"):
+                left, right = right, left
+                op = op.replace(">", "<")
+            fixes.append(_ordering_fix(spec.columns, left, op, right))
+        return fixes
+
+
+def _pool(table: str, column: ColumnSpec) -> Optional[List[str]]:
+    """
+    Values to choose from for a column: its IN-list CHECK,
+    else VOCABULARY.
+    """
+    if column.choices:
+        return column.choices
+    return VOCABULARY.get(f"{table}.{column.name}") or (
+        VOCABULARY.get(column.name) if column.type == "VARCHAR" else None
+    )
+
+
+def _step(column: ColumnSpec) -> Any:
+    """
+    Smallest increment of a column's type.
+    """
+    if column.type == "DATE":
+        return datetime.timedelta(days=1)
+    if column.type == "TIMESTAMP":
+        return datetime.timedelta(seconds=1)
+    if column.type in ("DECIMAL", "NUMERIC"):
+        return 10 ** -(column.scale or 0)
+    return 1
+
+
+def _ordering_fix(
+    columns: Dict[str, ColumnSpec],
+    low: str,
+    op: str,
+    high: str,
+) -> Callable[[Dict[str, Any]], None]:
+    """
+    Fix-up for CHECK (low <= high), (low < high) or
+    (low != high): swap, then step apart if needed.
+    """
+    step = _step(columns[high])
+
+    def fix(row):
+        a, b = row[low], row[high]
+        if a is None or b is None:
+            return
+        if op != "!=" and a > b:
+            row[low], row[high] = a, b = b, a
+        if op != "<=" and a == b:
+            row[high] = b + step
+    return fix
+
+
+def _random_value(
+    table: str,
+    column: ColumnSpec,
+) -> Callable[[int, random.Random], Any]:
+    """
+    Generator of a column's value from its type, CHECK
+    bounds and VALUE_HIGH.
+    """
+    name = column.name
+    if column.high is None:
+        column = dataclasses.replace(column, high=VALUE_HIGH.get(
+            f"{table}.{name}", VALUE_HIGH.get(name)
+        ))
+    if column.type in ("INTEGER", "BIGINT", "SMALLINT"):
+        low = int(column.low or 0) + int(column.low_strict)
+        high = int(column.high) if column.high is not None else max(
+            low, DEFAULT_INT_HIGH
+        )
+        return lambda i, rng: rng.randint(low, high)
+    if column.type in ("DECIMAL", "NUMERIC"):
+        scale = column.scale or 0
+        step = 10 ** -scale
+        limit = 10 ** ((column.length or 10) - scale) - step
+        low = (column.low or 0.0) + (step if column.low_strict else 0)
+        high = min(
+            column.high if column.high is not None else limit,
+            DEFAULT_NUMERIC_HIGH,
+        )
+        return lambda i, rng: round(rng.uniform(low, high), scale)
+    if column.type == "BOOLEAN":
+        odds = {"TRUE": 0.9, "FALSE": 0.1}.get(
+            (column.default or "").upper(), 0.5
+        )
+        return lambda i, rng: rng.random() < odds
+    if column.type == "DATE":
+        return lambda i, rng: DATE_START + datetime.timedelta(
+            days=rng.randrange(DATE_SPAN_DAYS)
+        )
+    if column.type == "TIMESTAMP":
+        start = datetime.datetime.combine(DATE_START, datetime.time())
+        span = DATE_SPAN_DAYS * 86_400
+        return lambda i, rng: start + datetime.timedelta(
+            seconds=rng.randrange(span)
+        )
+    if column.type in ("JSONB", "JSON"):
+        return lambda i, rng: {name: rng.randint(1, 100)}
+    if column.type == "TEXT":
+        label = name.replace("_", " ").capitalize()
+        return lambda i, rng: f"{label} {rng.randint(1, 1000)}"
+    # VARCHAR: "Product 17" for names, "Tracking Number 4"
+    # for other free-text columns.
+    length = column.length or 255
+    if name.endswith("_name"):
+        label = name[:-5].replace("_", " ").title()
+        return lambda i, rng: f"{label} {i + 1}"[:length]
+    label = name.replace("_", " ").title()
+    return lambda i, rng: f"{label} {rng.randint(1, 50)}"[:length]
+
+
+def _discount(dataset, row, i, rng):
+    """
+    Up to 20% off the line (CHECK discount <= unit_price *
+    quantity).
+    """
+    line = row["unit_price"] * row["quantity"]
+    return round(line * rng.random() * 0.2, 2)
+
+
+def _defects_count(dataset, row, i, rng):
+    """
+    Up to 10% of the run (keeps yield_percentage within
+    DECIMAL(5,2)).
+    """
+    return rng.randint(0, row["quantity"] // 10)
+
+
+def _conversions_count(dataset, row, i, rng):
+    """
+    At most the stage's visitors (keeps conversion_rate
+    within DECIMAL(5,2)).
+    """
+    return rng.randint(0, row["visitors_count"])
+
+
+def _cost_of_goods_sold(dataset, row, i, rng):
+    """
+    40-90% of revenue (keeps margin_percentage within
+    DECIMAL(6,2)).
+    """
+    return round(row["revenue"] * rng.uniform(0.4, 0.9), 2)
+
+
+def _stage_order(dataset, row, i, rng):
+    """
+    Position of the funnel stage.
+    """
+    return FUNNEL_STAGES.index(row["stage_name"]) + 1
+
+
+def _inventory_id(dataset, row, i, rng):
+    """
+    Finished-goods or raw-material inventory row,
+    following inventory_type (no foreign key in the DDL).
+    """
+    table = (
+        "finished_goods_inventory"
+        if row["inventory_type"] == "FINISHED_GOODS"
+        else "raw_material_inventory"
+    )
+    return dataset.key(table, rng.randrange(dataset.counts[table]))
+
+
+# Columns whose value depends on other columns of the
+# row: (table, column) -> fn(dataset, row, index, rng).
+COLUMN_OVERRIDES: Dict[Tuple[str, str], Callable[..., Any]] = {
+    ("order_items", "discount"): _discount,
+    ("production_runs", "defects_count"): _defects_count,
+    ("conversion_funnels", "conversions_count"): _conversions_count,
+    ("profitability_analysis", "cost_of_goods_sold"): _cost_of_goods_sold,
+    ("conversion_funnels", "stage_order"): _stage_order,
+    ("inventory_transactions", "inventory_id"): _inventory_id,
+}
@@ -107,7 +107,14 @@ def log_llm_response(
 ) -> None:
     """
     Log an LLM response with token usage.
+
+    cached_tokens is the part of prompt_tokens served
+    from the provider's prompt-prefix cache: taken from
+    "cached_input_tokens" (pydantic-ai usage) or
+    "prompt_tokens_details.cached_tokens" (OpenAI
+    usage), 0 when not reported.
     """
+    details = usage.get("prompt_tokens_details") or {}
     generated_sql_preview = generated_sql
     if trim_sql_preview:
         if len(generated_sql) > PROMPT_PREVIEW_LENGTH:
@@ -137,6 +144,11 @@ def log_llm_response(
                     + usage.get("output_tokens", 0)
                 )
             ),
+            "cached_tokens": (
+                usage.get("cached_input_tokens")
+                or details.get("cached_tokens")
+                or 0
+            ),
         },
     }
     _write_entry(entry)
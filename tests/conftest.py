@@ -2,6 +2,7 @@
 Shared pytest fixtures for Text-to-SQL tests.
 """
 
+import asyncio
 import json
 from datetime import datetime
 from pathlib import Path
@@ -9,11 +10,29 @@ from typing import (
     Any,
     Dict,
     List,
+    Sequence,
+    Union,
 )
 
 import pytest
 
+from pydantic_ai.messages import (
+    ModelResponse,
+    ToolCallPart,
+)
+from pydantic_ai.models.function import (
+    DeltaToolCall,
+    FunctionModel,
+)
+
+from text_to_sql import usage_tracker
 from text_to_sql.agents.types import QueryRequest
+from text_to_sql.cost_guard import set_cost_guard
+from text_to_sql.db import set_backend
+from text_to_sql.llm_gateway import set_gateway
+from text_to_sql.model_registry import set_registry
+from text_to_sql.prepared_statements import set_prepared_cache
+from text_to_sql.result_cache import set_result_cache
 
 
 EVALS_DIR = (
@@ -74,3 +93,159 @@ def make_request():
 def reference_date() -> datetime:
     """Fixed reference date for temporal tests."""
     return datetime(2026, 2, 22)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def log_dir(tmp_path_factory):
+    """
+    Write the application and token-usage logs to a
+    temporary directory instead of the source tree.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv(
+            "LOG_FILES_DIR_PATH", str(tmp_path_factory.mktemp("logs"))
+        )
+        mp.setattr(usage_tracker, "_handler", None)
+        yield
+        if usage_tracker._handler is not None:
+            usage_tracker._handler.close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_llm_gateway():
+    """
+    Isolate the process-wide LLM gateway (rate limits,
+    latency history, circuit breaker) per test.
+    """
+    set_gateway(None)
+    yield
+    set_gateway(None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_model_registry(monkeypatch):
+    """
+    Isolate the process-wide model registry (built-in
+    specs only, no MODEL_REGISTRY_FILE) per test.
+    """
+    monkeypatch.delenv("MODEL_REGISTRY_FILE", raising=False)
+    set_registry(None)
+    yield
+    set_registry(None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_result_cache(monkeypatch):
+    """
+    Isolate the process-wide result cache (off unless a
+    test sets one) per test.
+    """
+    monkeypatch.delenv("SQL_RESULT_CACHE", raising=False)
+    set_result_cache(None)
+    yield
+    set_result_cache(None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cost_guard(monkeypatch):
+    """
+    Isolate the process-wide cost guard (off unless a
+    test sets one) per test.
+    """
+    monkeypatch.delenv("SQL_COST_GUARD", raising=False)
+    set_cost_guard(None)
+    yield
+    set_cost_guard(None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_backend(monkeypatch):
+    """
+    Isolate the process-wide execution backend
+    (PostgreSQL unless a test sets one) per test.
+    """
+    monkeypatch.delenv("SQL_BACKEND", raising=False)
+    set_backend(None)
+    yield
+    set_backend(None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_prepared_cache(monkeypatch):
+    """
+    Isolate the process-wide prepared-statement cache
+    (off unless a test sets one) per test.
+    """
+    monkeypatch.delenv("SQL_PREPARED_STATEMENTS", raising=False)
+    set_prepared_cache(None)
+    yield
+    set_prepared_cache(None)
+
+
+@pytest.fixture
+def simulated_llm():
+    """
+    Factory for fake LLMs with scripted behaviour.
+
+    Each call consumes the next entry of ``script``
+    (the last entry repeats): a number is a latency in
+    seconds before returning ``output``; an exception
+    instance is raised instead. Returns the model and
+    a list that grows by one entry per call.
+    """
+    def _make(
+        output: Dict[str, Any],
+        script: Sequence[Union[float, Exception]],
+    ):
+        calls: List[int] = []
+
+        async def _fn(messages, info):
+            step = script[min(len(calls), len(script) - 1)]
+            calls.append(len(calls))
+            if isinstance(step, Exception):
+                raise step
+            await asyncio.sleep(step)
+            return ModelResponse(parts=[ToolCallPart(
+                info.output_tools[0].name, output,
+            )])
+        return FunctionModel(_fn), calls
+    return _make
+
+
+@pytest.fixture
+def streaming_llm():
+    """
+    Factory for fake streaming LLMs.
+
+    Each call streams the next entry of ``outputs`` (the
+    last entry repeats) as output-tool arguments in
+    ``chunk_size``-character deltas. Returns the model
+    and a list with one entry per call: the prompt,
+    and the chunks sent out of the total (fewer when
+    the consumer stopped reading).
+    """
+    def _make(
+        outputs: Sequence[Dict[str, Any]],
+        chunk_size: int = 4,
+    ):
+        calls: List[Dict[str, Any]] = []
+
+        async def _stream(messages, info):
+            output = outputs[min(len(calls), len(outputs) - 1)]
+            args = json.dumps(output)
+            call = {
+                "prompt": messages[-1].parts[-1].content,
+                "sent": 0,
+                "total": -(-len(args) // chunk_size),
+            }
+            calls.append(call)
+            name = info.output_tools[0].name
+            for start in range(0, len(args), chunk_size):
+                call["sent"] += 1
+                yield {0: DeltaToolCall(
+                    name=name if start == 0 else None,
+                    json_args=args[start:start + chunk_size],
+                )}
+                await asyncio.sleep(0)
+        return FunctionModel(stream_function=_stream), calls
+    return _make
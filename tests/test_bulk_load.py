@@ -0,0 +1,201 @@
+"""
+Unit tests for COPY bulk loading.
+
+Covers CSV streaming into copy_expert, COPY files,
+dropping / rebuilding secondary indexes and the load
+transaction. The connection is faked (no database).
+"""
+
+import pytest
+
+from text_to_sql import bulk_load
+from text_to_sql.bulk_load import (
+    copy_file,
+    copy_rows,
+    drop_indexes,
+    load_dataset,
+    load_files,
+)
+from text_to_sql.synthetic_data import SyntheticDataset
+
+
+DDL = """
+CREATE TABLE customers (
+    customer_id VARCHAR(20) PRIMARY KEY,
+    segment VARCHAR(20) CHECK (segment IN ('retail', 'corporate'))
+);
+CREATE TABLE orders (
+    order_id VARCHAR(20) PRIMARY KEY,
+    customer_id VARCHAR(20) NOT NULL REFERENCES customers(customer_id),
+    total DECIMAL(10,2) CHECK (total >= 0)
+);
+"""
+INDEXES = [("idx_orders_total", "CREATE INDEX idx_orders_total ON orders")]
+
+
+class _Cursor:
+    """Cursor stand-in recording statements and COPY data."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append(sql)
+
+    def fetchall(self):
+        return list(self.conn.indexes)
+
+    def copy_expert(self, sql, file):
+        chunks = []
+        while chunk := file.read(64):
+            chunks.append(chunk)
+        self.conn.statements.append(sql)
+        self.conn.copied[sql.split()[1]] = type(chunks[0])().join(chunks)
+        if self.conn.fail_on and self.conn.fail_on in sql:
+            raise RuntimeError("COPY failed")
+
+
+class _Connection:
+    """Connection stand-in."""
+
+    def __init__(self, indexes=(), fail_on=None):
+        self.statements = []
+        self.copied = {}
+        self.indexes = indexes
+        self.fail_on = fail_on
+        self.committed = self.rolled_back = False
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+class TestCopy:
+    """
+    COPY statements and streamed data.
+    """
+
+    def test_copy_rows(self):
+        """Rows: CSV with NULLs and quoting, in chunks."""
+        conn = _Connection()
+        rows = [("1", "a,b")] + [(str(i), None) for i in range(2, 50)]
+        count = copy_rows(
+            conn.cursor(), "t", ["id", "name"], rows, batch_rows=7
+        )
+        assert count == 49
+        assert conn.statements == [
+            "COPY t (id, name) FROM STDIN WITH (FORMAT csv)"
+        ]
+        lines = conn.copied["t"].splitlines()
+        assert lines[0] == '1,"a,b"'
+        assert lines[1] == "2,"
+        assert len(lines) == 49
+
+    def test_copy_csv_file(self, tmp_path):
+        """File: the header row gives the column list."""
+        path = tmp_path / "t.csv"
+        path.write_text("id,name\n1,x\n", encoding="utf-8")
+        conn = _Connection()
+        copy_file(conn.cursor(), "t", path, freeze=True)
+        assert conn.statements == [
+            "COPY t (id, name) FROM STDIN WITH (FORMAT csv, FREEZE true)"
+        ]
+        assert conn.copied["t"] == "1,x\n"
+
+    def test_copy_binary_file(self, tmp_path):
+        """File: binary COPY files are sent as bytes."""
+        path = tmp_path / "t.bin"
+        path.write_bytes(b"PGCOPY\n\xff\r\n\x00")
+        conn = _Connection()
+        copy_file(conn.cursor(), "t", path, fmt="binary")
+        assert conn.statements == [
+            "COPY t FROM STDIN WITH (FORMAT binary)"
+        ]
+        assert conn.copied["t"] == b"PGCOPY\n\xff\r\n\x00"
+
+    def test_unknown_format(self, tmp_path):
+        """File: only csv and binary are supported."""
+        with pytest.raises(ValueError, match="format"):
+            copy_file(_Connection().cursor(), "t", tmp_path, fmt="text")
+
+
+class TestLoad:
+    """
+    Index handling and the load transaction.
+    """
+
+    def test_drop_indexes(self):
+        """Indexes: dropped, definitions returned."""
+        conn = _Connection(INDEXES)
+        definitions = drop_indexes(conn.cursor(), ["orders"])
+        assert definitions == ["CREATE INDEX idx_orders_total ON orders"]
+        assert conn.statements[-1] == (
+            'DROP INDEX "mfg_ecommerce"."idx_orders_total"'
+        )
+
+    def test_load_dataset(self):
+        """Load: truncate, drop, COPY parents first, rebuild."""
+        dataset = SyntheticDataset(rows={"orders": 25}, ddl=DDL)
+        conn = _Connection(INDEXES)
+        timings = load_dataset(conn, dataset)
+        statements = [s.split("(")[0].strip() for s in conn.statements]
+        assert statements[1:] == [
+            "TRUNCATE customers, orders RESTART IDENTITY CASCADE",
+            "SELECT i.indexname, i.indexdef\n    FROM pg_indexes i\n"
+            "    WHERE i.schemaname = %s\n      AND i.tablename = ANY",
+            'DROP INDEX "mfg_ecommerce"."idx_orders_total"',
+            "COPY customers",
+            "COPY orders",
+            "CREATE INDEX idx_orders_total ON orders",
+            "ANALYZE customers, orders",
+        ]
+        assert "FREEZE true" in conn.statements[4]
+        assert len(conn.copied["orders"].splitlines()) == 25
+        assert conn.committed
+        assert set(timings) >= {"customers", "orders", "indexes", "total"}
+
+    def test_append_keeps_indexes(self):
+        """Load: no truncate / FREEZE / index rebuild."""
+        dataset = SyntheticDataset(ddl=DDL)
+        conn = _Connection(INDEXES)
+        load_dataset(
+            conn, dataset, ["orders"], truncate=False,
+            rebuild_indexes=False,
+        )
+        assert not any("TRUNCATE" in s for s in conn.statements)
+        assert not any("INDEX" in s for s in conn.statements)
+        assert list(conn.copied) == ["orders"]
+        assert "FREEZE" not in conn.statements[1]
+
+    def test_failure_rolls_back(self):
+        """Load: a failed COPY rolls everything back."""
+        dataset = SyntheticDataset(ddl=DDL)
+        conn = _Connection(INDEXES, fail_on="COPY orders")
+        with pytest.raises(RuntimeError):
+            load_dataset(conn, dataset)
+        assert conn.rolled_back and not conn.committed
+
+    def test_load_files(self, tmp_path, monkeypatch):
+        """Files: schema tables with a file, parents first."""
+        monkeypatch.setattr(
+            bulk_load, "load_schema_ddl",
+            lambda: type("DDL", (), {"full": DDL}),
+        )
+        SyntheticDataset(ddl=DDL).write_csv(tmp_path)
+        (tmp_path / "notes.csv").write_text("x\n")
+        conn = _Connection()
+        load_files(conn, tmp_path, rebuild_indexes=False)
+        assert list(conn.copied) == ["customers", "orders"]
+        with pytest.raises(ValueError, match="No .bin files"):
+            load_files(conn, tmp_path, fmt="binary")
@@ -0,0 +1,213 @@
+"""
+Unit tests for the execution cost guard.
+
+Covers per-role row caps, cost admission (reject /
+heavy-slot queueing), statement timeouts and budget
+files. EXPLAIN and execution are faked (no database).
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from text_to_sql import cost_guard
+from text_to_sql.cost_guard import (
+    DEFAULT_BUDGET,
+    CostBudget,
+    CostGuard,
+    QueryRejected,
+    get_cost_guard,
+)
+from text_to_sql.db import PlannerError
+
+
+BUDGETS = {"analyst": CostBudget(100, 1_000.0, 10_000.0, 5_000)}
+
+
+def _explain(cost, rows=10):
+    """EXPLAIN stand-in returning a fixed estimate."""
+    calls = []
+
+    def explain(sql):
+        calls.append(sql)
+        return {"total_cost": cost, "plan_rows": rows}
+
+    explain.calls = calls
+    return explain
+
+
+@pytest.fixture
+def executed(monkeypatch):
+    """Record queries instead of running them."""
+    runs = []
+
+    def fake_execute(sql, timeout_ms=None, role=None):
+        runs.append((sql, timeout_ms, role))
+        time.sleep(0.05)
+        return [{"n": 1}]
+
+    async def fake_execute_async(
+        sql, timeout_ms=None, deadline=None, role=None,
+    ):
+        runs.append((sql, timeout_ms, role))
+        await asyncio.sleep(0.05)
+        return [{"n": 1}]
+
+    monkeypatch.setattr(cost_guard, "execute_query", fake_execute)
+    monkeypatch.setattr(
+        cost_guard, "execute_query_async", fake_execute_async
+    )
+    return runs
+
+
+class TestCheck:
+    """
+    Row caps and cost verdicts.
+    """
+
+    def test_limit_injected_and_planned(self):
+        """Check: the capped query is what gets planned."""
+        explain = _explain(50.0)
+        guard = CostGuard(BUDGETS, explain=explain)
+        decision = guard.check("SELECT * FROM orders", "analyst")
+        assert decision.sql == "SELECT * FROM orders LIMIT 100"
+        assert explain.calls == [decision.sql]
+        assert decision.admitted and not decision.heavy
+        assert guard.stats()["limited"] == 1
+
+    def test_unknown_role_gets_default(self):
+        """Check: roles without a budget get the default."""
+        guard = CostGuard(BUDGETS, explain=_explain(50.0))
+        decision = guard.check("SELECT * FROM orders", "viewer")
+        assert decision.budget == DEFAULT_BUDGET
+
+    def test_over_budget_rejected(self):
+        """Check: cost above max_cost is refused."""
+        guard = CostGuard(BUDGETS, explain=_explain(50_000.0))
+        decision = guard.check("SELECT * FROM orders", "analyst")
+        assert not decision.admitted
+        assert "exceeds the analyst budget" in decision.reason
+        with pytest.raises(QueryRejected):
+            guard.admit(decision)
+
+    def test_heavy(self):
+        """Check: cost above queue_cost needs a slot."""
+        guard = CostGuard(BUDGETS, explain=_explain(5_000.0))
+        assert guard.check("SELECT 1 FROM t", "analyst").heavy
+
+    def test_planner_error_rejected(self):
+        """Check: a query that does not plan is refused."""
+        def explain(sql):
+            raise PlannerError('relation "nope" does not exist')
+
+        guard = CostGuard(BUDGETS, explain=explain)
+        decision = guard.check("SELECT * FROM nope", "analyst")
+        assert not decision.admitted
+        assert "does not plan" in decision.reason
+
+    def test_explain_unavailable_admits(self):
+        """Check: without EXPLAIN only the caps apply."""
+        def explain(sql):
+            raise ValueError("DATABASE_URL not set in .env")
+
+        guard = CostGuard(BUDGETS, explain=explain)
+        decision = guard.check("SELECT * FROM t", "analyst")
+        assert decision.admitted and decision.total_cost is None
+        assert guard.stats()["explain_skipped"] == 1
+
+
+class TestExecute:
+    """
+    Running queries within budget.
+    """
+
+    def test_role_timeout_applied(self, executed):
+        """Execute: the role's statement timeout is used."""
+        guard = CostGuard(BUDGETS, explain=_explain(50.0))
+        guard.execute("SELECT * FROM t", "analyst")
+        assert executed == [
+            ("SELECT * FROM t LIMIT 100", 5_000, "analyst"),
+        ]
+
+    def test_rejected_not_run(self, executed):
+        """Execute: rejected queries never reach the db."""
+        guard = CostGuard(BUDGETS, explain=_explain(50_000.0))
+        with pytest.raises(QueryRejected):
+            guard.execute("SELECT * FROM t", "analyst")
+        assert executed == []
+
+    def test_heavy_queries_serialized(self, executed):
+        """Execute: one heavy slot runs them one at a time."""
+        guard = CostGuard(
+            BUDGETS, heavy_slots=1, explain=_explain(5_000.0)
+        )
+        threads = [
+            threading.Thread(
+                target=guard.execute, args=("SELECT 1 FROM t", "analyst")
+            )
+            for _ in range(3)
+        ]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert time.perf_counter() - start >= 0.15
+        assert guard.stats()["queued"] == 3
+
+    def test_queue_timeout(self, executed):
+        """Execute: no slot in time means rejection."""
+        guard = CostGuard(
+            BUDGETS, heavy_slots=1, queue_timeout_s=0.01,
+            explain=_explain(5_000.0),
+        )
+        guard._heavy.acquire()
+        with pytest.raises(QueryRejected, match="slot"):
+            guard.execute("SELECT 1 FROM t", "analyst")
+        assert guard.stats()["queue_timeouts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_async_heavy_serialized(self, executed):
+        """Async: heavy queries share the slots."""
+        guard = CostGuard(
+            BUDGETS, heavy_slots=1, explain=_explain(5_000.0)
+        )
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            guard.execute_async("SELECT 1 FROM t", "analyst")
+            for _ in range(3)
+        ))
+        assert results == [[{"n": 1}]] * 3
+        assert time.perf_counter() - start >= 0.15
+        assert guard._heavy.acquire(blocking=False)
+
+
+class TestConfig:
+    """
+    Budget files and the env toggle.
+    """
+
+    def test_budget_file(self, tmp_path):
+        """Config: file entries override field by field."""
+        path = tmp_path / "budgets.json"
+        path.write_text(json.dumps({
+            "analyst": {"max_rows": 50},
+            "auditor": {"max_cost": 5.0},
+            "default": {"statement_timeout_ms": 1_000},
+        }))
+        guard = CostGuard.from_file(path)
+        assert guard.budget("analyst").max_rows == 50
+        assert guard.budget("analyst").max_cost == 1_000_000.0
+        assert guard.budget("auditor").max_cost == 5.0
+        assert guard.budget("auditor").statement_timeout_ms == 1_000
+        assert guard.budget("viewer").statement_timeout_ms == 1_000
+
+    def test_env_toggle(self, monkeypatch):
+        """Config: the guard is off unless SQL_COST_GUARD."""
+        assert get_cost_guard() is None
+        monkeypatch.setenv("SQL_COST_GUARD", "1")
+        monkeypatch.setenv("COST_GUARD_HEAVY_SLOTS", "3")
+        assert get_cost_guard() is not None
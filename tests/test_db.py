@@ -0,0 +1,191 @@
+"""
+Integration tests for EXPLAIN validation on the read-only
+pool and query execution on the pooled connections.
+
+Run against a local PostgreSQL by setting
+TEST_DATABASE_URL (e.g. postgresql://localhost/postgres);
+skipped otherwise.
+"""
+
+import asyncio
+import os
+
+import psycopg2.extensions
+import pytest
+
+from text_to_sql.db import (
+    PlannerError,
+    close_pool,
+    close_query_executor,
+    close_readonly_pool,
+    execute_query,
+    execute_query_async,
+    execute_query_columnar,
+    explain_query,
+    get_connection,
+    get_readonly_pool,
+    pool_stats,
+    stream_query,
+    stream_query_batches,
+)
+
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL,
+    reason="TEST_DATABASE_URL not set",
+)
+
+
+@pytest.fixture(autouse=True)
+def readonly_pool(monkeypatch):
+    """Point the read-only pool at the test database."""
+    monkeypatch.setenv(
+        "READONLY_DATABASE_URL", TEST_DATABASE_URL or ""
+    )
+    monkeypatch.setenv("DATABASE_URL", TEST_DATABASE_URL or "")
+    close_pool()
+    close_readonly_pool()
+    yield
+    close_query_executor()
+    close_pool()
+    close_readonly_pool()
+
+
+class TestExplainQuery:
+    """Tests for planning queries with EXPLAIN."""
+
+    def test_plan_estimate(self):
+        """EXPLAIN: returns root cost and row estimate."""
+        plan = explain_query(
+            "SELECT relname FROM pg_class WHERE relpages > 0"
+        )
+        assert plan["total_cost"] > 0
+        assert plan["plan_rows"] >= 1
+        assert plan["node_type"]
+
+    def test_unknown_column(self):
+        """EXPLAIN: planner error is typed."""
+        with pytest.raises(PlannerError) as exc:
+            explain_query("SELECT nope FROM pg_class")
+        assert exc.value.sqlstate == "42703"
+
+    def test_bad_literal(self):
+        """EXPLAIN: constant folding errors are planner errors."""
+        with pytest.raises(PlannerError):
+            explain_query("SELECT '2026-13-45'::date")
+
+    def test_sessions_are_read_only(self):
+        """Pool: connections default to read-only."""
+        pool = get_readonly_pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SHOW default_transaction_read_only"
+                )
+                assert cur.fetchone()[0] == "on"
+        finally:
+            pool.putconn(conn)
+
+    def test_connection_returned_after_error(self):
+        """Pool: connection reusable after a planner error."""
+        with pytest.raises(PlannerError):
+            explain_query("SELECT FROM nowhere_table")
+        assert explain_query("SELECT 1")["plan_rows"] == 1
+
+
+class TestConnectionPool:
+    """Tests for pooled query execution."""
+
+    def test_connection_reused(self):
+        """Pool: repeated queries share one backend."""
+        pids = {
+            execute_query("SELECT pg_backend_pid() AS pid")[0]["pid"]
+            for _ in range(3)
+        }
+        assert len(pids) == 1
+        stats = pool_stats()["db"]
+        assert stats["checkouts"] == 3
+        assert stats["created"] == 1
+
+    def test_search_path_from_options(self):
+        """Pool: search_path is set at connect time."""
+        rows = execute_query("SHOW search_path")
+        assert rows[0]["search_path"] == "mfg_ecommerce,public"
+
+    def test_get_connection_close_returns(self):
+        """Pool: closing a connection returns it."""
+        conn = get_connection()
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.close()
+        stats = pool_stats()["db"]
+        assert stats["in_use"] == 0
+        assert stats["idle"] == 1
+
+    def test_error_does_not_poison_pool(self):
+        """Pool: a failed query leaves the connection usable."""
+        with pytest.raises(Exception):
+            execute_query("SELECT nope FROM pg_class")
+        assert execute_query("SELECT 1 AS one") == [{"one": 1}]
+
+
+class TestAsyncExecution:
+    """Tests for queries awaited from the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries(self):
+        """Async: queries run concurrently on the pool."""
+        rows = await asyncio.gather(*(
+            execute_query_async(f"SELECT {i} AS i") for i in range(4)
+        ))
+        assert [r[0]["i"] for r in rows] == [0, 1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_statement_timeout(self):
+        """Async: the server stops a slow query."""
+        with pytest.raises((
+            psycopg2.extensions.QueryCanceledError, TimeoutError,
+        )):
+            await execute_query_async(
+                "SELECT pg_sleep(2)", timeout_ms=100
+            )
+        assert await execute_query_async("SELECT 1 AS one") == [
+            {"one": 1}
+        ]
+
+
+class TestStreamQuery:
+    """Tests for server-side cursor streaming."""
+
+    def test_batches(self):
+        """Stream: rows arrive in batches."""
+        batches = list(stream_query_batches(
+            "SELECT i FROM generate_series(1, 2500) AS i", 1000
+        ))
+        assert [len(b) for b in batches] == [1000, 1000, 500]
+
+    def test_max_rows_and_early_exit(self):
+        """Stream: a capped stream frees its connection."""
+        rows = list(stream_query(
+            "SELECT i FROM generate_series(1, 1000000) AS i",
+            max_rows=5,
+        ))
+        assert [r["i"] for r in rows] == [1, 2, 3, 4, 5]
+        assert pool_stats()["db"]["in_use"] == 0
+
+
+class TestColumnarResult:
+    """Tests for column-wise query results."""
+
+    def test_columns(self):
+        """Columnar: values grouped by column."""
+        result = execute_query_columnar(
+            "SELECT i, i * 0.5::float AS half, 'x' || i AS label "
+            "FROM generate_series(1, 3) AS i"
+        )
+        assert result.columns == ["i", "half", "label"]
+        assert list(result.column("i")) == [1, 2, 3]
+        assert result[2]["label"] == "x3"
@@ -0,0 +1,175 @@
+"""
+Unit tests for async query execution.
+
+Covers running queries off the event loop, statement
+timeouts from request deadlines and server-side
+cancellation. No database (fake pooled connections).
+"""
+
+import asyncio
+import threading
+import time
+
+import psycopg2.extensions
+import pytest
+
+from text_to_sql import db
+from text_to_sql.agents.deadline import Deadline
+from text_to_sql.db_pool import ConnectionPool
+
+
+class _Cursor:
+    """Cursor stand-in: a query sleeps QUERY_S unless cancelled."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.description = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        self.conn.executed.append(sql)
+        if sql.startswith("SET"):
+            return
+        self.conn.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        if self.conn.cancel_event.wait(self.conn.query_s):
+            self.conn.cancel_event.clear()
+            raise psycopg2.extensions.QueryCanceledError(
+                "canceling statement due to user request"
+            )
+        self.description = [("n",)]
+
+    def fetchall(self):
+        return [{"n": 1}]
+
+
+class _Connection:
+    """psycopg2 connection stand-in supporting cancel()."""
+
+    def __init__(self, query_s):
+        self.query_s = query_s
+        self.closed = 0
+        self.executed = []
+        self.cancels = 0
+        self.cancel_event = threading.Event()
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def cursor(self, cursor_factory=None):
+        return _Cursor(self)
+
+    def cancel(self):
+        self.cancels += 1
+        self.cancel_event.set()
+
+    def commit(self):
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    """Pool of fake connections whose queries take 0.1s."""
+    opened = []
+
+    def connect():
+        opened.append(_Connection(query_s=0.1))
+        return opened[-1]
+
+    pool = ConnectionPool(connect, min_size=0, max_size=4)
+    monkeypatch.setattr(db, "_pool", pool)
+    monkeypatch.setenv("DB_EXECUTOR_WORKERS", "4")
+    monkeypatch.delenv("DB_STATEMENT_TIMEOUT_MS", raising=False)
+    db.close_query_executor()
+    yield pool, opened
+    db.close_query_executor()
+
+
+class TestExecuteQueryAsync:
+    """
+    Queries awaited from the event loop.
+    """
+
+    @pytest.mark.asyncio
+    async def test_concurrent_without_blocking(self, fake_pool):
+        """Async: queries overlap and the loop keeps running."""
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            db.execute_query_async("SELECT 1") for _ in range(4)
+        ))
+        elapsed = time.perf_counter() - start
+        task.cancel()
+        assert results == [[{"n": 1}]] * 4
+        assert elapsed < 0.3
+        assert ticks >= 5
+
+    @pytest.mark.asyncio
+    async def test_deadline_sets_statement_timeout(self, fake_pool):
+        """Async: the statement timeout fits the deadline."""
+        _, opened = fake_pool
+        await db.execute_query_async(
+            "SELECT 1", timeout_ms=60_000,
+            deadline=Deadline.after_ms(5000),
+        )
+        timeout = int(opened[0].executed[0].rsplit(" ", 1)[1])
+        assert 4000 < timeout <= 5000
+
+    @pytest.mark.asyncio
+    async def test_expired_deadline(self, fake_pool):
+        """Async: an exhausted deadline runs nothing."""
+        _, opened = fake_pool
+        with pytest.raises(TimeoutError):
+            await db.execute_query_async(
+                "SELECT 1", deadline=Deadline.after_ms(-1),
+            )
+        assert opened == []
+
+    @pytest.mark.asyncio
+    async def test_timeout_cancels_on_server(self, fake_pool):
+        """Async: a timed-out query is cancelled and the
+        connection goes back to the pool."""
+        pool, opened = fake_pool
+        with pytest.raises(TimeoutError):
+            await db.execute_query_async("SELECT 1", timeout_ms=20)
+        for _ in range(100):
+            if pool.stats()["idle"] == 1:
+                break
+            await asyncio.sleep(0.01)
+        assert opened[0].cancels == 1
+        assert not opened[0].closed
+        assert pool.stats()["idle"] == 1
+
+    @pytest.mark.asyncio
+    async def test_task_cancel_cancels_query(self, fake_pool):
+        """Async: cancelling the awaiting task stops the query."""
+        _, opened = fake_pool
+        task = asyncio.create_task(db.execute_query_async("SELECT 1"))
+        await asyncio.sleep(0.03)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        for _ in range(100):
+            if opened[0].cancels:
+                break
+            await asyncio.sleep(0.01)
+        assert opened[0].cancels == 1
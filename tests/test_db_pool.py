@@ -0,0 +1,199 @@
+"""
+Unit tests for the connection pool.
+
+Covers reuse, the max_size bound and checkout timeout,
+lifetime / idle recycling, health checks, rollback on
+return and metrics. No database (fake connections).
+"""
+
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+import pytest
+
+from text_to_sql.db_pool import (
+    ConnectionPool,
+    PooledConnection,
+    PoolTimeout,
+)
+
+
+class _Cursor:
+    """Cursor stand-in; fails when its connection is dead."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        if self.conn.dead:
+            raise psycopg2.OperationalError("server closed")
+        self.conn.executed.append(sql)
+
+
+class _Connection:
+    """psycopg2 connection stand-in."""
+
+    def __init__(self):
+        self.closed = 0
+        self.dead = False
+        self.executed = []
+        self.rollbacks = 0
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def close(self):
+        self.closed = 1
+
+
+class _Factory:
+    """Counts the physical connections opened."""
+
+    def __init__(self):
+        self.opened = []
+
+    def __call__(self):
+        conn = _Connection()
+        self.opened.append(conn)
+        return conn
+
+
+class TestCheckout:
+    """
+    Reuse and the size bound.
+    """
+
+    def test_reuses_connection(self):
+        """Pool: sequential checkouts share one connection."""
+        factory = _Factory()
+        pool = ConnectionPool(factory, min_size=1, max_size=4)
+        for _ in range(5):
+            with pool.connection() as conn:
+                assert conn is factory.opened[0]
+        assert len(factory.opened) == 1
+        assert pool.stats()["checkouts"] == 5
+
+    def test_grows_to_max_then_times_out(self):
+        """Pool: past max_size, checkout waits then fails."""
+        pool = ConnectionPool(
+            _Factory(), min_size=0, max_size=2, timeout_s=0.05
+        )
+        a, b = pool.getconn(), pool.getconn()
+        assert a is not b
+        with pytest.raises(PoolTimeout):
+            pool.getconn()
+        assert pool.stats()["timeouts"] == 1
+        pool.putconn(a)
+        assert pool.getconn() is a
+
+    def test_waiter_gets_returned_connection(self):
+        """Pool: a blocked checkout is served on return."""
+        pool = ConnectionPool(_Factory(), min_size=1, max_size=1)
+        conn = pool.getconn()
+        got = []
+        waiter = threading.Thread(
+            target=lambda: got.append(pool.getconn())
+        )
+        waiter.start()
+        time.sleep(0.05)
+        pool.putconn(conn)
+        waiter.join(1)
+        assert got == [conn]
+        assert pool.stats()["wait_ms_max"] >= 40
+
+    def test_foreign_connection_rejected(self):
+        """Pool: putconn of an unknown connection fails."""
+        pool = ConnectionPool(_Factory(), min_size=0)
+        with pytest.raises(psycopg2.pool.PoolError):
+            pool.putconn(_Connection())
+
+
+class TestRecycling:
+    """
+    Lifetime, idle time, health checks and returns.
+    """
+
+    def test_max_lifetime(self):
+        """Recycle: old connections are replaced."""
+        factory = _Factory()
+        pool = ConnectionPool(
+            factory, min_size=1, max_lifetime_s=0.01
+        )
+        time.sleep(0.02)
+        conn = pool.getconn()
+        assert conn is factory.opened[1]
+        assert factory.opened[0].closed
+        assert pool.stats()["recycled_lifetime"] == 1
+
+    def test_idle_above_min_closed(self):
+        """Recycle: idle connections above min_size go."""
+        factory = _Factory()
+        pool = ConnectionPool(
+            factory, min_size=1, max_size=3, max_idle_s=0.01
+        )
+        conns = [pool.getconn() for _ in range(3)]
+        for conn in conns:
+            pool.putconn(conn)
+        time.sleep(0.02)
+        pool.getconn()
+        stats = pool.stats()
+        assert stats["recycled_idle"] == 2
+        assert stats["size"] == 1
+
+    def test_dead_connection_replaced(self):
+        """Health check: a dead idle connection is dropped."""
+        factory = _Factory()
+        pool = ConnectionPool(
+            factory, min_size=1, health_check_after_s=0
+        )
+        factory.opened[0].dead = True
+        conn = pool.getconn()
+        assert conn is factory.opened[1]
+        assert pool.stats()["health_check_failures"] == 1
+
+    def test_open_transaction_rolled_back(self):
+        """Return: an open transaction is rolled back."""
+        pool = ConnectionPool(_Factory(), min_size=1)
+        conn = pool.getconn()
+        conn.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        pool.putconn(conn)
+        assert conn.rollbacks == 1
+        assert pool.getconn() is conn
+
+    def test_broken_connection_not_reused(self):
+        """Return: an OperationalError closes it."""
+        factory = _Factory()
+        pool = ConnectionPool(factory, min_size=1)
+        with pytest.raises(psycopg2.OperationalError):
+            with pool.connection():
+                raise psycopg2.OperationalError("reset")
+        assert factory.opened[0].closed
+        assert pool.getconn() is factory.opened[1]
+
+    def test_pooled_connection_close_returns(self):
+        """Wrapper: close() returns it to the pool."""
+        pool = ConnectionPool(_Factory(), min_size=1)
+        raw = pool.getconn()
+        wrapped = PooledConnection(pool, raw)
+        wrapped.close()
+        assert wrapped.closed
+        assert not raw.closed
+        assert pool.stats()["idle"] == 1
+        with pytest.raises(psycopg2.InterfaceError):
+            wrapped.cursor()
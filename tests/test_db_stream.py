@@ -0,0 +1,124 @@
+"""
+Unit tests for streaming query results.
+
+Covers batching through named cursors, the row cap and
+early termination (cursor closed, connection returned).
+No database (fake pooled connections).
+"""
+
+import psycopg2.extensions
+import pytest
+
+from text_to_sql import db
+from text_to_sql.db_pool import ConnectionPool
+
+
+TOTAL_ROWS = 25
+
+
+class _NamedCursor:
+    """Server-side cursor stand-in over TOTAL_ROWS rows."""
+
+    def __init__(self, conn, name):
+        self.conn = conn
+        self.name = name
+        self.position = 0
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+        return False
+
+    def execute(self, sql):
+        self.conn.executed.append(sql)
+        if self.name is not None:
+            self.conn.status = (
+                psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+            )
+
+    def fetchmany(self, size):
+        self.conn.fetches.append(size)
+        end = min(self.position + size, TOTAL_ROWS)
+        batch = [{"n": i} for i in range(self.position, end)]
+        self.position = end
+        return batch
+
+
+class _Connection:
+    """psycopg2 connection stand-in."""
+
+    def __init__(self):
+        self.closed = 0
+        self.executed = []
+        self.fetches = []
+        self.cursors = []
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def cursor(self, name=None, cursor_factory=None):
+        self.cursors.append(_NamedCursor(self, name))
+        return self.cursors[-1]
+
+    def rollback(self):
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    """Pool of one fake connection."""
+    conn = _Connection()
+    pool = ConnectionPool(lambda: conn, min_size=1, max_size=1)
+    monkeypatch.setattr(db, "_pool", pool)
+    monkeypatch.delenv("DB_STATEMENT_TIMEOUT_MS", raising=False)
+    return pool, conn
+
+
+class TestStreamQuery:
+    """
+    Rows fetched batch by batch.
+    """
+
+    def test_batches_through_named_cursor(self, fake_pool):
+        """Stream: rows arrive in batch_size fetches."""
+        _, conn = fake_pool
+        batches = list(db.stream_query_batches("SELECT n", 10))
+        assert [len(b) for b in batches] == [10, 10, 5]
+        assert conn.cursors[0].name.startswith("stream_")
+
+    def test_max_rows_caps_fetch(self, fake_pool):
+        """Stream: the server is never asked past max_rows."""
+        _, conn = fake_pool
+        rows = list(db.stream_query("SELECT n", itersize=10, max_rows=12))
+        assert [r["n"] for r in rows] == list(range(12))
+        assert conn.fetches == [10, 2]
+
+    def test_early_exit_returns_connection(self, fake_pool):
+        """Stream: breaking out closes cursor, frees conn."""
+        pool, conn = fake_pool
+        rows = db.stream_query("SELECT n", itersize=5)
+        for row in rows:
+            if row["n"] == 2:
+                break
+        rows.close()
+        assert conn.cursors[0].closed
+        assert conn.fetches == [5]
+        assert pool.stats()["idle"] == 1
+        assert conn.status == (
+            psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        )
+
+    def test_statement_timeout(self, fake_pool):
+        """Stream: the timeout is set before declaring."""
+        _, conn = fake_pool
+        list(db.stream_query("SELECT n", timeout_ms=500))
+        assert conn.executed == [
+            "SET LOCAL statement_timeout = 500", "SELECT n",
+        ]
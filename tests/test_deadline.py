@@ -0,0 +1,166 @@
+"""
+Unit tests for per-request deadline propagation.
+
+Uses Pydantic AI FunctionModel with artificial latency
+in place of a real LLM.
+"""
+
+import asyncio
+
+import pytest
+
+from pydantic_ai.messages import (
+    ModelResponse,
+    ToolCallPart,
+)
+from pydantic_ai.models.function import FunctionModel
+
+from text_to_sql.agents.base import BaseAgent
+from text_to_sql.agents.deadline import (
+    Deadline,
+    DeadlineExceeded,
+)
+from text_to_sql.agents.orchestrator import (
+    OrchestratorAgent,
+)
+from text_to_sql.agents.schema_intelligence import (
+    SchemaIntelligenceAgent,
+)
+from text_to_sql.agents.sql_generation import (
+    SQLGenerationAgent,
+)
+
+
+def _slow_sql_model(
+    sql: str, delay_s: float, calls: list,
+) -> FunctionModel:
+    """
+    FunctionModel returning GeneratedSQL after delay_s.
+    """
+    async def _fn(messages, info):
+        calls.append(1)
+        await asyncio.sleep(delay_s)
+        return ModelResponse(parts=[ToolCallPart(
+            info.output_tools[0].name,
+            {"sql": sql, "confidence": 0.9},
+        )])
+    return FunctionModel(_fn)
+
+
+class _SlowAgent(BaseAgent):
+    """
+    Agent that sleeps longer than any test budget.
+    """
+
+    def __init__(self):
+        super().__init__("Slow", "slow")
+
+    async def _execute_internal(
+        self, request, previous_results, context,
+    ):
+        await asyncio.sleep(5)
+        return {}
+
+
+class TestDeadline:
+    """Tests for the Deadline helper."""
+
+    def test_remaining_and_can_fit(self):
+        """Deadline: fresh budget fits small work."""
+        deadline = Deadline.after_ms(5_000)
+        assert 4_000 < deadline.remaining_ms() <= 5_000
+        assert deadline.can_fit(1_000)
+        assert not deadline.can_fit(10_000)
+        assert not deadline.expired()
+
+    def test_call_timeout_uses_share(self):
+        """Deadline: call timeout is a budget share."""
+        deadline = Deadline.after_ms(10_000)
+        assert deadline.call_timeout_s(0.5) <= 5.0
+
+    def test_exhausted_budget_raises(self):
+        """Deadline: no time left raises."""
+        deadline = Deadline.after_ms(10)
+        with pytest.raises(DeadlineExceeded):
+            deadline.call_timeout_s()
+
+    def test_from_request_unbounded(self, make_request):
+        """Deadline: no timeout means no deadline."""
+        assert Deadline.from_request(
+            make_request("Show orders")
+        ) is None
+
+
+class TestTimeBudgetedAgents:
+    """Tests for agents consulting the deadline."""
+
+    @pytest.mark.asyncio
+    async def test_llm_call_times_out(self):
+        """LLM: slow call raises DeadlineExceeded."""
+        agent = SQLGenerationAgent()
+        model = _slow_sql_model("SELECT 1", 2.0, [])
+        with agent._gen_agent.override(model=model):
+            with pytest.raises(DeadlineExceeded):
+                await agent._run_llm(
+                    agent._gen_agent, "q",
+                    deadline=Deadline.after_ms(400),
+                )
+
+    @pytest.mark.asyncio
+    async def test_critique_loop_stops_on_budget(self):
+        """
+        Loop: no retry when another round trip won't
+        fit in the remaining budget.
+        """
+        agent = SQLGenerationAgent()
+        calls = []
+        model = _slow_sql_model(
+            "DELETE FROM orders", 0.15, calls
+        )
+        with agent._gen_agent.override(model=model):
+            result = await agent._run_critique_loop(
+                "Show orders", "CREATE TABLE orders",
+                ["orders"],
+                deadline=Deadline.after_ms(350),
+            )
+        assert len(calls) == 1
+        assert result["attempt"] == 1
+        assert result["critique_history"][-1][
+            "action"
+        ] == "deadline_stop"
+
+    @pytest.mark.asyncio
+    async def test_entity_extraction_degrades(self):
+        """
+        Schema: near deadline uses keyword extraction
+        without an LLM call.
+        """
+        agent = SchemaIntelligenceAgent()
+        calls = []
+        model = _slow_sql_model("SELECT 1", 0, calls)
+        with agent._entity_agent.override(model=model):
+            entities = await agent._extract_entities(
+                "Show all orders", ["orders"],
+                deadline=Deadline.after_ms(100),
+            )
+        assert calls == []
+        assert entities.tables == ["orders"]
+
+    @pytest.mark.asyncio
+    async def test_orchestrator_enforces_deadline(
+        self, make_request,
+    ):
+        """
+        Orchestrator: pipeline is cut at the deadline.
+        """
+        orchestrator = OrchestratorAgent()
+        orchestrator.inject_agent(
+            "refinement", _SlowAgent()
+        )
+        request = make_request("Show orders")
+        request.timeout_ms = 200
+        response = await orchestrator.process_query(
+            request
+        )
+        assert response.success is False
+        assert "deadline" in response.error_message
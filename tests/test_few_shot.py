@@ -0,0 +1,240 @@
+"""
+Unit tests for the few-shot example store.
+
+Covers BM25 retrieval, table restriction, golden-query
+seeding, persistence and prompt injection / recording
+in SQLGenerationAgent. No LLM calls (FunctionModel
+fakes).
+"""
+
+import json
+import os
+
+import pytest
+
+from pydantic_ai.messages import (
+    ModelResponse,
+    ToolCallPart,
+)
+from pydantic_ai.models.function import FunctionModel
+
+from text_to_sql import db
+from text_to_sql.agents.few_shot import (
+    SOURCE_GOLDEN,
+    FewShotExample,
+    FewShotStore,
+    tokenize,
+)
+from text_to_sql.agents.sql_generation import (
+    SQLGenerationAgent,
+)
+
+
+SCHEMA = (
+    "CREATE TABLE customers (\n"
+    "    customer_id VARCHAR(20) PRIMARY KEY,\n"
+    "    customer_segment VARCHAR(20)\n"
+    ");\n\n"
+    "CREATE TABLE orders (\n"
+    "    order_id VARCHAR(30) PRIMARY KEY,\n"
+    "    customer_id VARCHAR(20),\n"
+    "    total_amount DECIMAL(12,2),\n"
+    "    FOREIGN KEY (customer_id) "
+    "REFERENCES customers(customer_id)\n"
+    ");"
+)
+
+
+@pytest.fixture
+def store():
+    """Store with three examples."""
+    return FewShotStore([
+        FewShotExample(
+            "How many orders were placed last month?",
+            "SELECT COUNT(*) FROM orders",
+            ["orders"],
+        ),
+        FewShotExample(
+            "Average order value by customer segment",
+            "SELECT c.customer_segment, AVG(o.total_amount) "
+            "FROM orders o JOIN customers c "
+            "ON o.customer_id = c.customer_id "
+            "GROUP BY c.customer_segment",
+            ["customers", "orders"],
+        ),
+        FewShotExample(
+            "Revenue by product category",
+            "SELECT p.category, SUM(oi.total_price) "
+            "FROM order_items oi JOIN products p "
+            "ON oi.product_id = p.product_id "
+            "GROUP BY p.category",
+            ["order_items", "products"],
+        ),
+    ])
+
+
+class TestFewShotStore:
+    """Tests for indexing and retrieval."""
+
+    def test_tokenize(self):
+        """Tokenize: stopwords dropped, plurals folded."""
+        assert tokenize("Show me all the Orders by status") == [
+            "order", "status",
+        ]
+
+    def test_best_match_first(self, store):
+        """Search: highest BM25 score ranks first."""
+        results = store.search(
+            "Average order value per segment",
+            ["customers", "orders"],
+        )
+        assert results[0].question.startswith("Average")
+
+    def test_restricted_to_selected_tables(self, store):
+        """Search: examples outside the tables excluded."""
+        results = store.search(
+            "Revenue by category", ["orders"],
+        )
+        assert results == []
+
+    def test_no_shared_terms(self, store):
+        """Search: unrelated question returns nothing."""
+        assert store.search(
+            "xyzzy", ["customers", "orders"],
+        ) == []
+
+    def test_duplicates_ignored(self, store):
+        """Add: same question and SQL stored once."""
+        assert not store.add(
+            "How many orders were placed last month?",
+            "select count(*)  from orders",
+            ["orders"],
+        )
+        assert len(store) == 3
+
+    def test_seeded_from_golden_queries(self):
+        """Seed: allowed golden queries with SQL."""
+        store = FewShotStore.from_golden_queries()
+        assert len(store) >= 10
+        example = store.search(
+            "Total revenue by product category",
+            ["order_items", "orders", "products"],
+        )[0]
+        assert example.source == SOURCE_GOLDEN
+        assert "GROUP BY" in example.sql
+
+    def test_persisted_examples_reloaded(self, tmp_path):
+        """Persist: added examples survive a reload."""
+        path = tmp_path / "examples.jsonl"
+        FewShotStore(path=path).add(
+            "Orders per customer",
+            "SELECT customer_id, COUNT(*) FROM orders "
+            "GROUP BY customer_id",
+            ["orders"],
+        )
+        reloaded = FewShotStore(path=path)
+        assert len(reloaded) == 1
+        assert reloaded.search(
+            "orders per customer", ["orders"]
+        )[0].tables == ["orders"]
+
+    def test_pruned_on_schema_change(self, tmp_path, monkeypatch):
+        """Schema: examples on dropped tables are removed."""
+        monkeypatch.setattr(db, "_schema_listeners", [])
+        ddl = tmp_path / "schema.sql"
+        ddl.write_text(
+            SCHEMA + "\nCREATE TABLE products (product_id INT);"
+        )
+        db.load_schema_ddl(ddl)
+        path = tmp_path / "examples.jsonl"
+        store = FewShotStore(path=path)
+        store.add("Orders", "SELECT COUNT(*) FROM orders", ["orders"])
+        store.add(
+            "Products", "SELECT COUNT(*) FROM products", ["products"]
+        )
+        ddl.write_text(SCHEMA, encoding="utf-8")
+        os.utime(ddl, ns=(2 * 10**9, 2 * 10**9))
+        db.load_schema_ddl(ddl)
+        assert len(store) == 1
+        assert store.search("products", ["products"]) == []
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["question"] for line in lines] == [
+            "Orders"
+        ]
+
+
+class TestFewShotGeneration:
+    """Tests for few-shot prompts in SQL Generation."""
+
+    @pytest.mark.asyncio
+    async def test_examples_injected_and_recorded(self, store):
+        """Generation: examples in prompt, SQL recorded."""
+        agent = SQLGenerationAgent(few_shot=store)
+        prompts = []
+
+        def fake_llm(messages, info):
+            prompts.append(messages[-1].parts[-1].content)
+            return ModelResponse(parts=[ToolCallPart(
+                info.output_tools[0].name,
+                {"sql": "SELECT COUNT(*) FROM orders "
+                        "WHERE customer_id = 'C1'"},
+            )])
+
+        with agent._gen_agent.override(
+            model=FunctionModel(fake_llm)
+        ):
+            result = await agent._run_critique_loop(
+                "How many orders did customer C1 place?",
+                SCHEMA, ["customers", "orders"],
+            )
+        assert result["critique_history"][-1][
+            "action"
+        ] == "accepted_static"
+        prompt = prompts[0]
+        assert "Verified SQL for similar questions" in prompt
+        assert prompt.index("placed last month") < (
+            prompt.index("customer C1")
+        )
+        assert "product_id" not in prompt
+        assert len(store) == 4
+
+    @pytest.mark.asyncio
+    async def test_unreviewed_not_recorded(self, store, monkeypatch):
+        """Generation: SQL accepted without critique not kept."""
+        agent = SQLGenerationAgent(few_shot=store)
+        monkeypatch.setattr(agent, "_llm_available", lambda: False)
+
+        def fake_llm(messages, info):
+            return ModelResponse(parts=[ToolCallPart(
+                info.output_tools[0].name,
+                {"sql": "SELECT o.order_id FROM orders o "
+                        "JOIN customers c "
+                        "ON o.order_id = c.customer_segment"},
+            )])
+
+        with agent._gen_agent.override(
+            model=FunctionModel(fake_llm)
+        ):
+            result = await agent._run_critique_loop(
+                "Orders matching a segment", SCHEMA,
+                ["customers", "orders"],
+            )
+        assert result["critique_history"][-1][
+            "action"
+        ] == "accepted_unreviewed"
+        assert result["final_sql"] is not None
+        assert len(store) == 3
+
+    def test_examples_fit_token_budget(self, store):
+        """Generation: examples over budget are dropped."""
+        agent = SQLGenerationAgent(few_shot=store)
+        assert agent._select_examples(
+            "Average order value by segment",
+            ["customers", "orders"],
+            agent._available_token_budget(0) - 10,
+        ) == []
+
+    def test_zero_shot_by_default(self, monkeypatch):
+        """Generation: no store unless configured."""
+        monkeypatch.delenv("SQL_FEW_SHOT", raising=False)
+        assert SQLGenerationAgent().few_shot is None
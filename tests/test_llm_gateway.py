@@ -0,0 +1,189 @@
+"""
+Unit tests for the shared LLM gateway.
+
+Covers token buckets, priority lanes, queueing metrics
+and agent integration. No network calls.
+"""
+
+import asyncio
+import time
+
+from types import SimpleNamespace
+
+import pytest
+
+from pydantic_ai.messages import (
+    ModelResponse,
+    ToolCallPart,
+)
+from pydantic_ai.models.function import FunctionModel
+
+from text_to_sql.agents.sql_generation import (
+    SQLGenerationAgent,
+)
+from text_to_sql.llm_gateway import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    LLMGateway,
+    TokenBucket,
+    get_gateway,
+)
+
+
+class TestTokenBucket:
+    """Tests for the token bucket."""
+
+    def test_starts_full(self):
+        """Bucket: full capacity is available."""
+        bucket = TokenBucket.per_minute(60)
+        assert bucket.wait_time(60) == 0.0
+
+    def test_debit_creates_wait(self):
+        """Bucket: empty bucket waits for refill."""
+        bucket = TokenBucket(10, refill_per_s=10)
+        bucket.debit(10)
+        assert 0.0 < bucket.wait_time(5) <= 0.5
+
+    def test_credit_capped(self):
+        """Bucket: credit never exceeds capacity."""
+        bucket = TokenBucket(10, refill_per_s=1)
+        bucket.credit(100)
+        assert bucket.available() == pytest.approx(10)
+
+
+class TestGatewayLimits:
+    """Tests for RPM/TPM enforcement and lanes."""
+
+    @pytest.mark.asyncio
+    async def test_rpm_limit_queues(self):
+        """Gateway: requests beyond RPM wait."""
+        gateway = LLMGateway(rpm=600, tpm=10_000)
+        gateway._requests = TokenBucket(1, 20)
+        await gateway.acquire(10, lane="a")
+        queue_ms = await gateway.acquire(10, lane="a")
+        assert queue_ms >= 30
+        stats = gateway.stats()["a"]
+        assert stats["requests"] == 2
+        assert stats["queued"] == 1
+
+    @pytest.mark.asyncio
+    async def test_high_priority_served_first(self):
+        """Gateway: high-priority lane jumps queue."""
+        gateway = LLMGateway(
+            lane_priorities={
+                "batch": PRIORITY_LOW,
+                "interactive": PRIORITY_HIGH,
+            },
+        )
+        gateway._requests = TokenBucket(1, 20)
+        await gateway.acquire(1, lane="warmup")
+        order = []
+
+        async def _take(lane):
+            await gateway.acquire(1, lane=lane)
+            order.append(lane)
+
+        low = asyncio.create_task(_take("batch"))
+        await asyncio.sleep(0)
+        high = asyncio.create_task(_take("interactive"))
+        await asyncio.gather(low, high)
+        assert order == ["interactive", "batch"]
+
+    def test_settle_credits_unused_tokens(self):
+        """Gateway: over-estimate is returned."""
+        gateway = LLMGateway(tpm=1_000)
+        gateway.acquire_sync(800, lane="a")
+        gateway.settle(800, 200, lane="a")
+        assert gateway._tokens.available() >= 799
+        assert gateway.stats()["a"]["used_tokens"] == 200
+
+    def test_failed_completion_refunded(self, monkeypatch):
+        """Gateway: a failed request returns its reservation."""
+        gateway = LLMGateway(tpm=1_000)
+
+        def create(**kwargs):
+            raise RuntimeError("503")
+
+        client = SimpleNamespace(chat=SimpleNamespace(
+            completions=SimpleNamespace(create=create)
+        ))
+        monkeypatch.setattr(gateway, "sync_client", lambda: client)
+        with pytest.raises(RuntimeError):
+            gateway.chat_completion(
+                lane="a", output_estimate=800,
+                messages=[{"role": "user", "content": "hi"}],
+            )
+        assert gateway._tokens.available() >= 999
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        """Gateway: abandoned ticket doesn't block."""
+        gateway = LLMGateway()
+        gateway._requests = TokenBucket(1, 0.1)
+        await gateway.acquire(1)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                gateway.acquire(1), timeout=0.05
+            )
+        assert gateway._queue == []
+
+
+class TestAgentIntegration:
+    """Tests for agents routing through the gateway."""
+
+    def test_agents_share_client(self):
+        """Gateway: agents reuse one HTTP client."""
+        first = SQLGenerationAgent()
+        second = SQLGenerationAgent()
+        assert first._gateway is get_gateway()
+        assert (
+            first._gen_agent.model.client
+            is second._critique_agent.model.client
+        )
+
+    @pytest.mark.asyncio
+    async def test_llm_call_recorded_in_lane(self):
+        """Gateway: agent calls appear in lane stats."""
+        agent = SQLGenerationAgent()
+        agent._gateway = LLMGateway()
+
+        def fake_llm(messages, info):
+            return ModelResponse(parts=[ToolCallPart(
+                info.output_tools[0].name,
+                {"sql": "SELECT 1", "confidence": 0.9},
+            )])
+
+        start = time.monotonic()
+        with agent._gen_agent.override(
+            model=FunctionModel(fake_llm)
+        ):
+            await agent._run_llm(agent._gen_agent, "q")
+        assert time.monotonic() - start < 1
+        stats = agent._gateway.stats()["SQL Generation"]
+        assert stats["requests"] == 1
+        assert stats["used_tokens"] > 0
+
+    @pytest.mark.asyncio
+    async def test_usage_recorded_per_model(self):
+        """Gateway: usage is split by the model called."""
+        agent = SQLGenerationAgent()
+        agent._gateway = LLMGateway()
+
+        def fake_llm(messages, info):
+            return ModelResponse(parts=[ToolCallPart(
+                info.output_tools[0].name,
+                {"sql": "SELECT 1"},
+            )])
+
+        with agent._gen_agent.override(
+            model=FunctionModel(fake_llm)
+        ):
+            await agent._run_llm(agent._gen_agent, "q")
+            await agent._run_llm(
+                agent._gen_agent, "q",
+                model="openai:gpt-4o",
+            )
+        usage = agent._gateway.usage_by_model()
+        assert usage[agent.model]["requests"] == 1
+        assert usage["openai:gpt-4o"]["requests"] == 1
+        assert usage["openai:gpt-4o"]["input_tokens"] > 0
@@ -0,0 +1,163 @@
+"""
+Unit tests for the model registry.
+
+Covers spec lookup and provider defaults, shared
+tiktoken / approximate token counters, config file
+overrides, the MODEL_CONTEXT_WINDOWS view and model-
+aware context budgets in the agents.
+"""
+
+import json
+
+import pytest
+
+from text_to_sql.agents import base as base_mod
+from text_to_sql.agents.routing import estimate_cost
+from text_to_sql.agents.schema_intelligence import (
+    SchemaIntelligenceAgent,
+)
+from text_to_sql.model_registry import (
+    DEFAULT_CONTEXT_WINDOW,
+    ApproxTokenCounter,
+    ModelRegistry,
+    ModelSpec,
+    TiktokenCounter,
+    get_counter,
+    get_registry,
+    set_registry,
+)
+
+
+class TestLookup:
+    """
+    Specs of registered and unlisted models.
+    """
+
+    def test_builtin_spec(self):
+        """Lookup: built-in models carry their window."""
+        spec = get_registry().get("openai:gpt-4o")
+        assert spec.context_window == 128_000
+        assert spec.tokenizer == "o200k_base"
+
+    def test_provider_default(self):
+        """Lookup: unlisted models use provider defaults."""
+        spec = get_registry().get("anthropic:claude-new")
+        assert spec.name == "anthropic:claude-new"
+        assert spec.context_window == 200_000
+        assert spec.tokenizer is None
+
+    def test_unknown_provider(self):
+        """Lookup: an unknown provider gets the fallback."""
+        spec = get_registry().get("acme:model")
+        assert spec.context_window == DEFAULT_CONTEXT_WINDOW
+        assert get_registry().lookup("acme:model") is None
+
+
+class TestCounters:
+    """
+    Shared token counters.
+    """
+
+    def test_shared_instance(self):
+        """Counter: one instance per tokenizer."""
+        registry = get_registry()
+        assert registry.counter("openai:gpt-4o") is (
+            registry.counter("openai:gpt-4o-mini")
+        )
+        assert isinstance(
+            registry.counter("openai:gpt-4o"), TiktokenCounter
+        )
+        assert get_counter(None) is get_counter(None)
+
+    def test_approximate_counter(self):
+        """Counter: models without a tokenizer estimate."""
+        registry = get_registry()
+        assert isinstance(
+            registry.counter("anthropic:claude-sonnet-4-0"),
+            ApproxTokenCounter,
+        )
+        assert registry.count_tokens(
+            "x" * 32, "anthropic:claude-sonnet-4-0"
+        ) == 10
+
+    def test_approximation_errs_high(self):
+        """Counter: the estimate is not below tiktoken."""
+        ddl = (
+            "CREATE TABLE orders (\n"
+            "    order_id VARCHAR(30) PRIMARY KEY,\n"
+            "    customer_id VARCHAR(20),\n"
+            "    total_amount DECIMAL(12,2)\n"
+            ");"
+        )
+        exact = TiktokenCounter("o200k_base").count(ddl)
+        assert ApproxTokenCounter().count(ddl) >= exact
+
+
+class TestConfig:
+    """
+    Specs overridden / extended by a config file.
+    """
+
+    def test_from_file(self, tmp_path):
+        """Config: entries override and extend built-ins."""
+        path = tmp_path / "models.json"
+        path.write_text(json.dumps({"models": [
+            {"name": "openai:gpt-4o", "context_window": 64_000},
+            {"name": "local:llama", "context_window": 32_000,
+             "tokenizer": "cl100k_base"},
+        ]}))
+        registry = ModelRegistry.from_file(path)
+        spec = registry.get("openai:gpt-4o")
+        assert spec.context_window == 64_000
+        assert spec.input_price_per_1m == 2.50
+        assert registry.get("local:llama").tokenizer == (
+            "cl100k_base"
+        )
+
+    def test_from_env(self, tmp_path, monkeypatch):
+        """Config: MODEL_REGISTRY_FILE is read on first use."""
+        path = tmp_path / "models.json"
+        path.write_text(json.dumps({"models": [
+            {"name": "local:llama", "context_window": 32_000},
+        ]}))
+        monkeypatch.setenv("MODEL_REGISTRY_FILE", str(path))
+        set_registry(None)
+        assert get_registry().get("local:llama").context_window == (
+            32_000
+        )
+
+    def test_prices_in_cost(self):
+        """Config: estimate_cost uses registered prices."""
+        set_registry(ModelRegistry([
+            ModelSpec("local:llama", input_price_per_1m=1.0),
+        ]))
+        assert estimate_cost({
+            "local:llama": {"input_tokens": 1_000_000},
+        }) == pytest.approx(1.0)
+
+
+class TestAgentBudget:
+    """
+    Context budgets follow the agent's model.
+    """
+
+    def test_context_windows_view(self):
+        """View: writes register the model's spec."""
+        windows = base_mod.MODEL_CONTEXT_WINDOWS
+        assert windows["openai:gpt-4o-mini"] == 128_000
+        windows["anthropic:claude-new"] = 100_000
+        spec = get_registry().get("anthropic:claude-new")
+        assert spec.context_window == 100_000
+        assert spec.output_reserve == 8192
+        assert "acme:model" not in windows
+
+    def test_large_window_budget(self):
+        """Budget: a 200k model is not held to 128k."""
+        agent = SchemaIntelligenceAgent()
+        agent.model = "anthropic:claude-sonnet-4-0"
+        assert agent._available_token_budget(1000) == (
+            200_000 - 1000 - 8192
+        )
+        assert agent._available_token_budget(
+            1000, model="openai:gpt-4o"
+        ) == 128_000 - 1000 - 4096
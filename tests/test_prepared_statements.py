@@ -0,0 +1,272 @@
+"""
+Unit tests for the prepared-statement cache.
+
+Covers statement reuse per connection, LRU
+deallocation, the plain-SQL fallbacks and the db
+execution hook. No database (fake connections that
+keep prepared statements like a server session).
+"""
+
+import gc
+
+import psycopg2
+import psycopg2.extensions
+import pytest
+
+from text_to_sql import db
+from text_to_sql.db_pool import ConnectionPool
+from text_to_sql.prepared_statements import (
+    PreparedStatementCache,
+    get_prepared_cache,
+    set_prepared_cache,
+)
+
+
+class _PgError(psycopg2.Error):
+    """psycopg2 error with a SQLSTATE."""
+
+    def __init__(self, sqlstate):
+        super().__init__(sqlstate)
+        self.sqlstate = sqlstate
+
+    @property
+    def pgcode(self):
+        return self.sqlstate
+
+
+class _Cursor:
+    """Cursor stand-in running PREPARE / EXECUTE batches."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.description = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        self.conn.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        for statement in sql.split(";\n"):
+            self.conn.executed.append(statement)
+            self._run(statement)
+
+    def _run(self, statement):
+        word, _, rest = statement.partition(" ")
+        prepared = self.conn.prepared
+        if word == "SET":
+            return
+        if word == "DEALLOCATE":
+            if prepared.pop(rest.rstrip(";"), None) is None:
+                raise _PgError("26000")
+            return
+        if word == "PREPARE":
+            if "unpreparable" in rest:
+                raise _PgError("42P18")
+            prepared[rest.split(" ")[0]] = rest
+            return
+        if word == "EXECUTE":
+            if rest.split(" ")[0] not in prepared:
+                raise _PgError("26000")
+            if self.conn.fail_execute:
+                raise _PgError(self.conn.fail_execute)
+        self.description = [("n",)]
+
+    def fetchall(self):
+        return [{"n": 1}]
+
+
+class _Connection:
+    """psycopg2 connection stand-in with a statement table."""
+
+    def __init__(self):
+        self.closed = 0
+        self.executed = []
+        self.prepared = {}
+        self.fail_execute = None
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def cursor(self, cursor_factory=None):
+        return _Cursor(self)
+
+    def commit(self):
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    """Single fake connection behind the write pool."""
+    opened = []
+
+    def connect():
+        opened.append(_Connection())
+        return opened[-1]
+
+    monkeypatch.setattr(
+        db, "_pool", ConnectionPool(connect, min_size=0, max_size=1)
+    )
+    return opened
+
+
+@pytest.fixture
+def cache():
+    """Process-wide cache of 2 statements per connection."""
+    cache = PreparedStatementCache(max_statements=2)
+    set_prepared_cache(cache)
+    return cache
+
+
+class TestPreparedStatementCache:
+    """
+    Statements by skeleton, per connection.
+    """
+
+    def test_prepare_then_execute(self):
+        """Cache: first use prepares, repeats only execute."""
+        cache = PreparedStatementCache()
+        conn = _Connection()
+        first = cache.call(conn, "SELECT * FROM t WHERE a = 'x' LIMIT 5")
+        assert first.prepare == (
+            f"PREPARE {first.name} (unknown) AS "
+            f"SELECT * FROM t WHERE a = $1 LIMIT 5"
+        )
+        assert first.execute == f"EXECUTE {first.name} ('x')"
+        again = cache.call(conn, "select * from t where a = 'y' limit 5")
+        assert again.prepare is None
+        assert again.execute == f"EXECUTE {first.name} ('y')"
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_keyed_by_types(self):
+        """Cache: one statement per parameter type list."""
+        cache = PreparedStatementCache()
+        conn = _Connection()
+        calls = [
+            cache.call(conn, f"SELECT * FROM t WHERE price > {value}")
+            for value in ("10", "10.5", "3000000000", "11")
+        ]
+        assert [c.prepare.split(" AS ")[0] for c in calls[:3]] == [
+            f"PREPARE {calls[0].name} (integer)",
+            f"PREPARE {calls[1].name} (numeric)",
+            f"PREPARE {calls[2].name} (bigint)",
+        ]
+        assert len({c.name for c in calls[:3]}) == 3
+        assert calls[3].prepare is None
+        assert calls[3].name == calls[0].name
+        assert calls[1].execute == f"EXECUTE {calls[1].name} (10.5)"
+
+    def test_per_connection(self):
+        """Cache: each session prepares its own statement."""
+        cache = PreparedStatementCache()
+        conn, other = _Connection(), _Connection()
+        first = cache.call(conn, "SELECT 1")
+        second = cache.call(other, "SELECT 1")
+        assert second.prepare is not None
+        assert second.name != first.name
+        del other
+        gc.collect()
+        assert cache.stats()["connections"] == 1
+
+    def test_lru_deallocate(self):
+        """Cache: the least recently used statement goes."""
+        cache = PreparedStatementCache(max_statements=2)
+        conn = _Connection()
+        a = cache.call(conn, "SELECT a FROM t")
+        b = cache.call(conn, "SELECT b FROM t")
+        cache.call(conn, "SELECT a FROM t")
+        c = cache.call(conn, "SELECT c FROM t")
+        assert c.prepare.startswith(f"DEALLOCATE {b.name};\nPREPARE")
+        assert cache.call(conn, "SELECT a FROM t").name == a.name
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["statements"] == 2
+
+    def test_not_parameterizable(self):
+        """Cache: writes and bind parameters run as is."""
+        cache = PreparedStatementCache()
+        conn = _Connection()
+        assert cache.call(conn, "DELETE FROM t WHERE id = 1") is None
+        assert cache.call(conn, "SELECT * FROM t WHERE a = %s") is None
+        assert cache.stats()["skipped"] == 2
+
+    def test_env(self, monkeypatch):
+        """Cache: off unless SQL_PREPARED_STATEMENTS is set."""
+        assert get_prepared_cache() is None
+        monkeypatch.setenv("SQL_PREPARED_STATEMENTS", "1")
+        monkeypatch.setenv("SQL_PREPARED_CACHE_SIZE", "7")
+        assert get_prepared_cache().max_statements == 7
+
+
+class TestExecuteHook:
+    """
+    db.execute_query through prepared statements.
+    """
+
+    def test_reused_across_literals(self, fake_pool, cache):
+        """Hook: one PREPARE, then EXECUTE per query."""
+        for sku in ("P001", "P002", "P003"):
+            assert db.execute_query(
+                f"SELECT n FROM products WHERE sku = '{sku}'",
+                timeout_ms=1000,
+            ) == [{"n": 1}]
+        executed = fake_pool[0].executed
+        assert [s.split(" ")[0] for s in executed] == [
+            "PREPARE", "SET", "EXECUTE", "SET", "EXECUTE", "SET", "EXECUTE",
+        ]
+        assert executed[-1].endswith("('P003')")
+        assert cache.stats()["hits"] == 2
+
+    def test_unpreparable_falls_back(self, fake_pool, cache):
+        """Hook: a skeleton that fails to prepare runs plain."""
+        sql = "SELECT n FROM t WHERE unpreparable = 1"
+        assert db.execute_query(sql) == [{"n": 1}]
+        assert db.execute_query(sql) == [{"n": 1}]
+        assert fake_pool[0].executed[-1] == sql
+        stats = cache.stats()
+        assert stats["fallbacks"] == 1
+        assert stats["skipped"] == 1
+        assert stats["unpreparable"] == 1
+
+    def test_lost_statement_reprepared(self, fake_pool, cache):
+        """Hook: a statement gone on the server is re-prepared."""
+        sql = "SELECT n FROM t WHERE a = 1"
+        db.execute_query(sql)
+        fake_pool[0].prepared.clear()
+        assert db.execute_query(sql) == [{"n": 1}]
+        assert fake_pool[0].executed[-1] == sql
+        db.execute_query(sql)
+        assert fake_pool[0].executed[-2].startswith("PREPARE")
+        assert cache.stats()["fallbacks"] == 1
+
+    def test_stale_plan_deallocated(self, fake_pool, cache):
+        """Hook: a statement whose plan went stale is dropped."""
+        sql = "SELECT n FROM t WHERE a = 1"
+        db.execute_query(sql)
+        conn = fake_pool[0]
+        [name] = conn.prepared
+        conn.fail_execute = "0A000"
+        assert db.execute_query(sql) == [{"n": 1}]
+        conn.fail_execute = None
+        db.execute_query(sql)
+        assert conn.executed[-3] == f"DEALLOCATE {name}"
+        assert conn.executed[-2].startswith("PREPARE")
+        assert name not in conn.prepared
+        assert len(conn.prepared) == 1
+
+    def test_query_errors_raised(self, fake_pool, cache):
+        """Hook: errors of the query itself are not retried."""
+        db.execute_query("SELECT n FROM t WHERE a = 1")
+        fake_pool[0].fail_execute = "57014"
+        with pytest.raises(psycopg2.Error):
+            db.execute_query("SELECT n FROM t WHERE a = 2")
+        assert cache.stats()["fallbacks"] == 0
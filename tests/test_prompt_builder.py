@@ -0,0 +1,141 @@
+"""
+Unit tests for cache-friendly prompt assembly.
+
+Covers canonical schema ordering, the stable-first
+layout of SQL Generation prompts and cached-token
+accounting (gateway, usage log, cost). No LLM calls.
+"""
+
+import pytest
+
+from text_to_sql import usage_tracker
+from text_to_sql.agents.routing import estimate_cost
+from text_to_sql.agents.sql_generation import (
+    SQLGenerationAgent,
+)
+from text_to_sql.agents.types import TurnRecord
+from text_to_sql.llm_gateway import LLMGateway
+from text_to_sql.prompts.builder import (
+    PromptBuilder,
+    canonical_schema,
+)
+
+
+ORDERS = "CREATE TABLE orders (\n    order_id INT\n);"
+CUSTOMERS = "CREATE TABLE customers (\n    customer_id INT\n);"
+
+
+class TestPromptBuilder:
+    """Tests for PromptBuilder and canonical_schema."""
+
+    def test_schema_blocks_sorted(self):
+        """Schema: CREATE TABLE blocks ordered by name."""
+        assert canonical_schema(
+            f"{ORDERS}\n\n{CUSTOMERS}"
+        ) == canonical_schema(f"{CUSTOMERS}\n\n{ORDERS}")
+        assert canonical_schema(
+            f"{ORDERS}\n\n{CUSTOMERS}"
+        ).startswith("CREATE TABLE customers")
+
+    def test_schema_without_tables_unchanged(self):
+        """Schema: free text is passed through."""
+        assert canonical_schema("orders(id)") == "orders(id)"
+
+    def test_stable_parts_first(self):
+        """Layout: variable parts follow stable ones."""
+        builder = (
+            PromptBuilder()
+            .variable("Question: q")
+            .schema(ORDERS)
+            .tables(["orders", "customers"])
+        )
+        prompt = builder.build()
+        assert prompt.startswith(builder.prefix)
+        assert prompt.endswith("Question: q")
+        assert "Available tables: customers, orders" in (
+            builder.prefix
+        )
+
+
+class TestSQLGenerationLayout:
+    """Tests for the generation / critique prompts."""
+
+    @pytest.mark.parametrize("kwargs", [
+        {},
+        {"fused": True},
+        {"prior_turn": TurnRecord(
+            question="Orders per customer",
+            final_sql="SELECT 1",
+        )},
+    ])
+    def test_generation_shares_prefix(self, kwargs):
+        """Generation: questions differ after the prefix."""
+        first = SQLGenerationAgent._build_generation_prompt(
+            "How many orders?", f"{ORDERS}\n\n{CUSTOMERS}",
+            ["orders", "customers"], None, **kwargs,
+        )
+        second = SQLGenerationAgent._build_generation_prompt(
+            "Orders last week", f"{CUSTOMERS}\n\n{ORDERS}",
+            ["customers", "orders"],
+            {"critique": "wrong column"}, **kwargs,
+        )
+        prefix_len = first.index("How many orders?")
+        assert second[:prefix_len] == first[:prefix_len]
+        assert "Orders last week" not in first
+
+    def test_critique_checklist_before_sql(self):
+        """Critique: checklist is part of the prefix."""
+        prompt = SQLGenerationAgent._build_critique_prompt(
+            "SELECT 1", ORDERS, "How many orders?"
+        )
+        assert prompt.index("Check:") < prompt.index(
+            "How many orders?"
+        )
+        assert prompt.endswith("SELECT 1")
+
+
+class TestCachedTokenAccounting:
+    """Tests for cached input token accounting."""
+
+    def test_gateway_counts_cached_tokens(self):
+        """Gateway: cached input tokens per model."""
+        gateway = LLMGateway()
+        gateway.record_usage("m", 2000, 10, cached_input_tokens=1024)
+        gateway.record_usage("m", 2000, 10)
+        usage = gateway.usage_by_model()["m"]
+        assert usage["input_tokens"] == 4000
+        assert usage["cached_input_tokens"] == 1024
+
+    def test_cached_tokens_discounted(self):
+        """Cost: cached input billed at a discount."""
+        full = estimate_cost({"openai:gpt-4o-mini": {
+            "input_tokens": 1_000_000, "output_tokens": 0,
+        }})
+        cached = estimate_cost({"openai:gpt-4o-mini": {
+            "input_tokens": 1_000_000, "output_tokens": 0,
+            "cached_input_tokens": 1_000_000,
+        }})
+        assert cached < full
+
+    @pytest.mark.parametrize("usage", [
+        {"input_tokens": 2000, "output_tokens": 5,
+         "cached_input_tokens": 1152},
+        {"prompt_tokens": 2000, "completion_tokens": 5,
+         "total_tokens": 2005,
+         "prompt_tokens_details": {"cached_tokens": 1152}},
+    ])
+    def test_usage_log_records_cached_tokens(
+        self, usage, monkeypatch
+    ):
+        """Usage log: cached tokens from either shape."""
+        entries = []
+        monkeypatch.setattr(
+            usage_tracker, "_write_entry", entries.append
+        )
+        usage_tracker.log_llm_response(
+            request_id="r-001", model="m", question="q",
+            usage=usage, generated_sql="SELECT 1",
+        )
+        logged = entries[0]["usage"]
+        assert logged["cached_tokens"] == 1152
+        assert logged["prompt_tokens"] == 2000
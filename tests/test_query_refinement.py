@@ -10,6 +10,7 @@ import pytest
 from text_to_sql.agents.query_refinement import (
     QueryRefinementAgent,
 )
+from text_to_sql.agents.types import TurnRecord
 
 
 @pytest.fixture
@@ -312,3 +313,92 @@ async def test_sql_injection_in_nl_blocked(
         context={"reference_date": reference_date},
     )
     assert result["valid"] is False
+
+
+# --- Turn-aware follow-up detection ---
+
+
+@pytest.mark.asyncio
+async def test_follow_up_detected_with_prior_turn(
+    agent, make_request, reference_date,
+):
+    """Follow-up: 'now only for' edits prior turn."""
+    prior = TurnRecord(
+        question="Show total revenue by country",
+        selected_tables=["orders"],
+        final_sql="SELECT 1 FROM orders",
+    )
+    request = make_request("Now only for Germany")
+    result = await agent.execute(
+        request=request,
+        previous_results={},
+        context={
+            "reference_date": reference_date,
+            "turns": [prior],
+        },
+    )
+    assert result["follow_up"]["is_follow_up"] is True
+    assert "now only" in result["follow_up"]["markers"]
+
+
+@pytest.mark.asyncio
+async def test_follow_up_requires_prior_turn(
+    agent, make_request, reference_date,
+):
+    """Follow-up: no prior turn means new question."""
+    request = make_request("Same but last quarter")
+    result = await agent.execute(
+        request=request,
+        previous_results={},
+        context={"reference_date": reference_date},
+    )
+    assert result["follow_up"]["is_follow_up"] is False
+
+
+@pytest.mark.asyncio
+async def test_new_question_not_follow_up(
+    agent, make_request, reference_date,
+):
+    """Follow-up: unrelated question is not a follow-up."""
+    prior = TurnRecord(
+        question="Show total revenue by country",
+        final_sql="SELECT 1 FROM orders",
+    )
+    request = make_request(
+        "List all warehouses with their capacity"
+    )
+    result = await agent.execute(
+        request=request,
+        previous_results={},
+        context={
+            "reference_date": reference_date,
+            "turns": [prior],
+        },
+    )
+    assert result["follow_up"]["is_follow_up"] is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("question", [
+    "Show the top brand for each category and for each region",
+    "Which products are commonly in stock in our warehouses",
+    "List suppliers who only in practice ship to Europe and Asia",
+    "Exclude nothing and list every warehouse with its capacity",
+])
+async def test_fresh_question_with_marker_not_follow_up(
+    agent, make_request, reference_date, question,
+):
+    """Follow-up: substrings and long fresh questions miss."""
+    prior = TurnRecord(
+        question="Show total revenue by country",
+        final_sql="SELECT 1 FROM orders",
+    )
+    result = await agent.execute(
+        request=make_request(question),
+        previous_results={},
+        context={
+            "reference_date": reference_date,
+            "turns": [prior],
+        },
+    )
+    assert result["follow_up"]["is_follow_up"] is False
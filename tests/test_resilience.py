@@ -0,0 +1,259 @@
+"""
+Unit tests for hedged LLM calls and the provider
+circuit breaker.
+
+Uses the simulated_llm fixture (FunctionModel with
+scripted latency / failures) in place of a real LLM.
+"""
+
+import time
+
+import pytest
+
+from text_to_sql.agents.schema_intelligence import (
+    SchemaIntelligenceAgent,
+)
+from text_to_sql.agents.sql_generation import (
+    SQLGenerationAgent,
+)
+from text_to_sql.llm_resilience import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+)
+
+
+SQL_OUTPUT = {"sql": "SELECT 1 FROM orders", "confidence": 0.9}
+
+
+def _warm(agent, lane: str, latency_ms: float) -> None:
+    """Seed a lane's latency history."""
+    tracker = agent._gateway.latency(lane)
+    for _ in range(tracker.min_samples):
+        tracker.record(latency_ms)
+
+
+def _trip(agent) -> None:
+    """Force the shared breaker open."""
+    breaker = agent._gateway.breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+class TestLatencyTracker:
+    """Tests for p95 tracking."""
+
+    def test_no_percentile_below_min_samples(self):
+        """Tracker: too few samples, no hedge delay."""
+        tracker = LatencyTracker(min_samples=5)
+        tracker.record(100)
+        assert tracker.hedge_delay_s() is None
+
+    def test_p95(self):
+        """Tracker: nearest-rank p95."""
+        tracker = LatencyTracker(min_samples=1)
+        for ms in range(1, 101):
+            tracker.record(ms)
+        assert tracker.percentile(95) == 95
+        assert tracker.hedge_delay_s() == 0.095
+
+
+class TestCircuitBreaker:
+    """Tests for circuit state transitions."""
+
+    def test_opens_after_threshold(self):
+        """Breaker: consecutive failures open it."""
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure()
+        assert breaker.state == CIRCUIT_CLOSED
+        breaker.record_failure()
+        assert breaker.state == CIRCUIT_OPEN
+        assert breaker.is_open()
+        assert not breaker.allow()
+
+    def test_half_open_single_probe(self):
+        """Breaker: one probe after recovery."""
+        breaker = CircuitBreaker(
+            failure_threshold=1, recovery_timeout_s=0.01
+        )
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.state == CIRCUIT_HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CIRCUIT_CLOSED
+
+    def test_failed_probe_reopens(self):
+        """Breaker: failed probe re-opens."""
+        breaker = CircuitBreaker(
+            failure_threshold=1, recovery_timeout_s=0.01
+        )
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CIRCUIT_OPEN
+
+
+class TestHedging:
+    """Tests for hedged LLM calls."""
+
+    @pytest.mark.asyncio
+    async def test_slow_call_is_hedged(self, simulated_llm):
+        """Hedge: duplicate wins over a stalled call."""
+        agent = SQLGenerationAgent()
+        _warm(agent, "SQL Generation", 20)
+        model, calls = simulated_llm(SQL_OUTPUT, [2.0, 0.01])
+        start = time.monotonic()
+        with agent._gen_agent.override(model=model):
+            result = await agent._run_llm(
+                agent._gen_agent, "q"
+            )
+        assert time.monotonic() - start < 1
+        assert result.output.sql == SQL_OUTPUT["sql"]
+        assert len(calls) == 2
+        stats = agent._gateway.stats()["SQL Generation"]
+        assert stats["hedged"] == 1
+        assert stats["hedge_wins"] == 1
+
+    @pytest.mark.asyncio
+    async def test_loser_recorded_and_refunded(
+        self, simulated_llm, monkeypatch,
+    ):
+        """Hedge: the cancelled call keeps its latency."""
+        agent = SQLGenerationAgent()
+        _warm(agent, "SQL Generation", 20)
+        tracker = agent._gateway.latency("SQL Generation")
+        settled = []
+        settle = agent._gateway.settle
+        monkeypatch.setattr(
+            agent._gateway, "settle",
+            lambda reserved, used, lane: (
+                settled.append(used),
+                settle(reserved, used, lane),
+            ),
+        )
+        model, _ = simulated_llm(SQL_OUTPUT, [2.0, 0.2])
+        with agent._gen_agent.override(model=model):
+            await agent._run_llm(agent._gen_agent, "q")
+        samples = sorted(tracker._samples)
+        assert len(samples) == tracker.min_samples + 2
+        assert samples[-2] >= 200
+        assert 0 in settled
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_without_history(
+        self, simulated_llm,
+    ):
+        """Hedge: cold lane sends a single request."""
+        agent = SQLGenerationAgent()
+        model, calls = simulated_llm(SQL_OUTPUT, [0.05])
+        with agent._gen_agent.override(model=model):
+            await agent._run_llm(agent._gen_agent, "q")
+        assert len(calls) == 1
+
+
+class TestCircuitBreakerIntegration:
+    """Tests for agents degrading on an open circuit."""
+
+    @pytest.mark.asyncio
+    async def test_failures_open_circuit(
+        self, simulated_llm,
+    ):
+        """Breaker: optional calls refused once open."""
+        agent = SQLGenerationAgent()
+        agent._gateway.breaker = CircuitBreaker(
+            failure_threshold=2
+        )
+        model, calls = simulated_llm(
+            SQL_OUTPUT, [RuntimeError("503")]
+        )
+        with agent._gen_agent.override(model=model):
+            for _ in range(2):
+                with pytest.raises(RuntimeError):
+                    await agent._run_llm(
+                        agent._gen_agent, "q"
+                    )
+            with pytest.raises(CircuitOpenError):
+                await agent._run_llm(
+                    agent._gen_agent, "q", optional=True
+                )
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_inner_timeout_without_deadline(
+        self, simulated_llm,
+    ):
+        """Breaker: a call's own timeout is re-raised."""
+        agent = SQLGenerationAgent()
+        agent._gateway.breaker = CircuitBreaker(
+            failure_threshold=1
+        )
+        model, _ = simulated_llm(
+            SQL_OUTPUT, [TimeoutError("read timeout")]
+        )
+        with agent._gen_agent.override(model=model):
+            with pytest.raises(TimeoutError, match="read timeout"):
+                await agent._run_llm(agent._gen_agent, "q")
+        assert agent._gateway.breaker.state == CIRCUIT_OPEN
+
+    @pytest.mark.asyncio
+    async def test_essential_call_probes(self, simulated_llm):
+        """Breaker: an essential call closes a half-open circuit."""
+        agent = SQLGenerationAgent()
+        agent._gateway.breaker = CircuitBreaker(
+            failure_threshold=1, recovery_timeout_s=0.01
+        )
+        _trip(agent)
+        time.sleep(0.02)
+        model, calls = simulated_llm(SQL_OUTPUT, [0])
+        with agent._gen_agent.override(model=model):
+            await agent._run_llm(agent._gen_agent, "q")
+        assert len(calls) == 1
+        assert agent._gateway.breaker.state == CIRCUIT_CLOSED
+
+    @pytest.mark.asyncio
+    async def test_schema_uses_keywords_when_open(
+        self, simulated_llm,
+    ):
+        """Schema: open circuit skips LLM extraction."""
+        agent = SchemaIntelligenceAgent()
+        _trip(agent)
+        model, calls = simulated_llm(SQL_OUTPUT, [0])
+        with agent._entity_agent.override(model=model):
+            entities = await agent._extract_entities(
+                "Show all orders", ["orders"],
+            )
+        assert calls == []
+        assert entities.tables == ["orders"]
+
+    @pytest.mark.asyncio
+    async def test_critique_skipped_when_open(
+        self, simulated_llm,
+    ):
+        """Generation: open circuit skips critique."""
+        agent = SQLGenerationAgent()
+        _trip(agent)
+        gen_model, gen_calls = simulated_llm(
+            SQL_OUTPUT, [0]
+        )
+        critique_model, critique_calls = simulated_llm(
+            {"is_valid": True}, [0]
+        )
+        with agent._gen_agent.override(model=gen_model):
+            with agent._critique_agent.override(
+                model=critique_model
+            ):
+                result = await agent._run_critique_loop(
+                    "Show orders", "CREATE TABLE orders",
+                    ["orders"],
+                )
+        assert len(gen_calls) == 1
+        assert critique_calls == []
+        assert result["critique_history"][-1][
+            "action"
+        ] == "accepted_unreviewed"
@@ -0,0 +1,265 @@
+"""
+Unit tests for the query result cache.
+
+Covers keys (normalized SQL + role), TTL and byte
+budget eviction, table invalidation, compression and
+the execute_query integration (fake pooled
+connections, no database).
+"""
+
+import time
+
+import psycopg2.extensions
+import pytest
+
+from text_to_sql import db
+from text_to_sql.db_pool import ConnectionPool
+from text_to_sql.result_cache import (
+    ResultCache,
+    get_result_cache,
+    read_tables,
+    set_result_cache,
+    written_tables,
+)
+
+
+SQL = "SELECT id, name FROM products WHERE price > 10"
+ROWS = [{"id": 1, "name": "bolt"}, {"id": 2, "name": "nut"}]
+
+
+def _cached(cache, sql, rows, role="analyst"):
+    """Look up, then store rows on a miss."""
+    lookup = cache.lookup(sql, role)
+    if lookup.rows is None:
+        cache.store(lookup, rows)
+    return lookup
+
+
+class TestTables:
+    """
+    Tables read and written by a statement.
+    """
+
+    def test_read_tables_nested(self):
+        """Tables: subqueries and schemas are covered."""
+        sql = (
+            "SELECT * FROM mfg_ecommerce.orders o "
+            "WHERE o.id IN (SELECT order_id FROM order_items) "
+            "AND EXISTS (SELECT 1 FROM customers)"
+        )
+        assert read_tables(sql) == [
+            "customers", "order_items", "orders",
+        ]
+
+    def test_written_tables(self):
+        """Tables: every kind of write names its tables."""
+        assert written_tables(
+            "INSERT INTO mfg_ecommerce.Orders VALUES (1); "
+            'UPDATE ONLY "Items" SET x = 1; '
+            "TRUNCATE TABLE a, s.b"
+        ) == ["Items", "a", "b", "orders"]
+        assert written_tables(SQL) == []
+
+
+class TestResultCache:
+    """
+    Lookup, store and eviction.
+    """
+
+    def test_hit_on_normalized_sql(self):
+        """Cache: case and whitespace do not matter."""
+        cache = ResultCache()
+        _cached(cache, SQL, ROWS)
+        lookup = cache.lookup(
+            "select id,  name\nFROM products WHERE price > 10",
+            "analyst",
+        )
+        assert lookup.rows == ROWS
+        assert cache.stats()["hits"] == 1
+
+    def test_roles_do_not_share(self):
+        """Cache: entries are per role."""
+        cache = ResultCache()
+        _cached(cache, SQL, ROWS, role="admin")
+        assert cache.lookup(SQL, "analyst").rows is None
+
+    def test_rows_are_copies(self):
+        """Cache: mutating a hit leaves the entry intact."""
+        cache = ResultCache()
+        _cached(cache, SQL, ROWS)
+        cache.lookup(SQL, "analyst").rows[0]["name"] = "x"
+        assert cache.lookup(SQL, "analyst").rows == ROWS
+
+    def test_ttl(self):
+        """Cache: entries expire after the TTL."""
+        cache = ResultCache(ttl_s=0.05)
+        _cached(cache, SQL, ROWS)
+        time.sleep(0.1)
+        assert cache.lookup(SQL, "analyst").rows is None
+
+    def test_byte_budget_evicts_lru(self):
+        """Cache: the least recently used entry goes first."""
+        rows = [{"blob": "x" * 400}]
+        cache = ResultCache(max_bytes=1200)
+        for n in range(2):
+            _cached(cache, f"SELECT * FROM t{n}", rows)
+        cache.lookup("SELECT * FROM t0", "analyst")
+        _cached(cache, "SELECT * FROM t2", rows)
+        assert cache.lookup("SELECT * FROM t0", "analyst").rows
+        assert cache.lookup("SELECT * FROM t1", "analyst").rows is None
+        assert cache.stats()["bytes"] <= 1200
+
+    def test_oversized_not_stored(self):
+        """Cache: a result above the budget is skipped."""
+        cache = ResultCache(max_bytes=100)
+        lookup = cache.lookup(SQL, "analyst")
+        assert not cache.store(lookup, [{"blob": "x" * 500}])
+        assert cache.stats()["uncacheable"] == 1
+
+    def test_no_tables_not_stored(self):
+        """Cache: without known tables nothing invalidates."""
+        cache = ResultCache()
+        lookup = cache.lookup("SELECT now()", "analyst")
+        assert not cache.store(lookup, [{"now": 1}])
+        lookup = cache.lookup("INSERT INTO t SELECT * FROM s", "a")
+        assert lookup.tables == []
+
+    def test_compression_round_trip(self):
+        """Cache: large results are stored compressed."""
+        rows = [{"id": n, "name": "widget"} for n in range(500)]
+        plain = ResultCache()
+        packed = ResultCache(compress_min_bytes=1024)
+        _cached(plain, SQL, rows)
+        _cached(packed, SQL, rows)
+        assert packed.lookup(SQL, "analyst").rows == rows
+        assert packed.stats()["bytes"] < plain.stats()["bytes"] / 4
+
+
+class TestInvalidation:
+    """
+    Table versions and the write hook.
+    """
+
+    def test_invalidate_table(self):
+        """Invalidate: only entries reading the table go."""
+        cache = ResultCache()
+        _cached(cache, SQL, ROWS)
+        _cached(cache, "SELECT * FROM customers", ROWS)
+        cache.invalidate_tables(["products"])
+        assert cache.lookup(SQL, "analyst").rows is None
+        assert cache.lookup("SELECT * FROM customers", "analyst").rows
+        assert cache.stats()["stale"] == 1
+
+    def test_invalidate_sql(self):
+        """Invalidate: a write statement names its tables."""
+        cache = ResultCache()
+        _cached(cache, SQL, ROWS)
+        assert cache.invalidate_sql(
+            "UPDATE mfg_ecommerce.products SET price = 1"
+        ) == ["products"]
+        assert cache.lookup(SQL, "analyst").rows is None
+
+    def test_write_during_execution(self):
+        """Invalidate: a result computed across a write is
+        not stored."""
+        cache = ResultCache()
+        lookup = cache.lookup(SQL, "analyst")
+        cache.invalidate_tables(["products"])
+        assert not cache.store(lookup, ROWS)
+        assert cache.lookup(SQL, "analyst").rows is None
+
+
+class _Cursor:
+    """Cursor stand-in returning ROWS for SELECTs."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.description = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        self.conn.executed.append(sql)
+        if sql.lstrip().upper().startswith("SELECT"):
+            self.description = [("id",), ("name",)]
+
+    def fetchall(self):
+        return [dict(row) for row in ROWS]
+
+
+class _Connection:
+    """psycopg2 connection stand-in."""
+
+    def __init__(self):
+        self.closed = 0
+        self.executed = []
+
+    def cursor(self, cursor_factory=None):
+        return _Cursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def get_transaction_status(self):
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    """Pool of one fake connection, cache enabled."""
+    conn = _Connection()
+    pool = ConnectionPool(lambda: conn, min_size=1, max_size=1)
+    monkeypatch.setattr(db, "_pool", pool)
+    monkeypatch.delenv("DB_STATEMENT_TIMEOUT_MS", raising=False)
+    set_result_cache(ResultCache())
+    return conn
+
+
+class TestExecuteQuery:
+    """
+    execute_query through the cache.
+    """
+
+    def test_env_toggle(self, monkeypatch):
+        """Toggle: the cache is off unless SQL_RESULT_CACHE."""
+        assert get_result_cache() is None
+        monkeypatch.setenv("SQL_RESULT_CACHE", "1")
+        monkeypatch.setenv("SQL_RESULT_CACHE_MB", "2")
+        assert get_result_cache().max_bytes == 2 * 1024 * 1024
+
+    def test_second_call_is_cached(self, fake_pool):
+        """Execute: a repeated read skips the database."""
+        assert db.execute_query(SQL, role="analyst") == ROWS
+        assert db.execute_query(SQL, role="analyst") == ROWS
+        assert fake_pool.executed == [SQL]
+
+    def test_no_role_bypasses(self, fake_pool):
+        """Execute: without a role the cache is not used."""
+        db.execute_query(SQL)
+        db.execute_query(SQL)
+        assert fake_pool.executed == [SQL, SQL]
+
+    def test_write_invalidates(self, fake_pool):
+        """Execute: a committed write drops cached reads."""
+        db.execute_query(SQL, role="analyst")
+        db.execute_query("DELETE FROM products WHERE id = 1")
+        db.execute_query(SQL, role="analyst")
+        assert fake_pool.executed.count(SQL) == 2
+
+    @pytest.mark.asyncio
+    async def test_async_uses_cache(self, fake_pool):
+        """Execute: async reads share the cache."""
+        db.execute_query(SQL, role="analyst")
+        rows = await db.execute_query_async(SQL, role="analyst")
+        assert rows == ROWS
+        assert fake_pool.executed == [SQL]
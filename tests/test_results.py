@@ -0,0 +1,167 @@
+"""
+Unit tests for columnar query results.
+
+Covers column typing, row views, slicing, JSON / CSV
+export and unordered row comparison.
+"""
+
+import array
+import json
+import pickle
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from text_to_sql.results import ColumnarResult
+
+
+ROWS = [
+    {"id": 1, "price": 9.5, "name": "bolt", "total": Decimal("1.20")},
+    {"id": 2, "price": 3.25, "name": "nut", "total": Decimal("3.00")},
+    {"id": 3, "price": None, "name": "gear", "total": Decimal("7.10")},
+]
+
+
+class _Cursor:
+    """DB-API cursor stand-in returning tuples."""
+
+    def __init__(self, rows):
+        self.description = [(name,) for name in rows[0]]
+        self._rows = [tuple(r.values()) for r in rows]
+
+    def fetchmany(self, size):
+        batch, self._rows = self._rows[:size], self._rows[size:]
+        return batch
+
+
+class TestColumns:
+    """
+    Column storage and row access.
+    """
+
+    def test_numeric_columns_are_arrays(self):
+        """Columns: ints / floats pack into arrays."""
+        result = ColumnarResult.from_rows(ROWS)
+        assert isinstance(result.column("id"), array.array)
+        assert isinstance(result.column("name"), list)
+        # A NULL turns the float column into a list
+        assert result.column("price") == [9.5, 3.25, None]
+
+    def test_from_cursor_matches_rows(self):
+        """Columns: batched cursor reads match the rows."""
+        result = ColumnarResult.from_cursor(_Cursor(ROWS), 2)
+        assert result.to_rows() == ROWS
+        assert result.columns == ["id", "price", "name", "total"]
+
+    def test_row_views(self):
+        """Rows: views read values lazily by column."""
+        result = ColumnarResult.from_rows(ROWS)
+        assert result[1]["name"] == "nut"
+        assert dict(result[-1]) == ROWS[-1]
+        assert [row["id"] for row in result] == [1, 2, 3]
+        with pytest.raises(IndexError):
+            result[3]
+
+    def test_slice(self):
+        """Slices: columns keep their type and pickle."""
+        result = ColumnarResult.from_rows(ROWS)
+        tail = result[1:]
+        assert len(tail) == 2
+        assert type(tail.column("id")) is type(result.column("id"))
+        assert pickle.loads(pickle.dumps(tail)).to_rows() == ROWS[1:]
+        assert tail.to_rows() == ROWS[1:]
+        assert result[::2].to_rows() == [ROWS[0], ROWS[2]]
+
+    def test_empty(self):
+        """Columns: no rows keeps the given columns."""
+        result = ColumnarResult.from_rows([], columns=["a"])
+        assert len(result) == 0
+        assert result.to_csv() == "a\n"
+
+
+class TestExport:
+    """
+    JSON, CSV and Arrow output.
+    """
+
+    def test_json_orients(self):
+        """JSON: column and record layouts."""
+        result = ColumnarResult.from_rows(ROWS)
+        columns = json.loads(result.to_json())
+        assert columns["id"] == [1, 2, 3]
+        assert columns["total"] == ["1.20", "3.00", "7.10"]
+        records = json.loads(result.to_json("records"))
+        assert records[2]["price"] is None
+
+    def test_csv(self):
+        """CSV: header row, NULL as empty."""
+        csv_text = ColumnarResult.from_rows(ROWS).to_csv()
+        lines = csv_text.splitlines()
+        assert lines[0] == "id,price,name,total"
+        assert lines[3] == "3,,gear,7.10"
+
+    def test_arrow_optional(self):
+        """Arrow: IPC bytes, or a clear ImportError."""
+        result = ColumnarResult.from_rows(ROWS)
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            with pytest.raises(ImportError, match="pyarrow"):
+                result.to_arrow_ipc()
+        else:
+            assert result.to_arrow_ipc()
+
+
+class TestSameRows:
+    """
+    Unordered row comparison.
+    """
+
+    def test_order_insensitive(self):
+        """Compare: row and column order do not matter."""
+        a = ColumnarResult.from_rows(ROWS)
+        b = ColumnarResult.from_rows(
+            list(reversed(ROWS)),
+            columns=["total", "name", "price", "id"],
+        )
+        assert a.same_rows(b)
+
+    def test_differences(self):
+        """Compare: values, duplicates and names count."""
+        a = ColumnarResult.from_rows(ROWS)
+        changed = [dict(r) for r in ROWS]
+        changed[0]["name"] = "screw"
+        assert not a.same_rows(ColumnarResult.from_rows(changed))
+        dup = ColumnarResult.from_rows([ROWS[0], ROWS[0], ROWS[1]])
+        assert not a.same_rows(dup)
+        renamed = ColumnarResult.from_rows(
+            [{"x": r["id"]} for r in ROWS]
+        )
+        assert not ColumnarResult.from_rows(
+            [{"id": r["id"]} for r in ROWS]
+        ).same_rows(renamed)
+
+    def test_json_values(self):
+        """Compare: JSONB dicts / lists compare by content."""
+        a = ColumnarResult.from_rows([
+            {"id": 1, "doc": {"city": "Oslo", "zip": ["0150"]}},
+            {"id": 2, "doc": None},
+        ])
+        b = ColumnarResult.from_rows([
+            {"id": 2, "doc": None},
+            {"id": 1, "doc": {"zip": ["0150"], "city": "Oslo"}},
+        ])
+        assert a.same_rows(b)
+        c = ColumnarResult.from_rows([
+            {"id": 1, "doc": {"city": "Bergen"}},
+            {"id": 2, "doc": None},
+        ])
+        assert not a.same_rows(c)
+
+    def test_dates(self):
+        """Compare: non-numeric columns compare by value."""
+        a = ColumnarResult.from_rows([{"d": date(2026, 1, 1)}])
+        b = ColumnarResult.from_rows([{"d": date(2026, 1, 1)}])
+        assert a.same_rows(b)
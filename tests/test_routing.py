@@ -0,0 +1,152 @@
+"""
+Unit tests for complexity-based model routing.
+
+Covers tier assignment, route lookups, cost estimates
+and critique skipping in SQLGenerationAgent. No LLM
+calls (FunctionModel fakes).
+"""
+
+import pytest
+
+from text_to_sql.agents.orchestrator import analyze_query
+from text_to_sql.agents.routing import (
+    CRITIQUE_LANE,
+    GENERATION_LANE,
+    TIER_COMPLEX,
+    TIER_SIMPLE,
+    TIER_STANDARD,
+    RoutingPolicy,
+    estimate_cost,
+)
+from text_to_sql.agents.sql_generation import (
+    SQLGenerationAgent,
+)
+
+
+class TestRoutingPolicy:
+    """Tests for tier assignment and routes."""
+
+    @pytest.mark.parametrize("query, tables, tier", [
+        ("How many orders?", ["orders"], TIER_SIMPLE),
+        ("Show the top products", ["products"], TIER_STANDARD),
+        (
+            "Orders per customer",
+            ["orders", "customers"], TIER_STANDARD,
+        ),
+        (
+            "Combine returns and shipments",
+            ["returns"], TIER_COMPLEX,
+        ),
+        (
+            "Revenue by warehouse",
+            ["a", "b", "c", "d"], TIER_COMPLEX,
+        ),
+    ])
+    def test_tiers(self, make_request, query, tables, tier):
+        """Tier: analysis flags and table count."""
+        analysis = analyze_query(make_request(query))
+        assert RoutingPolicy.tier(analysis, tables) == tier
+
+    def test_simple_skips_critique(self):
+        """Route: simple tier has no critique model."""
+        route = RoutingPolicy().route(None, ["orders"])
+        assert route.tier == TIER_SIMPLE
+        assert route.skips(CRITIQUE_LANE)
+        assert route.model(GENERATION_LANE)
+
+    def test_uniform_never_skips(self):
+        """Route: uniform baseline reviews every tier."""
+        policy = RoutingPolicy.uniform("openai:gpt-4o")
+        route = policy.route(None, ["orders"])
+        assert not route.skips(CRITIQUE_LANE)
+        assert route.model(CRITIQUE_LANE) == "openai:gpt-4o"
+
+    def test_unrouted_lane_uses_default(self):
+        """Route: lanes missing from the route fall back."""
+        route = RoutingPolicy().route(None, ["orders"])
+        assert not route.skips("Schema Intelligence")
+        assert route.model("Schema Intelligence") is None
+
+    def test_estimate_cost(self):
+        """Cost: priced per model, unknown models free."""
+        cost = estimate_cost({
+            "openai:gpt-4o-mini": {
+                "input_tokens": 1_000_000,
+                "output_tokens": 0,
+            },
+            "local:llama": {
+                "input_tokens": 5_000,
+                "output_tokens": 5_000,
+            },
+        })
+        assert cost == pytest.approx(0.15)
+
+
+class TestRoutedGeneration:
+    """Tests for routing inside SQLGenerationAgent."""
+
+    SCHEMA = (
+        "CREATE TABLE orders (\n"
+        "    order_id VARCHAR(30) PRIMARY KEY,\n"
+        "    status VARCHAR(20)\n"
+        ");"
+    )
+    # Ungrouped column: the static check only warns
+    SQL = (
+        "SELECT o.status, o.order_id FROM orders o "
+        "GROUP BY o.status"
+    )
+
+    @pytest.mark.asyncio
+    async def test_simple_query_skips_critique(
+        self, simulated_llm,
+    ):
+        """Routing: simple tier accepted unreviewed."""
+        agent = SQLGenerationAgent(routing=RoutingPolicy())
+        gen_model, _ = simulated_llm({"sql": self.SQL}, [0])
+        critique_model, critique_calls = simulated_llm(
+            {"is_valid": True}, [0]
+        )
+        route = agent.routing.route(None, ["orders"])
+        with agent._gen_agent.override(model=gen_model):
+            with agent._critique_agent.override(
+                model=critique_model
+            ):
+                result = await agent._run_critique_loop(
+                    "Order statuses", self.SCHEMA,
+                    ["orders"], route=route,
+                )
+        assert critique_calls == []
+        last = result["critique_history"][-1]
+        assert last["action"] == "accepted_unreviewed"
+        assert "routing" in last["critique"]
+
+    @pytest.mark.asyncio
+    async def test_routed_models_used(self, simulated_llm):
+        """Routing: calls go to the tier's models."""
+        agent = SQLGenerationAgent(routing=RoutingPolicy({
+            TIER_STANDARD: {
+                GENERATION_LANE: "openai:gpt-4o",
+                CRITIQUE_LANE: "openai:gpt-4-turbo",
+            },
+        }))
+        gen_model, _ = simulated_llm({"sql": self.SQL}, [0])
+        critique_model, critique_calls = simulated_llm(
+            {"is_valid": True}, [0]
+        )
+        route = agent.routing.route(
+            None, ["orders", "customers"]
+        )
+        with agent._gen_agent.override(model=gen_model):
+            with agent._critique_agent.override(
+                model=critique_model
+            ):
+                await agent._run_critique_loop(
+                    "Order statuses", self.SCHEMA,
+                    ["orders"], route=route,
+                )
+        assert len(critique_calls) == 1
+        usage = agent._gateway.usage_by_model()
+        assert set(usage) == {
+            "openai:gpt-4o", "openai:gpt-4-turbo",
+        }
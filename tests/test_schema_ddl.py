@@ -0,0 +1,100 @@
+"""
+Unit tests for the cached schema DDL loader.
+
+Covers reuse while the file is unchanged, reloading on
+mtime / size changes, change listeners and the default
+schema file. No database.
+"""
+
+import gc
+import os
+
+import pytest
+
+from text_to_sql import db
+from text_to_sql.db import (
+    get_schema_ddl,
+    load_schema_ddl,
+    on_schema_change,
+)
+
+
+DDL = """
+-- Products
+DROP TABLE IF EXISTS products;
+CREATE TABLE products (
+    product_id SERIAL PRIMARY KEY
+);
+CREATE INDEX idx ON products (product_id);
+"""
+
+
+@pytest.fixture
+def ddl_file(tmp_path, monkeypatch):
+    """DDL file with a fixed mtime, no listeners."""
+    monkeypatch.setattr(db, "_schema_listeners", [])
+    path = tmp_path / "schema.sql"
+    path.write_text(DDL, encoding="utf-8")
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    return path
+
+
+def _rewrite(path, text, mtime_s):
+    """Replace the file content and set its mtime."""
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime_s * 10**9, mtime_s * 10**9))
+
+
+class TestLoadSchemaDDL:
+    """
+    Loading, reuse and reload.
+    """
+
+    def test_reused_while_unchanged(self, ddl_file):
+        """Load: the same parsed object until the file changes."""
+        first = load_schema_ddl(ddl_file)
+        assert load_schema_ddl(ddl_file) is first
+        assert first.create_blocks.startswith("CREATE TABLE products")
+        assert "DROP TABLE" in first.full
+
+    def test_reloaded_on_change(self, ddl_file):
+        """Load: a new mtime / size is read again."""
+        first = load_schema_ddl(ddl_file)
+        _rewrite(ddl_file, DDL + "CREATE TABLE t (a INT);\n", 2)
+        second = load_schema_ddl(ddl_file)
+        assert second is not first
+        assert "CREATE TABLE t (a INT);" in second.create_blocks
+
+    def test_listeners(self, ddl_file):
+        """Listeners: run on content changes, not touches."""
+        seen = []
+        on_schema_change(seen.append)
+        load_schema_ddl(ddl_file)
+        _rewrite(ddl_file, DDL, 2)
+        load_schema_ddl(ddl_file)
+        assert seen == []
+        _rewrite(ddl_file, DDL + "-- changed\n", 3)
+        schema = load_schema_ddl(ddl_file)
+        assert seen == [schema]
+
+    def test_bound_listener_held_weakly(self, ddl_file):
+        """Listeners: registering keeps no object alive."""
+        class Dependent:
+            calls = 0
+
+            def reset(self, schema):
+                Dependent.calls += 1
+
+        dependent = Dependent()
+        on_schema_change(dependent.reset)
+        del dependent
+        gc.collect()
+        load_schema_ddl(ddl_file)
+        _rewrite(ddl_file, DDL + "-- changed\n", 2)
+        load_schema_ddl(ddl_file)
+        assert Dependent.calls == 0
+
+    def test_project_schema(self):
+        """Default: get_schema_ddl reads the project schema."""
+        assert get_schema_ddl().startswith("CREATE TABLE")
+        assert get_schema_ddl(llm_context=True) is get_schema_ddl()
@@ -8,10 +8,15 @@ BFS traversal, and token benchmarking.
 import pytest
 
 from text_to_sql.agents.schema_intelligence import (
+    ENTITY_RESOLUTION_HYBRID,
     SchemaIntelligenceAgent,
     _singularize,
 )
-from text_to_sql.agents.types import EntityExtraction
+from text_to_sql.agents.types import (
+    EntityExtraction,
+    TurnRecord,
+)
+from text_to_sql.db import load_schema_ddl
 
 
 SAMPLE_DDL = """
@@ -379,6 +384,112 @@ class TestSchemaPruningCache:
             agent._cache.get("query B")["data"] == "B"
         )
 
+    def test_schema_change_resets(self, agent):
+        """
+        A changed DDL file drops the graph and cache.
+        """
+        agent._build_fk_graph(SAMPLE_DDL)
+        agent._cache.set("q1", {"data": "v1"})
+        agent._on_schema_change(load_schema_ddl())
+        assert not agent._schema_loaded
+        assert agent._cache.get("q1") is None
+
+# --- Turn-aware reuse ---
+
+
+class TestReusePriorTurn:
+    """
+    Tests for reusing the prior turn's schema on
+    follow-up questions.
+    """
+
+    @staticmethod
+    def _follow_up_results():
+        return {
+            "refinement": {
+                "follow_up": {"is_follow_up": True},
+            },
+        }
+
+    def test_reuses_prior_selection(
+        self, agent, make_request,
+    ):
+        """
+        Reuse: follow-up keeps prior tables and schema.
+        """
+        agent._build_fk_graph(SAMPLE_DDL)
+        prior = TurnRecord(
+            question="Show orders by customer",
+            selected_tables=["customers", "orders"],
+            pruned_schema="CREATE TABLE orders ...",
+            final_sql="SELECT 1 FROM orders",
+        )
+        output = agent._reuse_prior_turn(
+            make_request("Now only for Germany"),
+            "Now only for Germany",
+            SAMPLE_DDL,
+            self._follow_up_results(),
+            {"turns": [prior]},
+            0.0,
+        )
+        assert output["reused_prior_turn"] is True
+        assert output["selected_tables"] == [
+            "customers", "orders",
+        ]
+        assert output["pruned_schema"] == (
+            "CREATE TABLE orders ..."
+        )
+        assert output["execution_step"].action == (
+            "schema_selection_reused_prior_turn"
+        )
+
+    def test_narrows_in_newly_named_tables(
+        self, agent, make_request,
+    ):
+        """
+        Reuse: tables named in the follow-up are added.
+        """
+        agent._build_fk_graph(SAMPLE_DDL)
+        prior = TurnRecord(
+            question="Show orders by customer",
+            selected_tables=["customers", "orders"],
+            final_sql="SELECT 1 FROM orders",
+        )
+        output = agent._reuse_prior_turn(
+            make_request("Same but per product"),
+            "Same but per product",
+            SAMPLE_DDL,
+            self._follow_up_results(),
+            {"turns": [prior]},
+            0.0,
+        )
+        assert "products" in output["selected_tables"]
+        assert "CREATE TABLE products" in (
+            output["pruned_schema"]
+        )
+
+    def test_not_follow_up_returns_none(
+        self, agent, make_request,
+    ):
+        """
+        Reuse: new questions take the normal path.
+        """
+        agent._build_fk_graph(SAMPLE_DDL)
+        prior = TurnRecord(
+            question="Show orders",
+            selected_tables=["orders"],
+            final_sql="SELECT 1 FROM orders",
+        )
+        output = agent._reuse_prior_turn(
+            make_request("Show products"),
+            "Show products",
+            SAMPLE_DDL,
+            {},
+            {"turns": [prior]},
+            0.0,
+        )
+        assert output is None
+
 
 # --- _get_fk_paths ---
 
@@ -474,3 +585,97 @@ class TestContextBudget:
             - DEFAULT_OUTPUT_RESERVE
         )
         assert budget == expected
+
+
+class TestHybridResolution:
+    """
+    Tests for deterministic-first entity resolution.
+    """
+
+    @pytest.mark.asyncio
+    async def test_confident_query_skips_llm(
+        self, simulated_llm,
+    ):
+        """
+        Hybrid: direct table mention costs no LLM call.
+        """
+        agent = SchemaIntelligenceAgent(
+            entity_resolution=ENTITY_RESOLUTION_HYBRID,
+        )
+        agent._build_fk_graph(SAMPLE_DDL)
+        model, calls = simulated_llm(
+            {"tables": ["customers"]}, [0]
+        )
+        with agent._entity_agent.override(model=model):
+            entities, info = await agent._resolve_entities(
+                "Show all orders", SAMPLE_DDL,
+            )
+        assert calls == []
+        assert entities.tables == ["orders"]
+        assert info["method"] == "deterministic"
+        assert agent.resolution_stats[
+            "deterministic"
+        ] == 1
+
+    @pytest.mark.asyncio
+    async def test_low_confidence_calls_llm(
+        self, simulated_llm,
+    ):
+        """
+        Hybrid: vague query falls back to the LLM.
+        """
+        agent = SchemaIntelligenceAgent(
+            entity_resolution=ENTITY_RESOLUTION_HYBRID,
+        )
+        agent._build_fk_graph(SAMPLE_DDL)
+        model, calls = simulated_llm(
+            {"tables": ["customers"]}, [0]
+        )
+        with agent._entity_agent.override(model=model):
+            entities, info = await agent._resolve_entities(
+                "Who are our biggest spenders?",
+                SAMPLE_DDL,
+            )
+        assert len(calls) == 1
+        assert entities.tables == ["customers"]
+        assert info["method"] == "llm"
+        assert info["confidence"] < 0.7
+
+    @pytest.mark.asyncio
+    async def test_llm_mode_always_calls_llm(
+        self, simulated_llm,
+    ):
+        """
+        LLM mode: default behaviour is unchanged.
+        """
+        agent = SchemaIntelligenceAgent()
+        agent._build_fk_graph(SAMPLE_DDL)
+        model, calls = simulated_llm(
+            {"tables": ["orders"]}, [0]
+        )
+        with agent._entity_agent.override(model=model):
+            _, info = await agent._resolve_entities(
+                "Show all orders", SAMPLE_DDL,
+            )
+        assert len(calls) == 1
+        assert info == {"method": "llm"}
+
+    @pytest.mark.asyncio
+    async def test_fused_never_calls_llm(
+        self, simulated_llm,
+    ):
+        """
+        Fused: deterministic seeds even at low confidence.
+        """
+        agent = SchemaIntelligenceAgent()
+        agent._build_fk_graph(SAMPLE_DDL)
+        model, calls = simulated_llm(
+            {"tables": ["customers"]}, [0]
+        )
+        with agent._entity_agent.override(model=model):
+            _, info = await agent._resolve_entities(
+                "Who are our biggest spenders?",
+                SAMPLE_DDL, fused=True,
+            )
+        assert calls == []
+        assert info["method"] == "fused"
@@ -218,6 +218,77 @@ class TestResolveTables:
         assert "customers" in seeds
 
 
+class TestResolveWithConfidence:
+    """
+    Tests for confidence-scored deterministic resolution.
+    """
+
+    def test_direct_table_name_full_confidence(
+        self, full_pruner,
+    ):
+        """
+        Confidence: table named directly scores 1.0.
+        """
+        resolution = full_pruner.resolve_with_confidence(
+            "How many orders were placed last month?"
+        )
+        assert resolution.confidence == 1.0
+        assert resolution.seed_tables == ["orders"]
+        assert "table_name" in resolution.layer_tables
+
+    def test_fallback_zero_confidence(self, full_pruner):
+        """
+        Confidence: fallback trigger scores 0.
+        """
+        resolution = full_pruner.resolve_with_confidence(
+            "What is the meaning of life?"
+        )
+        assert resolution.used_fallback is True
+        assert resolution.confidence == 0.0
+
+    def test_unresolved_terms_lower_confidence(
+        self, full_pruner,
+    ):
+        """
+        Confidence: unresolved content words penalize.
+        """
+        clear = full_pruner.resolve_with_confidence(
+            "Show all customers"
+        )
+        vague = full_pruner.resolve_with_confidence(
+            "Show customers with churn risk flags"
+        )
+        assert "churn" in vague.unresolved_terms
+        assert vague.confidence < clear.confidence
+
+    def test_seed_table_columns_resolve(
+        self, sample_pruner,
+    ):
+        """
+        Confidence: a column of a seed table is not an
+        unresolved term.
+        """
+        resolution = sample_pruner.resolve_with_confidence(
+            "List customer email addresses"
+        )
+        assert "email" not in resolution.unresolved_terms
+
+    def test_golden_queries_mostly_confident(
+        self, full_pruner, golden_queries,
+    ):
+        """
+        Golden queries: most skip the LLM at 0.7.
+        """
+        scores = [
+            full_pruner.resolve_with_confidence(
+                gq["nl_query"]
+            ).confidence
+            for gq in golden_queries
+        ]
+        confident = [s for s in scores if s >= 0.7]
+        assert len(confident) >= len(scores) * 0.8
+
+
 class TestBFSTraversal:
     """
     Tests for BFS minimal table set selection.
@@ -323,3 +323,25 @@ async def test_risk_score_complex_joins(agent):
     )
     score = await agent._assess_risk(sql)
     assert score > 0.1
+
+
+# --- SQL re-check ---
+
+
+@pytest.mark.asyncio
+async def test_check_sql_pii_blocked_for_analyst(agent):
+    """Re-check: SQL reading customer PII is vetoed."""
+    reason = await agent.check_sql(
+        "SELECT email FROM customers",
+        {"role": "analyst"},
+    )
+    assert reason and "PII" in reason
+
+
+@pytest.mark.asyncio
+async def test_check_sql_simple_select_passes(agent):
+    """Re-check: a plain SELECT passes."""
+    assert await agent.check_sql(
+        "SELECT product_name FROM products",
+        {"role": "analyst"},
+    ) is None
@@ -7,9 +7,20 @@ LLM-dependent tests are marked for integration runs.
 
 import pytest
 
+from pydantic_ai.messages import (
+    ModelResponse,
+    ToolCallPart,
+)
+from pydantic_ai.models.function import FunctionModel
+
 from text_to_sql.agents.sql_generation import (
     SQLGenerationAgent,
 )
+from text_to_sql.agents.types import TurnRecord
+from text_to_sql.db import (
+    PlannerError,
+    close_readonly_pool,
+)
 
 
 @pytest.fixture
@@ -271,3 +282,582 @@ class TestContextBudget:
                 base_mod.MODEL_CONTEXT_WINDOWS[
                     agent.model
                 ] = original
+
+
+class TestFollowUpEdit:
+    """
+    Tests for editing the prior turn's SQL on
+    follow-up questions.
+    """
+
+    def test_prior_turn_only_for_follow_up(self):
+        """
+        Prior turn: returned only for follow-ups.
+        """
+        prior = TurnRecord(
+            question="Show orders",
+            final_sql="SELECT * FROM orders",
+        )
+        follow = {
+            "refinement": {
+                "follow_up": {"is_follow_up": True},
+            },
+        }
+        context = {"turns": [prior]}
+        assert SQLGenerationAgent._get_prior_turn(
+            follow, context
+        ) is prior
+        assert SQLGenerationAgent._get_prior_turn(
+            {}, context
+        ) is None
+        assert SQLGenerationAgent._get_prior_turn(
+            follow, {}
+        ) is None
+
+    @pytest.mark.asyncio
+    async def test_follow_up_edit_is_reviewed(
+        self, agent, make_request, simulated_llm,
+    ):
+        """
+        Follow-up: the edit goes through critique.
+        """
+        prompts = []
+
+        def fake_llm(messages, info):
+            prompts.append(
+                messages[-1].parts[-1].content
+            )
+            return ModelResponse(parts=[ToolCallPart(
+                info.output_tools[0].name,
+                {
+                    "sql": (
+                        "SELECT COUNT(*) FROM orders "
+                        "WHERE country = 'Germany'"
+                    ),
+                    "tables_used": ["orders"],
+                    "confidence": 0.9,
+                },
+            )])
+
+        prior = TurnRecord(
+            question="How many orders?",
+            selected_tables=["orders"],
+            final_sql="SELECT COUNT(*) FROM orders",
+        )
+        previous = {
+            "refinement": {
+                "refined_query": "Now only for Germany",
+                "follow_up": {"is_follow_up": True},
+            },
+            "schema": {
+                "pruned_schema": "CREATE TABLE orders ...",
+                "selected_tables": ["orders"],
+            },
+        }
+        critique_model, critique_calls = simulated_llm(
+            {"is_valid": True}, [0]
+        )
+        model = FunctionModel(fake_llm)
+        with agent._gen_agent.override(model=model):
+            with agent._critique_agent.override(
+                model=critique_model
+            ):
+                result = await agent.execute(
+                    request=make_request(
+                        "Now only for Germany"
+                    ),
+                    previous_results=previous,
+                    context={"turns": [prior]},
+                )
+
+        assert len(prompts) == 1
+        assert "Previous SQL" in prompts[0]
+        assert "Germany" in result["final_sql"]
+        assert len(critique_calls) == 1
+        assert result["critique_history"][-1][
+            "action"
+        ] == "accepted"
+        assert result["execution_step"].output_data[
+            "edited_prior_sql"
+        ] is True
+
+
+class TestStaticValidation:
+    """
+    Tests for the catalog check replacing the critique
+    LLM call.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE customers (\n"
+        "    customer_id VARCHAR(20) PRIMARY KEY,\n"
+        "    first_name VARCHAR(50)\n"
+        ");\n\n"
+        "CREATE TABLE orders (\n"
+        "    order_id VARCHAR(30) PRIMARY KEY,\n"
+        "    customer_id VARCHAR(20),\n"
+        "    FOREIGN KEY (customer_id) "
+        "REFERENCES customers(customer_id)\n"
+        ");"
+    )
+
+    @pytest.mark.asyncio
+    async def test_clean_sql_skips_critique(
+        self, agent, simulated_llm,
+    ):
+        """Static: clean SQL accepted without critique."""
+        gen_model, gen_calls = simulated_llm(
+            {"sql": "SELECT COUNT(*) FROM orders"}, [0]
+        )
+        critique_model, critique_calls = simulated_llm(
+            {"is_valid": True}, [0]
+        )
+        with agent._gen_agent.override(model=gen_model):
+            with agent._critique_agent.override(
+                model=critique_model
+            ):
+                result = await agent._run_critique_loop(
+                    "How many orders?", self.SCHEMA,
+                    ["orders"],
+                )
+        assert len(gen_calls) == 1
+        assert critique_calls == []
+        assert result["critique_history"][-1][
+            "action"
+        ] == "accepted_static"
+
+    @pytest.mark.asyncio
+    async def test_errors_feed_retry_prompt(
+        self, agent,
+    ):
+        """Static: unknown column retried with hint."""
+        prompts = []
+        outputs = [
+            "SELECT c.name FROM customers c",
+            "SELECT c.first_name FROM customers c",
+        ]
+
+        def fake_llm(messages, info):
+            prompts.append(
+                messages[-1].parts[-1].content
+            )
+            return ModelResponse(parts=[ToolCallPart(
+                info.output_tools[0].name,
+                {"sql": outputs[len(prompts) - 1]},
+            )])
+
+        model = FunctionModel(fake_llm)
+        with agent._gen_agent.override(model=model):
+            result = await agent._run_critique_loop(
+                "Customer names", self.SCHEMA,
+                ["customers"],
+            )
+        actions = [
+            h["action"] for h in result["critique_history"]
+        ]
+        assert actions == ["retry_static", "accepted_static"]
+        assert "first_name" in prompts[1]
+        assert result["final_sql"] == outputs[1]
+
+    @pytest.mark.asyncio
+    async def test_warnings_request_critique(
+        self, agent, simulated_llm,
+    ):
+        """Static: non-FK join still goes to critique."""
+        gen_model, _ = simulated_llm({
+            "sql": (
+                "SELECT o.order_id FROM orders o "
+                "JOIN customers c "
+                "ON o.order_id = c.customer_id"
+            ),
+        }, [0])
+        critique_model, critique_calls = simulated_llm(
+            {"is_valid": True}, [0]
+        )
+        with agent._gen_agent.override(model=gen_model):
+            with agent._critique_agent.override(
+                model=critique_model
+            ):
+                result = await agent._run_critique_loop(
+                    "Orders with customers", self.SCHEMA,
+                    ["orders", "customers"],
+                )
+        assert len(critique_calls) == 1
+        assert result["critique_history"][-1][
+            "action"
+        ] == "accepted"
+
+
+class TestExplainValidation:
+    """Tests for the optional EXPLAIN stage."""
+
+    PLAN = {
+        "total_cost": 12.5,
+        "startup_cost": 0.0,
+        "plan_rows": 100,
+        "node_type": "Seq Scan",
+        "explain_ms": 1.2,
+    }
+
+    @pytest.mark.asyncio
+    async def test_planner_error_feeds_retry(
+        self, monkeypatch,
+    ):
+        """EXPLAIN: planner error retried, plan surfaced."""
+        planned = []
+
+        def fake_explain(sql, timeout_ms):
+            planned.append(sql)
+            if len(planned) == 1:
+                raise PlannerError(
+                    'column "nme" does not exist',
+                    sqlstate="42703",
+                )
+            return dict(self.PLAN)
+
+        monkeypatch.setattr(
+            "text_to_sql.agents.sql_generation.explain_query",
+            fake_explain,
+        )
+        prompts = []
+        outputs = [
+            "SELECT nme FROM orders",
+            "SELECT name FROM orders",
+        ]
+
+        def fake_llm(messages, info):
+            prompts.append(
+                messages[-1].parts[-1].content
+            )
+            return ModelResponse(parts=[ToolCallPart(
+                info.output_tools[0].name,
+                {"sql": outputs[len(prompts) - 1]},
+            )])
+
+        agent = SQLGenerationAgent(explain_validation=True)
+        with agent._gen_agent.override(
+            model=FunctionModel(fake_llm)
+        ):
+            result = await agent._run_critique_loop(
+                "Order names", "CREATE TABLE orders",
+                ["orders"],
+            )
+        actions = [
+            h["action"] for h in result["critique_history"]
+        ]
+        assert actions == ["retry_explain", "accepted_static"]
+        assert '"nme" does not exist' in prompts[1]
+        assert result["plan_estimate"]["total_cost"] == 12.5
+
+    @pytest.mark.asyncio
+    async def test_disabled_without_database(
+        self, monkeypatch,
+    ):
+        """EXPLAIN: no DATABASE_URL turns the stage off."""
+        monkeypatch.delenv("DATABASE_URL", raising=False)
+        monkeypatch.delenv(
+            "READONLY_DATABASE_URL", raising=False
+        )
+        close_readonly_pool()
+        agent = SQLGenerationAgent(explain_validation=True)
+        assert await agent._explain("SELECT 1") == (
+            None, None,
+        )
+        assert agent.explain_validation is False
+
+
+class TestNBest:
+    """Tests for parallel n-best generation."""
+
+    @staticmethod
+    def _by_temperature(sql_by_temperature, seen):
+        """Fake LLM answering per sampling temperature."""
+        def fake_llm(messages, info):
+            temperature = (info.model_settings or {}).get(
+                "temperature"
+            )
+            seen.append(temperature)
+            return ModelResponse(parts=[ToolCallPart(
+                info.output_tools[0].name,
+                {"sql": sql_by_temperature[temperature]},
+            )])
+        return FunctionModel(fake_llm)
+
+    @pytest.mark.asyncio
+    async def test_consensus_skips_critique(
+        self, simulated_llm,
+    ):
+        """n-best: agreeing candidates skip critique."""
+        agent = SQLGenerationAgent(n_best=3)
+        seen = []
+        model = self._by_temperature({
+            0.0: "SELECT COUNT(*) FROM orders",
+            0.4: "select count(*)\nfrom orders;",
+            0.8: "SELECT COUNT(order_id) FROM orders",
+        }, seen)
+        critique_model, critique_calls = simulated_llm(
+            {"is_valid": True}, [0]
+        )
+        with agent._gen_agent.override(model=model):
+            with agent._critique_agent.override(
+                model=critique_model
+            ):
+                result = await agent._run_critique_loop(
+                    "How many orders?",
+                    "CREATE TABLE orders", ["orders"],
+                )
+        assert sorted(seen) == [0.0, 0.4, 0.8]
+        assert critique_calls == []
+        assert result["attempt"] == 1
+        assert result["final_sql"] == (
+            "SELECT COUNT(*) FROM orders"
+        )
+        last = result["critique_history"][-1]
+        assert last["action"] == "accepted_consensus"
+        assert "2/3" in last["critique"]
+
+    @pytest.mark.asyncio
+    async def test_disagreement_runs_critique(
+        self, simulated_llm,
+    ):
+        """n-best: no agreement falls back to critique."""
+        agent = SQLGenerationAgent(n_best=2)
+        model = self._by_temperature({
+            0.0: "SELECT COUNT(*) FROM orders",
+            0.4: "SELECT SUM(total) FROM orders",
+        }, [])
+        critique_model, critique_calls = simulated_llm(
+            {"is_valid": True}, [0]
+        )
+        with agent._gen_agent.override(model=model):
+            with agent._critique_agent.override(
+                model=critique_model
+            ):
+                result = await agent._run_critique_loop(
+                    "How many orders?",
+                    "CREATE TABLE orders", ["orders"],
+                )
+        assert len(critique_calls) == 1
+        assert result["critique_history"][-1][
+            "action"
+        ] == "accepted"
+
+    @pytest.mark.asyncio
+    async def test_invalid_candidates_retry_serially(self):
+        """n-best: all rejected locally, serial retry."""
+        agent = SQLGenerationAgent(n_best=2)
+        prompts = []
+
+        def fake_llm(messages, info):
+            prompts.append(
+                messages[-1].parts[-1].content
+            )
+            sql = (
+                "SELECT c.name FROM customers c"
+                if len(prompts) <= 2
+                else "SELECT c.first_name FROM customers c"
+            )
+            return ModelResponse(parts=[ToolCallPart(
+                info.output_tools[0].name, {"sql": sql},
+            )])
+
+        with agent._gen_agent.override(
+            model=FunctionModel(fake_llm)
+        ):
+            result = await agent._run_critique_loop(
+                "Customer names",
+                TestStaticValidation.SCHEMA,
+                ["customers"],
+            )
+        actions = [
+            h["action"] for h in result["critique_history"]
+        ]
+        assert actions == [
+            "retry_static", "retry_static",
+            "accepted_static",
+        ]
+        assert result["attempt"] == 2
+        assert "first_name" in prompts[-1]
+
+
+class TestFusedMode:
+    """
+    Tests for picking tables and writing SQL in one
+    generation call.
+    """
+
+    @pytest.mark.asyncio
+    async def test_tables_chosen_from_candidates(
+        self, agent,
+    ):
+        """Fused: stray tables retried, used tables kept."""
+        prompts = []
+        outputs = [
+            {
+                "sql": "SELECT COUNT(*) FROM orders",
+                "tables_used": ["orders", "invoices"],
+            },
+            {
+                "sql": "SELECT COUNT(*) FROM orders",
+                "tables_used": ["orders"],
+            },
+        ]
+
+        def fake_llm(messages, info):
+            prompts.append(
+                messages[-1].parts[-1].content
+            )
+            return ModelResponse(parts=[ToolCallPart(
+                info.output_tools[0].name,
+                outputs[len(prompts) - 1],
+            )])
+
+        with agent._gen_agent.override(
+            model=FunctionModel(fake_llm)
+        ):
+            result = await agent._run_critique_loop(
+                "How many orders?",
+                TestStaticValidation.SCHEMA,
+                ["customers", "orders"],
+                fused=True,
+            )
+        actions = [
+            h["action"] for h in result["critique_history"]
+        ]
+        assert actions == ["retry_tables", "accepted_static"]
+        assert "Candidate tables" in prompts[0]
+        assert "invoices" in prompts[1]
+        assert result["tables_used"] == ["orders"]
+
+    @pytest.mark.asyncio
+    async def test_standard_mode_ignores_tables_used(
+        self, agent, simulated_llm,
+    ):
+        """Fused: off by default, tables_used unchecked."""
+        gen_model, _ = simulated_llm({
+            "sql": "SELECT COUNT(*) FROM orders",
+            "tables_used": ["invoices"],
+        }, [0])
+        with agent._gen_agent.override(model=gen_model):
+            result = await agent._run_critique_loop(
+                "How many orders?",
+                TestStaticValidation.SCHEMA,
+                ["customers", "orders"],
+            )
+        assert result["critique_history"][-1][
+            "action"
+        ] == "accepted_static"
+        assert result["tables_used"] is None
+
+
+class TestStreaming:
+    """
+    Tests for streamed generation with early abort.
+    """
+
+    SCHEMA = TestStaticValidation.SCHEMA
+
+    def test_prefix_checks(self):
+        """Stream: only unfixable prefixes abort."""
+        check = SQLGenerationAgent._prefix_issue
+        tables = ["orders", "customers"]
+        assert check("SEL", tables) is None
+        assert check("SELECT o.order_id FROM ord", tables) is None
+        assert check("SELECT * FROM orders o JOIN", tables) is None
+        assert check("SELECT deleted_at FROM orders", tables) is None
+        assert "SELECT" in check("WITH x AS (", tables)
+        assert "DELETE" in check("SELECT 1; DELETE ", tables)
+        assert "products" in check(
+            "SELECT * FROM orders o JOIN products p ON", tables
+        )
+        assert check(
+            "SELECT EXTRACT(YEAR FROM o.order_date) FROM orders o ",
+            tables,
+        ) is None
+
+    @pytest.mark.asyncio
+    async def test_stray_table_aborts_and_retries(
+        self, streaming_llm,
+    ):
+        """Stream: bad table cuts the stream, then retry."""
+        agent = SQLGenerationAgent(streaming=True)
+        model, calls = streaming_llm([
+            {
+                "sql": (
+                    "SELECT p.name FROM orders o JOIN "
+                    "products p ON p.id = o.order_id "
+                    "WHERE o.customer_id = 'C1' "
+                    "ORDER BY p.name"
+                ),
+                "explanation": "Products per order",
+            },
+            {"sql": "SELECT COUNT(*) FROM orders"},
+        ])
+        with agent._gen_agent.override(model=model):
+            result = await agent._run_critique_loop(
+                "How many orders?", self.SCHEMA,
+                ["orders", "customers"],
+            )
+        history = result["critique_history"]
+        assert [h["action"] for h in history] == [
+            "retry_stream_abort", "accepted_static",
+        ]
+        assert history[0]["sql"] is None
+        assert calls[0]["sent"] < calls[0]["total"]
+        assert "products" in calls[1]["prompt"]
+        assert result["final_sql"] == "SELECT COUNT(*) FROM orders"
+
+    @pytest.mark.asyncio
+    async def test_valid_stream_completes(self, streaming_llm):
+        """Stream: valid SQL is read to the end."""
+        agent = SQLGenerationAgent(streaming=True)
+        model, calls = streaming_llm([{
+            "sql": (
+                "SELECT c.first_name FROM customers c "
+                "JOIN orders o ON o.customer_id = c.customer_id"
+            ),
+        }])
+        with agent._gen_agent.override(model=model):
+            result = await agent._run_critique_loop(
+                "Who ordered?", self.SCHEMA,
+                ["orders", "customers"],
+            )
+        assert calls[0]["sent"] == calls[0]["total"]
+        assert result["critique_history"][-1][
+            "action"
+        ] == "accepted_static"
+
+    @pytest.mark.asyncio
+    async def test_aborted_prefix_never_returned(
+        self, streaming_llm,
+    ):
+        """Stream: all attempts aborted, no partial SQL."""
+        agent = SQLGenerationAgent(streaming=True)
+        model, calls = streaming_llm([
+            {"sql": "DELETE FROM orders WHERE order_id = 'x'"},
+        ])
+        with agent._gen_agent.override(model=model):
+            result = await agent._run_critique_loop(
+                "Remove order x", self.SCHEMA, ["orders"],
+            )
+        assert len(calls) == 3
+        assert all(c["sent"] < c["total"] for c in calls)
+        assert result["final_sql"] is None
+
+    @pytest.mark.asyncio
+    async def test_n_best_records_aborts(self, streaming_llm):
+        """Stream: aborted n-best candidates are dropped."""
+        agent = SQLGenerationAgent(n_best=2, streaming=True)
+        model, _ = streaming_llm([
+            {"sql": "SELECT * FROM products p WHERE p.id = 1"},
+            {"sql": "SELECT COUNT(*) FROM orders"},
+        ])
+        with agent._gen_agent.override(model=model):
+            result = await agent._run_critique_loop(
+                "How many orders?", self.SCHEMA, ["orders"],
+            )
+        actions = [
+            h["action"] for h in result["critique_history"]
+        ]
+        assert actions[0] == "retry_stream_abort"
+        assert actions[-1] == "accepted_static"
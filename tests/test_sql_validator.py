@@ -0,0 +1,372 @@
+"""
+Unit tests for the catalog-aware static SQL validator.
+
+Validates against the project schema (schema_setup.sql);
+no database or LLM needed.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from text_to_sql.sql_validator import (
+    SchemaCatalog,
+    cap_limit,
+    catalog_for_ddl,
+    normalize_sql,
+    parameterize_sql,
+    prefix_tables,
+    validate_sql,
+)
+
+
+SCHEMA_PATH = (
+    Path(__file__).parent.parent
+    / "schema" / "schema_setup.sql"
+)
+
+
+@pytest.fixture(scope="module")
+def catalog() -> SchemaCatalog:
+    """Catalog of the full project schema."""
+    return catalog_for_ddl(
+        SCHEMA_PATH.read_text(encoding="utf-8")
+    )
+
+
+def _codes(sql: str, catalog: SchemaCatalog) -> list:
+    """Issue codes raised for a query."""
+    return [i.code for i in validate_sql(sql, catalog).issues]
+
+
+class TestSchemaCatalog:
+    """Tests for building the catalog from DDL."""
+
+    def test_tables_and_columns(self, catalog):
+        """Catalog: tables and columns parsed."""
+        assert "order_id" in catalog.columns("orders")
+        assert "total_price" in catalog.columns(
+            "order_items"
+        )
+        assert not catalog.has_table("orderz")
+
+    def test_foreign_keys(self, catalog):
+        """Catalog: table-level and ALTER TABLE FKs."""
+        assert catalog.has_fk(
+            "orders", "customer_id",
+            "customers", "customer_id",
+        )
+        assert catalog.has_fk(
+            "warehouses", "warehouse_id",
+            "finished_goods_inventory", "warehouse_id",
+        )
+
+    def test_views(self, catalog):
+        """Catalog: view output columns."""
+        assert "stock_status" in catalog.columns(
+            "vw_available_inventory"
+        )
+
+    def test_fk_edges_merged(self):
+        """Catalog: external FK edges are added."""
+        catalog = SchemaCatalog.from_ddl(
+            "CREATE TABLE a (id INT, b_id INT);\n"
+            "CREATE TABLE b (id INT);",
+            fk_edges=[{
+                "from": "a", "from_col": "b_id",
+                "to": "b", "to_col": "id",
+            }],
+        )
+        assert catalog.has_fk("b", "id", "a", "b_id")
+
+
+class TestValidQueries:
+    """Queries that must pass without issues."""
+
+    @pytest.mark.parametrize("sql", [
+        "SELECT p.category, SUM(oi.total_price) AS revenue "
+        "FROM order_items oi JOIN products p "
+        "ON p.product_id = oi.product_id "
+        "GROUP BY p.category ORDER BY revenue DESC",
+        "SELECT e.first_name, m.first_name AS manager "
+        "FROM employees e LEFT JOIN employees m "
+        "ON e.manager_id = m.employee_id",
+        "SELECT p.product_name FROM products p WHERE "
+        "EXISTS (SELECT 1 FROM order_items oi "
+        "WHERE oi.product_id = p.product_id)",
+        "WITH monthly AS (SELECT date_trunc('month', "
+        "order_date) m, SUM(total_amount) total "
+        "FROM orders GROUP BY 1) SELECT m, total, "
+        "LAG(total) OVER (ORDER BY m) FROM monthly",
+        "SELECT COUNT(*) FROM orders WHERE order_date "
+        ">= CURRENT_DATE - INTERVAL '30 days'",
+        "SELECT EXTRACT(YEAR FROM o.order_date)::int y, "
+        "COUNT(*) FROM orders o GROUP BY 1",
+        "SELECT t.product_id FROM (SELECT product_id, "
+        "ROW_NUMBER() OVER (PARTITION BY category) rn "
+        "FROM products) t WHERE t.rn <= 3",
+        "SELECT c.customer_id, c.first_name "
+        "FROM customers c GROUP BY c.customer_id",
+        "SELECT percentile_cont(0.5) WITHIN GROUP "
+        "(ORDER BY total_amount) FROM orders",
+    ])
+    def test_no_issues(self, sql, catalog):
+        """Valid: realistic generated SQL passes."""
+        result = validate_sql(sql, catalog)
+        assert result.issues == []
+        assert not result.needs_review
+
+
+class TestErrors:
+    """Queries that cannot run as written."""
+
+    def test_unknown_table(self, catalog):
+        """Error: unknown table with suggestion."""
+        result = validate_sql(
+            "SELECT * FROM orderz", catalog
+        )
+        assert result.errors[0].code == "unknown_table"
+        assert "orders" in result.errors[0].hint
+
+    def test_unknown_column(self, catalog):
+        """Error: unknown qualified column."""
+        result = validate_sql(
+            "SELECT c.name FROM customers c", catalog
+        )
+        assert result.errors[0].code == "unknown_column"
+        assert "name" in result.errors[0].hint
+
+    def test_unknown_column_in_subquery(self, catalog):
+        """Error: unknown column inside a subquery."""
+        assert _codes(
+            "SELECT order_id FROM orders WHERE "
+            "total_amount > (SELECT AVG(total) "
+            "FROM orders)",
+            catalog,
+        ) == ["unknown_column"]
+
+    def test_table_name_instead_of_alias(self, catalog):
+        """Error: aliased table referenced by name."""
+        result = validate_sql(
+            "SELECT orders.order_id FROM orders o",
+            catalog,
+        )
+        assert result.errors[0].code == "unknown_alias"
+        assert "o.order_id" in result.errors[0].hint
+
+    def test_ambiguous_column(self, catalog):
+        """Error: unqualified column in two tables."""
+        assert _codes(
+            "SELECT order_id FROM orders o JOIN "
+            "order_items oi ON o.order_id = oi.order_id",
+            catalog,
+        ) == ["ambiguous_column"]
+
+    def test_join_without_condition(self, catalog):
+        """Error: JOIN without ON."""
+        assert "missing_join_condition" in _codes(
+            "SELECT 1 FROM orders o JOIN customers c",
+            catalog,
+        )
+
+    @pytest.mark.parametrize("sql", [
+        "DELETE FROM orders",
+        "SELECT 1; SELECT 2",
+        "SELECT 'open FROM orders",
+        "SELECT (1 FROM orders",
+    ])
+    def test_syntax(self, sql, catalog):
+        """Error: non-SELECT / malformed input."""
+        assert _codes(sql, catalog) == ["syntax"]
+
+
+class TestWarnings:
+    """Queries that run but have doubtful semantics."""
+
+    def test_non_fk_join(self, catalog):
+        """Warning: join not following a FK."""
+        result = validate_sql(
+            "SELECT o.order_id FROM orders o JOIN "
+            "customers c ON o.order_id = c.customer_id",
+            catalog,
+        )
+        assert result.is_valid
+        assert result.needs_review
+        assert result.warnings[0].code == "non_fk_join"
+        assert "orders.customer_id" in result.warnings[0].hint
+
+    def test_cartesian_product(self, catalog):
+        """Warning: unlinked comma join."""
+        assert _codes(
+            "SELECT 1 FROM orders o, customers c",
+            catalog,
+        ) == ["cartesian_product"]
+
+    def test_group_by(self, catalog):
+        """Warning: column neither grouped nor aggregated."""
+        assert _codes(
+            "SELECT o.status, o.order_id FROM orders o "
+            "GROUP BY o.status",
+            catalog,
+        ) == ["group_by"]
+
+    def test_no_catalog_needs_review(self):
+        """Warning-free but unchecked without a catalog."""
+        result = validate_sql(
+            "SELECT * FROM orders",
+            SchemaCatalog.from_ddl("CREATE TABLE orders"),
+        )
+        assert result.is_valid
+        assert result.needs_review
+
+
+class TestNormalizeSQL:
+    """Tests for canonical SQL text."""
+
+    def test_formatting_ignored(self):
+        """Normalize: case, whitespace, comments, ';'."""
+        assert normalize_sql(
+            "SELECT  COUNT(*)\n-- total\nFROM Orders;"
+        ) == normalize_sql("select count(*) from orders")
+
+    def test_literals_kept(self):
+        """Normalize: literal case is significant."""
+        assert normalize_sql(
+            "SELECT 1 FROM t WHERE s = 'A'"
+        ) != normalize_sql("SELECT 1 FROM t WHERE s = 'a'")
+
+
+class TestPrefixTables:
+    """Tests for tables named in a partial query."""
+
+    def test_complete_names_only(self):
+        """Prefix: the growing last token is ignored."""
+        assert prefix_tables(
+            "SELECT * FROM orders o JOIN cust"
+        ) == ["orders"]
+
+    def test_functions_not_tables(self):
+        """Prefix: FROM in EXTRACT / IS DISTINCT skipped."""
+        assert prefix_tables(
+            "SELECT EXTRACT(YEAR FROM o.order_date) "
+            "FROM orders o, generate_series(1, 3) g "
+            "WHERE a IS DISTINCT FROM b AND"
+        ) == ["orders"]
+
+    def test_subqueries_and_schemas(self):
+        """Prefix: subquery tables, schema-qualified."""
+        assert prefix_tables(
+            "SELECT * FROM (SELECT 1 FROM items) s "
+            "JOIN public.customers c ON"
+        ) == ["items", "customers"]
+
+    def test_unterminated_literal(self):
+        """Prefix: an open string does not fail."""
+        assert prefix_tables(
+            "SELECT * FROM orders WHERE s = 'ab"
+        ) == ["orders"]
+
+    def test_complete_query(self):
+        """Prefix: a complete query counts its last table."""
+        sql = "SELECT * FROM a WHERE x IN (SELECT y FROM items)"
+        assert prefix_tables(sql) == ["a"]
+        assert prefix_tables(sql, complete=True) == ["a", "items"]
+        assert prefix_tables("SELECT 'ab", complete=True) == []
+
+
+class TestCapLimit:
+    """
+    Row caps on the outer SELECT.
+    """
+
+    def test_added(self):
+        """Cap: a query without LIMIT gets one."""
+        assert cap_limit("SELECT * FROM a;", 100) == (
+            "SELECT * FROM a LIMIT 100"
+        )
+
+    def test_lowered_not_raised(self):
+        """Cap: larger limits drop, smaller ones stay."""
+        assert cap_limit("SELECT * FROM a LIMIT 500 OFFSET 3", 100) == (
+            "SELECT * FROM a LIMIT 100 OFFSET 3"
+        )
+        assert cap_limit("SELECT * FROM a LIMIT ALL", 100) == (
+            "SELECT * FROM a LIMIT 100"
+        )
+        assert cap_limit("SELECT * FROM a LIMIT 5", 100) == (
+            "SELECT * FROM a LIMIT 5"
+        )
+
+    def test_inner_limit_ignored(self):
+        """Cap: only the outer query counts."""
+        assert cap_limit(
+            "SELECT * FROM (SELECT * FROM b LIMIT 9999) x", 100
+        ).endswith("x LIMIT 100")
+
+    def test_wrapped(self):
+        """Cap: FETCH / expression limits are wrapped."""
+        for sql in (
+            "SELECT * FROM a FETCH FIRST 5 ROWS ONLY",
+            "SELECT * FROM a LIMIT 5 + 5",
+        ):
+            capped = cap_limit(sql, 100)
+            assert capped.startswith("SELECT * FROM (")
+            assert capped.endswith(") AS capped LIMIT 100")
+
+    def test_non_select_unchanged(self):
+        """Cap: writes are left to the safety checks."""
+        assert cap_limit("UPDATE a SET x = 1", 100) == (
+            "UPDATE a SET x = 1"
+        )
+
+
+class TestParameterizeSQL:
+    """
+    Literals replaced with bind parameters.
+    """
+
+    def test_filters(self):
+        """Parameterize: filter values, typed and shared."""
+        query = parameterize_sql(
+            "SELECT name FROM products WHERE sku = 'P001' "
+            "AND price > 10 AND qty IN (10, 3000000000, 2.5)"
+        )
+        assert query.sql == (
+            "SELECT name FROM products WHERE sku = $1 "
+            "AND price > $2 AND qty IN ($2, $3, $4)"
+        )
+        assert query.values == ("'P001'", "10", "3000000000", "2.5")
+        assert query.types == ("unknown", "integer", "bigint", "numeric")
+
+    def test_same_skeleton(self):
+        """Parameterize: only literal values differ."""
+        first = parameterize_sql(
+            "SELECT * FROM orders WHERE status = 'shipped' LIMIT 10"
+        )
+        second = parameterize_sql(
+            "select *  from ORDERS where status = 'pending' limit 10;"
+        )
+        assert first.skeleton == second.skeleton
+        assert second.sql == "select *  from ORDERS where status = $1 limit 10"
+
+    def test_shape_literals_kept(self):
+        """Parameterize: literals that shape the query stay."""
+        sql = (
+            "SELECT 'total' AS label, DATE_TRUNC('month', d), "
+            "CASE WHEN x > 1 THEN 'hi' ELSE 'lo' END, "
+            "CAST(x AS NUMERIC(10, 2)) FROM t "
+            "WHERE d >= DATE '2024-01-01' - INTERVAL '1 day' "
+            "AND s = E'a' GROUP BY 1, 2 ORDER BY 3 DESC "
+            "LIMIT 5 OFFSET 5"
+        )
+        query = parameterize_sql(sql)
+        assert query.sql == sql.replace("x > 1", "x > $1")
+        assert query.values == ("1",)
+
+    def test_not_parameterized(self):
+        """Parameterize: writes, batches and bind params skipped."""
+        assert parameterize_sql("DELETE FROM t WHERE id = 1") is None
+        assert parameterize_sql("SELECT 1; SELECT 2") is None
+        assert parameterize_sql("SELECT * FROM t WHERE a = %s") is None
+        assert parameterize_sql("SELECT 'ab") is None
+        assert parameterize_sql("SELECT a FROM t").values == ()
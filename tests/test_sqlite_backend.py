@@ -0,0 +1,269 @@
+"""
+Unit tests for the embedded SQLite execution backend.
+
+Covers the PostgreSQL-to-SQLite translation, loading
+the project schema and sample data, running the golden
+queries through the db helpers, timeouts, cancellation,
+EXPLAIN and backend selection. Runs against a real
+in-memory SQLite database (no PostgreSQL).
+"""
+
+import asyncio
+import json
+import sqlite3
+
+from pathlib import Path
+
+import pytest
+
+from text_to_sql import db
+from text_to_sql.result_cache import ResultCache, set_result_cache
+from text_to_sql.sqlite_backend import (
+    SQLiteBackend,
+    translate_ddl,
+    translate_sql,
+)
+from text_to_sql.synthetic_data import SyntheticDataset
+
+
+GOLDEN = Path(__file__).parent.parent / "evals" / "golden_queries.json"
+SLOW_SQL = (
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) "
+    "SELECT COUNT(*) AS n FROM c"
+)
+
+
+@pytest.fixture(scope="module")
+def shared_backend():
+    """Project schema with sample data, loaded once."""
+    backend = SQLiteBackend()
+    yield backend
+    backend.close()
+
+
+@pytest.fixture
+def backend(shared_backend):
+    """The shared backend as the process-wide backend."""
+    db.set_backend(shared_backend)
+    return shared_backend
+
+
+class TestTranslate:
+    """
+    PostgreSQL constructs rewritten for SQLite.
+    """
+
+    def test_date_arithmetic(self):
+        """Dates: DATE_TRUNC and INTERVAL become date()."""
+        sql = translate_sql(
+            "SELECT 1 FROM orders WHERE order_date >= "
+            "DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '1 month'"
+        )
+        assert sql == (
+            "SELECT 1 FROM orders WHERE order_date >= "
+            "date(date(CURRENT_DATE, 'start of month'), '-1 months')"
+        )
+        assert translate_sql("NOW() + INTERVAL '2 weeks'") == (
+            "datetime(datetime('now'), '+14 days')"
+        )
+
+    def test_casts(self):
+        """Casts: :: and CAST map to SQLite functions."""
+        assert translate_sql("SUM(x)::NUMERIC / 2") == (
+            "CAST(SUM(x) AS REAL) / 2"
+        )
+        assert translate_sql("o.created_at::date") == (
+            "date(o.created_at)"
+        )
+        assert translate_sql("CAST(s AS varchar(20))") == (
+            "CAST(s AS TEXT)"
+        )
+
+    def test_functions(self):
+        """Functions: EXTRACT, STRING_AGG, TO_CHAR, ..."""
+        sql = translate_sql(
+            "SELECT EXTRACT(YEAR FROM d), "
+            "STRING_AGG(DISTINCT name, ','), "
+            "TO_CHAR(d, 'YYYY-MM'), GREATEST(a, b)"
+        )
+        assert sql == (
+            "SELECT CAST(strftime('%Y', d) AS INTEGER), "
+            "GROUP_CONCAT(DISTINCT name), "
+            "strftime('%Y-%m', d), MAX(COALESCE(a, b), COALESCE(b, a))"
+        )
+
+    def test_greatest_skips_nulls(self):
+        """Functions: GREATEST / LEAST ignore NULLs."""
+        conn = sqlite3.connect(":memory:")
+        row = conn.execute(translate_sql(
+            "SELECT GREATEST(NULL, 2, 1), LEAST(3, NULL, 1), "
+            "GREATEST(NULL, NULL)"
+        )).fetchone()
+        assert row == (2, 1, None)
+
+    def test_names_and_operators(self):
+        """Names: schema prefixes dropped, ILIKE is LIKE."""
+        sql = translate_sql(
+            "SELECT * FROM mfg_ecommerce.products p WHERE "
+            "p.name ILIKE '%a::b%' AND p.x IS DISTINCT FROM p.y"
+        )
+        assert sql == (
+            "SELECT * FROM products p WHERE "
+            "p.name LIKE '%a::b%' AND p.x IS NOT p.y"
+        )
+
+    def test_unbalanced_unchanged(self):
+        """Translate: unparseable SQL is passed through."""
+        assert translate_sql("SELECT (1::int") == "SELECT (1::int"
+
+    def test_ddl(self):
+        """DDL: types mapped, PostgreSQL-only statements dropped."""
+        statements = translate_ddl(
+            "CREATE SCHEMA IF NOT EXISTS s; SET search_path TO s;\n"
+            "DROP TABLE IF EXISTS t CASCADE;\n"
+            "CREATE TABLE t (id SERIAL PRIMARY KEY, doc JSONB);\n"
+            "COMMENT ON TABLE t IS 'x';\n"
+            "ALTER TABLE t ADD FOREIGN KEY (id) REFERENCES u(id);"
+        )
+        assert statements == [
+            "DROP TABLE IF EXISTS t",
+            "CREATE TABLE t (id INTEGER PRIMARY KEY, doc TEXT)",
+        ]
+
+
+class TestBackend:
+    """
+    Queries through the db helpers on SQLite.
+    """
+
+    def test_schema_loaded(self, backend):
+        """Load: 35 tables, sample rows, generated columns."""
+        assert len(backend.tables()) == 35
+        rows = db.execute_query(
+            "SELECT COUNT(*) AS n FROM mfg_ecommerce.products"
+        )
+        assert rows == [{"n": 6}]
+        item = db.execute_query(
+            "SELECT unit_price * quantity - discount + tax AS expected, "
+            "total_price FROM order_items LIMIT 1"
+        )[0]
+        assert item["total_price"] == pytest.approx(item["expected"])
+
+    def test_golden_queries_run(self, backend):
+        """Run: every golden reference query executes."""
+        golden = json.loads(GOLDEN.read_text(encoding="utf-8"))
+        for query in golden:
+            if query.get("reference_sql"):
+                db.execute_query(query["reference_sql"])
+
+    def test_views(self, backend):
+        """Run: the reporting views translate and run."""
+        rows = db.execute_query(
+            "SELECT products FROM vw_order_fulfillment_status "
+            "WHERE order_id = 'ORD-2024-001'"
+        )
+        assert rows == [{"products": "Quantum Laptop Pro"}]
+
+    def test_columnar_and_stream(self, backend):
+        """Run: columnar results and batched streaming."""
+        result = db.execute_query_columnar(
+            "SELECT product_id FROM products ORDER BY product_id"
+        )
+        assert len(result) == 6
+        batches = list(db.stream_query_batches(
+            "SELECT product_id FROM products", 4, max_rows=5,
+        ))
+        assert [len(b) for b in batches] == [4, 1]
+
+    def test_write_invalidates(self, backend):
+        """Write: cached reads of the written table drop."""
+        set_result_cache(ResultCache(ttl_s=60))
+        sql = "SELECT COUNT(*) AS n FROM suppliers"
+        before = db.execute_query(sql, role="analyst")[0]["n"]
+        db.execute_query(
+            "INSERT INTO suppliers (supplier_id, supplier_name, country) "
+            "VALUES ('SUP-TEST', 'Test', 'Nowhere')"
+        )
+        try:
+            assert db.execute_query(sql, role="analyst") == [
+                {"n": before + 1}
+            ]
+        finally:
+            db.execute_query(
+                "DELETE FROM suppliers WHERE supplier_id = 'SUP-TEST'"
+            )
+
+    def test_timeout(self, backend):
+        """Timeout: a runaway query is interrupted."""
+        with pytest.raises(TimeoutError):
+            db.execute_query(SLOW_SQL, timeout_ms=50)
+        assert db.execute_query("SELECT 1 AS one") == [{"one": 1}]
+
+    @pytest.mark.asyncio
+    async def test_async_cancel(self, backend):
+        """Async: a timed-out query is interrupted."""
+        with pytest.raises(TimeoutError):
+            await db.execute_query_async(SLOW_SQL, timeout_ms=50)
+        rows = await asyncio.wait_for(
+            db.execute_query_async("SELECT 1 AS one"), 5,
+        )
+        assert rows == [{"one": 1}]
+
+    def test_explain(self, backend):
+        """Explain: cost grows with the rows scanned."""
+        small = db.explain_query("SELECT * FROM products")
+        large = db.explain_query(
+            "SELECT * FROM order_items oi JOIN orders o "
+            "ON o.order_id = oi.order_id"
+        )
+        assert 0 < small["total_cost"] < large["total_cost"]
+
+    def test_explain_planner_error(self, backend):
+        """Explain: unknown columns raise PlannerError."""
+        with pytest.raises(db.PlannerError) as info:
+            db.explain_query("SELECT nope FROM products")
+        assert info.value.sqlstate == "42703"
+
+
+class TestSelection:
+    """
+    Backend chosen by SQL_BACKEND.
+    """
+
+    def test_default_postgres(self):
+        """Select: PostgreSQL unless configured."""
+        assert isinstance(db.get_backend(), db.PostgresBackend)
+        assert isinstance(db.get_backend(), db.ExecutionBackend)
+
+    def test_env(self, monkeypatch):
+        """Select: SQL_BACKEND=sqlite, unknown names fail."""
+        monkeypatch.setenv("SQL_BACKEND", "sqlite")
+        backend = db.get_backend()
+        assert isinstance(backend, SQLiteBackend)
+        assert isinstance(backend, db.ExecutionBackend)
+        backend.close()
+        db.set_backend(None)
+        monkeypatch.setenv("SQL_BACKEND", "oracle")
+        with pytest.raises(ValueError, match="oracle"):
+            db.get_backend()
+
+    def test_synthetic_dataset(self, tmp_path):
+        """Load: a synthetic dataset, booleans as 0 / 1."""
+        dataset = SyntheticDataset(0.02)
+        backend = SQLiteBackend(str(tmp_path / "data.db"), scale=0.02)
+        try:
+            rows = backend.execute(
+                "SELECT COUNT(*) AS n, SUM(is_active IN (0, 1)) AS b "
+                "FROM products"
+            )
+            n = dataset.counts["products"]
+            assert rows == [{"n": n, "b": n}]
+        finally:
+            backend.close()
+        reopened = SQLiteBackend(str(tmp_path / "data.db"))
+        try:
+            assert reopened.execute(
+                "SELECT COUNT(*) AS n FROM order_items"
+            ) == [{"n": dataset.counts["order_items"]}]
+        finally:
+            reopened.close()
@@ -0,0 +1,266 @@
+"""
+Unit tests for the synthetic data generator.
+
+Generates every table of the project schema at a small
+scale and checks the rows against the DDL: keys,
+foreign keys, UNIQUE and CHECK constraints, column
+lengths, and consistency across tables. No database.
+"""
+
+import collections
+import csv
+
+import pytest
+
+from text_to_sql.synthetic_data import (
+    SyntheticDataset,
+    load_order,
+    parse_schema,
+)
+
+
+SCALE = 0.05
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    """Project schema at a small scale."""
+    return SyntheticDataset(SCALE)
+
+
+@pytest.fixture(scope="module")
+def data(dataset):
+    """Table -> rows as column -> text dicts."""
+    return {
+        table: [
+            dict(zip(dataset.columns(table), row))
+            for row in dataset.rows(table)
+        ]
+        for table in dataset.order
+    }
+
+
+def _number(value):
+    """Numbers compared as numbers, dates as ISO text."""
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+class TestParseSchema:
+    """
+    DDL parsing and load order.
+    """
+
+    def test_tables_and_columns(self, dataset):
+        """Parse: all tables, generated columns not loaded."""
+        assert len(dataset.tables) == 35
+        assert "total_price" not in dataset.columns("order_items")
+        assert "id" not in dataset.columns("safety_stock_levels")
+        orders = dataset.tables["orders"].columns
+        assert orders["status"].choices[0] == "pending"
+        assert orders["total_amount"].low == 0
+
+    def test_constraints(self, dataset):
+        """Parse: table, ALTER and column constraints."""
+        routes = dataset.tables["shipping_routes"]
+        assert routes.uniques == [
+            ("from_warehouse_id", "to_warehouse_id", "carrier_id")
+        ]
+        assert ("from_warehouse_id", "!=", "to_warehouse_id") in (
+            routes.comparisons
+        )
+        fks = dataset.tables["warehouses"].foreign_keys
+        assert fks["manager_id"] == ("employees", "employee_id")
+        assert dataset.tables["order_items"].unparsed_checks == [
+            "discount <= unit_price * quantity"
+        ]
+
+    def test_load_order(self, dataset):
+        """Order: every parent loads before its children."""
+        position = {t: i for i, t in enumerate(dataset.order)}
+        for table, spec in dataset.tables.items():
+            for parent, _ in spec.foreign_keys.values():
+                assert position[parent] <= position[table]
+
+    def test_cycle(self):
+        """Order: a foreign key cycle is an error."""
+        tables = parse_schema(
+            "CREATE TABLE a (x INTEGER PRIMARY KEY, y INTEGER "
+            "REFERENCES b(y));\n"
+            "CREATE TABLE b (y INTEGER PRIMARY KEY, x INTEGER "
+            "REFERENCES a(x));"
+        )
+        with pytest.raises(ValueError, match="cycle"):
+            load_order(tables)
+
+
+class TestRows:
+    """
+    Generated rows against the schema's constraints.
+    """
+
+    def test_keys_unique(self, dataset, data):
+        """Rows: primary keys and UNIQUE columns are unique."""
+        for table, spec in dataset.tables.items():
+            rows = data[table]
+            assert len(rows) == dataset.counts[table]
+            for column in spec.columns.values():
+                if column.generated:
+                    continue
+                if column.primary_key or column.unique:
+                    values = [r[column.name] for r in rows]
+                    assert len(set(values)) == len(values), table
+            for unique in spec.uniques:
+                tuples = [tuple(r[c] for c in unique) for r in rows]
+                assert len(set(tuples)) == len(tuples), table
+
+    def test_foreign_keys_resolve(self, dataset, data):
+        """Rows: every foreign key names an existing row."""
+        for table, spec in dataset.tables.items():
+            for column, (parent, key) in spec.foreign_keys.items():
+                keys = {r[key] for r in data[parent]}
+                for row in data[table]:
+                    value = row[column]
+                    assert value is None or value in keys, (
+                        f"{table}.{column}={value}"
+                    )
+
+    def test_checks_and_types(self, dataset, data):
+        """Rows: NOT NULL, lengths, IN lists, bounds."""
+        for table, spec in dataset.tables.items():
+            for row in data[table]:
+                for name, value in row.items():
+                    column = spec.columns[name]
+                    if value is None:
+                        assert not column.not_null, f"{table}.{name}"
+                        continue
+                    if column.type == "VARCHAR":
+                        assert len(value) <= column.length
+                    if column.choices:
+                        assert value in column.choices
+                    if column.low is not None:
+                        assert float(value) >= column.low
+                        if column.low_strict:
+                            assert float(value) > column.low
+                    if column.high is not None:
+                        assert float(value) <= column.high
+
+    def test_comparisons(self, dataset, data):
+        """Rows: column-to-column CHECKs hold."""
+        compare = {
+            "<=": lambda a, b: a <= b,
+            "<": lambda a, b: a < b,
+            ">=": lambda a, b: a >= b,
+            ">": lambda a, b: a > b,
+            "!=": lambda a, b: a != b,
+        }
+        for table, spec in dataset.tables.items():
+            for left, op, right in spec.comparisons:
+                for row in data[table]:
+                    a, b = _number(row[left]), _number(row[right])
+                    assert compare[op](a, b), f"{table}: {row}"
+        for row in data["order_items"]:
+            line = float(row["unit_price"]) * int(row["quantity"])
+            assert float(row["discount"]) <= line
+
+    def test_consistent_across_tables(self, data):
+        """Rows: products match variants, customers orders."""
+        variant_product = {
+            r["variant_id"]: r["product_id"]
+            for r in data["product_variants"]
+        }
+        for table in ("order_items", "finished_goods_inventory", "returns"):
+            for row in data[table]:
+                assert variant_product[row["variant_id"]] == (
+                    row["product_id"]
+                )
+        inventory = {
+            r["inventory_id"]: r for r in data["finished_goods_inventory"]
+        }
+        order_customer = {
+            r["order_id"]: r["customer_id"] for r in data["orders"]
+        }
+        for row in data["order_items"]:
+            allocated = inventory[row["allocated_inventory_id"]]
+            assert allocated["variant_id"] == row["variant_id"]
+        for row in data["shipments"]:
+            assert order_customer[row["order_id"]] == (
+                row["to_customer_id"]
+            )
+
+    def test_generated_columns_fit(self, data):
+        """Rows: GENERATED percentages fit their DECIMAL."""
+        for row in data["production_runs"]:
+            quantity = int(row["quantity"])
+            defects = int(row["defects_count"])
+            assert abs((quantity - defects) * 100 / quantity) < 1000
+        for row in data["conversion_funnels"]:
+            visitors = int(row["visitors_count"])
+            if visitors:
+                rate = int(row["conversions_count"]) * 100 / visitors
+                assert rate < 1000
+        for row in data["profitability_analysis"]:
+            revenue = float(row["revenue"])
+            if revenue:
+                margin = (revenue - float(row["cost_of_goods_sold"]))
+                assert abs(margin * 100 / revenue) < 10_000
+
+    def test_hierarchy(self, data):
+        """Rows: one root employee, managers listed first."""
+        position = {
+            r["employee_id"]: i for i, r in enumerate(data["employees"])
+        }
+        roots = [r for r in data["employees"] if r["manager_id"] is None]
+        assert len(roots) == 1
+        for i, row in enumerate(data["employees"]):
+            if row["manager_id"] is not None:
+                assert position[row["manager_id"]] < i
+
+
+class TestScale:
+    """
+    Row counts, capping and determinism.
+    """
+
+    def test_order_items_target(self):
+        """Scale: sized by order_items, dimensions grow slower."""
+        small = SyntheticDataset.for_order_items(10_000)
+        large = SyntheticDataset.for_order_items(10_000_000)
+        assert small.counts["order_items"] == 10_000
+        assert large.counts["order_items"] == 10_000_000
+        assert large.counts["orders"] == 1_000 * small.counts["orders"]
+        assert large.counts["products"] < 40 * small.counts["products"]
+
+    def test_capped_at_unique_tuples(self):
+        """Scale: composite UNIQUE tables are capped."""
+        dataset = SyntheticDataset(
+            SCALE, rows={"conversion_funnels": 1_000_000}
+        )
+        campaigns = dataset.counts["campaigns"]
+        assert dataset.counts["conversion_funnels"] == campaigns * 6
+
+    def test_deterministic(self):
+        """Seed: the same seed gives the same rows."""
+        first = list(SyntheticDataset(SCALE).rows("order_items"))
+        again = list(SyntheticDataset(SCALE).rows("order_items"))
+        other = list(SyntheticDataset(SCALE, seed=1).rows("order_items"))
+        assert first == again
+        assert first != other
+
+    def test_write_csv(self, tmp_path):
+        """CSV: one file per table, header first."""
+        dataset = SyntheticDataset(SCALE)
+        written = dataset.write_csv(tmp_path, ["products", "customers"])
+        assert written == {
+            "products": dataset.counts["products"],
+            "customers": dataset.counts["customers"],
+        }
+        with (tmp_path / "products.csv").open(newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == dataset.columns("products")
+        assert len(rows) == dataset.counts["products"] + 1
+        assert collections.Counter(
+            r[0] for r in rows[1:]
+        ).most_common(1)[0][1] == 1
@@ -0,0 +1,363 @@
+"""
+Unit tests for the parameterized SQL template cache.
+
+Covers literal extraction, template building and
+rendering, uncacheable SQL, hit-rate metrics and
+serving repeats through OrchestratorAgent (static
+validation and security re-check, no generation).
+"""
+
+import os
+
+import pytest
+
+from text_to_sql import db
+from text_to_sql.agents.base import BaseAgent
+from text_to_sql.agents.orchestrator import (
+    OrchestratorAgent,
+)
+from text_to_sql.agents.security_governance import (
+    SecurityGovernanceAgent,
+)
+from text_to_sql.agents.templates import (
+    LITERAL_DATE,
+    LITERAL_NUMBER,
+    LITERAL_STRING,
+    SQLTemplateCache,
+    build_template,
+    extract_literals,
+    render_template,
+)
+
+
+SCHEMA = (
+    "CREATE TABLE customers (\n"
+    "    customer_id VARCHAR(20) PRIMARY KEY,\n"
+    "    customer_segment VARCHAR(20)\n"
+    ");\n\n"
+    "CREATE TABLE orders (\n"
+    "    order_id VARCHAR(30) PRIMARY KEY,\n"
+    "    customer_id VARCHAR(20),\n"
+    "    order_date DATE,\n"
+    "    total_amount DECIMAL(12,2),\n"
+    "    FOREIGN KEY (customer_id) "
+    "REFERENCES customers(customer_id)\n"
+    ");"
+)
+SCHEMA_RESULT = {
+    "selected_tables": ["customers", "orders"],
+    "pruned_schema": SCHEMA,
+    "fk_paths": [],
+}
+QUESTION = (
+    "Total order amount for 'Retail' customers "
+    "between 2026-03-01 and 2026-03-31"
+)
+SQL = (
+    "SELECT SUM(o.total_amount) FROM orders o "
+    "JOIN customers c ON c.customer_id = o.customer_id "
+    "WHERE c.customer_segment = 'Retail' "
+    "AND o.order_date BETWEEN '2026-03-01' "
+    "AND '2026-03-31'"
+)
+
+
+class _Refinement(BaseAgent):
+    """
+    Refinement stand-in: passes the question through
+    with its skeleton and literals.
+    """
+
+    def __init__(self):
+        super().__init__("Refinement", "refine")
+
+    async def _execute_internal(
+        self, request, previous_results, context,
+    ):
+        skeleton, literals = extract_literals(
+            request.natural_language
+        )
+        return {
+            "refined_query": request.natural_language,
+            "follow_up": {"is_follow_up": False},
+            "query_skeleton": skeleton,
+            "literals": literals,
+        }
+
+
+class _Counting(BaseAgent):
+    """
+    Agent stand-in returning a fixed result and
+    counting its runs.
+    """
+
+    def __init__(self, name, result):
+        super().__init__(name, name)
+        self.result = result
+        self.calls = 0
+
+    async def _execute_internal(
+        self, request, previous_results, context,
+    ):
+        self.calls += 1
+        return dict(self.result)
+
+
+def _orchestrator():
+    """
+    Orchestrator with a template cache and stand-ins
+    for schema selection and SQL generation.
+    """
+    orchestrator = OrchestratorAgent(
+        template_cache=SQLTemplateCache()
+    )
+    schema = _Counting("Schema", SCHEMA_RESULT)
+    generation = _Counting("SQLGeneration", {
+        "final_sql": SQL,
+        "explanation": "Sum of retail orders",
+        "confidence_score": 0.9,
+        "attempt_count": 1,
+        "critique_history": [{"action": "accepted"}],
+    })
+    orchestrator.inject_agent("refinement", _Refinement())
+    orchestrator.inject_agent(
+        "security", SecurityGovernanceAgent()
+    )
+    orchestrator.inject_agent("schema", schema)
+    orchestrator.inject_agent("sql_generation", generation)
+    return orchestrator, schema, generation
+
+
+class TestExtractLiterals:
+    """
+    Skeletons and typed literals of questions.
+    """
+
+    def test_dates_strings_numbers(self):
+        """Extract: each literal kind gets a placeholder."""
+        skeleton, literals = extract_literals(
+            "Top 5 products in 'Home & Garden' since "
+            "2026-01-01"
+        )
+        assert skeleton == (
+            "top {number} products in {string} since {date}"
+        )
+        assert [lit["kind"] for lit in literals] == [
+            LITERAL_NUMBER, LITERAL_STRING, LITERAL_DATE,
+        ]
+        assert literals[1]["value"] == "Home & Garden"
+
+    def test_same_skeleton_for_variants(self):
+        """Extract: questions differing in literals match."""
+        a, _ = extract_literals("Orders for product P001")
+        b, _ = extract_literals("orders for product  P042")
+        assert a == b == "orders for product {string}"
+
+
+class TestBuildRender:
+    """
+    Templates from accepted SQL.
+    """
+
+    def test_round_trip_with_new_literals(self):
+        """Render: new literals replace the originals."""
+        _, literals = extract_literals(QUESTION)
+        template = build_template(SQL, literals)
+        assert template is not None
+        assert "'Retail'" not in template.sql
+        _, new = extract_literals(
+            "Total order amount for 'Corporate' customers "
+            "between 2026-04-01 and 2026-04-30"
+        )
+        sql = render_template(template, new)
+        assert "'Corporate'" in sql
+        assert "BETWEEN '2026-04-01' AND '2026-04-30'" in sql
+
+    def test_quotes_escaped(self):
+        """Render: embedded quotes are doubled."""
+        _, literals = extract_literals("Customers in 'North'")
+        template = build_template(
+            "SELECT * FROM customers "
+            "WHERE customer_segment = 'North'",
+            literals,
+        )
+        sql = render_template(
+            template,
+            [{"kind": LITERAL_STRING, "value": "x' OR '1'='1"}],
+        )
+        assert sql.endswith("= 'x'' OR ''1''=''1'")
+
+    def test_like_pattern_kept(self):
+        """Build: LIKE wildcards stay around the value."""
+        _, literals = extract_literals("Segments like 'ret'")
+        template = build_template(
+            "SELECT * FROM customers "
+            "WHERE customer_segment LIKE '%ret%'",
+            literals,
+        )
+        sql = render_template(
+            template, [{"kind": LITERAL_STRING, "value": "corp"}]
+        )
+        assert sql.endswith("LIKE '%corp%'")
+
+    def test_rewritten_literal_uncacheable(self):
+        """Build: a literal absent from the SQL blocks it."""
+        assert build_template(
+            "SELECT * FROM orders "
+            "WHERE order_date >= '2026-03-01'",
+            [{"kind": LITERAL_DATE, "value": "2026-03-15"}],
+        ) is None
+
+    def test_ambiguous_literal_uncacheable(self):
+        """Build: a literal matching twice blocks it."""
+        assert build_template(
+            "SELECT * FROM orders WHERE order_date "
+            "BETWEEN '2026-03-01' AND '2026-03-01'",
+            [{"kind": LITERAL_DATE, "value": "2026-03-01"}],
+        ) is None
+
+    def test_kind_mismatch_rejected(self):
+        """Render: a bad date or number is not bound."""
+        _, literals = extract_literals("Orders since 2026-03-01")
+        template = build_template(
+            "SELECT * FROM orders "
+            "WHERE order_date >= '2026-03-01'",
+            literals,
+        )
+        assert render_template(
+            template,
+            [{"kind": LITERAL_DATE, "value": "2026-13-45"}],
+        ) is None
+        assert render_template(
+            template,
+            [{"kind": LITERAL_NUMBER, "value": "1"}],
+        ) is None
+
+
+class TestTemplateCache:
+    """
+    Cache keyed by skeleton and role.
+    """
+
+    def test_hit_rate_and_roles(self):
+        """Cache: stats count hits, misses, stores."""
+        cache = SQLTemplateCache()
+        skeleton, literals = extract_literals(QUESTION)
+        assert cache.lookup(skeleton, literals, "analyst") is None
+        assert cache.store(
+            skeleton, literals, "analyst",
+            {"final_sql": SQL}, SCHEMA_RESULT,
+        )
+        assert cache.lookup(skeleton, literals, "analyst")
+        assert cache.lookup(skeleton, literals, "admin") is None
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["stored"] == 1
+
+    def test_uncacheable_counted(self):
+        """Cache: SQL without the literals is not stored."""
+        cache = SQLTemplateCache()
+        assert not cache.store(
+            "orders since {date}",
+            [{"kind": LITERAL_DATE, "value": "2026-03-01"}],
+            "analyst",
+            {"final_sql": "SELECT * FROM orders"},
+            SCHEMA_RESULT,
+        )
+        assert cache.stats()["uncacheable"] == 1
+
+    def test_cleared_on_schema_change(self, tmp_path, monkeypatch):
+        """Cache: a DDL change drops every template."""
+        monkeypatch.setattr(db, "_schema_listeners", [])
+        path = tmp_path / "schema.sql"
+        path.write_text(SCHEMA, encoding="utf-8")
+        db.load_schema_ddl(path)
+        cache = SQLTemplateCache()
+        skeleton, literals = extract_literals(QUESTION)
+        cache.store(
+            skeleton, literals, "analyst",
+            {"final_sql": SQL}, SCHEMA_RESULT,
+        )
+        path.write_text(SCHEMA + "\nCREATE TABLE t (a INT);")
+        os.utime(path, ns=(2 * 10**9, 2 * 10**9))
+        db.load_schema_ddl(path)
+        assert cache.lookup(skeleton, literals, "analyst") is None
+
+
+class TestOrchestratorTemplates:
+    """
+    Repeats served from templates by the orchestrator.
+    """
+
+    @pytest.mark.asyncio
+    async def test_repeat_skips_generation(self, make_request):
+        """Orchestrator: a literal variant runs no generation."""
+        orchestrator, schema, generation = _orchestrator()
+        first = await orchestrator.process_query(
+            make_request(QUESTION)
+        )
+        assert first.success
+        second = await orchestrator.process_query(make_request(
+            "Total order amount for 'Corporate' customers "
+            "between 2026-04-01 and 2026-04-30"
+        ))
+        assert second.success
+        assert "'Corporate'" in second.generated_sql
+        assert schema.calls == generation.calls == 1
+        assert second.execution_chain[-1].action == (
+            "template_cache_hit"
+        )
+        assert orchestrator.template_cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_security_recheck_rejects(self, make_request):
+        """Orchestrator: a vetoed render falls back."""
+        orchestrator, _, generation = _orchestrator()
+        await orchestrator.process_query(make_request(QUESTION))
+
+        async def veto(sql, user_context):
+            return "policy changed"
+
+        orchestrator.available_agents["security"].check_sql = veto
+        response = await orchestrator.process_query(
+            make_request(QUESTION)
+        )
+        assert response.success
+        assert generation.calls == 2
+        assert orchestrator.template_cache.stats()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_follow_up_not_served(self, make_request):
+        """Orchestrator: follow-ups bypass the cache."""
+        orchestrator, _, generation = _orchestrator()
+        await orchestrator.process_query(make_request(QUESTION))
+
+        async def follow_up(request, previous_results, context):
+            skeleton, literals = extract_literals(
+                request.natural_language
+            )
+            return {
+                "refined_query": request.natural_language,
+                "follow_up": {"is_follow_up": True},
+                "query_skeleton": skeleton,
+                "literals": literals,
+            }
+
+        orchestrator.available_agents[
+            "refinement"
+        ]._execute_internal = follow_up
+        await orchestrator.process_query(make_request(QUESTION))
+        assert generation.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_unreviewed_not_stored(self, make_request):
+        """Orchestrator: SQL accepted without critique not kept."""
+        orchestrator, _, generation = _orchestrator()
+        generation.result["critique_history"] = [
+            {"action": "accepted_unreviewed"},
+        ]
+        await orchestrator.process_query(make_request(QUESTION))
+        await orchestrator.process_query(make_request(QUESTION))
+        assert generation.calls == 2
+        assert orchestrator.template_cache.stats()["stored"] == 0